@@ -0,0 +1,124 @@
+"""
+Benchmark of dashboard filtering: AssetIndex bitmaps against pandas masks.
+
+A dashboard-shaped frame (normalized, valid rows) is generated with the
+cardinalities of the real data. Every query is answered both with boolean
+masks plus a pandas groupby, as the dashboard did before the index, and
+with the index; results are compared before timing. Run from the
+repository root:
+
+    python -m benchmarks.bench_asset_index
+    python -m benchmarks.bench_asset_index --rows 100000 1000000 --repeat 20
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+from core.services.asset_index import AssetIndex
+from tests.asset_generator import BRANDS, REGIONS
+
+
+def generate_dashboard_frame(rows: int, seed: int = 0) -> pd.DataFrame:
+    """Normalized dashboard rows: one kota_kab per region, ~20 OLTs per region, ~40 FDTs per OLT."""
+    rng = np.random.default_rng(seed)
+    region = rng.integers(0, len(REGIONS), rows)
+    olt_no = region * 100 + rng.integers(0, 20, rows)
+    fdt_no = olt_no * 100 + rng.integers(0, 40, rows)
+    total_hc = rng.integers(0, 16, rows).astype(float)
+    return pd.DataFrame({
+        'fat_id': np.array([f"ICNFAT{n:07d}" for n in range(rows)], dtype=object),
+        'olt': np.array([f"OLT{n:04d}" for n in olt_no], dtype=object),
+        'fdt_id': np.array([f"FDT-{n:06d}" for n in fdt_no], dtype=object),
+        'kota_kab': np.array([r[0].title() for r in REGIONS], dtype=object)[region],
+        'brand_olt': rng.choice([b.title() for b in BRANDS], rows).astype(object),
+        'fat_filter_pemakaian': rng.choice(['IDLE', 'USED', 'FULL', 'UNKNOWN'], rows).astype(object),
+        'latitude_fat': np.array([r[2] for r in REGIONS])[region] + rng.normal(0, 0.08, rows),
+        'longitude_fat': np.array([r[3] for r in REGIONS])[region] + rng.normal(0, 0.08, rows),
+        'total_hc': total_hc,
+    })
+
+
+def _pandas_queries(df: pd.DataFrame, kota: str, olt: str) -> Dict[str, Callable]:
+    def top_fdt():
+        selection = df[df['kota_kab'] == kota]
+        return selection.groupby('fdt_id', as_index=False)['total_hc'].sum().sort_values(
+            by='total_hc', ascending=False).head(15)
+
+    def kpis():
+        selection = df[(df['kota_kab'] == kota) & (df['brand_olt'] == 'Zte')]
+        return {'total_fat': selection['fat_id'].nunique(), 'total_olt': selection['olt'].nunique(),
+                'total_fdt': selection['fdt_id'].nunique(), 'total_hc': selection['total_hc'].sum()}
+
+    def olt_count():
+        return int(((df['olt'] == olt) & (df['fat_filter_pemakaian'] == 'FULL')).sum())
+
+    return {'top 15 FDT by HC in a city': top_fdt, 'KPIs for city + brand': kpis,
+            'count for OLT + status': olt_count}
+
+
+def _index_queries(index: AssetIndex, kota: str, olt: str) -> Dict[str, Callable]:
+    return {
+        'top 15 FDT by HC in a city': lambda: index.group_by('fdt_id', kota_kab=kota).head(15),
+        'KPIs for city + brand': lambda: index.kpis(kota_kab=kota, brand_olt='Zte'),
+        'count for OLT + status': lambda: index.select(olt=olt, fat_filter_pemakaian='FULL').count(),
+    }
+
+
+def _check(name: str, expected, actual):
+    if isinstance(expected, pd.DataFrame):
+        # Ties in total_hc may be ordered differently; compare as sets of (fdt_id, total_hc)
+        assert np.allclose(np.sort(expected['total_hc'].to_numpy()), np.sort(actual['total_hc'].to_numpy())), name
+        assert expected['total_hc'].iloc[0] == actual['total_hc'].iloc[0], name
+    elif isinstance(expected, dict):
+        for key, value in expected.items():
+            assert np.isclose(value, actual[key]), f"{name}: {key} {value} != {actual[key]}"
+    else:
+        assert expected == actual, f"{name}: {expected} != {actual}"
+
+
+def _median_ms(query: Callable, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        query()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000
+
+
+def bench_size(rows: int, seed: int, repeat: int) -> List[str]:
+    df = generate_dashboard_frame(rows, seed)
+    start = time.perf_counter()
+    index = AssetIndex(df)
+    build = time.perf_counter() - start
+    kota, olt = df['kota_kab'].iloc[0], df['olt'].iloc[0]
+
+    pandas_queries, index_queries = _pandas_queries(df, kota, olt), _index_queries(index, kota, olt)
+    lines = [f"{rows:,} rows: index built in {build:.3f}s, {index.nbytes / 2 ** 20:.1f} MiB"]
+    for name, query in pandas_queries.items():
+        _check(name, query(), index_queries[name]())
+        before = _median_ms(query, repeat)
+        after = _median_ms(index_queries[name], repeat)
+        lines.append(f"  {name:<28} pandas {before:>9.3f} ms   index {after:>8.3f} ms   "
+                     f"{before / after if after else float('inf'):>6.1f}x")
+    return lines
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+    for rows in args.rows:
+        print("\n".join(bench_size(rows, args.seed, args.repeat)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+"""
+Benchmark of the dashboard frame conversion: the former optimize_dataframe_memory against the compact schema.
+
+Converts a snapshot-like Arrow table (string columns, float64 coordinates,
+int64 total_hc with nulls) to pandas and reports the conversion time and
+the resulting frame's memory. Run from the repository root:
+
+    python -m benchmarks.bench_compact_schema
+    python -m benchmarks.bench_compact_schema --rows 100000 1000000
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from typing import Callable, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from benchmarks.bench_asset_index import generate_dashboard_frame
+from core.services.asset_schema import compact_arrow_table, format_compact_report
+
+
+def generate_snapshot_table(rows: int, seed: int = 0) -> pa.Table:
+    """Dashboard rows as the snapshot stores them; 5% of total_hc is null (no home_connecteds row)."""
+    df = generate_dashboard_frame(rows, seed)
+    rng = np.random.default_rng(seed)
+    df['total_hc'] = df['total_hc'].astype('Int64').mask(rng.random(rows) < 0.05)
+    return pa.Table.from_pandas(df, preserve_index=False).replace_schema_metadata(None)
+
+
+def legacy_optimize(df: pd.DataFrame) -> pd.DataFrame:
+    """optimize_dataframe_memory as it was in features/home/views/dashboard.py."""
+    if df.empty:
+        return df
+    df_optimized = df.copy()
+    for col in df_optimized.select_dtypes(include=['int64']).columns:
+        if df_optimized[col].min() >= 0:
+            if df_optimized[col].max() < 255:
+                df_optimized[col] = df_optimized[col].astype('uint8')
+            elif df_optimized[col].max() < 65535:
+                df_optimized[col] = df_optimized[col].astype('uint16')
+            else:
+                df_optimized[col] = df_optimized[col].astype('uint32')
+        else:
+            if df_optimized[col].min() > -128 and df_optimized[col].max() < 127:
+                df_optimized[col] = df_optimized[col].astype('int8')
+            elif df_optimized[col].min() > -32768 and df_optimized[col].max() < 32767:
+                df_optimized[col] = df_optimized[col].astype('int16')
+            else:
+                df_optimized[col] = df_optimized[col].astype('int32')
+    for col in df_optimized.select_dtypes(include=['object']).columns:
+        if df_optimized[col].nunique() / len(df_optimized) < 0.5:
+            df_optimized[col] = df_optimized[col].astype('category')
+    return df_optimized
+
+
+def measure(convert: Callable[[], pd.DataFrame], repeat: int) -> Tuple[float, int]:
+    """Median seconds of ``convert`` and the deep memory of its result in bytes."""
+    seconds, df = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        df = convert()
+        seconds.append(time.perf_counter() - start)
+    return statistics.median(seconds), int(df.memory_usage(index=False, deep=True).sum())
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 500_000])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    for rows in args.rows:
+        table = generate_snapshot_table(rows, args.seed)
+        legacy_s, legacy_b = measure(lambda: legacy_optimize(table.to_pandas()), args.repeat)
+        compact_s, compact_b = measure(lambda: compact_arrow_table(table)[0], args.repeat)
+        print(f"{rows:,} rows: optimize_dataframe_memory {legacy_s:.3f}s {legacy_b / 2 ** 20:.1f} MiB | "
+              f"compact schema {compact_s:.3f}s {compact_b / 2 ** 20:.1f} MiB | "
+              f"{legacy_s / compact_s:.1f}x faster")
+        print(format_compact_report(compact_arrow_table(table)[1]))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+"""
+Benchmark result fetch paths: fetchall tuples vs server-side cursor vs Arrow COPY.
+
+Rows are generated with generate_series in an asset-shaped SELECT, so no
+data has to be loaded first. Run from the repository root:
+
+    python -m benchmarks.bench_fetch_backends --dsn "host=localhost dbname=iconnet user=postgres"
+    python -m benchmarks.bench_fetch_backends --rows 10000 100000 1000000 --repeat 3
+"""
+
+import argparse
+import time
+
+import pandas as pd
+
+from core.utils.database import ManagedConnectionPool
+from core.services.AssetDataService import AssetDataService
+
+BENCH_QUERY = """
+    SELECT
+        'ICN-FAT-' || lpad(g::text, 7, '0')                      AS fat_id,
+        'OLT-' || (g %% 97)                                      AS olt,
+        'FDT-' || (g %% 1013)                                    AS fdt_id,
+        CASE WHEN g %% 13 = 0 THEN NULL
+             ELSE -6.2 + (g %% 5000) * 0.0001 END::float         AS latitude_fat,
+        106.8 + (g %% 7000) * 0.0001                             AS longitude_fat,
+        'KOTA ' || (g %% 34)                                     AS kota_kab,
+        CASE WHEN g %% 7 = 0 THEN NULL ELSE (g %% 17) END::integer AS total_hc,
+        DATE '2022-01-01' + (g %% 900)                           AS tanggal_rfs
+    FROM generate_series(1, %s) AS g
+"""
+
+
+def _fetchall(service: AssetDataService, rows: int) -> pd.DataFrame:
+    data, columns, error = service._execute_query(BENCH_QUERY, (rows,))
+    if error:
+        raise RuntimeError(error)
+    return pd.DataFrame(data, columns=columns)
+
+
+def _backend(name: str):
+    def run(service: AssetDataService, rows: int) -> pd.DataFrame:
+        df, error = service._execute_query_frame(BENCH_QUERY, (rows,), backend=name)
+        if error:
+            raise RuntimeError(error)
+        return df
+    return run
+
+
+PATHS = {
+    "fetchall": _fetchall,
+    "cursor": _backend("cursor"),
+    "arrow": _backend("arrow"),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--dsn", default="", help="libpq connection string")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per case (best is reported)")
+    args = parser.parse_args()
+
+    db_pool = ManagedConnectionPool(minconn=1, maxconn=2, dsn=args.dsn)
+    service = AssetDataService(db_pool)
+
+    print(f"{'rows':>10} {'path':>9} {'best s':>8} {'rows/s':>12} {'frame MiB':>10}")
+    try:
+        for rows in args.rows:
+            for name, run in PATHS.items():
+                timings = []
+                for _ in range(args.repeat):
+                    start = time.perf_counter()
+                    df = run(service, rows)
+                    timings.append(time.perf_counter() - start)
+                best = min(timings)
+                frame_mib = df.memory_usage(deep=True).sum() / 2**20
+                print(f"{rows:>10,} {name:>9} {best:>8.3f} {rows / best:>12,.0f} {frame_mib:>10.1f}")
+                del df
+    finally:
+        db_pool.closeall()
+
+
+if __name__ == "__main__":
+    main()
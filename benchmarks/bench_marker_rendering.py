@@ -0,0 +1,68 @@
+"""
+Benchmark of dashboard marker rendering: folium.Marker per row against MarkerLayer.
+
+Builds a map with the dashboard's marker helper in both modes and reports
+the server time (adding markers plus rendering the page HTML) and the HTML
+size. Run from the repository root:
+
+    python -m benchmarks.bench_marker_rendering
+    python -m benchmarks.bench_marker_rendering --rows 1000 5000 20000
+"""
+
+import argparse
+import contextlib
+import io
+import statistics
+import sys
+import time
+from typing import Tuple
+
+import folium
+import numpy as np
+import pandas as pd
+
+from benchmarks.bench_asset_index import generate_dashboard_frame
+from features.home.views.dashboard import _add_markers_to_map_helper
+
+
+def generate_marker_frame(rows: int, seed: int = 0) -> pd.DataFrame:
+    """Dashboard rows with the popup fields; a third of the FATs are full (fat_id_x filled)."""
+    df = generate_dashboard_frame(rows, seed)
+    rng = np.random.default_rng(seed)
+    df['fat_id_x'] = np.where(rng.random(rows) < 0.3, df['fat_id'].str.replace('ICNFAT', 'X-FAT-'), None)
+    df['link_dokumen_feeder'] = 'https://drive.google.com/file/d/feeder' + df['fdt_id'].str[4:]
+    return df
+
+
+def render(df: pd.DataFrame, compact: bool) -> Tuple[float, int]:
+    """Seconds to add the markers and render the map HTML, and the HTML size in bytes."""
+    start = time.perf_counter()
+    m = folium.Map(location=[-7.5, 112.7], zoom_start=8)
+    with contextlib.redirect_stdout(io.StringIO()):
+        _add_markers_to_map_helper(m, df, "benchmark", performance_limit=None, compact=compact)
+    html = m.get_root().render()
+    return time.perf_counter() - start, len(html.encode('utf-8'))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000, 5_000])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    for rows in args.rows:
+        df = generate_marker_frame(rows, args.seed)
+        results = {}
+        for compact in (False, True):
+            runs = [render(df, compact) for _ in range(args.repeat)]
+            results[compact] = (statistics.median(seconds for seconds, _ in runs), runs[0][1])
+        (legacy_s, legacy_b), (compact_s, compact_b) = results[False], results[True]
+        print(f"{rows:,} markers: per-marker {legacy_s:.3f}s {legacy_b / 2 ** 20:.2f} MiB | "
+              f"MarkerLayer {compact_s:.3f}s {compact_b / 2 ** 20:.2f} MiB | "
+              f"{legacy_s / compact_s:.0f}x faster, {legacy_b / compact_b:.0f}x smaller")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
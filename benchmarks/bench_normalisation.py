@@ -0,0 +1,85 @@
+"""
+Benchmark the typed normalisation stages against the previous per-cell code.
+
+``capitalize_columns_except`` must give exactly the old ``apply`` result on
+every column. ``_convert_column_types`` must match the old string round trip
+on text columns; numeric columns are now cast directly, so for them the old
+result is only reported (it turned e.g. a float 3.0 into 30). Run from the
+repository root:
+
+    python -m benchmarks.bench_normalisation
+    python -m benchmarks.bench_normalisation --rows 100000 500000
+"""
+
+import argparse
+import contextlib
+import io
+import time
+
+import pandas as pd
+
+from core.services.etl_proces import AssetPipeline
+from tests.asset_generator import generate_raw_assets
+from tests.legacy_reference import capitalize_apply, edge_case_frame, int64_via_text
+
+
+def _time(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[50_000, 200_000])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    pipeline = AssetPipeline()
+    edge = edge_case_frame(20_000, args.seed)
+    pd.testing.assert_frame_equal(pipeline.capitalize_columns_except(edge.copy()),
+                                  capitalize_apply(edge.copy(), pipeline.exclude_columns))
+    pd.testing.assert_series_equal(pipeline.capitalize_columns_except(edge[["Counts"]].copy())["Counts"],
+                                   capitalize_apply(edge[["Counts"]].copy(), ())["Counts"])
+    pipeline.pop_column_stats()
+    print("Edge-case check passed.")
+
+    for rows in args.rows:
+        raw = generate_raw_assets(rows, seed=args.seed)
+        with contextlib.redirect_stdout(io.StringIO()):
+            expected, before = _time(capitalize_apply, raw.copy(), pipeline.exclude_columns)
+            actual, after = _time(pipeline.capitalize_columns_except, raw.copy())
+        pd.testing.assert_frame_equal(actual, expected)
+        stats = pipeline.pop_column_stats()["capitalize"]
+        print(f"\ncapitalize, {rows:,} rows: apply {before:.3f}s -> typed {after:.3f}s ({before / after:.1f}x)")
+        for col, stat in sorted(stats.items(), key=lambda item: -item[1]["seconds"]):
+            print(f"  {col:<24} {stat['path']:<12} {stat['seconds']:.4f}s")
+
+        # Same columns as the Int64 entries of astype_map, before renaming
+        renamed = pipeline._rename_columns(actual)
+        int64_cols = [col for col, dtype in pipeline.astype_map.items()
+                      if dtype == "Int64" and col in renamed.columns]
+        with contextlib.redirect_stdout(io.StringIO()):
+            old = {}
+            start = time.perf_counter()
+            for col in int64_cols:
+                old[col] = int64_via_text(renamed[col])
+            before = time.perf_counter() - start
+            converted, after = _time(pipeline._convert_column_types, renamed.copy())
+        stats = pipeline.pop_column_stats()["convert_types"]
+        print(f"convert_types (Int64 columns), {rows:,} rows: text {before:.3f}s -> typed "
+              f"{sum(stat['seconds'] for stat in stats.values()):.3f}s")
+        for col in int64_cols:
+            stat = stats[col]
+            if stat["path"] == "text":
+                pd.testing.assert_series_equal(converted[col], old[col])
+                note = "same as before"
+            else:
+                changed = int((converted[col] != old[col]).fillna(True).sum())
+                note = f"{changed:,} values differ from the text round trip" if changed else "same as before"
+            print(f"  {col:<24} {stat['path']:<8} {stat['seconds']:.4f}s  {note}")
+    print("\nTyped stages match the per-cell code on all text columns.")
+
+
+if __name__ == "__main__":
+    main()
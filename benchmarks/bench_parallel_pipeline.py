@@ -0,0 +1,57 @@
+"""
+Scaling benchmark for the multi-process row-local stages of AssetPipeline.
+
+The same seeded raw sheet is processed with 1 worker (in-process) and with
+each requested worker count; every parallel result must equal the serial
+one. The first call per worker count starts the pool and is not timed.
+Run from the repository root:
+
+    python -m benchmarks.bench_parallel_pipeline
+    python -m benchmarks.bench_parallel_pipeline --rows 400000 --workers 1 2 4 8
+"""
+
+import argparse
+import os
+import time
+
+import pandas as pd
+
+from core.services.etl_proces import AssetPipeline
+from tests.asset_generator import generate_raw_assets
+
+
+def _process(workers: int, raw: pd.DataFrame):
+    result = AssetPipeline(workers=workers).run_staged(raw.copy())
+    start = time.perf_counter()
+    processed = result.processed
+    return processed, time.perf_counter() - start, result.timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    raw = generate_raw_assets(args.rows, seed=args.seed)
+    print(f"{args.rows:,} rows, {os.cpu_count()} CPUs")
+
+    expected, serial, serial_timings = _process(1, raw)
+    print(f"{'workers':>8} {'seconds':>8} {'rows/s':>10} {'speedup':>8}  slowest stages")
+    for workers in sorted(set(args.workers)):
+        if workers > 1:
+            _process(workers, raw.head(20_000 * workers))  # warm up the pool
+            actual, seconds, timings = _process(workers, raw)
+            pd.testing.assert_frame_equal(actual, expected)
+        else:
+            seconds, timings = serial, serial_timings
+        slowest = ", ".join(f"{name} {s:.2f}s" for name, s in
+                            sorted(timings.items(), key=lambda item: -item[1])[:3])
+        print(f"{workers:>8} {seconds:>8.2f} {args.rows / seconds:>10,.0f} "
+              f"{serial / seconds:>7.2f}x  {slowest}")
+    print("All worker counts produce the serial result.")
+
+
+if __name__ == "__main__":
+    main()
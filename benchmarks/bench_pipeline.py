@@ -0,0 +1,216 @@
+"""
+Benchmark suite for the asset ETL pipeline, with JSON results per commit.
+
+Seeded synthetic sheets (tests.asset_generator) are run through
+AssetPipeline up to the table split. Each size is timed ``--repeat`` times;
+the report has the median and best end-to-end time, the median time of every
+stage, throughput and peak memory (tracemalloc, from one extra untimed run).
+Results are written as JSON named after the current commit, and ``--compare``
+lists stages that got slower than an earlier result file. Run from the
+repository root:
+
+    python -m benchmarks.bench_pipeline
+    python -m benchmarks.bench_pipeline --rows 10000 100000 500000 --repeat 5
+    python -m benchmarks.bench_pipeline --compare benchmarks/results/pipeline_<commit>.json
+
+The exit status is 1 if ``--compare`` found a regression.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows has no resource module; the RSS figure is skipped
+    resource = None
+
+import numpy as np
+import pandas as pd
+
+from core.services.etl_proces import AssetPipeline
+from tests.asset_generator import generate_raw_assets
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+# Slowdowns below this share of the previous time are treated as noise
+DEFAULT_THRESHOLD = 0.10
+
+# Stages faster than this are not compared (timer noise dominates)
+MIN_COMPARED_SECONDS = 0.05
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)), check=True)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _metadata(args: argparse.Namespace) -> Dict[str, Any]:
+    return {
+        "commit": _git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "seed": args.seed,
+        "repeat": args.repeat,
+        "workers": args.workers,
+    }
+
+
+def _run_once(raw: pd.DataFrame, workers: int):
+    # Pipeline progress is printed; keep it out of the report
+    result = AssetPipeline(workers=workers).run_staged(raw.copy())
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        splits = result.splits
+        seconds = time.perf_counter() - start
+    return splits, seconds, dict(result.timings)
+
+
+def _peak_memory_mib(raw: pd.DataFrame, workers: int) -> float:
+    tracemalloc.start()
+    try:
+        _run_once(raw, workers)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 2 ** 20
+
+
+def bench_size(rows: int, seed: int, repeat: int, workers: int) -> Dict[str, Any]:
+    """
+    Times the pipeline on one generated sheet.
+
+    Args:
+        rows: Rows of the generated sheet.
+        seed: Generator seed.
+        repeat: Timed runs; medians are reported.
+        workers: AssetPipeline worker processes.
+
+    Returns:
+        Result entry as stored in the JSON file.
+    """
+    raw = generate_raw_assets(rows, seed=seed)
+    if workers > 1:
+        _run_once(raw.head(1_000), workers)  # start the worker pool outside the timed runs
+
+    totals, stage_runs = [], []
+    for _ in range(repeat):
+        splits, seconds, timings = _run_once(raw, workers)
+        totals.append(seconds)
+        stage_runs.append(timings)
+
+    stages = {name: statistics.median(run.get(name, 0.0) for run in stage_runs) for name in stage_runs[0]}
+    median = statistics.median(totals)
+    return {
+        "rows": rows,
+        "workers": workers,
+        "end_to_end": {"median": median, "min": min(totals), "runs": totals},
+        "stages": stages,
+        "rows_per_second": rows / median if median else None,
+        "peak_memory_mib": _peak_memory_mib(raw, workers),
+        "output_rows": {table: len(frame) for table, frame in splits.items()},
+    }
+
+
+def compare(previous: Dict[str, Any], current: Dict[str, Any], threshold: float) -> List[str]:
+    """
+    Lists end-to-end and stage times that grew by more than ``threshold``.
+
+    Entries are matched on (rows, workers); sizes only in one file are skipped.
+    """
+    before = {(entry["rows"], entry["workers"]): entry for entry in previous.get("results", [])}
+    regressions = []
+    for entry in current["results"]:
+        old = before.get((entry["rows"], entry["workers"]))
+        if old is None:
+            continue
+        pairs = [("end_to_end", old["end_to_end"]["median"], entry["end_to_end"]["median"])]
+        pairs += [(name, old["stages"][name], seconds) for name, seconds in entry["stages"].items()
+                  if name in old["stages"]]
+        for name, was, now in pairs:
+            if was >= MIN_COMPARED_SECONDS and now > was * (1 + threshold):
+                regressions.append(f"{entry['rows']:,} rows, {entry['workers']} worker(s): "
+                                   f"{name} {was:.3f}s -> {now:.3f}s (+{(now / was - 1) * 100:.0f}%)")
+        if old.get("output_rows") and old["output_rows"] != entry["output_rows"]:
+            regressions.append(f"{entry['rows']:,} rows: output rows changed "
+                               f"{old['output_rows']} -> {entry['output_rows']}")
+    return regressions
+
+
+def _print_entry(entry: Dict[str, Any]):
+    e2e = entry["end_to_end"]
+    print(f"\n{entry['rows']:,} rows, {entry['workers']} worker(s): median {e2e['median']:.3f}s, "
+          f"best {e2e['min']:.3f}s, {entry['rows_per_second']:,.0f} rows/s, "
+          f"peak {entry['peak_memory_mib']:.0f} MiB")
+    total = sum(entry["stages"].values()) or 1.0
+    for name, seconds in sorted(entry["stages"].items(), key=lambda item: -item[1]):
+        print(f"  {name:<22} {seconds:>8.3f}s {seconds / total * 100:>5.1f}%")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--output", help="JSON result file (default: benchmarks/results/pipeline_<commit>.json)")
+    parser.add_argument("--compare", help="Earlier JSON result file to check for regressions")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Relative slowdown reported as a regression (default: 0.10)")
+    args = parser.parse_args()
+    if args.repeat < 1 or args.workers < 1:
+        parser.error("--repeat and --workers must be at least 1")
+
+    report = {"meta": _metadata(args), "results": []}
+    print(f"Pipeline benchmark, commit {report['meta']['commit'] or 'unknown'}, "
+          f"{report['meta']['cpu_count']} CPUs, {args.repeat} run(s) per size")
+    for rows in args.rows:
+        entry = bench_size(rows, args.seed, args.repeat, args.workers)
+        report["results"].append(entry)
+        _print_entry(entry)
+    if resource is not None:
+        # Whole-process high-water mark, includes the generated sheets
+        # (ru_maxrss is in kilobytes on Linux but in bytes on macOS)
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        report["meta"]["max_rss_mib"] = max_rss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"pipeline_{report['meta']['commit'] or 'local'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as handle:
+        json.dump(report, handle, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as handle:
+            previous = json.load(handle)
+        regressions = compare(previous, report, args.threshold)
+        label = previous.get("meta", {}).get("commit") or args.compare
+        if regressions:
+            print(f"\nSlower than {label} by more than {args.threshold:.0%}:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"\nNo regressions against {label}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
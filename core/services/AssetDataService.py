@@ -2,17 +2,118 @@
 
 import pandas as pd
 import streamlit as st
-from psycopg2 import pool, Error as Psycopg2Error, OperationalError, InterfaceError
-from typing import List, Dict, Any, Optional, Tuple
+from psycopg2 import Error as Psycopg2Error, OperationalError, InterfaceError
+from typing import List, Dict, Any, Optional, Tuple, Iterable, Iterator, Callable
 import numpy as np
 import logging
-from core.services.etl_proces import AssetPipeline
+import hashlib
+from datetime import date
+import os
+import time
+from core.services.etl_proces import AssetPipeline, PipelineResult, clean_fat_ids
+from core.services.etl_streaming import STREAM_CHUNK_ROWS, ChunkedAssetPipeline, read_uploaded_table, stream_file_splits
+from core.services.etl_fingerprints import RowFingerprints, fetch_row_hashes, store_row_hashes
+from core.services.kpi_views import (ALL_KOTA, DIMENSION_VIEWS, GLOBAL_VIEW, KOTA_VIEW, KPI_DIMENSIONS,
+                                     KPI_TABLES, ensure_kpi_views, refresh_kpi_views)
 import asyncio
-from ..utils.database import get_robust_connection, execute_with_retry, is_connection_alive, cache_query_result, CACHE_CONFIG
+from core.services.asset_schema import compact_arrow_table, compact_asset_frame, format_compact_report
+from core.services.rfs_series import (RFS_GRANULARITIES, RFS_SERIES_COLUMNS, RFS_SOURCE_TABLES, apply_rfs_changes,
+                                      ensure_rfs_series, rfs_series_query)
+from core.services.map_viewport import (INDONESIA_BBOX, MAP_VIEWPORT_CONFIG, BoundingBox, MapCursor,
+                                        ensure_fat_location_index, viewport_query)
+from ..utils.bulk_copy import bulk_insert_dataframe, bulk_merge_dataframe, select_missing_keys
+from ..utils.arrow_fetch import fetch_arrow_table, arrow_table_to_frame
+from ..utils.asset_snapshot import SNAPSHOT_CONFIG, AssetSnapshotStore, get_snapshot_store
+from ..utils.database import ManagedConnectionPool, get_robust_connection, execute_with_retry, is_connection_alive, cache_query_result, bump_table_versions, get_table_versions, stream_query, CACHE_CONFIG
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Asset tables joined by fat_id. Child tables reference user_terminals with
+# ON DELETE CASCADE, so a delete on user_terminals changes all of them.
+ASSET_TABLES = ("user_terminals", "clusters", "home_connecteds",
+                "dokumentasis", "additional_informations")
+
+# Tables describing the asset schema (dynamic columns live in dynamic_columns)
+SCHEMA_TABLES = ("dynamic_columns",)
+
+# Rows fetched per round trip when streaming large result sets
+STREAM_ITERSIZE = 10000
+
+# Result fetch backends for bulk loads:
+#   "cursor" - server-side cursor, NumPy/object dtypes (default)
+#   "arrow"  - COPY ... TO STDOUT parsed by pyarrow, Arrow-backed dtypes
+FETCH_BACKENDS = ("cursor", "arrow")
+
+# Upload modes: "insert" adds new FAT IDs only, "merge" also updates changed ones
+UPLOAD_MODES = ("insert", "merge")
+
+# Worker processes for the row-local ETL stages (see AssetPipeline.ROW_LOCAL_STAGES)
+ETL_WORKERS = int(os.environ.get("ETL_WORKERS", "1"))
+
+
+def _concat_column_chunks(parts: List[pd.Series]) -> pd.Series:
+    """
+    Concatenate per-batch column Series into one column.
+
+    Batches that are entirely NULL are inferred as object dtype; they are cast
+    to the dtype of the other batches first so the result matches what
+    ``pd.DataFrame(all_rows)`` would infer (integers with NULLs become float64).
+    """
+    if not parts:
+        return pd.Series([], dtype=object)
+    if len(parts) == 1:
+        return parts[0]
+
+    typed = [p.dtype for p in parts if not (p.dtype == object and p.isna().all())]
+    if typed and typed[0] != object:
+        target = typed[0]
+        if target.kind in 'iu':
+            target = np.dtype('float64')
+        if target.kind in 'fM':
+            parts = [p.astype(target) if p.dtype == object else p for p in parts]
+    return pd.concat(parts, ignore_index=True)
+
+
+def frame_from_batches(batches: Iterable[Tuple[List[tuple], List[str]]]) -> pd.DataFrame:
+    """
+    Build a DataFrame incrementally from (rows, column_names) batches.
+
+    Each batch is converted to typed columns and its row tuples are released
+    before the next batch is fetched, so the full result is never
+    held as Python tuples and as a DataFrame at the same time.
+
+    Args:
+        batches: Iterable of (rows, column_names), e.g. from ``stream_query``.
+
+    Returns:
+        DataFrame with the same columns and dtypes as ``pd.DataFrame(rows, columns=...)``.
+    """
+    columns = None
+    column_parts: List[List[pd.Series]] = []
+    for rows, batch_columns in batches:
+        if columns is None:
+            columns = batch_columns
+            column_parts = [[] for _ in columns]
+        if not rows:
+            continue
+        chunk = pd.DataFrame.from_records(rows, columns=range(len(columns)))
+        del rows
+        for i in range(len(columns)):
+            column_parts[i].append(chunk[i])
+        del chunk
+
+    if columns is None:
+        return pd.DataFrame()
+
+    data = {}
+    for i in range(len(columns)):
+        data[i] = _concat_column_chunks(column_parts[i])
+        column_parts[i] = None
+    df = pd.DataFrame(data, copy=False)
+    df.columns = columns
+    return df
+
 
 class AssetDataService:
     """
@@ -25,17 +126,41 @@ class AssetDataService:
     Enhanced with intelligent caching for better performance.
     """
 
-    def __init__(self, db_pool: pool.SimpleConnectionPool):
+    # Essential dashboard columns (see load_all_assets)
+    _ASSET_QUERY = """
+        SELECT
+            ut.fat_id,          -- Kunci join dan digunakan di KPI/Map
+            ut.olt,             -- Digunakan di KPI/Map
+            ut.fdt_id,          -- Digunakan di KPI
+            ut.brand_olt,       -- Digunakan di Visualisasi
+            ut.fat_filter_pemakaian, -- Digunakan di Visualisasi
+            ut.latitude_fat,    -- Untuk Peta
+            ut.longitude_fat,   -- Untuk Peta
+            ut.fat_id_x,        -- Untuk ikon Peta
+            cl.kota_kab,        -- Digunakan di Filter, KPI, Visualisasi, Map
+            hc.total_hc,        -- Digunakan di KPI, Visualisasi, Map, Bump Chart
+            dk.link_dokumen_feeder, -- Untuk popup Peta
+            ai.tanggal_rfs      -- <<< BARU: Untuk Bump Chart
+        FROM user_terminals ut
+        LEFT JOIN clusters cl ON ut.fat_id = cl.fat_id
+        LEFT JOIN home_connecteds hc ON ut.fat_id = hc.fat_id
+        LEFT JOIN dokumentasis dk ON ut.fat_id = dk.fat_id
+        LEFT JOIN additional_informations ai ON ut.fat_id = ai.fat_id -- <<< BARU: Join untuk tanggal RFS
+    """
+
+    def __init__(self, db_pool: ManagedConnectionPool, etl_workers: Optional[int] = None):
         """
         Initializes the AssetDataService.
 
         Args:
-            db_pool: The psycopg2 connection pool.
+            db_pool: The thread-safe database connection pool.
+            etl_workers: Worker processes for uploaded-file ETL (default ETL_WORKERS).
         """
         if db_pool is None:
             raise ValueError(
                 "Database connection pool (db_pool) cannot be None.")
         self.db_pool = db_pool
+        self.etl_workers = etl_workers or ETL_WORKERS
 
         # Initialize column manager for dynamic columns
         self._column_manager = None
@@ -54,6 +179,22 @@ class AssetDataService:
         self._comprehensive_query_cache_time = None
         self._comprehensive_query_cache_ttl = 600  # 10 minutes cache
 
+        # Version of the schema tables the caches above were built against
+        self._schema_versions = get_table_versions(SCHEMA_TABLES)
+
+        # Pipeline run of the last uploaded file as (file key, PipelineResult),
+        # and the result whose processed frame was last returned for preview
+        self._upload_pipeline = None
+        self._pending_upload = None
+        # Raw-row fingerprints of the last uploaded file's processed rows, and
+        # how many of its rows were skipped as unchanged since the last upload
+        self._upload_fingerprints = None
+        self._upload_skipped = 0
+
+        # Whether the FAT location index used by viewport queries was checked
+        self._fat_location_index_ready = False
+        self._rfs_series_ready = False
+
     @property
     def column_manager(self):
         """Lazy initialization of column manager."""
@@ -75,6 +216,7 @@ class AssetDataService:
         """
         import time
 
+        self._sync_schema_caches()
         current_time = time.time()
 
         # Check if cache is valid
@@ -136,9 +278,16 @@ class AssetDataService:
         self.invalidate_table_columns_cache()
         logger.info("All caches invalidated")
 
+    def _sync_schema_caches(self):
+        """Drop the schema caches if dynamic columns changed in this or another process."""
+        versions = get_table_versions(SCHEMA_TABLES)
+        if versions != self._schema_versions:
+            self._schema_versions = versions
+            self.invalidate_all_cache()
+
     def _execute_query(self, query: str, params: Optional[tuple] = None, fetch: str = "all") -> Tuple[Optional[List[Tuple]], Optional[List[str]], Optional[str]]:
         """
-        Executes a SQL query using the connection pool with robust error handling.
+        Executes a SQL query on a leased pool connection with robust error handling.
 
         Args:
             query: The SQL query string.
@@ -178,146 +327,394 @@ class AssetDataService:
         except Exception as e:
             return None, None, f"Execution Error: {e}"
 
-    @cache_query_result(ttl_seconds=CACHE_CONFIG['asset_data_ttl'])
-    def load_all_assets(self, limit: Optional[int] = None) -> Optional[pd.DataFrame]:
+    def _stream_query(self, query: str, params: Optional[tuple] = None,
+                      itersize: int = STREAM_ITERSIZE) -> Iterator[pd.DataFrame]:
+        """
+        Yields query results as DataFrame chunks from a server-side cursor.
+
+        The pool connection stays leased until the generator is exhausted or closed.
+
+        Args:
+            query: The SQL query string.
+            params: Optional tuple of parameters for the query.
+            itersize: Number of rows per chunk.
+
+        Yields:
+            DataFrames of at most ``itersize`` rows.
+        """
+        for rows, columns in stream_query(self.db_pool, query, params, itersize):
+            yield pd.DataFrame.from_records(rows, columns=columns)
+
+    def _execute_query_frame(self, query: str, params: Optional[tuple] = None,
+                             itersize: int = STREAM_ITERSIZE,
+                             backend: str = "cursor") -> Tuple[Optional[pd.DataFrame], Optional[str]]:
+        """
+        Executes a SELECT and returns the result as a DataFrame.
+
+        With the "cursor" backend rows are read through a server-side cursor
+        and the DataFrame is built in chunks. With the "arrow" backend the
+        result is copied out as CSV and parsed by pyarrow into Arrow-backed
+        columns, without creating Python objects per cell.
+
+        Args:
+            query: The SQL query string.
+            params: Optional tuple of parameters for the query.
+            itersize: Number of rows fetched per round trip ("cursor" only).
+            backend: One of FETCH_BACKENDS.
+
+        Returns:
+            A tuple containing (dataframe, error_message).
+            dataframe is None if an error occurred.
+        """
+        if backend not in FETCH_BACKENDS:
+            return None, f"Unknown fetch backend: {backend}"
+        try:
+            if backend == "arrow":
+                table = execute_with_retry(
+                    self.db_pool, lambda conn: fetch_arrow_table(conn, query, params))
+                return arrow_table_to_frame(table), None
+            return frame_from_batches(stream_query(self.db_pool, query, params, itersize)), None
+        except (OperationalError, InterfaceError) as e:
+            return None, f"Database Connection Error: {e}"
+        except Psycopg2Error as db_err:
+            return None, f"Database Error: {db_err}"
+        except Exception as e:
+            return None, f"Execution Error: {e}"
+
+    @cache_query_result(ttl_seconds=CACHE_CONFIG['versioned_data_ttl'], tables=ASSET_TABLES)
+    def load_all_assets(self, limit: Optional[int] = None, backend: str = "cursor") -> Optional[pd.DataFrame]:
         """
         Loads essential asset data for the dashboard by joining relevant tables.
-        Results are cached for improved performance.
+        Results are cached until one of the joined tables is written to.
 
         Args:
             limit: Maximum number of rows to load. If None, loads all.
+            backend: Fetch backend, "cursor" or "arrow" (Arrow-backed dtypes).
 
         Returns:
             A pandas DataFrame containing the essential asset data, or None if an error occurs.
         """
         logger.info(f"Loading asset data from database (limit: {limit})")
 
-        # --- MODIFIKASI QUERY ---
-        query = """
-            SELECT
-                ut.fat_id,          -- Kunci join dan digunakan di KPI/Map
-                ut.olt,             -- Digunakan di KPI/Map
-                ut.fdt_id,          -- Digunakan di KPI
-                ut.brand_olt,       -- Digunakan di Visualisasi
-                ut.fat_filter_pemakaian, -- Digunakan di Visualisasi
-                ut.latitude_fat,    -- Untuk Peta
-                ut.longitude_fat,   -- Untuk Peta
-                ut.fat_id_x,        -- Untuk ikon Peta
-                cl.kota_kab,        -- Digunakan di Filter, KPI, Visualisasi, Map
-                hc.total_hc,        -- Digunakan di KPI, Visualisasi, Map, Bump Chart
-                dk.link_dokumen_feeder, -- Untuk popup Peta
-                ai.tanggal_rfs      -- <<< BARU: Untuk Bump Chart
-            FROM user_terminals ut
-            LEFT JOIN clusters cl ON ut.fat_id = cl.fat_id
-            LEFT JOIN home_connecteds hc ON ut.fat_id = hc.fat_id
-            LEFT JOIN dokumentasis dk ON ut.fat_id = dk.fat_id
-            LEFT JOIN additional_informations ai ON ut.fat_id = ai.fat_id -- <<< BARU: Join untuk tanggal RFS
-        """
+        query = self._ASSET_QUERY
         query_params = []
         if limit is not None:
             query += " LIMIT %s"
             query_params.append(limit)
-        query += ";"
 
-        data, columns, error = self._execute_query(
-            query, tuple(query_params) if query_params else None, fetch="all")
+        df, error = self._execute_query_frame(
+            query, tuple(query_params) if query_params else None, backend=backend)
 
         if error:
             st.error(f"Failed to load asset data: {error}")
             return None
-        if data is None:
-            st.warning("No asset data returned from query.")
-            return pd.DataFrame(columns=columns or [])
 
-        df = pd.DataFrame(data, columns=columns)
         logger.info(f"Loaded {len(df)} asset records")
         return df
 
-    @cache_query_result(ttl_seconds=CACHE_CONFIG['aggregation_ttl'])
-    def get_asset_aggregations(self, group_by_column: str) -> Optional[pd.DataFrame]:
+    def asset_snapshot_store(self) -> Optional[AssetSnapshotStore]:
+        """The process-wide snapshot store of the dashboard asset data, or None if disabled."""
+        if not SNAPSHOT_CONFIG['enabled']:
+            return None
+        return get_snapshot_store(self.db_pool, "dashboard_assets", self._ASSET_QUERY, ASSET_TABLES)
+
+    def load_asset_snapshot(self, compact: bool = False) -> Optional[pd.DataFrame]:
+        """
+        Loads the dashboard asset data from the on-disk Arrow snapshot.
+
+        Same columns and dtypes as ``load_all_assets(limit=None)``. The
+        snapshot is rebuilt first if an asset table changed since it was
+        written; if snapshots are disabled or unavailable, the join is
+        queried directly.
+
+        Args:
+            compact: Apply the compact schema (core.services.asset_schema) while
+                     converting: categorical city/OLT/FDT/brand/usage columns, float32
+                     coordinates and the smallest nullable integer for total_hc.
+                     Bytes saved per column are logged and kept in
+                     ``df.attrs['compact_report']``.
+
+        Returns:
+            A pandas DataFrame containing the essential asset data, or None if an error occurs.
+        """
+        df, report = None, None
+        store = self.asset_snapshot_store()
+        if store is not None:
+            try:
+                start = time.perf_counter()
+                table = store.load_table()
+                if table is not None:
+                    if compact:
+                        df, report = compact_arrow_table(table)
+                    else:
+                        df = arrow_table_to_frame(table, arrow_dtypes=False)
+                    logger.info(f"Loaded {len(df)} asset records from snapshot "
+                                f"in {time.perf_counter() - start:.3f}s")
+            except Exception as e:
+                logger.warning(f"Asset snapshot unavailable, querying the database: {e}")
+        if df is None:
+            df = self.load_all_assets(limit=None)
+            if df is None or not compact:
+                return df
+            # The cached frame is shared: convert into a new frame, leaving it unchanged
+            df, report = compact_asset_frame(df)
+        if report:
+            logger.info(f"Compact asset schema, bytes per column:\n{format_compact_report(report)}")
+            df.attrs['compact_report'] = report
+        return df
+
+    def iter_all_assets(self, itersize: int = STREAM_ITERSIZE) -> Iterator[pd.DataFrame]:
+        """
+        Streams the dashboard asset data in chunks, for callers that can render
+        or export incrementally instead of waiting for the full result.
+
+        Args:
+            itersize: Number of rows per chunk.
+
+        Yields:
+            DataFrames with the same columns as ``load_all_assets``.
+        """
+        yield from self._stream_query(self._ASSET_QUERY, itersize=itersize)
+
+    def refresh_kpi_views(self, force: bool = False) -> Tuple[bool, Optional[str]]:
+        """
+        Refreshes the dashboard KPI materialized views if the asset tables changed.
+
+        The views (see core.services.kpi_views) are created on first use and
+        refreshed with REFRESH ... CONCURRENTLY, so dashboards reading them
+        are not blocked.
+
+        Args:
+            force: Refresh even if no asset table changed since the last refresh.
+
+        Returns:
+            A tuple containing (refreshed, error_message).
+        """
+        def _refresh(conn):
+            ensure_kpi_views(conn)
+            return refresh_kpi_views(conn, force=force)
+
+        start = time.perf_counter()
+        try:
+            refreshed = execute_with_retry(self.db_pool, _refresh)
+        except (OperationalError, InterfaceError) as e:
+            return False, f"Database Connection Error: {e}"
+        except Psycopg2Error as db_err:
+            return False, f"Database Error: {db_err}"
+        except Exception as e:
+            return False, f"Execution Error: {e}"
+        if refreshed:
+            logger.info(f"KPI views refreshed in {time.perf_counter() - start:.2f}s")
+        return refreshed, None
+
+    def _refresh_aggregates_after_load(self):
+        """Refreshes the KPI views and the RFS series after an ETL load so the next dashboard read finds them fresh."""
+        refreshed, error = self.refresh_kpi_views()
+        if error:
+            logger.warning(f"KPI view refresh after load failed: {error}")
+        elif refreshed:
+            logger.info("KPI views refreshed after load.")
+        applied, error = self.apply_rfs_changes()
+        if error:
+            logger.warning(f"RFS series update after load failed: {error}")
+        elif applied:
+            logger.info(f"RFS series updated for {applied} FATs after load.")
+
+    def _read_kpi_views(self, queries: Dict[str, Tuple[str, Optional[tuple]]]
+                        ) -> Tuple[Optional[Dict[str, pd.DataFrame]], Optional[str]]:
+        """
+        Runs SELECTs against the KPI views on one connection, refreshing stale views first.
+
+        Args:
+            queries: Mapping of result name to (query, params).
+
+        Returns:
+            A tuple containing (frames by name, error_message).
+        """
+        _, error = self.refresh_kpi_views()
+        if error:
+            return None, error
+
+        def _select(conn):
+            frames = {}
+            with conn.cursor() as cur:
+                for name, (query, params) in queries.items():
+                    cur.execute(query, params)
+                    frames[name] = pd.DataFrame(cur.fetchall(), columns=[desc[0] for desc in cur.description])
+            conn.rollback()
+            return frames
+
+        try:
+            return execute_with_retry(self.db_pool, _select), None
+        except (OperationalError, InterfaceError) as e:
+            return None, f"Database Connection Error: {e}"
+        except Psycopg2Error as db_err:
+            return None, f"Database Error: {db_err}"
+        except Exception as e:
+            return None, f"Execution Error: {e}"
+
+    @cache_query_result(ttl_seconds=CACHE_CONFIG['versioned_data_ttl'], tables=KPI_TABLES)
+    def load_dashboard_kpis(self) -> Optional[Dict[str, pd.DataFrame]]:
+        """
+        Loads every dashboard KPI view: O(groups) rows instead of the asset join.
+
+        Results are cached until one of the aggregated tables is written to.
+
+        Returns:
+            Mapping of 'global', 'kota_kab' and each of KPI_DIMENSIONS to the
+            view's rows (dimension views hold one row per city and value, plus
+            kota_kab == ALL_KOTA rows over every city), or None on error.
+        """
+        queries = {'global': (f"SELECT * FROM {GLOBAL_VIEW}", None),
+                   'kota_kab': (f"SELECT * FROM {KOTA_VIEW} ORDER BY total_hc DESC", None)}
+        for dimension, view in DIMENSION_VIEWS.items():
+            queries[dimension] = (f"SELECT * FROM {view} ORDER BY total_assets DESC", None)
+        frames, error = self._read_kpi_views(queries)
+        if error:
+            logger.warning(f"Failed to load KPI views: {error}")
+            return None
+        return frames
+
+    @cache_query_result(ttl_seconds=CACHE_CONFIG['versioned_data_ttl'], tables=KPI_TABLES)
+    def get_asset_aggregations(self, group_by_column: str, kota_kab: str = ALL_KOTA) -> Optional[pd.DataFrame]:
         """
         Get aggregated asset data for improved dashboard performance.
-        Results are cached for fast repeated access.
+
+        Read from the KPI materialized views, so values are cleaned as on the
+        dashboard (e.g. kota_kab title-cased, invalid cities left out).
+        Results are cached until one of the aggregated tables is written to.
 
         Args:
             group_by_column: Column to group by (e.g., 'kota_kab', 'brand_olt')
+            kota_kab: Restrict a brand_olt/fat_filter_pemakaian/olt breakdown to one city.
 
         Returns:
             DataFrame with aggregated data
         """
-        allowed_columns = ['kota_kab', 'brand_olt',
-                           'fat_filter_pemakaian', 'olt']
+        allowed_columns = ('kota_kab',) + KPI_DIMENSIONS
         if group_by_column not in allowed_columns:
             st.error(f"Invalid group by column: {group_by_column}")
             return None
 
-        query = f"""
-            SELECT 
-                cl.{group_by_column},
-                COUNT(DISTINCT ut.fat_id) as total_assets,
-                COUNT(DISTINCT ut.olt) as total_olt,
-                COUNT(DISTINCT ut.fdt_id) as total_fdt,
-                COALESCE(SUM(hc.total_hc), 0) as total_hc,
-                COALESCE(AVG(hc.total_hc), 0) as avg_hc
-            FROM user_terminals ut
-            LEFT JOIN clusters cl ON ut.fat_id = cl.fat_id
-            LEFT JOIN home_connecteds hc ON ut.fat_id = hc.fat_id
-            WHERE cl.{group_by_column} IS NOT NULL
-            GROUP BY cl.{group_by_column}
-            ORDER BY total_hc DESC
-        """
-
-        data, columns, error = self._execute_query(query, fetch="all")
+        columns = f"{group_by_column}, total_assets, total_olt, total_fdt, total_hc, avg_hc"
+        if group_by_column == 'kota_kab':
+            query, params = f"SELECT {columns} FROM {KOTA_VIEW} ORDER BY total_hc DESC", None
+        else:
+            query = f"""
+                SELECT {columns} FROM {DIMENSION_VIEWS[group_by_column]}
+                WHERE kota_kab = %s AND {group_by_column} IS NOT NULL
+                ORDER BY total_hc DESC
+            """
+            params = (kota_kab,)
 
+        frames, error = self._read_kpi_views({'result': (query, params)})
         if error:
             st.error(f"Failed to load aggregations: {error}")
             return None
+        return frames['result']
 
-        if data is None:
-            return pd.DataFrame(columns=columns or [])
+    def apply_rfs_changes(self) -> Tuple[int, Optional[str]]:
+        """
+        Folds queued asset changes into the RFS series tables.
 
-        return pd.DataFrame(data, columns=columns)    @ cache_query_result(ttl_seconds=CACHE_CONFIG['map_data_ttl'])
+        The tables and their queue triggers (see core.services.rfs_series) are
+        created on first use, which also queues every FAT for the initial build.
 
-    def get_map_data(self, kota_filter: Optional[str] = None, limit: Optional[int] = 1000) -> Optional[pd.DataFrame]:
+        Returns:
+            A tuple containing (number of FATs applied, error_message).
         """
-        Get optimized data specifically for map rendering with caching.
+        def _apply(conn):
+            if not self._rfs_series_ready:
+                ensure_rfs_series(conn)
+                self._rfs_series_ready = True
+            return apply_rfs_changes(conn)
+
+        start = time.perf_counter()
+        try:
+            applied = execute_with_retry(self.db_pool, _apply)
+        except (OperationalError, InterfaceError) as e:
+            return 0, f"Database Connection Error: {e}"
+        except Psycopg2Error as db_err:
+            return 0, f"Database Error: {db_err}"
+        except Exception as e:
+            return 0, f"Execution Error: {e}"
+        if applied:
+            logger.info(f"RFS series updated for {applied} FATs in {time.perf_counter() - start:.2f}s")
+        return applied, None
+
+    @cache_query_result(ttl_seconds=CACHE_CONFIG['versioned_data_ttl'], tables=RFS_SOURCE_TABLES)
+    def get_rfs_series(self, granularity: str = 'month', start: Optional[date] = None, end: Optional[date] = None,
+                       kota_kab: str = ALL_KOTA) -> Optional[pd.DataFrame]:
+        """
+        Assets and HC per kota_kab and RFS period, from the pre-aggregated buckets.
+
+        Queued changes are applied first; the read itself touches only the
+        buckets inside the window. Results are cached until one of the
+        source tables is written to.
 
         Args:
-            kota_filter: Filter by specific city/regency
-            limit: Maximum number of points to return (None for unlimited)
+            granularity: 'day', 'month' or 'year'.
+            start: First RFS date included (None: from the earliest). Monthly and
+                   yearly series start at the month containing it.
+            end: Last RFS date included (None: up to the latest).
+            kota_kab: Restrict to one city (ALL_KOTA for every city).
 
         Returns:
-            DataFrame optimized for map visualization
+            DataFrame with period_start, kota_kab, total_assets and total_hc,
+            ordered by period, or None on error.
         """
-        base_query = """
-            SELECT 
-                ut.fat_id,
-                ut.latitude_fat,
-                ut.longitude_fat,
-                ut.olt,
-                cl.kota_kab,
-                COALESCE(hc.total_hc, 0) as total_hc
-            FROM user_terminals ut
-            LEFT JOIN clusters cl ON ut.fat_id = cl.fat_id
-            LEFT JOIN home_connecteds hc ON ut.fat_id = hc.fat_id
-            WHERE ut.latitude_fat IS NOT NULL 
-            AND ut.longitude_fat IS NOT NULL
-            AND ut.latitude_fat BETWEEN -11 AND 6
-            AND ut.longitude_fat BETWEEN 95 AND 141        """
+        if granularity not in RFS_GRANULARITIES:
+            st.error(f"Invalid RFS granularity: {granularity}")
+            return None
 
-        params = []
-        if kota_filter and kota_filter != 'All':
-            base_query += " AND cl.kota_kab = %s"
-            params.append(kota_filter)
+        _, error = self.apply_rfs_changes()
+        if error:
+            logger.warning(f"Failed to update RFS series: {error}")
+            return None
 
-        base_query += " ORDER BY hc.total_hc DESC NULLS LAST"
+        query, params = rfs_series_query(granularity, start, end, kota_kab)
+        data, _, error = self._execute_query(query, params, fetch="all")
+        if error:
+            logger.warning(f"Failed to load RFS series: {error}")
+            return None
+        return pd.DataFrame(data or [], columns=RFS_SERIES_COLUMNS)
 
-        if limit is not None:
-            base_query += " LIMIT %s"
-            params.append(limit)
+    def _ensure_fat_location_index(self) -> Optional[str]:
+        """Creates the GiST index behind the viewport queries once per service; returns an error message."""
+        if self._fat_location_index_ready:
+            return None
+        try:
+            execute_with_retry(self.db_pool, ensure_fat_location_index)
+        except Exception as e:
+            # Viewport queries still work, only without the index
+            logger.warning(f"Could not create FAT location index: {e}")
+            return str(e)
+        self._fat_location_index_ready = True
+        return None
+
+    @cache_query_result(ttl_seconds=CACHE_CONFIG['versioned_data_ttl'],
+                        tables=("user_terminals", "clusters", "home_connecteds", "dokumentasis"))
+    def get_map_data(self, kota_filter: Optional[str] = None, limit: Optional[int] = 1000,
+                     bbox: Optional[BoundingBox] = None, cursor: Optional[MapCursor] = None) -> Optional[pd.DataFrame]:
+        """
+        Get optimized data specifically for map rendering with caching.
+        Results are cached until one of the queried tables is written to.
 
-        data, columns, error = self._execute_query(
-            base_query, tuple(params) if params else None, fetch="all")
+        FATs are read through the GiST location index, one row per FAT,
+        ordered by total_hc (highest first) and then fat_id.
+
+        Args:
+            kota_filter: Filter by specific city/regency
+            limit: Maximum number of points to return (None for unlimited)
+            bbox: Only FATs inside this box (default: all of Indonesia)
+            cursor: Only FATs after this one in the ordering (see get_map_page)
+
+        Returns:
+            DataFrame optimized for map visualization
+        """
+        self._ensure_fat_location_index()
+        query, params = viewport_query(bbox or INDONESIA_BBOX, kota_filter, cursor, limit)
+        data, columns, error = self._execute_query(query, params, fetch="all")
 
         if error:
             st.error(f"Failed to load map data: {error}")
@@ -328,6 +725,31 @@ class AssetDataService:
 
         return pd.DataFrame(data, columns=columns)
 
+    def get_map_page(self, bbox: BoundingBox, kota_filter: Optional[str] = None,
+                     cursor: Optional[MapCursor] = None, page_size: Optional[int] = None
+                     ) -> Tuple[Optional[pd.DataFrame], Optional[MapCursor]]:
+        """
+        One page of the FATs inside a map viewport.
+
+        Args:
+            bbox: The viewport.
+            kota_filter: Filter by specific city/regency
+            cursor: None for the first page, else the cursor returned with the previous page.
+            page_size: FATs per page (default MAP_VIEWPORT_CONFIG['page_size']).
+
+        Returns:
+            A tuple containing (page, cursor of the next page or None if this
+            is the last one). The page is None on error.
+        """
+        page_size = page_size or MAP_VIEWPORT_CONFIG['page_size']
+        # One extra row tells whether another page follows
+        df = self.get_map_data(kota_filter, limit=page_size + 1, bbox=bbox.rounded(), cursor=cursor)
+        if df is None or len(df) <= page_size:
+            return df, None
+        df = df.iloc[:page_size]
+        last = df.iloc[-1]
+        return df, MapCursor(int(last['total_hc']), str(last['fat_id']))
+
     def search_assets(self, column_name: str, value: Any) -> Optional[pd.DataFrame]:
         """
         Searches for assets based on a specific column and value.
@@ -360,94 +782,213 @@ class AssetDataService:
             return pd.DataFrame(columns=columns or [])
         return pd.DataFrame(data, columns=columns)
 
-    def _get_existing_fat_ids(self) -> Tuple[Optional[set], Optional[str]]:
+    def _get_new_fat_ids(self, fat_ids: pd.Series) -> Tuple[Optional[set], Optional[str]]:
         """
-        Fetches distinct, cleaned (stripped, uppercase) FAT IDs from the user_terminals table.
+        Determines which of the given FAT IDs do not exist in user_terminals yet.
+
+        The comparison runs server-side against a staging table, so only the
+        uploaded IDs are sent and only the new ones are returned. IDs are
+        normalised with clean_fat_ids, as when they are written, so the
+        check is an exact match on the fat_id index.
+
+        Args:
+            fat_ids: FAT IDs from the uploaded file.
 
         Returns:
-            A tuple containing (set_of_fat_ids, error_message).
-            set_of_fat_ids is None if an error occurs.
+            A tuple containing (set_of_new_fat_ids, error_message).
+            set_of_new_fat_ids is None if an error occurs.
             error_message is None if successful.
         """
-        print("DEBUG: Fetching existing FAT IDs from database...")
-        query_existing = "SELECT DISTINCT fat_id FROM user_terminals;"
-        existing_data, _, db_error = self._execute_query(
-            query_existing, fetch="all")
+        print("DEBUG: Checking uploaded FAT IDs against the database...")
+        cleaned_ids = clean_fat_ids(fat_ids.dropna()).unique()
 
-        if db_error:
-            return None, f"Failed to fetch existing FAT IDs: {db_error}"
+        def _select_new(conn):
+            with conn.cursor() as cur:
+                new_ids = select_missing_keys(cur, cleaned_ids, "user_terminals", "fat_id")
+            conn.rollback()
+            return new_ids
 
-        db_fat_id_set = set()
-        if existing_data:
-            db_fat_id_set = {str(item[0]).strip().upper()
-                             for item in existing_data if item[0] is not None}
-            print(
-                f"DEBUG: Found {len(db_fat_id_set)} unique existing FAT IDs.")
-        else:
-            print("DEBUG: No existing FAT IDs found in database.")
-        return db_fat_id_set, None
+        try:
+            new_ids = set(execute_with_retry(self.db_pool, _select_new, max_retries=3))
+        except Exception as e:
+            return None, f"Failed to check existing FAT IDs: {e}"
+        print(
+            f"DEBUG: {len(new_ids)} of {len(cleaned_ids)} uploaded FAT IDs are new.")
+        return new_ids, None
 
-    def _filter_new_records(self, df: pd.DataFrame, existing_ids: set) -> pd.DataFrame:
-        """Filters a DataFrame to keep only rows with fat_id not present in the existing_ids set."""
-        if 'fat_id' not in df.columns or not existing_ids:
-            # No filtering needed if column missing or no existing IDs to compare against
+    def _filter_new_records(self, df: pd.DataFrame, new_ids: set) -> pd.DataFrame:
+        """Filters a DataFrame to keep only rows whose fat_id is in the new_ids set."""
+        if 'fat_id' not in df.columns:
             return df
 
         print("DEBUG: Filtering DataFrame for new FAT IDs...")
-        df['fat_id_clean_temp'] = df['fat_id'].astype(
-            str).str.strip().str.upper()
-        filtered_df = df[~df['fat_id_clean_temp'].isin(existing_ids)].copy()
-        filtered_df.drop(columns=['fat_id_clean_temp'], inplace=True)
+        fat_id_clean = clean_fat_ids(df['fat_id'])
+        filtered_df = df[fat_id_clean.isin(new_ids)].copy()
         print(
             f"DEBUG: Filtering complete. Kept {len(filtered_df)} new records.")
         return filtered_df
 
-    def process_uploaded_asset_file(self, uploaded_file) -> Optional[pd.DataFrame]:
+    def _fetch_row_hashes(self, fat_ids: Iterable[str]) -> Dict[str, int]:
+        """Stored raw-row fingerprints of the given FAT IDs; empty if they cannot be read."""
+        def _select(conn):
+            with conn.cursor() as cur:
+                stored = fetch_row_hashes(cur, fat_ids)
+            conn.rollback()
+            return stored
+
+        try:
+            return execute_with_retry(self.db_pool, _select, max_retries=3)
+        except Exception as e:
+            logger.warning(f"Could not read row fingerprints, processing all rows: {e}")
+            return {}
+
+    def _skip_unchanged_rows(self, df: pd.DataFrame, pipeline: AssetPipeline
+                             ) -> Tuple[pd.DataFrame, Optional[RowFingerprints], set]:
         """
-        Processes an uploaded asset file (CSV assumed).
-        Applies the AssetPipeline, fetches existing FAT IDs, and returns a DataFrame
-        containing only the records with new FAT IDs.
+        Drops raw rows whose content is unchanged since they were last loaded.
+
+        Args:
+            df: Raw rows of an uploaded file.
+            pipeline: The pipeline that will process the remaining rows.
+
+        Returns:
+            Tuple (rows_to_process, their fingerprints, skipped FAT IDs).
+            Fingerprints are None if the file has no FAT ID column.
+        """
+        fingerprints = RowFingerprints.of(df, pipeline)
+        if fingerprints is None:
+            return df, None, set()
+        unchanged = fingerprints.unchanged_mask(self._fetch_row_hashes(fingerprints.fat_ids.unique()))
+        if not unchanged.any():
+            return df, fingerprints, set()
+        skipped_ids = set(fingerprints.fat_ids[unchanged])
+        logger.info(f"Skipping {int(unchanged.sum())} rows ({len(skipped_ids)} FAT IDs) "
+                    f"unchanged since the last upload.")
+        return df[~unchanged], fingerprints.subset(~unchanged), skipped_ids
+
+    @staticmethod
+    def _row_hashes_for(split_dfs: Dict[str, pd.DataFrame],
+                        fingerprints: Optional[RowFingerprints]) -> Optional[pd.DataFrame]:
+        """Fingerprints to store with a write of split_dfs: those of the FAT IDs being written."""
+        terminals = split_dfs.get("user_terminals")
+        if fingerprints is None or terminals is None or 'fat_id' not in terminals.columns:
+            return None
+        return fingerprints.for_fat_ids(terminals['fat_id'])
+
+    def _get_upload_pipeline(self, uploaded_file) -> Optional[PipelineResult]:
+        """
+        Returns the pipeline run for an uploaded file, memoised per file content.
+
+        Streamlit re-runs the page on every interaction, so the file is read
+        and processed once and the result reused until a different file is
+        uploaded. Rows unchanged since they were last loaded are left out
+        (see _skip_unchanged_rows); their count is kept in _upload_skipped.
+
+        Args:
+            uploaded_file: The file object from st.file_uploader.
+
+        Returns:
+            A PipelineResult, or None if the file has no rows left to process.
+        """
+        file_key = hashlib.sha1(uploaded_file.getvalue()).hexdigest()
+        if self._upload_pipeline is not None and self._upload_pipeline[0] == file_key:
+            logger.debug("Reusing processed data of the uploaded file.")
+            return self._upload_pipeline[1]
+
+        print("DEBUG: Starting file processing...")
+        df = read_uploaded_table(uploaded_file)
+        print(f"DEBUG: File loaded successfully. Shape: {df.shape}")
+        pipeline = AssetPipeline(workers=self.etl_workers)
+        rows_read = len(df)
+        df, fingerprints, _ = self._skip_unchanged_rows(df, pipeline)
+        self._upload_fingerprints = fingerprints
+        self._upload_skipped = rows_read - len(df)
+        self._pending_upload = None
+
+        # --- Run the main processing pipeline ---
+        result = None
+        if not df.empty:
+            print("DEBUG: Starting asset data processing pipeline...")
+            result = pipeline.run_staged(df)
+        self._upload_pipeline = (file_key, result)
+        return result
+
+    def _split_for_write(self, df_processed: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+        """
+        Returns the per-table split of a processed DataFrame about to be written.
+
+        If the frame is the unedited preview of the last upload, its memoised
+        split is reused; otherwise the frame is split from scratch.
+        """
+        pending = self._pending_upload
+        if pending is not None and pending.matches(df_processed):
+            logger.debug("Reusing the pipeline result of the previewed upload.")
+            result = pending
+        else:
+            result = PipelineResult.from_processed(df_processed)
+        split_dfs = result.splits
+        logger.info(result.timing_report())
+        return split_dfs
+
+    def process_uploaded_asset_file(self, uploaded_file, mode: str = "insert") -> Optional[pd.DataFrame]:
+        """
+        Processes an uploaded asset file (CSV or XLSX).
+        Applies the AssetPipeline and, in "insert" mode, returns a DataFrame
+        containing only the records with new FAT IDs. In "merge" mode all
+        records are returned, to be diffed against the database by
+        merge_asset_dataframe. In both modes, rows whose raw content is
+        unchanged since they were last loaded are skipped before processing.
 
         Args:
             uploaded_file: The file object from st.file_uploader.
+            mode: One of UPLOAD_MODES ("insert" or "merge").
 
         Returns:
             A single processed pandas DataFrame, or None if an error occurs.
         """
         try:
-            print("DEBUG: Starting file processing...")
-            df = pd.read_csv(uploaded_file)
-            print(f"DEBUG: CSV loaded successfully. Shape: {df.shape}")
-
-            # --- Run the main processing pipeline ---
-            print("DEBUG: Starting asset data processing pipeline...")
-            pipeline = AssetPipeline()
-            processed_df = pipeline.run(df)
-            if processed_df is None:
-                # Error logged within pipeline.run()
+            result = self._get_upload_pipeline(uploaded_file)
+            if result is None:
+                if self._upload_skipped:
+                    st.info(
+                        f"All {self._upload_skipped} rows are unchanged since they were last loaded. Nothing to process.")
+                else:
+                    st.warning("The uploaded file is empty.")
+                return pd.DataFrame()
+            if self._upload_skipped:
+                st.info(
+                    f"{self._upload_skipped} rows unchanged since they were last loaded were skipped.")
+            try:
+                processed_df = result.processed
+            except Exception as e:
+                print(f"ERROR during pipeline execution: {e}")
+                self._upload_pipeline = None  # Retry from the raw file next time
                 st.error("Data processing pipeline failed.")
                 return None
             print(
-                "DEBUG: Asset data processing pipeline finished. Shape after processing: {processed_df.shape}")
+                f"DEBUG: Asset data processing pipeline finished. Shape after processing: {processed_df.shape}")
+            logger.info(result.timing_report())
 
-            # --- Fetch existing IDs ---
-            db_fat_id_set, fetch_error = self._get_existing_fat_ids()
-            if fetch_error:
-                st.error(fetch_error)
-                return None
+            if mode == "merge":
+                st.info(
+                    f"{len(processed_df)} records will be merged: new FAT IDs are inserted and changed ones updated.")
+                self._pending_upload = result
+                return processed_df
 
             # --- Filter for new records ---
             if 'fat_id' not in processed_df.columns:
                 print(
                     "WARN: 'fat_id' column not found after processing. Cannot filter new records.")
                 filtered_df = processed_df  # Return all if filtering not possible
-            elif not db_fat_id_set:
-                print(
-                    "DEBUG: No existing FAT IDs in DB. All records are considered new.")
-                filtered_df = processed_df  # Return all if DB is empty
             else:
+                new_fat_ids, fetch_error = self._get_new_fat_ids(
+                    processed_df['fat_id'])
+                if fetch_error:
+                    st.error(fetch_error)
+                    return None
+
                 filtered_df = self._filter_new_records(
-                    processed_df, db_fat_id_set)
+                    processed_df, new_fat_ids)
 
                 if filtered_df.empty:
                     st.info(
@@ -456,6 +997,10 @@ class AssetDataService:
                     st.success(
                         f"Found {len(filtered_df)} new FAT ID records in the uploaded file.")
 
+            # Keep the memoised split if the same rows were selected on a previous rerun
+            if self._pending_upload is None or not self._pending_upload.matches(filtered_df):
+                self._pending_upload = result.derive(filtered_df)
+
             # Return the final DataFrame (filtered or original)
             return filtered_df
 
@@ -479,7 +1024,7 @@ class AssetDataService:
 
     def insert_asset_dataframe(self, df_processed: pd.DataFrame) -> Tuple[int, int]:
         """
-        Splits the processed DataFrame using AssetPipeline and inserts data
+        Splits the processed DataFrame using AssetPipeline and bulk loads it
         into the respective asset tables, handling potential duplicates via ON CONFLICT.
 
         Args:
@@ -497,8 +1042,7 @@ class AssetDataService:
             return 0, 0        # --- Split the data just before insertion using the pipeline ---
         try:
             print("DEBUG: Splitting data before insertion...")
-            pipeline = AssetPipeline()
-            split_dfs = pipeline.split_data(df_processed.copy())
+            split_dfs = self._split_for_write(df_processed)
             if not split_dfs:
                 st.error("Failed to split data before insertion. Aborting.")
                 return 0, len(df_processed)
@@ -508,66 +1052,281 @@ class AssetDataService:
             return 0, len(df_processed)
         # -------------------------------------------------------------
 
-        def _perform_insertion(conn):
+        try:
+            reports, table_errors = self.load_asset_tables(
+                split_dfs, row_hashes=self._row_hashes_for(split_dfs, self._upload_fingerprints))
+        except (OperationalError, InterfaceError) as e:
+            st.error(f"Database connection error during insertion: {e}")
+            return 0, len(df_processed)
+        except Exception as e:
+            st.error(f"General error during DataFrame insertion: {e}")
+            return 0, len(df_processed)
+
+        for report in reports:
+            st.info(
+                f"'{report['table']}': {report['inserted']} of {report['staged']} rows inserted "
+                f"({report['rows_per_sec']:,.0f} rows/s)")
+            attempted_count += report['staged']
+        for table_name, (row_count, insert_err) in table_errors.items():
+            st.error(f"Error inserting into '{table_name}': {insert_err}")
+            error_count += row_count
+
+        if attempted_count:
+            self._refresh_aggregates_after_load()
+        st.success(f"Attempted to process data for all tables.")
+        return attempted_count, error_count
+
+    def load_asset_tables(self, split_dfs: Dict[str, pd.DataFrame],
+                          row_hashes: Optional[pd.DataFrame] = None
+                          ) -> Tuple[List[Dict[str, Any]], Dict[str, Tuple[int, str]]]:
+        """
+        Bulk loads split asset tables with COPY into staging tables, then INSERT ... SELECT.
+
+        Each table is loaded under its own savepoint, so a failing table is
+        rolled back without discarding the others. Everything is committed
+        in one transaction at the end.
+
+        Args:
+            split_dfs: Mapping of table name to the rows to insert into it.
+            row_hashes: Optional (fat_id, row_hash) raw-row fingerprints to store
+                        with the rows; skipped if any table failed to load.
+
+        Returns:
+            Tuple (reports, errors): one load report per loaded table (see
+            ``bulk_insert_dataframe``), and a mapping of failed table name to
+            (row_count, error_message).
+        """
+        # Only user_terminals has a unique fat_id; child tables take every row
+        conflict_columns = {"user_terminals": ("fat_id",)}
+
+        def _perform_load(conn):
+            reports, errors = [], {}
             with conn.cursor() as cur:
                 for table_name, df_subset in split_dfs.items():
                     if df_subset.empty:
-                        st.info(f"No data to insert into '{table_name}'.")
                         continue
+                    cur.execute("SAVEPOINT load_table")
+                    try:
+                        reports.append(bulk_insert_dataframe(
+                            cur, df_subset, table_name, conflict_columns.get(table_name)))
+                        cur.execute("RELEASE SAVEPOINT load_table")
+                    except Psycopg2Error as load_err:
+                        cur.execute("ROLLBACK TO SAVEPOINT load_table")
+                        logger.error(f"Bulk load into '{table_name}' failed: {load_err}")
+                        errors[table_name] = (len(df_subset), str(load_err).strip())
+                if not errors:
+                    self._store_row_hashes(cur, row_hashes)
+            conn.commit()
+            return reports, errors
+
+        reports, errors = execute_with_retry(self.db_pool, _perform_load, max_retries=3)
+        written_tables = [r['table'] for r in reports if r['inserted']]
+        bump_table_versions(*written_tables)
+        return reports, errors
+
+    def _store_row_hashes(self, cur, row_hashes: Optional[pd.DataFrame]):
+        """Stores raw-row fingerprints in the write transaction; a failure only loses the fingerprints."""
+        if row_hashes is None or row_hashes.empty:
+            return
+        cur.execute("SAVEPOINT store_row_hashes")
+        try:
+            written = store_row_hashes(cur, row_hashes)
+            cur.execute("RELEASE SAVEPOINT store_row_hashes")
+            logger.debug(f"Stored {written} raw-row fingerprints.")
+        except Psycopg2Error as hash_err:
+            cur.execute("ROLLBACK TO SAVEPOINT store_row_hashes")
+            logger.warning(f"Storing row fingerprints failed: {hash_err}")
+
+    def merge_asset_dataframe(self, df_processed: pd.DataFrame) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """
+        Merges a processed upload into the asset tables, inserting new FAT IDs
+        and updating existing ones only where values actually changed.
 
-                    st.info(
-                        f"Inserting {len(df_subset)} rows into '{table_name}'...")
-                    cols_str = ", ".join(
-                        [f'"{col}"' for col in df_subset.columns])
-                    placeholders = ", ".join(["%s"] * len(df_subset.columns))
-                    insert_query = f"INSERT INTO {table_name} ({cols_str}) VALUES ({placeholders})"
-
-                    # --- Conditionally add ON CONFLICT clause ---
-                    # Apply ON CONFLICT only to tables where fat_id is expected to be unique
-                    # Adjust this set based on your actual database schema constraints
-                    # Example: Only user_terminals has unique fat_id
-                    tables_with_fat_id_pk = {"user_terminals"}
-                    if table_name in tables_with_fat_id_pk:
-                        insert_query += " ON CONFLICT (fat_id) DO NOTHING"
-
-                    # Convert DataFrame rows to list of tuples, handling NaT/NaN
-                    data_tuples = [
-                        tuple(
-                            int(x) if isinstance(x, np.integer) else
-                            (None if pd.isna(x) else x)
-                            for x in row
-                        )
-                        for row in df_subset.itertuples(index=False, name=None)
-                    ]
+        All five tables are diffed server-side against COPY-staged rows in a
+        single transaction; concurrent merges are serialized with an advisory lock.
 
-                    try:
-                        cur.executemany(insert_query, data_tuples)
-                        nonlocal attempted_count
-                        attempted_count += len(data_tuples)
-                    except Psycopg2Error as insert_err:
-                        conn.rollback()  # Rollback this batch
-                        st.error(
-                            f"Error inserting into '{table_name}': {insert_err}")
-                        # Assume all failed in batch
-                        nonlocal error_count
-                        error_count += len(data_tuples)
-                        continue  # Continue to next table
-
-                # Summary message
-                st.success(f"Attempted to process data for all tables.")
-                conn.commit()
-                return attempted_count, error_count
+        Args:
+            df_processed: The processed (and potentially user-edited) DataFrame
+                          containing combined asset data.
+
+        Returns:
+            A tuple containing (summary, error_message). summary has FAT-level
+            'inserted', 'updated' and 'unchanged' counts plus per-table reports
+            under 'tables'. summary is None if an error occurs.
+        """
+        if df_processed is None or df_processed.empty:
+            return {'inserted': 0, 'updated': 0, 'unchanged': 0, 'tables': []}, None
+
+        try:
+            split_dfs = self._split_for_write(df_processed)
+        except Exception as split_err:
+            return None, f"Error during data splitting before merge: {split_err}"
+        if not split_dfs or split_dfs.get("user_terminals", pd.DataFrame()).empty:
+            return None, "No user_terminals rows to merge (missing fat_id?)."
+        summary, error = self.merge_asset_splits(
+            split_dfs, row_hashes=self._row_hashes_for(split_dfs, self._upload_fingerprints))
+        if summary is not None and (summary['inserted'] or summary['updated']):
+            self._refresh_aggregates_after_load()
+        return summary, error
+
+    def merge_asset_splits(self, split_dfs: Dict[str, pd.DataFrame],
+                           row_hashes: Optional[pd.DataFrame] = None
+                           ) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """
+        Merges already split asset tables into the database (see merge_asset_dataframe).
+
+        Args:
+            split_dfs: Mapping of table name to its rows; must include user_terminals.
+            row_hashes: Optional (fat_id, row_hash) raw-row fingerprints to store
+                        in the same transaction.
+
+        Returns:
+            A tuple containing (summary, error_message), as merge_asset_dataframe.
+        """
+        def _perform_merge(conn):
+            reports = []
+            with conn.cursor() as cur:
+                cur.execute("SELECT pg_advisory_xact_lock(hashtext('asset_merge'))")
+                cur.execute(
+                    "CREATE TEMP TABLE merge_changed_keys (fat_id VARCHAR(255)) ON COMMIT DROP")
+                # Parent first so child rows for new FAT IDs satisfy the foreign key
+                for table_name in ASSET_TABLES:
+                    df_subset = split_dfs.get(table_name)
+                    if df_subset is None or df_subset.empty:
+                        continue
+                    reports.append(bulk_merge_dataframe(
+                        cur, df_subset, table_name, "fat_id",
+                        key_is_unique=(table_name == "user_terminals"),
+                        changed_keys_table="merge_changed_keys"))
+                cur.execute("SELECT count(DISTINCT fat_id) FROM merge_changed_keys")
+                touched = cur.fetchone()[0]
+                self._store_row_hashes(cur, row_hashes)
+            conn.commit()
+            return reports, touched
 
         try:
-            return execute_with_retry(self.db_pool, _perform_insertion, max_retries=3)
+            reports, touched = execute_with_retry(self.db_pool, _perform_merge, max_retries=3)
         except (OperationalError, InterfaceError) as e:
-            st.error(f"Database connection error during insertion: {e}")
-            return 0, len(df_processed)
+            return None, f"Database connection error during merge: {e}"
+        except Psycopg2Error as db_err:
+            return None, f"Database error during merge: {db_err}"
         except Exception as e:
-            st.error(f"General error during DataFrame insertion: {e}")
-            return 0, len(df_processed)
+            return None, f"General error during merge: {e}"
 
-        return attempted_count, error_count
+        bump_table_versions(*[r['table'] for r in reports if r['inserted'] or r['updated']])
+
+        total = len(split_dfs["user_terminals"])
+        inserted = next(r['inserted'] for r in reports if r['table'] == "user_terminals")
+        summary = {
+            'inserted': inserted,
+            'updated': touched - inserted,
+            'unchanged': total - touched,
+            'tables': reports
+        }
+        logger.info(
+            f"Merge finished: {summary['inserted']} inserted, {summary['updated']} updated, "
+            f"{summary['unchanged']} unchanged FAT IDs")
+        return summary, None
+
+    def stream_asset_file(self, uploaded_file, mode: str = "insert", chunk_rows: int = STREAM_CHUNK_ROWS,
+                          progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None
+                          ) -> Tuple[Dict[str, Any], Optional[str]]:
+        """
+        Processes and loads a large CSV/XLSX upload chunk by chunk, without a preview.
+
+        Each chunk is read, cleaned, split and written (bulk insert or merge)
+        in its own transaction, so memory is bounded by ``chunk_rows`` rather
+        than the file size. A FAT ID repeated in a later chunk is skipped,
+        like a duplicate within one frame, and rows unchanged since they
+        were last loaded are not processed at all. Chunks already written
+        stay committed if a later chunk fails.
+
+        Args:
+            uploaded_file: The file object from st.file_uploader (CSV or XLSX).
+            mode: One of UPLOAD_MODES ("insert" or "merge").
+            chunk_rows: Maximum raw rows per chunk.
+            progress_callback: Optional callable receiving the running summary
+                               (plus 'progress', the estimated fraction of the
+                               file read) after each chunk.
+
+        Returns:
+            A tuple containing (summary, error_message). summary has 'chunks',
+            'rows_read', 'inserted', 'updated', 'unchanged', 'skipped_unchanged',
+            'skipped_existing', 'duplicates_dropped', 'failed_rows', 'seconds'
+            and 'stage_timings';
+            on error it reflects the chunks loaded before the failure.
+        """
+        if mode not in UPLOAD_MODES:
+            return {}, f"Unknown upload mode '{mode}'. Use one of {UPLOAD_MODES}."
+
+        start = time.perf_counter()
+        chunked = ChunkedAssetPipeline(AssetPipeline(workers=self.etl_workers))
+        summary = {
+            'chunks': 0, 'rows_read': 0, 'inserted': 0, 'updated': 0, 'unchanged': 0,
+            'skipped_unchanged': 0, 'skipped_existing': 0, 'duplicates_dropped': 0,
+            'failed_rows': 0, 'seconds': 0.0, 'stage_timings': chunked.timings
+        }
+        chunk_fingerprints = {}
+
+        def _skip_unchanged(raw_chunk: pd.DataFrame) -> pd.DataFrame:
+            kept, fingerprints, skipped_ids = self._skip_unchanged_rows(raw_chunk, chunked.pipeline)
+            summary['skipped_unchanged'] += len(raw_chunk) - len(kept)
+            # A later row with a skipped FAT ID is a duplicate, as if the row had been loaded
+            chunked.seen_fat_ids.update(skipped_ids)
+            chunk_fingerprints['current'] = fingerprints
+            return kept
+
+        def _on_chunk(number: int, rows_read: int, progress: Optional[float]):
+            summary.update(chunks=number, rows_read=rows_read,
+                           duplicates_dropped=chunked.duplicates_dropped,
+                           seconds=time.perf_counter() - start)
+            if progress_callback:
+                progress_callback({**summary, 'progress': progress})
+
+        try:
+            for split_dfs in stream_file_splits(uploaded_file, chunk_rows, chunked, _on_chunk,
+                                                row_filter=_skip_unchanged):
+                terminals = split_dfs.get("user_terminals")
+                if terminals is None or 'fat_id' not in terminals.columns:
+                    return summary, "Column 'fat_id' (FATID) not found in the uploaded file."
+                fingerprints = chunk_fingerprints.get('current')
+
+                if mode == "merge":
+                    chunk_summary, merge_error = self.merge_asset_splits(
+                        split_dfs, row_hashes=self._row_hashes_for(split_dfs, fingerprints))
+                    if merge_error:
+                        return summary, merge_error
+                    for key in ('inserted', 'updated', 'unchanged'):
+                        summary[key] += chunk_summary[key]
+                    continue
+
+                new_ids, fetch_error = self._get_new_fat_ids(terminals['fat_id'])
+                if fetch_error:
+                    return summary, fetch_error
+                split_dfs = {table: df[df['fat_id'].isin(new_ids)] if 'fat_id' in df.columns else df
+                             for table, df in split_dfs.items()}
+                summary['skipped_existing'] += len(terminals) - len(split_dfs["user_terminals"])
+
+                reports, table_errors = self.load_asset_tables(
+                    split_dfs, row_hashes=self._row_hashes_for(split_dfs, fingerprints))
+                summary['inserted'] += sum(r['inserted'] for r in reports if r['table'] == "user_terminals")
+                for table_name, (row_count, insert_err) in table_errors.items():
+                    logger.error(f"Streaming load into '{table_name}' failed: {insert_err}")
+                    summary['failed_rows'] += row_count
+        except (OperationalError, InterfaceError) as e:
+            return summary, f"Database connection error during streaming load: {e}"
+        except Psycopg2Error as db_err:
+            return summary, f"Database error during streaming load: {db_err}"
+        except Exception as e:
+            return summary, f"Error while streaming the uploaded file: {e}"
+
+        if summary['inserted'] or summary['updated']:
+            self._refresh_aggregates_after_load()
+        summary['seconds'] = time.perf_counter() - start
+        logger.info(
+            f"Streaming {mode} finished: {summary['rows_read']} rows in {summary['chunks']} chunks, "
+            f"{summary['inserted']} inserted, {summary['updated']} updated in {summary['seconds']:.1f}s")
+        return summary, None
 
     def insert_single_asset(self, data: Dict[str, Any]) -> Optional[str]:
         """
@@ -619,6 +1378,7 @@ class AssetDataService:
         if error:
             st.error(f"Failed to update asset: {error}")
             return f"Update Error: {error}"
+        bump_table_versions(table_name)
         return None  # Success
 
     def update_asset_table(self, table_name: str, identifier_col: str, identifier_value: Any, update_data: Dict[str, Any]) -> Optional[str]:
@@ -658,6 +1418,7 @@ class AssetDataService:
         if error:
             st.error(f"Failed to update {table_name}: {error}")
             return f"Update Error: {error}"
+        bump_table_versions(table_name)
         return None  # Success
 
     def delete_asset(self, identifier_col: str, identifier_value: Any) -> Optional[str]:
@@ -684,6 +1445,7 @@ class AssetDataService:
             st.error(f"Failed to delete asset: {error}")
             return f"Deletion Error: {error}"
 
+        bump_table_versions(*ASSET_TABLES)  # Deletes cascade to child tables
         return None  # Success
 
     def delete_asset_table(self, table_name: str, identifier_col: str, identifier_value: Any) -> Optional[str]:
@@ -713,6 +1475,10 @@ class AssetDataService:
         if error:
             st.error(f"Failed to delete from {table_name}: {error}")
             return f"Deletion Error: {error}"
+        if table_name == "user_terminals":
+            bump_table_versions(*ASSET_TABLES)  # Deletes cascade to child tables
+        else:
+            bump_table_versions(table_name)
         return None  # Success
 
     def search_table(self, table_name: str, column_name: str, value: Any) -> Optional[pd.DataFrame]:
@@ -748,12 +1514,13 @@ class AssetDataService:
             return pd.DataFrame(columns=columns or [])
         return pd.DataFrame(data, columns=columns)
 
-    def load_comprehensive_asset_data(self, limit: Optional[int] = None) -> Optional[pd.DataFrame]:
+    def load_comprehensive_asset_data(self, limit: Optional[int] = None, backend: str = "cursor") -> Optional[pd.DataFrame]:
         """
         Load comprehensive asset data from all tables with complete joins.        This method provides all available data for comprehensive search and detail views.
 
         Args:
             limit: Maximum number of rows to load. If None, loads all.
+            backend: Fetch backend, "cursor" or "arrow" (Arrow-backed dtypes).
 
         Returns:
             DataFrame with comprehensive asset data from all tables
@@ -767,25 +1534,32 @@ class AssetDataService:
         if limit is not None:
             query += " LIMIT %s"
             query_params.append(limit)
-        query += ";"
 
-        data, columns, error = self._execute_query(
-            query, tuple(query_params) if query_params else None, fetch="all")
+        df, error = self._execute_query_frame(
+            query, tuple(query_params) if query_params else None, backend=backend)
 
         if error:
             logger.error(f"Failed to load comprehensive asset data: {error}")
             return None
-        if data is None:
-            logger.warning("No comprehensive asset data returned from query")
-            return pd.DataFrame(columns=columns or [])
 
-        df = pd.DataFrame(data, columns=columns)
         logger.info(
-            f"Loaded {len(df)} comprehensive asset records with {len(columns)} columns")
-        logger.info(f"Raw database columns: {columns}")
+            f"Loaded {len(df)} comprehensive asset records with {len(df.columns)} columns")
+        logger.info(f"Raw database columns: {list(df.columns)}")
 
         return df
 
+    def iter_comprehensive_asset_data(self, itersize: int = STREAM_ITERSIZE) -> Iterator[pd.DataFrame]:
+        """
+        Streams the comprehensive asset data in chunks of ``itersize`` rows.
+
+        Args:
+            itersize: Number of rows per chunk.
+
+        Yields:
+            DataFrames with the same columns as ``load_comprehensive_asset_data``.
+        """
+        yield from self._stream_query(self._build_comprehensive_query(), itersize=itersize)
+
     def update_asset_comprehensive(self, pk_column: str, pk_value: Any, update_data: Dict[str, Any]) -> Optional[str]:
         """
         Update asset data across multiple tables based on the field being updated.
@@ -1009,6 +1783,7 @@ class AssetDataService:
                     if error:
                         error_msg = f"Failed to delete from {table_name}: {error}"
                         logger.error(error_msg)
+                        bump_table_versions(*ASSET_TABLES)
                         return error_msg
 
                     if affected_rows and affected_rows > 0:
@@ -1019,8 +1794,12 @@ class AssetDataService:
                 except Exception as e:
                     error_msg = f"Error deleting from table {table_name}: {e}"
                     logger.error(error_msg)
+                    bump_table_versions(*ASSET_TABLES)
                     return error_msg
 
+            # Earlier tables may already have been deleted from
+            bump_table_versions(*ASSET_TABLES)
+
             if deleted_count == 0:
                 return f"No records found with {identifier_col} = {identifier_value}"
 
@@ -1136,6 +1915,7 @@ class AssetDataService:
         """
         import time
 
+        self._sync_schema_caches()
         current_time = time.time()
 
         # Check if cache is valid
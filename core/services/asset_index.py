@@ -0,0 +1,275 @@
+"""
+In-memory columnar index over the dashboard asset frame.
+
+The index is built once per asset snapshot. The filter columns (kota_kab,
+olt, brand_olt, fat_filter_pemakaian) are dictionary-encoded, and every
+value keeps the rows it occurs in:
+
+- columns with at most DENSE_BITMAP_MAX_VALUES values store one packed
+  bitmap (n_rows / 8 bytes) per value;
+- columns with more values (olt) store the row ids sorted by value (CSR
+  layout), and a bitmap is built on demand only for the selected values.
+
+A filter is the AND of one bitmap per filtered column. KPI sums and
+group-bys then run on NumPy arrays (np.bincount over the codes of the
+selected rows), so a filter change costs a few vector operations over
+packed bits instead of boolean masks over object columns and a pandas
+groupby.
+
+    index = AssetIndex(df)
+    selection = index.select(kota_kab='Kota Surabaya')
+    selection.kpis()                     # total_fat, total_hc, ...
+    selection.group_by('fdt_id').head(15)
+"""
+
+import logging
+from typing import Dict, Iterable, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Columns with value bitmaps, usable in select()
+FILTER_COLUMNS = ("kota_kab", "olt", "brand_olt", "fat_filter_pemakaian")
+
+# Encoded for distinct counts and group-bys only
+KEY_COLUMNS = ("fat_id", "fdt_id")
+
+NUMERIC_COLUMNS = ("latitude_fat", "longitude_fat", "total_hc")
+
+# Columns with more values keep sorted row ids instead of one bitmap per value
+DENSE_BITMAP_MAX_VALUES = 256
+
+FilterValue = Union[None, str, Iterable[str]]
+
+
+class _EncodedColumn:
+    """
+    Dictionary-encoded column.
+
+    Attributes:
+        values: Distinct values, sorted; codes index into it.
+        codes: int32 code of every row (-1 for missing values).
+        lookup: Value to code.
+        bitmaps: (len(values), n_bytes) packed row bitmaps, for dense columns.
+        row_ids / offsets: Row ids sorted by code; the rows of code c are
+            row_ids[offsets[c]:offsets[c + 1]].
+    """
+
+    def __init__(self, series: pd.Series, with_rows: bool, dense: bool):
+        codes, uniques = pd.factorize(series, sort=True, use_na_sentinel=True)
+        self.values = np.asarray(uniques, dtype=object)
+        self.codes = codes.astype(np.int32, copy=False)
+        self.lookup = {value: code for code, value in enumerate(self.values)}
+        self.bitmaps: Optional[np.ndarray] = None
+        self.row_ids: Optional[np.ndarray] = None
+        self.offsets: Optional[np.ndarray] = None
+        if not with_rows:
+            return
+
+        present = np.flatnonzero(self.codes >= 0)
+        order = present[np.argsort(self.codes[present], kind='stable')].astype(np.int32)
+        counts = np.bincount(self.codes[present], minlength=len(self.values))
+        offsets = np.zeros(len(self.values) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        if dense and len(self.values) <= DENSE_BITMAP_MAX_VALUES:
+            n_rows = len(self.codes)
+            self.bitmaps = np.empty((len(self.values), (n_rows + 7) // 8), dtype=np.uint8)
+            bits = np.zeros(n_rows, dtype=bool)
+            for code in range(len(self.values)):
+                rows = order[offsets[code]:offsets[code + 1]]
+                bits[rows] = True
+                self.bitmaps[code] = np.packbits(bits)
+                bits[rows] = False
+        else:
+            self.row_ids, self.offsets = order, offsets
+
+    def codes_of(self, values: Iterable) -> np.ndarray:
+        """Codes of the given values; unknown values are left out."""
+        return np.array([self.lookup[v] for v in values if v in self.lookup], dtype=np.int64)
+
+    def bitmap(self, codes: np.ndarray, n_rows: int) -> np.ndarray:
+        """Packed bitmap of the rows holding any of the given codes."""
+        if self.bitmaps is not None:
+            if len(codes) == 1:
+                return self.bitmaps[codes[0]]
+            if len(codes) == 0:
+                return np.zeros(self.bitmaps.shape[1], dtype=np.uint8)
+            return np.bitwise_or.reduce(self.bitmaps[codes], axis=0)
+        bits = np.zeros(n_rows, dtype=bool)
+        for code in codes:
+            bits[self.row_ids[self.offsets[code]:self.offsets[code + 1]]] = True
+        return np.packbits(bits)
+
+
+class AssetSelection:
+    """
+    Rows of an AssetIndex matching a filter.
+
+    Attributes:
+        index: The index the rows belong to.
+        bitmap: Packed bitmap of the selected rows.
+    """
+
+    def __init__(self, index: 'AssetIndex', bitmap: np.ndarray):
+        self.index = index
+        self.bitmap = bitmap
+        self._row_ids: Optional[np.ndarray] = None
+
+    def count(self) -> int:
+        """Number of selected rows."""
+        return int(np.bitwise_count(self.bitmap).sum(dtype=np.int64))
+
+    def row_ids(self) -> np.ndarray:
+        """Positions of the selected rows in the indexed frame, ascending."""
+        if self._row_ids is None:
+            bits = np.unpackbits(self.bitmap, count=self.index.n_rows).view(bool)
+            self._row_ids = np.flatnonzero(bits)
+        return self._row_ids
+
+    def mask(self) -> np.ndarray:
+        """Boolean mask of the selected rows."""
+        return np.unpackbits(self.bitmap, count=self.index.n_rows).view(bool)
+
+    def frame(self) -> pd.DataFrame:
+        """The selected rows of the indexed frame (a new frame)."""
+        return self.index.frame.take(self.row_ids())
+
+    def numbers(self, column: str) -> np.ndarray:
+        """Values of a NUMERIC_COLUMNS column for the selected rows (float64, NaN if missing)."""
+        return self.index.numbers[column][self.row_ids()]
+
+    def _distinct(self, column: str) -> int:
+        encoded = self.index.columns[column]
+        codes = encoded.codes[self.row_ids()]
+        codes = codes[codes >= 0]
+        if len(codes) * 8 < len(encoded.values):
+            return len(np.unique(codes))  # Sorting a small selection beats a full-length bincount
+        return int(np.count_nonzero(np.bincount(codes, minlength=len(encoded.values))))
+
+    def kpis(self) -> Dict[str, float]:
+        """
+        KPI sums of the selected rows, with the keys of the asset_kpi_global view.
+
+        Returns:
+            Mapping of total_fat, total_assets, total_olt, total_fdt,
+            total_hc and avg_hc (NaN if nothing is selected).
+        """
+        total_assets = len(self.row_ids())
+        hc = self.numbers('total_hc')
+        total_hc = float(np.nansum(hc))
+        return {
+            'total_fat': self._distinct('fat_id'),
+            'total_assets': total_assets,
+            'total_olt': self._distinct('olt'),
+            'total_fdt': self._distinct('fdt_id'),
+            'total_hc': total_hc,
+            'avg_hc': float(np.nanmean(hc)) if np.isfinite(hc).any() else float('nan'),
+        }
+
+    def group_by(self, column: str) -> pd.DataFrame:
+        """
+        Row count and HC sum per value of an encoded column, like a pandas groupby.
+
+        Rows with a missing value are left out.
+
+        Args:
+            column: One of FILTER_COLUMNS or KEY_COLUMNS.
+
+        Returns:
+            A frame of (column, count, total_hc) sorted by total_hc, descending.
+        """
+        encoded = self.index.columns[column]
+        rows = self.row_ids()
+        codes = encoded.codes[rows]
+        present = codes >= 0
+        codes = codes[present]
+        hc = np.nan_to_num(self.index.numbers['total_hc'][rows][present])
+        counts = np.bincount(codes, minlength=len(encoded.values))
+        sums = np.bincount(codes, weights=hc, minlength=len(encoded.values))
+        groups = np.flatnonzero(counts)
+        result = pd.DataFrame({column: encoded.values[groups], 'count': counts[groups],
+                               'total_hc': sums[groups]})
+        return result.sort_values('total_hc', ascending=False, kind='stable', ignore_index=True)
+
+
+class AssetIndex:
+    """
+    Dictionary-encoded, bitmap-indexed view of the dashboard asset frame.
+
+    The frame is expected to be normalized (see
+    core.services.kpi_views.normalize_dashboard_assets) and is not copied;
+    it must not be modified while the index is in use.
+
+    Attributes:
+        frame: The indexed frame.
+        n_rows: Number of rows.
+        columns: Encoded FILTER_COLUMNS and KEY_COLUMNS present in the frame.
+        numbers: float64 arrays of the NUMERIC_COLUMNS present in the frame.
+    """
+
+    def __init__(self, frame: pd.DataFrame):
+        self.frame = frame
+        self.n_rows = len(frame)
+        self.columns: Dict[str, _EncodedColumn] = {}
+        for column in FILTER_COLUMNS + KEY_COLUMNS:
+            if column in frame.columns:
+                self.columns[column] = _EncodedColumn(
+                    frame[column], with_rows=column in FILTER_COLUMNS, dense=column != 'olt')
+        self.numbers: Dict[str, np.ndarray] = {
+            column: pd.to_numeric(frame[column], errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+            for column in NUMERIC_COLUMNS if column in frame.columns}
+
+        # All rows set, padding bits of the last byte cleared
+        self._all_rows = np.packbits(np.ones(self.n_rows, dtype=bool))
+        logger.info(f"Built asset index over {self.n_rows} rows, {self.nbytes / 2 ** 20:.1f} MiB")
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the index arrays (the frame itself not included)."""
+        total = sum(array.nbytes for array in self.numbers.values())
+        for encoded in self.columns.values():
+            total += encoded.codes.nbytes
+            for array in (encoded.bitmaps, encoded.row_ids, encoded.offsets):
+                if array is not None:
+                    total += array.nbytes
+        return total
+
+    def values(self, column: str) -> list:
+        """Distinct values of an encoded column, sorted."""
+        return self.columns[column].values.tolist()
+
+    def select(self, **filters: FilterValue) -> AssetSelection:
+        """
+        Selects the rows matching every filter.
+
+        Args:
+            **filters: FILTER_COLUMNS name to a value or a list of values
+                (any of them matches). None means no filter on that column.
+
+        Returns:
+            The matching rows.
+
+        Raises:
+            KeyError: If a filter names a column without bitmaps.
+        """
+        bitmap = self._all_rows
+        for column, wanted in filters.items():
+            if wanted is None:
+                continue
+            encoded = self.columns.get(column)
+            if encoded is None or (encoded.bitmaps is None and encoded.row_ids is None):
+                raise KeyError(f"Column '{column}' is not indexed for filtering")
+            if isinstance(wanted, str) or not isinstance(wanted, Iterable):
+                wanted = [wanted]
+            bitmap = bitmap & encoded.bitmap(encoded.codes_of(wanted), self.n_rows)
+        return AssetSelection(self, bitmap)
+
+    def kpis(self, **filters: FilterValue) -> Dict[str, float]:
+        """KPI sums of the rows matching the filters (see AssetSelection.kpis)."""
+        return self.select(**filters).kpis()
+
+    def group_by(self, column: str, **filters: FilterValue) -> pd.DataFrame:
+        """Count and HC sum per value of a column for the matching rows (see AssetSelection.group_by)."""
+        return self.select(**filters).group_by(column)
@@ -0,0 +1,174 @@
+"""
+Declared compact schema of the dashboard asset frame.
+
+A few columns dominate the frame's memory, and their shape is known:
+
+- kota_kab, olt, brand_olt, fat_filter_pemakaian and fdt_id repeat a
+  small set of values (an FDT feeds many FATs): categoricals whose
+  categories are the sorted distinct values, so the same values always get
+  the same codes;
+- latitude_fat and longitude_fat: float32 (about 1 m at Indonesian
+  longitudes, enough for the map);
+- total_hc: the smallest nullable integer type that holds its range.
+
+compact_arrow_table applies the schema to an Arrow table before it is
+converted, so the categoricals come straight from dictionary arrays and no
+object column is built for them. compact_asset_frame does the same for a
+frame that is already in pandas, replacing only the schema's columns.
+Both report (bytes before, bytes after) per column.
+"""
+
+import logging
+import sys
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+logger = logging.getLogger(__name__)
+
+CATEGORY = "category"
+FLOAT32 = "float32"
+SMALLEST_INT = "smallest_int"
+
+ASSET_COMPACT_SCHEMA = {
+    'kota_kab': CATEGORY,
+    'olt': CATEGORY,
+    'brand_olt': CATEGORY,
+    'fat_filter_pemakaian': CATEGORY,
+    'fdt_id': CATEGORY,
+    'latitude_fat': FLOAT32,
+    'longitude_fat': FLOAT32,
+    'total_hc': SMALLEST_INT,
+}
+
+# Candidate integer types, smallest first, with their nullable pandas dtypes
+_INT_TYPES = ((pa.int8(), pd.Int8Dtype()), (pa.int16(), pd.Int16Dtype()),
+              (pa.int32(), pd.Int32Dtype()), (pa.int64(), pd.Int64Dtype()))
+
+# (bytes before, bytes after) per column
+CompactReport = Dict[str, Tuple[int, int]]
+
+
+def _smallest_int(low, high) -> Tuple[pa.DataType, pd.api.extensions.ExtensionDtype]:
+    for arrow_type, pandas_type in _INT_TYPES:
+        info = np.iinfo(arrow_type.to_pandas_dtype())
+        if low is None or (info.min <= low and high <= info.max):
+            return arrow_type, pandas_type
+    return _INT_TYPES[-1]
+
+
+def _sorted_dictionary(column: pa.ChunkedArray) -> pa.ChunkedArray:
+    """Dictionary-encodes a column with the sorted distinct values as the dictionary."""
+    values = pc.unique(column).drop_null()
+    values = values.take(pc.array_sort_indices(values))
+    index_type = _smallest_int(0, len(values))[0]
+    indices = pc.index_in(column, value_set=values).cast(index_type)
+    return pa.chunked_array([pa.DictionaryArray.from_arrays(chunk, values) for chunk in indices.chunks],
+                            type=pa.dictionary(index_type, values.type))
+
+
+def _default_pandas_bytes(column: pa.ChunkedArray) -> int:
+    """Bytes the column takes after a plain to_pandas() (object strings deduplicated, as pyarrow does)."""
+    if pa.types.is_string(column.type) or pa.types.is_large_string(column.type):
+        distinct = pc.unique(column).drop_null().to_pylist()
+        return 8 * len(column) + sum(sys.getsizeof(value) for value in distinct)
+    return 8 * len(column)
+
+
+def compact_arrow_table(table: pa.Table, schema: Dict[str, str] = ASSET_COMPACT_SCHEMA
+                        ) -> Tuple[pd.DataFrame, CompactReport]:
+    """
+    Converts an Arrow table to a DataFrame with the compact schema applied.
+
+    Columns not in the schema (or of an unexpected Arrow type) convert as
+    with a plain to_pandas().
+
+    Args:
+        table: The asset table, e.g. a snapshot (core.utils.asset_snapshot).
+        schema: Column name to CATEGORY, FLOAT32 or SMALLEST_INT.
+
+    Returns:
+        A tuple containing (dataframe, report).
+    """
+    before, int_dtypes = {}, {}
+    for name, kind in schema.items():
+        if name not in table.column_names:
+            continue
+        column = table.column(name)
+        if kind == CATEGORY and (pa.types.is_string(column.type) or pa.types.is_large_string(column.type)):
+            converted = _sorted_dictionary(column)
+        elif kind == FLOAT32 and pa.types.is_floating(column.type):
+            converted = column.cast(pa.float32())
+        elif kind == SMALLEST_INT and pa.types.is_integer(column.type):
+            bounds = pc.min_max(column).as_py()
+            arrow_type, pandas_type = _smallest_int(bounds['min'], bounds['max'])
+            converted = column.cast(arrow_type)
+            int_dtypes[name] = (arrow_type, pandas_type)
+        else:
+            continue
+        before[name] = _default_pandas_bytes(column)
+        table = table.set_column(table.column_names.index(name), name, converted)
+
+    # Nullable integers: a plain conversion turns an int column with nulls into float64.
+    # Only the schema's columns get them; a types_mapper would catch every column of that type.
+    df = table.drop_columns(list(int_dtypes)).to_pandas()
+    for position, name in enumerate(table.column_names):
+        if name in int_dtypes:
+            arrow_type, pandas_type = int_dtypes[name]
+            values = table.column(name).to_pandas(types_mapper={arrow_type: pandas_type}.get)
+            # Back in its place among the data columns (index columns are not in df.columns)
+            df.insert(len([c for c in table.column_names[:position] if c in df.columns]), name, values.array)
+    report = {name: (size, int(df[name].memory_usage(index=False, deep=True))) for name, size in before.items()}
+    return df, report
+
+
+def compact_asset_frame(df: pd.DataFrame, schema: Dict[str, str] = ASSET_COMPACT_SCHEMA
+                        ) -> Tuple[pd.DataFrame, CompactReport]:
+    """
+    Applies the compact schema to a DataFrame.
+
+    Only the schema's columns are converted; the returned frame shares the
+    other columns with ``df``, which is left unchanged.
+
+    Returns:
+        A tuple containing (dataframe, report).
+    """
+    converted, report = {}, {}
+    for name, kind in schema.items():
+        if name not in df.columns:
+            continue
+        column = df[name]
+        if kind == CATEGORY:
+            values = column.astype(object).where(column.notna(), None)
+            new = pd.Series(pd.Categorical(values, categories=sorted(values.dropna().unique().tolist(), key=str)),
+                            index=column.index, name=name)
+        elif kind == FLOAT32:
+            new = pd.to_numeric(column, errors='coerce').astype(np.float32)
+        else:
+            numbers = pd.to_numeric(column, errors='coerce')
+            if numbers.notna().any() and not np.all(np.mod(numbers.dropna(), 1) == 0):
+                continue  # Fractional values do not fit an integer type
+            low, high = (numbers.min(), numbers.max()) if numbers.notna().any() else (None, None)
+            new = numbers.astype(_smallest_int(low, high)[1])
+        converted[name] = new
+        report[name] = (int(column.memory_usage(index=False, deep=True)),
+                        int(new.memory_usage(index=False, deep=True)))
+    if not converted:
+        return df, report
+    compact = pd.DataFrame({name: converted.get(name, df[name]) for name in df.columns}, index=df.index, copy=False)
+    return compact, report
+
+
+def format_compact_report(report: CompactReport) -> str:
+    """One line per column: 'name: before -> after (saved)' in KiB."""
+    lines = []
+    for name, (before, after) in report.items():
+        lines.append(f"{name}: {before / 1024:,.0f} KiB -> {after / 1024:,.0f} KiB "
+                     f"(saved {(before - after) / 1024:,.0f} KiB)")
+    total_before = sum(before for before, _ in report.values())
+    total_after = sum(after for _, after in report.values())
+    lines.append(f"total: {total_before / 1024:,.0f} KiB -> {total_after / 1024:,.0f} KiB")
+    return "\n".join(lines)
@@ -4,15 +4,60 @@ Helper untuk memperbaiki dan mengoptimalkan sistem search secara holistik.
 Menyediakan unified search interface yang menggabungkan static dan dynamic columns.
 """
 
+import json
 import pandas as pd
 import logging
-from typing import Dict, List, Optional, Any, Tuple, TYPE_CHECKING
+from datetime import date
+from typing import Dict, List, Optional, Any, Tuple, Iterator, NamedTuple, TYPE_CHECKING
 
 if TYPE_CHECKING:
     from core.services.AssetDataService import AssetDataService
 
 logger = logging.getLogger(__name__)
 
+# Jumlah hasil per halaman pencarian
+SEARCH_PAGE_SIZE = 50
+# Hasil dihitung persis sampai batas ini; di atasnya dipakai estimasi planner
+SEARCH_COUNT_CAP = 10_000
+
+# Alias tabel pada comprehensive query (AssetDataService.build_comprehensive_query)
+TABLE_ALIASES = {
+    'user_terminals': 'ut',
+    'clusters': 'cl',
+    'home_connecteds': 'hc',
+    'dokumentasis': 'dk',
+    'additional_informations': 'ai'
+}
+
+_SEARCH_FROM = """
+    FROM user_terminals ut
+    LEFT JOIN clusters cl ON ut.fat_id = cl.fat_id
+    LEFT JOIN home_connecteds hc ON ut.fat_id = hc.fat_id
+    LEFT JOIN dokumentasis dk ON ut.fat_id = dk.fat_id
+    LEFT JOIN additional_informations ai ON ut.fat_id = ai.fat_id
+"""
+
+# Urutan hasil: (kolom kunci, pengganti NULL, arah); fat_id selalu menjadi kunci terakhir.
+# Pengganti NULL menaruh FAT tanpa tanggal RFS di akhir pada kedua arah.
+SEARCH_ORDERS = {
+    'fat_id': (None, None, 'ASC'),
+    'rfs_newest': ('ai.tanggal_rfs', date.min, 'DESC'),
+    'rfs_oldest': ('ai.tanggal_rfs', date.max, 'ASC'),
+}
+
+
+def _contains_pattern(value: str) -> str:
+    """LIKE pattern matching value anywhere, with its own % and _ taken literally (ESCAPE '\\')."""
+    escaped = value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f"%{escaped}%"
+
+
+class SearchPage(NamedTuple):
+    """Satu halaman hasil pencarian."""
+    rows: pd.DataFrame
+    next_cursor: Optional[tuple]  # Kunci baris terakhir; None jika ini halaman terakhir
+    search_mode: str              # 'exact' atau 'partial' (mode 'auto' sudah diputuskan)
+
 
 class UnifiedSearchService:
     """
@@ -151,283 +196,250 @@ class UnifiedSearchService:
         """
         Pencarian holistik yang menggabungkan multiple search methods.
 
+        Mengembalikan satu halaman sebesar 'limit' (lihat search_page untuk
+        halaman berikutnya).
+
         Args:
             search_params: {
                 'primary_column': str,     # Kolom utama untuk pencarian
                 'primary_value': str,      # Nilai utama untuk pencarian
                 'additional_filters': Dict[str, str],  # Filter tambahan
                 'search_mode': str,        # 'exact', 'partial', 'auto'
+                'order': str,              # Kunci SEARCH_ORDERS (default 'fat_id')
                 'limit': int               # Limit hasil
             }
 
         Returns:
             DataFrame dengan hasil pencarian
         """
-        try:
-            primary_column = search_params.get('primary_column')
-            primary_value = search_params.get('primary_value')
-            additional_filters = search_params.get('additional_filters', {})
-            search_mode = search_params.get('search_mode', 'auto')
-            limit = search_params.get('limit', 1000)
-
-            if not primary_column or not primary_value:
-                logger.error("Primary column and value are required")
-                return pd.DataFrame()
-
-            # Get column metadata
-            searchable_columns = self.get_all_searchable_columns()
-            if primary_column not in searchable_columns:
-                logger.error(f"Column '{primary_column}' is not searchable")
-                return pd.DataFrame()
-
-            column_meta = searchable_columns[primary_column]
-
-            # Execute primary search
-            if column_meta['type'] == 'static':
-                result_df = self._search_static_column(
-                    column_meta, primary_value, search_mode, limit)
-            else:
-                result_df = self._search_dynamic_column(
-                    column_meta, primary_value, search_mode, limit)
-
-            if result_df is None or result_df.empty:
-                return pd.DataFrame()            # Apply additional filters
-            if additional_filters:
-                result_df = self._apply_additional_filters(
-                    result_df, additional_filters, searchable_columns)
-
-            # Enrich with dynamic columns data for all results
-            result_df = self._enrich_with_dynamic_columns(result_df)
-
-            logger.info(f"Unified search returned {len(result_df)} results")
-            return result_df
-
-        except Exception as e:
-            logger.error(f"Error in unified search: {e}")
+        page = self.search_page(search_params, page_size=search_params.get('limit') or 1000)
+        if page is None or page.rows.empty:
             return pd.DataFrame()
+        logger.info(f"Unified search returned {len(page.rows)} results")
+        return page.rows
 
-    def _search_static_column(self, column_meta: Dict, value: str,
-                              search_mode: str, limit: int) -> Optional[pd.DataFrame]:
-        """Search dalam static column menggunakan optimized query."""
-        try:
-            db_column = column_meta['db_column']
-            table = column_meta.get('table', 'user_terminals')
-            # Determine search operator and add table alias
-            if search_mode == 'exact':
-                where_condition = f"ut.{db_column} = %s"
-                params = [value]
-            elif search_mode == 'partial':
-                where_condition = f"LOWER(ut.{db_column}) LIKE LOWER(%s)"
-                params = [f"%{value}%"]
-            else:  # auto mode
-                # Try exact first, then partial if no results
-                exact_result = self._search_static_column(
-                    column_meta, value, 'exact', limit)
-                if exact_result is not None and not exact_result.empty:
-                    return exact_result
-                return self._search_static_column(
-                    column_meta, value, 'partial', limit)            # Use database filtering for efficiency (not Python filtering)
-            # Create optimized comprehensive query with WHERE clause
-
-            if table == 'user_terminals':
-                # Build efficient query with database-level filtering
-                if search_mode == 'exact':
-                    where_condition = f"ut.{db_column} = %s"
-                    params = [value]
-                elif search_mode == 'partial':
-                    where_condition = f"LOWER(ut.{db_column}) LIKE LOWER(%s)"
-                    params = [f"%{value}%"]
-
-                # Use the same comprehensive SELECT from AssetDataService but with filtering
-                # This ensures ALL columns including dynamic ones are included from ALL tables
-                base_query = self.asset_data_service.build_comprehensive_query()
-                # Remove the ORDER BY and add WHERE condition
-                base_query_parts = base_query.strip().split('ORDER BY')
-                select_and_joins = base_query_parts[0].strip()
-
-                query = select_and_joins + f"""
-                    WHERE {where_condition}
-                    ORDER BY ut.fat_id
-                    LIMIT %s
-                """
-                params.append(limit if limit else 1000)
+    def search_page(self, search_params: Dict[str, Any], cursor: Optional[tuple] = None,
+                    page_size: int = SEARCH_PAGE_SIZE) -> Optional[SearchPage]:
+        """
+        Satu halaman hasil pencarian dengan keyset pagination.
 
-                data, columns, error = self.asset_data_service._execute_query(
-                    query, tuple(params))
+        Halaman berikutnya dimulai setelah baris terakhir halaman sebelumnya
+        (WHERE kunci > kunci terakhir), sehingga setiap halaman adalah satu
+        query sebesar page_size, berapapun jauhnya halaman tersebut. Setiap FAT
+        muncul satu kali, meskipun tabel anak memiliki beberapa baris untuknya.
 
-                if error:
-                    logger.error(
-                        f"Error in optimized comprehensive search: {error}")
-                    return None
+        Args:
+            search_params: Seperti search_unified ('limit' diabaikan). Untuk
+                halaman berikutnya, gunakan search_mode dari halaman pertama.
+            cursor: None untuk halaman pertama, atau next_cursor halaman sebelumnya.
+            page_size: Jumlah baris per halaman.
 
-                if not data:
-                    return pd.DataFrame()
+        Returns:
+            SearchPage, atau None jika terjadi error.
+        """
+        search_mode = search_params.get('search_mode', 'auto')
+        if search_mode == 'auto':
+            # Try exact first, then partial if no results
+            page = self.search_page({**search_params, 'search_mode': 'exact'}, cursor, page_size)
+            if page is None or not page.rows.empty:
+                return page
+            return self.search_page({**search_params, 'search_mode': 'partial'}, cursor, page_size)
+
+        where = self._where(search_params, search_mode)
+        if where is None:
+            return SearchPage(pd.DataFrame(), None, search_mode)
+        conditions, params = where
+
+        order = search_params.get('order', 'fat_id')
+        key_column, sentinel, direction = SEARCH_ORDERS[order]
+        # Child tables may hold several rows per FAT: keep one row per FAT
+        # (the one whose key sorts first) so the keyset is unique.
+        key = f"COALESCE({key_column}, %s)" if key_column else "ut.fat_id"
+        distinct_order = f"ut.fat_id, {key} {direction}" if key_column else "ut.fat_id"
+        select_and_joins = self.get_cached_comprehensive_base_query().replace(
+            "SELECT", f"SELECT DISTINCT ON (ut.fat_id) {key} AS search_key,", 1)
+        inner_params = ([sentinel] if key_column else []) + params + ([sentinel] if key_column else [])
+
+        outer_conditions, outer_params = [], []
+        if cursor is not None:
+            if key_column:
+                comparison = '<' if direction == 'DESC' else '>'
+                outer_conditions.append(
+                    f"(search_key {comparison} %s OR (search_key = %s AND fat_id > %s))")
+                outer_params = [cursor[0], cursor[0], cursor[1]]
+            else:
+                # fat_id is the DISTINCT ON column, so the condition can go inside
+                conditions = conditions + ["ut.fat_id > %s"]
+                inner_params = params + [cursor[0]]
+        outer_where = f"WHERE {' AND '.join(outer_conditions)}" if outer_conditions else ""
+        order_by = f"search_key {direction}, fat_id" if key_column else "fat_id"
+
+        # One extra row tells whether another page follows
+        query = f"""
+            SELECT * FROM (
+                {select_and_joins}
+                WHERE {" AND ".join(conditions)}
+                ORDER BY {distinct_order}
+            ) AS fats
+            {outer_where}
+            ORDER BY {order_by}
+            LIMIT %s
+        """
+        data, columns, error = self.asset_data_service._execute_query(
+            query, tuple(inner_params + outer_params + [page_size + 1]))
 
-                result_df = pd.DataFrame(data, columns=columns)
-                logger.info(
-                    f"Optimized search returned {len(result_df)} rows with {len(result_df.columns)} columns")
-                return result_df
+        if error:
+            logger.error(f"Error in paginated search: {error}")
+            return None
 
+        rows = pd.DataFrame(data or [], columns=columns or [])
+        next_cursor = None
+        if len(rows) > page_size:
+            rows = rows.iloc[:page_size]
+            last = rows.iloc[-1]
+            if key_column:
+                next_cursor = (last['search_key'], last['fat_id'])
             else:
-                # For searches in other tables, use optimized database query too
-                # Determine the correct table alias and column
-                if table == 'clusters':
-                    table_column = f"cl.{db_column}"
-                elif table == 'home_connecteds':
-                    table_column = f"hc.{db_column}"
-                elif table == 'additional_informations':
-                    table_column = f"ai.{db_column}"
-                elif table == 'dokumentasis':
-                    table_column = f"dk.{db_column}"
-                else:
-                    # fallback to user_terminals
-                    table_column = f"ut.{db_column}"
-
-                # Build where condition
-                if search_mode == 'exact':
-                    where_condition = f"{table_column} = %s"
-                    params = [value]
-                elif search_mode == 'partial':
-                    where_condition = f"LOWER({table_column}) LIKE LOWER(%s)"
-                    params = [f"%{value}%"]
-
-                # Same comprehensive query but with different WHERE condition
-                base_query = self.asset_data_service.build_comprehensive_query()
-                # Remove the ORDER BY and add WHERE condition
-                base_query_parts = base_query.strip().split('ORDER BY')
-                select_and_joins = base_query_parts[0].strip()
-
-                query = select_and_joins + f"""
-                    WHERE {where_condition}
-                    ORDER BY ut.fat_id
-                    LIMIT %s
-                """
-                params.append(limit if limit else 1000)
+                next_cursor = (last['fat_id'],)
+        rows = rows.drop(columns='search_key', errors='ignore')
 
-                data, columns, error = self.asset_data_service._execute_query(
-                    query, tuple(params))
+        # Enrich with dynamic columns data for this page only
+        rows = self._enrich_with_dynamic_columns(rows)
+        return SearchPage(rows, next_cursor, search_mode)
 
-                if error:
-                    logger.error(
-                        f"Error in optimized search for {table}: {error}")
-                    return None
-
-                if not data:
-                    return pd.DataFrame()
+    def count_matches(self, search_params: Dict[str, Any]) -> Tuple[Optional[int], bool]:
+        """
+        Jumlah FAT yang cocok: persis sampai SEARCH_COUNT_CAP, di atasnya estimasi planner.
 
-                result_df = pd.DataFrame(data, columns=columns)
-                logger.info(
-                    f"Optimized search in {table} returned {len(result_df)} rows with {len(result_df.columns)} columns")
-                return result_df
+        Args:
+            search_params: Seperti search_page, dengan search_mode yang sudah diputuskan
+                (SearchPage.search_mode).
 
-        except Exception as e:
-            logger.error(f"Exception in static column search: {e}")
+        Returns:
+            A tuple containing (count or None on error, exact).
+        """
+        where = self._where(search_params, search_params.get('search_mode', 'partial'))
+        if where is None:
+            return 0, True
+        conditions, params = where
+        where_sql = " AND ".join(conditions)
+
+        data, _, error = self.asset_data_service._execute_query(
+            f"SELECT count(*) FROM (SELECT DISTINCT ut.fat_id {_SEARCH_FROM} WHERE {where_sql} LIMIT %s) AS matches",
+            tuple(params + [SEARCH_COUNT_CAP + 1]))
+        if error or not data:
+            logger.error(f"Error counting search results: {error}")
+            return None, False
+        count = data[0][0]
+        if count <= SEARCH_COUNT_CAP:
+            return count, True
+
+        data, _, error = self.asset_data_service._execute_query(
+            f"EXPLAIN (FORMAT JSON) SELECT DISTINCT ut.fat_id {_SEARCH_FROM} WHERE {where_sql}", tuple(params))
+        if error or not data:
+            return count, False
+        plan = data[0][0]
+        plan = json.loads(plan) if isinstance(plan, str) else plan
+        return max(int(plan[0]['Plan']['Plan Rows']), count), False
+
+    def iter_search_pages(self, search_params: Dict[str, Any], page_size: int = 1000) -> Iterator[pd.DataFrame]:
+        """Semua hasil pencarian, per halaman (misalnya untuk export)."""
+        cursor = None
+        while True:
+            page = self.search_page(search_params, cursor, page_size)
+            if page is None:
+                return
+            if not page.rows.empty:
+                yield page.rows
+            if page.next_cursor is None:
+                return
+            search_params = {**search_params, 'search_mode': page.search_mode}
+            cursor = page.next_cursor
+
+    def _where(self, search_params: Dict[str, Any], search_mode: str) -> Optional[Tuple[List[str], list]]:
+        """WHERE conditions and parameters for a search, or None if the search is invalid."""
+        primary_column = search_params.get('primary_column')
+        primary_value = search_params.get('primary_value')
+        if not primary_column or not primary_value:
+            logger.error("Primary column and value are required")
             return None
 
-    def _search_dynamic_column(self, column_meta: Dict, value: str,
-                               search_mode: str, limit: int) -> Optional[pd.DataFrame]:
-        """Search dalam dynamic column."""
-        try:
-            column_id = column_meta['column_id']
+        # Get column metadata
+        searchable_columns = self.get_all_searchable_columns()
+        if primary_column not in searchable_columns:
+            logger.error(f"Column '{primary_column}' is not searchable")
+            return None
+        if search_params.get('order', 'fat_id') not in SEARCH_ORDERS:
+            logger.error(f"Unknown search order '{search_params.get('order')}'")
+            return None
 
-            # Determine search pattern
+        condition, params = self._match_condition(
+            searchable_columns[primary_column], primary_value, search_mode)
+        conditions = [condition]
+
+        # Additional filters: case-insensitive partial match, in the database
+        for filter_column, filter_value in (search_params.get('additional_filters') or {}).items():
+            if not filter_value.strip():
+                continue
+            if filter_column not in searchable_columns:
+                logger.info(f"Ignoring filter on non-searchable column '{filter_column}'")
+                continue
+            condition, filter_params = self._match_condition(
+                searchable_columns[filter_column], filter_value, 'partial')
+            conditions.append(condition)
+            params.extend(filter_params)
+        return conditions, params
+
+    def _match_condition(self, column_meta: Dict, value: str, search_mode: str) -> Tuple[str, list]:
+        """WHERE condition matching one searchable column ('exact' or 'partial')."""
+        if column_meta['type'] == 'static':
+            table_column = f"{TABLE_ALIASES.get(column_meta.get('table'), 'ut')}.{column_meta['db_column']}"
             if search_mode == 'exact':
-                search_pattern = value
-                like_operator = "="
-            elif search_mode == 'partial':
-                search_pattern = f"%{value}%"
-                like_operator = "LIKE"
-            else:  # auto mode
-                # Try exact first
-                exact_result = self._search_dynamic_column(
-                    column_meta, value, 'exact', limit)
-                if exact_result is not None and not exact_result.empty:
-                    return exact_result
-                return self._search_dynamic_column(
-                    column_meta, value, 'partial', limit)
-
-            query = """
-                SELECT ut.*, cl.kota_kab, cl.kecamatan, cl.kelurahan,
-                       hc.total_hc, ai.tanggal_rfs,
-                       dcd.column_value as dynamic_value
-                FROM user_terminals ut
-                LEFT JOIN clusters cl ON ut.fat_id = cl.fat_id
-                LEFT JOIN home_connecteds hc ON ut.fat_id = hc.fat_id
-                LEFT JOIN additional_informations ai ON ut.fat_id = ai.fat_id
-                JOIN dynamic_column_data dcd ON ut.fat_id = dcd.record_id
-                WHERE dcd.column_id = %s 
-                AND LOWER(dcd.column_value) {} LOWER(%s)
-                ORDER BY ut.fat_id
-                LIMIT %s
-            """.format(like_operator)
-
-            data, columns, error = self.asset_data_service._execute_query(
-                query, (column_id, search_pattern, limit))
-
-            if error:
-                logger.error(f"Error in dynamic column search: {error}")
-                return None
-
-            if not data:
-                return pd.DataFrame()
-
-            df = pd.DataFrame(data, columns=columns)
-            # Remove helper column
-            if 'dynamic_value' in df.columns:
-                df = df.drop('dynamic_value', axis=1)
-
-            return df
-
-        except Exception as e:
-            logger.error(f"Exception in dynamic column search: {e}")
-            return None
+                return f"{table_column} = %s", [value]
+            return f"LOWER({table_column}) LIKE LOWER(%s) ESCAPE '\\'", [_contains_pattern(value)]
+
+        if search_mode == 'exact':
+            match_sql, search_pattern = "= LOWER(%s)", value
+        else:
+            match_sql, search_pattern = "LIKE LOWER(%s) ESCAPE '\\'", _contains_pattern(value)
+        return f"""EXISTS (
+                SELECT 1 FROM dynamic_column_data dcd
+                WHERE dcd.record_id = ut.fat_id
+                AND dcd.column_id = %s
+                AND LOWER(dcd.column_value) {match_sql}
+            )""", [column_meta['column_id'], search_pattern]
+
+    def top_values(self, search_params: Dict[str, Any], column: str, limit: int = 5) -> List[Any]:
+        """
+        Nilai terbanyak sebuah kolom statis di seluruh hasil pencarian (bukan hanya halaman ini).
 
-    def _apply_additional_filters(self, df: pd.DataFrame, filters: Dict[str, str],
-                                  searchable_columns: Dict) -> pd.DataFrame:
-        """Apply additional filters to search results."""
-        try:
-            filtered_df = df.copy()
-
-            for filter_column, filter_value in filters.items():
-                if not filter_value.strip():
-                    continue
-
-                # Map display name to actual column name in DataFrame
-                actual_column = None
-
-                # Check if it's a direct column match
-                if filter_column in filtered_df.columns:
-                    actual_column = filter_column
-                elif filter_column in searchable_columns:
-                    # Map from searchable columns
-                    meta = searchable_columns[filter_column]
-                    if meta['type'] == 'static':
-                        db_col = meta['db_column']
-                        # Try common column mappings
-                        column_mapping = {
-                            'kota_kab': 'kota_kab',
-                            'kecamatan': 'kecamatan',
-                            'kelurahan': 'kelurahan',
-                            'fat_id': 'fat_id',
-                            'olt': 'olt',
-                            'brand_olt': 'brand_olt',
-                            'hostname_olt': 'hostname_olt'
-                        }
-                        actual_column = column_mapping.get(db_col, db_col)
-
-                if actual_column and actual_column in filtered_df.columns:
-                    # Apply case-insensitive partial match
-                    mask = filtered_df[actual_column].astype(str).str.lower().str.contains(
-                        filter_value.lower(), na=False)
-                    filtered_df = filtered_df[mask]
-                    logger.info(
-                        f"Applied filter {filter_column}={filter_value}, {len(filtered_df)} results remain")
-
-            return filtered_df
+        Args:
+            search_params: Seperti count_matches.
+            column: Nama kolom statis yang bisa dicari (misalnya 'Kota/Kab').
+            limit: Jumlah nilai maksimal.
 
-        except Exception as e:
-            logger.error(f"Error applying additional filters: {e}")
-            return df
+        Returns:
+            Nilai kolom, urut dari jumlah FAT terbanyak; kosong jika terjadi error.
+        """
+        column_meta = self.get_all_searchable_columns().get(column)
+        where = self._where(search_params, search_params.get('search_mode', 'partial'))
+        if column_meta is None or column_meta['type'] != 'static' or where is None:
+            return []
+        conditions, params = where
+        table_column = f"{TABLE_ALIASES.get(column_meta.get('table'), 'ut')}.{column_meta['db_column']}"
+
+        data, _, error = self.asset_data_service._execute_query(f"""
+            SELECT {table_column}, count(DISTINCT ut.fat_id) AS fats
+            {_SEARCH_FROM}
+            WHERE {" AND ".join(conditions)} AND {table_column} IS NOT NULL
+            GROUP BY {table_column}
+            ORDER BY fats DESC, {table_column}
+            LIMIT %s
+        """, tuple(params + [limit]))
+        if error:
+            logger.error(f"Error fetching top values for '{column}': {error}")
+            return []
+        return [row[0] for row in data or []]
 
     def get_search_suggestions(self, column_name: str, partial_value: str,
                                limit: int = 10) -> List[str]:
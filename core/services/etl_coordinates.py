@@ -0,0 +1,281 @@
+"""
+Vectorized coordinate cleaning for AssetPipeline.
+
+Mirrors ``AssetPipeline._apply_coordinate_cleaning`` and
+``_clean_invalid_characters`` cell for cell, but each format is recognised
+once per column with pandas ``.str`` operations and regex ``extract`` on
+Arrow-backed strings (evaluated in C by pyarrow), combined with NumPy masks.
+A row only falls through to the next format if the previous ones did not
+match it.
+
+Arrow's regex engine (RE2) uses ASCII character classes, whereas Python's
+``re``, ``str.strip`` and ``float()`` also accept Unicode digits and spaces.
+Cells containing characters outside printable ASCII (besides '°') are
+therefore handed to an optional per-cell ``fallback`` so results stay
+identical to the per-cell cleaners.
+"""
+
+import re
+from typing import Any, Callable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+_STRING = pd.ArrowDtype(pa.string())
+
+# ASCII whitespace stripped by str.strip(); wider whitespace goes to the fallback
+_WHITESPACE = " \t\n\r\x0b\x0c"
+_WS = r'[ \t\n\r\x0b\x0c]'
+
+# Cells made only of these characters are handled by the vectorized path
+_PLAIN_PATTERN = r'[\t\n\x0b\x0c\r -~°]*'
+
+# ASCII strings accepted by Python's float(): optional whitespace and sign,
+# digits with single underscores between them, optional fraction and
+# exponent, or inf/infinity/nan (any case).
+_DIGITS = r'[0-9](?:_?[0-9])*'
+FLOAT_PATTERN = (
+    r'(?:' + _WS + r'*[+-]?(?:(?:(?:' + _DIGITS + r')?\.' + _DIGITS + r'|' + _DIGITS + r'\.?)'
+    r'(?:[eE][+-]?' + _DIGITS + r')?|(?i:inf|infinity|nan))' + _WS + r'*)'
+)
+
+_COMMA_SPLIT = r'(?s)^(?P<lat>[^,]*),(?P<lon>.*)$'
+_DEGREE_SPLIT = r'(?s)^(?P<lat>[^°]*)°(?P<lon>.*)$'
+_E_SPLIT = r'(?s)^(?P<lat>[^eE]*)[eE](?P<lon>.*)$'
+_DOT_SPACE = r'^(?P<lat>-?[0-9]+\.?[0-9]*)\.' + _WS + r'+(?P<lon>-?[0-9]+\.?[0-9]*)$'
+_DOT_SEPARATED = r'^(?P<lat>-?[0-9]+\.[0-9]+)\.(?P<lon>[0-9]+\.?[0-9]*)$'
+_MERGED = r'^(?P<lat_int>-?[0-9])(?P<lat_dec>[0-9]{6})(?P<lon_int>[0-9]{3})(?P<lon_dec>[0-9]{6})$'
+
+# Already-clean 'lat,lon' / 'lat, lon' values, which every cleaner would
+# return unchanged (apart from dropping the space)
+_CANONICAL = r'^(?P<lat>-?[0-9]+(?:\.[0-9]+)?), ?(?P<lon>-?[0-9]+(?:\.[0-9]+)?)$'
+
+_INVALID_CHARACTERS_RE = re.compile(r'[^\d\.,-]')
+
+# Types that take the "long float" path (isinstance(x, (float, int)))
+_NUMERIC_CELL_TYPES = (float, int, bool, np.float64)
+
+
+def _to_strings(values, index: pd.Index) -> pd.Series:
+    """Arrow-backed string Series from Python strings (None becomes NA)."""
+    return pd.Series(pa.array(np.asarray(values, dtype=object), type=pa.string()),
+                     index=index, dtype=_STRING)
+
+
+def _mask(values: pd.Series) -> np.ndarray:
+    """NumPy boolean mask from an Arrow boolean Series, NA counted as False."""
+    return values.fillna(False).to_numpy(dtype=bool)
+
+
+def _is_float(values: pd.Series) -> np.ndarray:
+    """Mask of strings that Python's float() would accept."""
+    return _mask(values.str.fullmatch(FLOAT_PATTERN))
+
+
+def _tidy_part(part: pd.Series) -> pd.Series:
+    return (part.str.strip(_WHITESPACE).str.replace(',', '.', regex=False)
+            .str.replace(r'\.+', '.', regex=True).str.strip('.'))
+
+
+def clean_comma_separated(values: pd.Series) -> pd.Series:
+    """Vectorized ``_clean_comma_separated``: 'lat,lon' with dot cleanup and float validation."""
+    parts = values.str.strip(_WHITESPACE).str.extract(_COMMA_SPLIT)
+    lat = _tidy_part(parts['lat'])
+    lon = _tidy_part(parts['lon'])
+    return (lat + ',' + lon).where(_is_float(lat) & _is_float(lon))
+
+
+def _from_long_float(values: pd.Series) -> pd.Series:
+    """Vectorized ``_clean_split_from_long_float`` for numeric cells."""
+    numbers = values.astype(float)
+    sign = np.where(numbers < 0, '-', '')
+    digits = _to_strings(numbers.abs().map('{:.10f}'.format), values.index)
+    digits = digits.str.replace('.', '', regex=False).str.rstrip('0')
+    joined = (_to_strings(sign, values.index) + digits.str[0] + '.' + digits.str[1:7]
+              + ',' + digits.str[7:10] + '.' + digits.str[10:])
+    return clean_comma_separated(joined).where(_mask(digits.str.len() >= 10))
+
+
+def _canonical(values: pd.Series) -> pd.Series:
+    parts = values.str.extract(_CANONICAL)
+    return parts['lat'] + ',' + parts['lon']
+
+
+def _degree_separator(values: pd.Series) -> pd.Series:
+    parts = values.str.extract(_DEGREE_SPLIT)
+    lat = parts['lat'].str.strip(_WHITESPACE)
+    lon = parts['lon'].str.replace('°', '', regex=False).str.strip(_WHITESPACE)
+    return clean_comma_separated(lat + ',' + lon)
+
+
+def _two_commas_with_space(values: pd.Series) -> pd.Series:
+    standardized = values.str.strip(_WHITESPACE).str.replace(
+        ', ', ',', regex=False).str.replace(' ', ',', regex=False)
+    return clean_comma_separated(standardized)
+
+
+def _dot_space_separated(values: pd.Series) -> pd.Series:
+    parts = values.str.strip(_WHITESPACE).str.extract(_DOT_SPACE)
+    return parts['lat'] + ',' + parts['lon']
+
+
+def _e_separator(values: pd.Series) -> pd.Series:
+    parts = values.str.strip(_WHITESPACE).str.extract(_E_SPLIT)
+    lat = parts['lat'].str.strip(_WHITESPACE)
+    lon = parts['lon'].str.strip(_WHITESPACE)
+    is_south = _mask(lat.str.upper().str.startswith('S'))
+    lat = lat.where(~is_south, lat.str[1:].str.strip(_WHITESPACE))
+
+    valid = _is_float(lat) & _is_float(lon)
+    if not valid.any():
+        return pd.Series(pd.NA, index=values.index, dtype=_STRING)
+    # float() per value keeps Python's parsing of the validated strings
+    lat_float = pd.Series(lat[valid].to_numpy(dtype=object).astype(float))
+    lon_float = pd.Series(lon[valid].to_numpy(dtype=object).astype(float))
+
+    lat_final = lat_float.where(~(lat_float.abs() > 90), lat_float / 100)
+    lon_final = lon_float.where(~(lon_float.abs() > 180), lon_float / 100)
+    lat_final = lat_final.where(~is_south[valid], -lat_final.abs())
+
+    formatted = lat_final.astype(str) + ',' + lon_final.astype(str)
+    return _to_strings(formatted, values.index[valid]).reindex(values.index)
+
+
+def _dot_separated_no_comma(values: pd.Series) -> pd.Series:
+    values = values.str.strip(_WHITESPACE)
+    parts = values.str.extract(_DOT_SEPARATED)
+    has_comma = _mask(values.str.contains(',', regex=False))
+    return clean_comma_separated(parts['lat'] + ',' + parts['lon']).where(~has_comma)
+
+
+def _merged_coordinates(values: pd.Series) -> pd.Series:
+    compact = (values.str.strip(_WHITESPACE).str.replace(' ', '', regex=False)
+               .str.replace(',', '', regex=False))
+    parts = compact.str.extract(_MERGED)
+    return (parts['lat_int'] + '.' + parts['lat_dec'] + ','
+            + parts['lon_int'] + '.' + parts['lon_dec'])
+
+
+# Applied in order of precedence, as in AssetPipeline._apply_coordinate_cleaning;
+# the last one is the final plain 'lat,lon' attempt. Each cleaner only runs
+# on the rows matching its candidate pattern (None: all remaining rows).
+# Canonical values go first; no earlier cleaner could have changed them.
+STRING_CLEANERS = (
+    (None, _canonical),
+    ('°', _degree_separator),
+    ('[, ]', _two_commas_with_space),
+    (r'\.' + _WS, _dot_space_separated),
+    ('[eE]', _e_separator),
+    (r'^-?[0-9]+\.[0-9]+\.[0-9]', _dot_separated_no_comma),
+    (None, _merged_coordinates),
+    (',', clean_comma_separated),
+)
+
+
+def _resolve(result: np.ndarray, positions: np.ndarray, strings: pd.Series,
+             cleaner: Callable[[pd.Series], pd.Series],
+             candidates: Optional[str] = None) -> np.ndarray:
+    """Runs ``cleaner`` on candidate rows, stores matches in ``result`` and returns the unmatched mask."""
+    unmatched = np.ones(len(strings), dtype=bool)
+    rows = np.arange(len(strings))
+    if candidates is not None:
+        rows = np.flatnonzero(_mask(strings.str.contains(candidates, regex=True)))
+        if len(rows) == 0:
+            return unmatched
+        strings = strings.iloc[rows].reset_index(drop=True)
+    cleaned = cleaner(strings)
+    matched = _mask(cleaned.notna())
+    result[positions[rows[matched]]] = cleaned[matched].to_numpy(dtype=object)
+    unmatched[rows[matched]] = False
+    return unmatched
+
+
+def clean_coordinates(column: pd.Series,
+                      fallback: Optional[Callable[[Any], Optional[str]]] = None) -> pd.Series:
+    """
+    Vectorized equivalent of ``column.apply(AssetPipeline._apply_coordinate_cleaning)``.
+
+    Args:
+        column: Raw coordinate values of any dtype.
+        fallback: Optional per-cell cleaner for values with characters outside
+                  printable ASCII, where RE2 and Python semantics differ.
+                  Without it those values go through the vectorized path.
+
+    Returns:
+        Object Series of normalised 'lat,lon' strings, or None where no
+        format matched.
+    """
+    result = np.full(len(column), None, dtype=object)
+    pending = np.flatnonzero(column.notna().to_numpy())
+    if len(pending) == 0:
+        return pd.Series(result, index=column.index)
+
+    # Numeric cells first: large merged numbers split by digit position
+    values = column.iloc[pending]
+    if pd.api.types.is_numeric_dtype(values.dtype):
+        is_numeric_cell = np.ones(len(pending), dtype=bool)
+    else:
+        is_numeric_cell = values.map(type).isin(_NUMERIC_CELL_TYPES).to_numpy()
+    if is_numeric_cell.any():
+        numeric_positions = pending[is_numeric_cell]
+        unmatched = _resolve(result, numeric_positions,
+                             column.iloc[numeric_positions].reset_index(drop=True), _from_long_float)
+        pending = np.concatenate([pending[~is_numeric_cell], numeric_positions[unmatched]])
+        pending.sort()
+
+    # Everything else is processed as str() of the cell (object first so
+    # datetimes keep their full repr)
+    raw = column.iloc[pending].astype(object).astype(str).to_numpy(dtype=object)
+    strings = (_to_strings(raw, pd.RangeIndex(len(pending)))
+               .str.replace('Â', '', regex=False).str.replace(' ', ' ', regex=False))
+
+    if fallback is not None:
+        exotic = ~_mask(strings.str.fullmatch(_PLAIN_PATTERN))
+        if exotic.any():
+            result[pending[exotic]] = column.iloc[pending[exotic]].map(fallback).to_numpy(dtype=object)
+            pending, strings = pending[~exotic], strings[~exotic]
+
+    strings = strings.str.strip(_WHITESPACE)
+    keep = ~_mask(strings.str.lower().isin(['', 'none', 'nan', '<na>']))
+    pending, strings = pending[keep], strings[keep].reset_index(drop=True)
+
+    for candidates, cleaner in STRING_CLEANERS:
+        if len(pending) == 0:
+            break
+        unmatched = _resolve(result, pending, strings, cleaner, candidates)
+        pending, strings = pending[unmatched], strings[unmatched].reset_index(drop=True)
+
+    return pd.Series(result, index=column.index)
+
+
+def clean_invalid_characters(values: pd.Series) -> np.ndarray:
+    """Vectorized ``_clean_invalid_characters``: keep digits, dot, comma and minus; '' becomes None."""
+    cleaned = values.str.replace(r'[^0-9.,-]', '', regex=True).to_numpy(dtype=object, na_value=None)
+    # Python's \d also keeps non-ASCII digits
+    non_ascii = ~_mask(values.str.fullmatch(r'[\x00-\x7f]*')) & _mask(values.notna())
+    for pos in np.flatnonzero(non_ascii):
+        cleaned[pos] = _INVALID_CHARACTERS_RE.sub('', values.iloc[pos])
+    cleaned[cleaned == ''] = None
+    return cleaned
+
+
+def split_coordinates(column: pd.Series,
+                      fallback: Optional[Callable[[Any], Optional[str]]] = None
+                      ) -> Tuple[pd.Series, pd.Series]:
+    """
+    Clean a raw coordinate column and split it into numeric latitude/longitude.
+
+    Args:
+        column: Raw coordinate values.
+        fallback: Optional per-cell cleaner, see ``clean_coordinates``.
+
+    Returns:
+        Tuple (latitude, longitude) as numeric Series (NaN where invalid).
+    """
+    cleaned = clean_coordinates(column, fallback)
+    # Every cleaned value has the form 'lat,lon'
+    parts = _to_strings(cleaned, column.index).str.extract(_COMMA_SPLIT)
+    lat = pd.Series(clean_invalid_characters(parts['lat']), index=column.index)
+    lon = pd.Series(clean_invalid_characters(parts['lon']), index=column.index)
+    return pd.to_numeric(lat, errors='coerce'), pd.to_numeric(lon, errors='coerce')
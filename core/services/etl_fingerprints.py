@@ -0,0 +1,169 @@
+"""
+Raw-row fingerprints for incremental uploads.
+
+Every raw spreadsheet row is hashed (xxh3-64 over the header and the row's
+cell values) and stored per FAT ID in ``etl_row_hashes`` when the row is
+written. On the next upload, rows whose FAT ID still has the same
+fingerprint are dropped before the pipeline runs, so cleaning and database
+writes scale with the rows that changed rather than with the file.
+
+The table references user_terminals with ON DELETE CASCADE, so a deleted
+asset loses its fingerprint and is loaded again by the next upload.
+"""
+
+import logging
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+import xxhash
+from pandas.api.types import infer_dtype
+from psycopg2 import sql
+
+from core.services.etl_proces import AssetPipeline
+from core.utils.bulk_copy import copy_into_staging
+
+logger = logging.getLogger(__name__)
+
+ROW_HASH_TABLE = "etl_row_hashes"
+
+# Part of every hash; bump it when the pipeline's cleaning rules change so
+# that rows stored under the old rules are processed again
+ROW_HASH_VERSION = 1
+
+CREATE_ROW_HASH_TABLE = f"""
+    CREATE TABLE IF NOT EXISTS {ROW_HASH_TABLE} (
+        fat_id VARCHAR(255) PRIMARY KEY REFERENCES user_terminals(fat_id) ON DELETE CASCADE,
+        row_hash BIGINT NOT NULL,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+# Separator that cannot be confused with cell text
+_CELL_SEPARATOR = "\x1f"
+
+
+def _cell_text(column: pd.Series) -> np.ndarray:
+    values = column.to_numpy()
+    if column.dtype == object and infer_dtype(values, skipna=False) == "string":
+        return values  # Already text, no missing cells
+    return column.astype(str).to_numpy()
+
+
+def hash_raw_rows(df: pd.DataFrame) -> np.ndarray:
+    """
+    Returns the xxh3-64 fingerprint of every row of a raw frame, as int64.
+
+    The header and ROW_HASH_VERSION seed the hash, so the same cells under
+    a different header (renamed or reordered columns) hash differently.
+    """
+    header = _CELL_SEPARATOR.join(str(col) for col in df.columns)
+    seed = xxhash.xxh3_64_intdigest(f"{ROW_HASH_VERSION}{_CELL_SEPARATOR}{header}")
+    columns = [_cell_text(df.iloc[:, position]) for position in range(df.shape[1])]
+    hashes = np.fromiter(
+        (xxhash.xxh3_64_intdigest(_CELL_SEPARATOR.join(cells), seed) for cells in zip(*columns)),
+        dtype=np.uint64, count=len(df))
+    return hashes.view(np.int64)
+
+
+class RowFingerprints:
+    """
+    FAT IDs and fingerprints of the rows of one raw frame.
+
+    Attributes:
+        fat_ids: The cleaned FAT ID of each raw row.
+        hashes: The fingerprint of each raw row (int64, aligned with fat_ids).
+    """
+
+    def __init__(self, fat_ids: pd.Series, hashes: np.ndarray):
+        self.fat_ids = fat_ids
+        self.hashes = hashes
+
+    @classmethod
+    def of(cls, df: pd.DataFrame, pipeline: Optional[AssetPipeline] = None) -> Optional['RowFingerprints']:
+        """Fingerprints of a raw frame, or None if it has no FAT ID column."""
+        fat_ids = (pipeline or AssetPipeline()).raw_fat_ids(df)
+        if fat_ids is None:
+            return None
+        return cls(fat_ids, hash_raw_rows(df))
+
+    def first_per_fat_id(self) -> pd.Series:
+        """Fingerprint of the first row of each FAT ID, the row the pipeline keeps."""
+        first = ~self.fat_ids.duplicated().to_numpy()
+        return pd.Series(self.hashes[first], index=self.fat_ids.to_numpy()[first])
+
+    def unchanged_mask(self, stored: Dict[str, int]) -> np.ndarray:
+        """
+        Marks the rows of FAT IDs whose kept row matches its stored fingerprint.
+
+        All rows of such a FAT ID are marked, so a later duplicate row cannot
+        take the place of the skipped one.
+        """
+        if not stored:
+            return np.zeros(len(self.hashes), dtype=bool)
+        first = self.first_per_fat_id()
+        # Nullable ints: a float round trip would lose bits of the 64-bit hashes
+        known = pd.Series(list(stored.values()), index=list(stored.keys()), dtype="Int64").reindex(first.index)
+        same = (known == first.to_numpy()).fillna(False).to_numpy(dtype=bool)
+        return self.fat_ids.isin(first.index[same]).to_numpy()
+
+    def subset(self, mask: np.ndarray) -> 'RowFingerprints':
+        """Fingerprints of the rows selected by a boolean mask."""
+        return RowFingerprints(self.fat_ids[mask], self.hashes[mask])
+
+    def for_fat_ids(self, fat_ids: Iterable[str]) -> pd.DataFrame:
+        """Frame of (fat_id, row_hash) for the given FAT IDs, ready for store_row_hashes."""
+        first = self.first_per_fat_id()
+        first = first[first.index.isin(pd.Index(fat_ids))]
+        return pd.DataFrame({'fat_id': first.index.astype(object), 'row_hash': first.to_numpy()})
+
+
+def fetch_row_hashes(cur, fat_ids: Iterable[str]) -> Dict[str, int]:
+    """
+    Returns the stored fingerprints of the given FAT IDs (missing ones are left out).
+
+    The FAT IDs are staged with COPY and joined server-side. Returns an
+    empty mapping if the fingerprint table does not exist yet.
+    """
+    cur.execute("SELECT to_regclass(%s)", (ROW_HASH_TABLE,))
+    if cur.fetchone()[0] is None:
+        return {}
+    key_frame = pd.DataFrame({'fat_id': pd.Series(list(fat_ids), dtype=object)}).drop_duplicates()
+    if key_frame.empty:
+        return {}
+    staging_table = f"stage_keys_{ROW_HASH_TABLE}"
+    copy_into_staging(cur, key_frame, ROW_HASH_TABLE, staging_table)
+    cur.execute(sql.SQL("""
+        SELECT h.fat_id, h.row_hash FROM {hashes} AS h JOIN {staging} AS s ON s.fat_id = h.fat_id
+    """).format(hashes=sql.Identifier(ROW_HASH_TABLE), staging=sql.Identifier(staging_table)))
+    stored = dict(cur.fetchall())
+    cur.execute(sql.SQL("DROP TABLE {}").format(sql.Identifier(staging_table)))
+    return stored
+
+
+def store_row_hashes(cur, row_hashes: pd.DataFrame) -> int:
+    """
+    Upserts (fat_id, row_hash) rows into the fingerprint table, creating it if needed.
+
+    Only FAT IDs present in user_terminals are stored. Meant to run in the
+    transaction that wrote the rows, so fingerprints and data commit together.
+
+    Returns:
+        Number of fingerprints written.
+    """
+    if row_hashes is None or row_hashes.empty:
+        return 0
+    cur.execute(CREATE_ROW_HASH_TABLE)
+    staging_table = f"stage_{ROW_HASH_TABLE}"
+    copy_into_staging(cur, row_hashes[['fat_id', 'row_hash']], ROW_HASH_TABLE, staging_table)
+    cur.execute(sql.SQL("""
+        INSERT INTO {hashes} (fat_id, row_hash, updated_at)
+        SELECT s.fat_id, s.row_hash, CURRENT_TIMESTAMP FROM {staging} AS s
+        WHERE EXISTS (SELECT 1 FROM user_terminals AS ut WHERE ut.fat_id = s.fat_id)
+        ON CONFLICT (fat_id) DO UPDATE
+            SET row_hash = EXCLUDED.row_hash, updated_at = EXCLUDED.updated_at
+            WHERE {hashes}.row_hash IS DISTINCT FROM EXCLUDED.row_hash
+    """).format(hashes=sql.Identifier(ROW_HASH_TABLE), staging=sql.Identifier(staging_table)))
+    written = cur.rowcount
+    cur.execute(sql.SQL("DROP TABLE {}").format(sql.Identifier(staging_table)))
+    return written
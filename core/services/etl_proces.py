@@ -3,6 +3,67 @@ from typing import List, Dict, Any, Optional, Tuple
 import numpy as np
 import re
 import pandas as pd
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from core.services.etl_coordinates import split_coordinates
+from core.services.etl_normalize import title_strip, to_int64
+
+# Names of the pipeline stages other modules refer to
+RAW_STAGE = "raw"
+PROCESSED_STAGE = "clean_fat_id"
+SPLIT_STAGE = "split"
+
+# Below this many rows per worker, partitioning costs more than it saves
+MIN_PARTITION_ROWS = 5000
+
+# Worker pools are reused across runs; starting interpreters is the slow part
+_EXECUTORS: Dict[int, ProcessPoolExecutor] = {}
+_EXECUTORS_LOCK = threading.Lock()
+
+
+def _get_executor(workers: int) -> ProcessPoolExecutor:
+    with _EXECUTORS_LOCK:
+        executor = _EXECUTORS.get(workers)
+        if executor is None:
+            # spawn: forking the (multi-threaded) Streamlit server is not safe
+            executor = ProcessPoolExecutor(max_workers=workers,
+                                           mp_context=multiprocessing.get_context("spawn"))
+            _EXECUTORS[workers] = executor
+        return executor
+
+
+def _discard_executor(workers: int):
+    with _EXECUTORS_LOCK:
+        executor = _EXECUTORS.pop(workers, None)
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def clean_fat_ids(fat_ids: pd.Series) -> pd.Series:
+    """Normalises FAT IDs: strip, uppercase, remove whitespace/hyphens."""
+    return (
+        fat_ids
+        .astype(str)
+        .str.strip()
+        .str.upper()
+        # Remove whitespace, tabs, hyphens
+        .str.replace(r'[\s\t\-]+', '', regex=True)
+    )
+
+
+def _run_partition(pipeline: 'AssetPipeline', stages: List[str], df: pd.DataFrame
+                   ) -> Tuple[pd.DataFrame, Dict[str, float], Dict[str, Dict[str, Dict[str, Any]]]]:
+    """Worker entry point: runs row-local stages over one partition, timing each (and each column)."""
+    timings = {}
+    for name in stages:
+        start = time.perf_counter()
+        df = getattr(pipeline, pipeline.STAGE_GRAPH[name][1])(df)
+        timings[name] = time.perf_counter() - start
+    return df, timings, pipeline.pop_column_stats()
 
 
 class AssetPipeline:
@@ -12,8 +73,27 @@ class AssetPipeline:
     Finally, splits the processed data into multiple DataFrames corresponding to target database tables.
     """
 
-    def __init__(self):
-        """Initializes the pipeline configuration with column settings."""
+    # "vectorized" parses whole coordinate columns at once (etl_coordinates);
+    # "legacy" applies the per-cell cleaners below and is kept as the reference.
+    COORDINATE_ENGINES = ("vectorized", "legacy")
+
+    def __init__(self, coordinate_engine: str = "vectorized", workers: int = 1):
+        """
+        Initializes the pipeline configuration with column settings.
+
+        Args:
+            coordinate_engine: One of COORDINATE_ENGINES.
+            workers: Worker processes for the row-local stages (1 runs them in-process).
+        """
+        if coordinate_engine not in self.COORDINATE_ENGINES:
+            raise ValueError(
+                f"Unknown coordinate engine '{coordinate_engine}'. Use one of {self.COORDINATE_ENGINES}.")
+        if workers < 1:
+            raise ValueError(f"workers must be at least 1, got {workers}.")
+        self.coordinate_engine = coordinate_engine
+        self.workers = workers
+        # Per-column {"seconds", "path"} of the typed stages, see pop_column_stats
+        self._column_stats: Dict[str, Dict[str, Dict[str, Any]]] = {}
         # Columns to exclude from string capitalization (if capitalization step is added later)
         self.exclude_columns = {
             "Hostname OLT", "FDT ID", "FATID", "Type OLT", "OLT", "ID FAT",
@@ -127,20 +207,43 @@ class AssetPipeline:
             return df
         print("  Pipeline Step: Cleaning column names...")
 
+        df.columns = self._clean_names(df.columns)
+        return df
+
+    @staticmethod
+    def _clean_names(columns) -> List[str]:
+        """Column names as clean_column_names leaves them."""
         target_col_name = "Status OSP AMARTA"  # Assuming this is still relevant
         new_cols = []
         count = 1
 
-        for col in df.columns:
+        for col in columns:
             current_col_name = col
             if col == target_col_name:
                 current_col_name = f"{target_col_name} {count}"
                 count += 1
             cleaned_name = re.sub(r"\s+", " ", str(current_col_name)).strip()
             new_cols.append(cleaned_name)
+        return new_cols
 
-        df.columns = new_cols
-        return df
+    def raw_fat_ids(self, df: pd.DataFrame) -> Optional[pd.Series]:
+        """
+        The FAT IDs a raw (unprocessed) frame's rows will have after the pipeline.
+
+        Only the FAT ID column is cleaned, so this is cheap compared to a
+        full run.
+
+        Args:
+            df: The raw input DataFrame, with its original header.
+
+        Returns:
+            The cleaned FAT ID per row (same index as df), or None if the
+            frame has no FAT ID column.
+        """
+        for position, name in enumerate(self._clean_names(df.columns)):
+            if self.column_rename_map.get(name, name) == 'fat_id':
+                return clean_fat_ids(df.iloc[:, position])
+        return None
 
     def capitalize_columns_except(self, df: pd.DataFrame) -> pd.DataFrame:
         """Capitalizes string columns except those specified in `exclude_columns`."""
@@ -149,8 +252,9 @@ class AssetPipeline:
         print("  Pipeline Step: Capitalizing string values...")
         for col in df.columns:
             if col not in self.exclude_columns and df[col].dtype == "object":
-                df[col] = df[col].apply(
-                    lambda x: x.title().strip() if isinstance(x, str) else x)
+                start = time.perf_counter()
+                df[col], path = title_strip(df[col])
+                self._record_column("capitalize", col, start, path)
         return df
     # -----------------------------
 
@@ -175,15 +279,30 @@ class AssetPipeline:
         print("  Pipeline Step: Converting column types (Int64)...")
         for col in int64_cols:
             if col in df.columns:
-                df[col] = df[col].astype(str).str.replace(
-                    "[., ]", "", regex=True).str.strip()
-                df[col] = pd.to_numeric(
-                    df[col], errors="coerce").astype("Int64")
+                # Numeric columns are cast directly; text is parsed without separators
+                start = time.perf_counter()
+                df[col], path = to_int64(df[col])
+                self._record_column("convert_types", col, start, path)
 
         print("  Pipeline Step: Converting column types (Others)...")
         df = df.astype(other_cols, errors="ignore")
         return df
 
+    def _record_column(self, stage: str, col: str, start: float, path: str):
+        self._column_stats.setdefault(stage, {})[col] = {
+            "seconds": time.perf_counter() - start, "path": path}
+
+    def pop_column_stats(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """
+        Returns and clears the per-column stats of the typed normalisation stages.
+
+        Returns:
+            {stage: {column: {"seconds": float, "path": str}}} for the
+            'capitalize' and 'convert_types' stages run since the last call.
+        """
+        stats, self._column_stats = self._column_stats, {}
+        return stats
+
     # --- Coordinate Cleaning Methods ---
 
     def _clean_comma_separated(self, coord: Any) -> Optional[str]:
@@ -421,6 +540,15 @@ class AssetPipeline:
             return df
 
         print(f"  -> Processing column '{original_col}'...")
+        if self.coordinate_engine == "vectorized":
+            df[lat_col], df[lon_col] = split_coordinates(
+                df[original_col], fallback=self._apply_coordinate_cleaning)
+            print(
+                f"     ✅ Split into '{lat_col}' and '{lon_col}', converted to numeric.")
+            df.drop(columns=[original_col], inplace=True, errors='ignore')
+            print(f"     ✅ Dropped original column '{original_col}'.")
+            return df
+
         # Apply the cleaning chain
         cleaned_coords = df[original_col].apply(
             self._apply_coordinate_cleaning)
@@ -464,64 +592,66 @@ class AssetPipeline:
         """Cleans the 'fat_id' column: strip, uppercase, remove whitespace/hyphens."""
         # This is part of split_data, logging done there
         if 'fat_id' in df.columns:
-            df['fat_id'] = (
-                df['fat_id']
-                .astype(str)
-                .str.strip()
-                .str.upper()
-                # Remove whitespace, tabs, hyphens
-                .str.replace(r'[\s\t\-]+', '', regex=True)
-            )
+            df['fat_id'] = clean_fat_ids(df['fat_id'])
         return df
 
     def _expand_fat_id_ranges(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Expands rows where 'fat_id' represents a range (e.g., 'ID1-ID2') into separate rows."""
+        """
+        Expands rows where 'fat_id' represents a range (e.g., 'ID1-ID2') into separate rows.
+
+        A value is a range when splitting it on '-' leaves exactly two
+        non-blank parts; each part becomes its own row (stripped) and the
+        other columns are repeated. Any other value keeps its row unchanged.
+        Rows stay in order and keep their index labels.
+        """
         # This is part of split_data, logging done there
         if 'fat_id' not in df.columns:
             return df
 
-        expanded_rows = []
-        for _, row in df.iterrows():
-            fat_id = str(row['fat_id']).strip(
-            ) if pd.notna(row['fat_id']) else ''
-
-            # Check for range format (contains '-')
-            if '-' in fat_id:
-                id_parts = [part.strip()
-                            for part in fat_id.split('-') if part.strip()]
-                # If it's a valid range (exactly two parts after split)
-                if len(id_parts) == 2:
-                    row1 = row.copy()
-                    row1['fat_id'] = id_parts[0]
-                    expanded_rows.append(row1)
-
-                    row2 = row.copy()
-                    row2['fat_id'] = id_parts[1]
-                    expanded_rows.append(row2)
-                else:
-                    # Invalid range format, keep original row
-                    expanded_rows.append(row)
-            else:
-                # Not a range, keep original row
-                expanded_rows.append(row)
-
-        return pd.DataFrame(expanded_rows) if expanded_rows else pd.DataFrame(columns=df.columns)
+        fat_ids = df['fat_id'].reset_index(drop=True)
+        text = fat_ids.astype(object).where(fat_ids.notna(), '').astype(str).str.strip()
+
+        # One entry per non-blank part, indexed by row position
+        parts = text[text.str.contains('-', regex=False)].str.split('-').explode().str.strip()
+        parts = parts[parts != '']
+        range_parts = parts[parts.groupby(level=0).transform('size') == 2]
+
+        # List column holding both parts for range rows, then one row per part
+        expanded_ids = fat_ids.astype(object)
+        if not range_parts.empty:
+            grouped = range_parts.groupby(level=0).agg(list)
+            expanded_ids.iloc[grouped.index] = grouped.values
+        return df.assign(fat_id=expanded_ids.values).explode('fat_id')
+
+    def _prepare_fat_ids(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Expands FAT ID ranges and keeps the first row per FAT ID (fat_id must already be cleaned)."""
+        if df.empty:
+            return df
+        df = self._expand_fat_id_ranges(df)
+        df.drop_duplicates(subset='fat_id', keep="first",
+                           inplace=True)  # Keep cleaning fat_id here
+        print(
+            f"  -> Base data prepared with {len(df)} unique FAT IDs after cleaning/expansion.")
+        return df
 
     def split_data(self, df: pd.DataFrame) -> Dict[str, pd.DataFrame]:
         """Splits the processed DataFrame into multiple DataFrames based on target table schemas."""
-        print("\n--- Splitting Data for Target Tables ---")
         if df.empty:
+            print("\n--- Splitting Data for Target Tables ---")
             print("  -> Input DataFrame is empty. Returning empty dictionary.")
             print("  Pipeline Step: Skipping data splitting (empty DataFrame).")
             return {}
 
         # Clean and expand fat_id before splitting
-        df = self._clean_fat_id(df)
-        df = self._expand_fat_id_ranges(df)
-        df.drop_duplicates(subset='fat_id', keep="first",
-                           inplace=True)  # Keep cleaning fat_id here
-        print(
-            f"  -> Base data prepared with {len(df)} unique FAT IDs after cleaning/expansion.")
+        df = self._prepare_fat_ids(self._clean_fat_id(df))
+        return self._split_tables(df)
+
+    def _split_tables(self, df: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+        """Selects each target table's columns from the prepared DataFrame."""
+        print("\n--- Splitting Data for Target Tables ---")
+        if df.empty:
+            print("  -> Input DataFrame is empty. Returning empty dictionary.")
+            return {}
 
         split_dfs = {}
         table_definitions = {
@@ -564,6 +694,91 @@ class AssetPipeline:
 
     # --- Main Pipeline Execution ---
 
+    # Stage graph: stage -> (upstream stage, AssetPipeline method). Each stage
+    # takes its upstream stage's output; RAW_STAGE is the input frame.
+    STAGE_GRAPH = {
+        "clean_column_names": (RAW_STAGE, "clean_column_names"),
+        "capitalize": ("clean_column_names", "capitalize_columns_except"),
+        "rename": ("capitalize", "_rename_columns"),
+        "fill_na": ("rename", "fill_na_values"),
+        "clean_values": ("fill_na", "clean_column_values"),
+        "coordinates": ("clean_values", "_process_all_coordinates"),
+        "convert_types": ("coordinates", "_convert_column_types"),
+        PROCESSED_STAGE: ("convert_types", "_clean_fat_id"),
+        "prepare_fat_ids": (PROCESSED_STAGE, "_prepare_fat_ids"),
+        SPLIT_STAGE: ("prepare_fat_ids", "_split_tables"),
+    }
+
+    # Stages that only look at their own row, in graph order. With workers > 1
+    # they run on row partitions in worker processes; FAT ID de-duplication
+    # and the split need the whole frame and always run here.
+    ROW_LOCAL_STAGES = ("clean_column_names", "capitalize", "rename", "fill_na",
+                        "clean_values", "coordinates", "convert_types", PROCESSED_STAGE)
+
+    def run_partitioned(self, df: pd.DataFrame, stages: List[str]
+                        ) -> Tuple[pd.DataFrame, Dict[str, float], Dict[str, Dict[str, Dict[str, Any]]]]:
+        """
+        Runs consecutive row-local stages over row partitions of df in worker processes.
+
+        Partitions keep their index labels and are concatenated in order. If
+        a stage inferred different dtypes for the same column in different
+        partitions (e.g. a date column that only parses in some of them),
+        the stages are run again over the whole frame so the result is the
+        same as a single-process run.
+
+        Args:
+            df: Input of the first stage in ``stages``; it is not modified.
+            stages: Consecutive entries of ROW_LOCAL_STAGES.
+
+        Returns:
+            Tuple of (output of the last stage, {stage: seconds}, column stats
+            as from pop_column_stats). Seconds are those of the slowest partition.
+        """
+        partitions = min(self.workers, len(df) // MIN_PARTITION_ROWS)
+        if partitions < 2:
+            return _run_partition(self, stages, df.copy())
+
+        bounds = np.linspace(0, len(df), partitions + 1).astype(int)
+        parts = [df.iloc[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+        try:
+            results = list(_get_executor(self.workers).map(
+                _run_partition, [self] * partitions, [stages] * partitions, parts))
+        except BrokenProcessPool as e:
+            print(f"DEBUG: ETL worker pool failed ({e}); running stages in one process.")
+            _discard_executor(self.workers)
+            return _run_partition(self, stages, df.copy())
+
+        frames = [frame for frame, _, _ in results]
+        if any(not frame.dtypes.equals(frames[0].dtypes) for frame in frames[1:]):
+            print("DEBUG: Partitions produced different column types; re-running stages in one process.")
+            return _run_partition(self, stages, df.copy())
+
+        timings = {name: max(times[name] for _, times, _ in results) for name in stages}
+        column_stats = {}
+        for _, _, partition_stats in results:
+            for stage, columns in partition_stats.items():
+                for col, stat in columns.items():
+                    merged = column_stats.setdefault(stage, {}).setdefault(col, {"seconds": 0.0, "path": stat["path"]})
+                    merged["seconds"] = max(merged["seconds"], stat["seconds"])
+                    if stat["path"] not in merged["path"].split("+"):
+                        merged["path"] += "+" + stat["path"]
+        return pd.concat(frames), timings, column_stats
+
+    def run_staged(self, df: pd.DataFrame) -> 'PipelineResult':
+        """
+        Returns a lazily evaluated pipeline run over a raw DataFrame.
+
+        Nothing runs until ``processed`` or ``splits`` is read from the
+        result; each stage then runs once and is timed.
+
+        Args:
+            df: The raw input pandas DataFrame.
+
+        Returns:
+            A PipelineResult bound to this pipeline.
+        """
+        return PipelineResult(self, df)
+
     def run(self, df: pd.DataFrame) -> Optional[pd.DataFrame]:
         """
         Runs the complete asset data cleaning and processing pipeline,
@@ -582,21 +797,122 @@ class AssetPipeline:
 
         try:
             print("Starting Asset Pipeline...")
-            df = self.clean_column_names(df)  # Step 1 <-- Now called correctly
-            df = self.capitalize_columns_except(df)  # Step 2
-            df = self._rename_columns(df)  # Step 3
-            df = self.fill_na_values(df)  # Step 4
-            df = self.clean_column_values(df)  # Step 5
-            df = self._process_all_coordinates(
-                df)  # Step 6: Process coordinates
-            # Step 7: Convert types AFTER coordinates are split
-            df = self._convert_column_types(df)
-
-            # Step 8: Split the processed data
-            split_dataframes = self.split_data(df)
-            print("Asset Pipeline finished successfully (before splitting).")
-            return df
+            result = self.run_staged(df)
+            processed = result.processed
+            print(f"Asset Pipeline finished successfully (before splitting). {result.timing_report()}")
+            return processed
         except Exception as e:
             print(f"ERROR during pipeline execution: {e}")
             # st.error(...) removed, error logged above
             return None  # Return None on critical pipeline error
+
+
+class PipelineResult:
+    """
+    Memoised run of AssetPipeline.STAGE_GRAPH over one input frame.
+
+    Stages run on demand, at most once each, and their durations are kept
+    in ``timings`` (per column for the typed stages in ``column_stats``).
+    Reading ``processed`` runs the cleaning stages; reading ``splits``
+    then only adds FAT ID preparation and the table split.
+    Stages may modify their input in place, so intermediate frames are
+    released once the next stage has consumed them; the processed frame
+    and the splits are kept.
+    """
+
+    RETAINED_STAGES = (PROCESSED_STAGE, SPLIT_STAGE)
+
+    def __init__(self, pipeline: AssetPipeline, df: pd.DataFrame, seed_stage: str = RAW_STAGE):
+        """
+        Args:
+            pipeline: The pipeline whose stages are run.
+            df: Input frame, taken as the output of ``seed_stage``.
+            seed_stage: Stage the input corresponds to; only later stages run.
+        """
+        self.pipeline = pipeline
+        self.timings: Dict[str, float] = {}
+        # {stage: {column: {"seconds", "path"}}} of the typed normalisation stages
+        self.column_stats: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._outputs: Dict[str, Any] = {seed_stage: df}
+        self._released = set()
+
+    @classmethod
+    def from_processed(cls, df: pd.DataFrame, pipeline: Optional[AssetPipeline] = None) -> 'PipelineResult':
+        """
+        Result for an already processed (possibly user-edited) DataFrame.
+
+        The frame is copied and still goes through FAT ID cleaning, as the
+        user may have typed new IDs.
+        """
+        return cls(pipeline or AssetPipeline(), df.copy(), seed_stage="convert_types")
+
+    def derive(self, df: pd.DataFrame) -> 'PipelineResult':
+        """Result for a row subset of this result's processed frame (e.g. only new FAT IDs)."""
+        return PipelineResult(self.pipeline, df, seed_stage=PROCESSED_STAGE)
+
+    def stage(self, name: str) -> Any:
+        """Returns a stage's output, running it (and any missing upstream stage) first."""
+        if name in self._outputs:
+            return self._outputs[name]
+        if name in self._released:
+            raise RuntimeError(f"Output of stage '{name}' was already consumed by a later stage.")
+        if name not in self.pipeline.STAGE_GRAPH:
+            raise KeyError(f"Stage '{name}' is not available in this result.")
+        if self.pipeline.workers > 1 and name in self.pipeline.ROW_LOCAL_STAGES:
+            return self._run_partitioned(name)
+
+        upstream, method = self.pipeline.STAGE_GRAPH[name]
+        data = self.stage(upstream)
+        start = time.perf_counter()
+        output = getattr(self.pipeline, method)(data)
+        self.timings[name] = time.perf_counter() - start
+        self.column_stats.update(self.pipeline.pop_column_stats())
+        self._outputs[name] = output
+        if upstream not in self.RETAINED_STAGES:
+            del self._outputs[upstream]
+            self._released.add(upstream)
+        return output
+
+    def _run_partitioned(self, name: str) -> pd.DataFrame:
+        # Run every missing row-local stage up to `name` in one pass over the partitions
+        graph = self.pipeline.STAGE_GRAPH
+        chain = [name]
+        upstream = graph[name][0]
+        while (upstream not in self._outputs and upstream not in self._released
+               and upstream in self.pipeline.ROW_LOCAL_STAGES):
+            chain.insert(0, upstream)
+            upstream = graph[upstream][0]
+
+        data = self.stage(upstream)
+        output, timings, column_stats = self.pipeline.run_partitioned(data, chain)
+        self.timings.update(timings)
+        self.column_stats.update(column_stats)
+        self._outputs[name] = output
+        self._released.update(chain[:-1])
+        if upstream not in self.RETAINED_STAGES:
+            del self._outputs[upstream]
+            self._released.add(upstream)
+        return output
+
+    @property
+    def processed(self) -> pd.DataFrame:
+        """The cleaned, combined DataFrame (before splitting)."""
+        return self.stage(PROCESSED_STAGE)
+
+    @property
+    def splits(self) -> Dict[str, pd.DataFrame]:
+        """The processed data split per target table."""
+        return self.stage(SPLIT_STAGE)
+
+    def matches(self, df: pd.DataFrame) -> bool:
+        """True if df is identical to the processed frame, i.e. its splits can be reused."""
+        processed = self._outputs.get(PROCESSED_STAGE)
+        return processed is not None and processed.equals(df) and list(processed.columns) == list(df.columns)
+
+    def timing_report(self) -> str:
+        """One-line summary of the stage durations run so far."""
+        if not self.timings:
+            return "No stages run."
+        total = sum(self.timings.values())
+        stages = ", ".join(f"{name} {seconds:.3f}s" for name, seconds in self.timings.items())
+        return f"Stage timings ({total:.3f}s total): {stages}"
@@ -0,0 +1,201 @@
+"""
+Chunked reading and processing of large asset spreadsheets.
+
+Files are read in bounded chunks (pandas' chunked CSV reader, openpyxl's
+read-only mode for XLSX) and every chunk goes through the regular
+AssetPipeline stages on its own. The only state kept across chunks is the
+set of FAT IDs already emitted, so a FAT ID repeated in a later chunk is
+dropped exactly like ``split_data`` drops it within one frame.
+"""
+
+import os
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+import pandas as pd
+from pandas.io.parsers import TextParser
+
+from core.services.etl_proces import AssetPipeline, PipelineResult
+
+# Rows per chunk; bounds peak memory of the streaming ETL
+STREAM_CHUNK_ROWS = 20000
+
+EXCEL_EXTENSIONS = (".xlsx", ".xlsm")
+
+
+def _is_excel(uploaded_file) -> bool:
+    name = getattr(uploaded_file, "name", "") or ""
+    return os.path.splitext(name)[1].lower() in EXCEL_EXTENSIONS
+
+
+def _file_size(uploaded_file) -> Optional[int]:
+    size = getattr(uploaded_file, "size", None)
+    if size is None and hasattr(uploaded_file, "getbuffer"):
+        size = uploaded_file.getbuffer().nbytes
+    return size
+
+
+def read_uploaded_table(uploaded_file) -> pd.DataFrame:
+    """Reads a whole uploaded CSV or XLSX file into a DataFrame."""
+    if _is_excel(uploaded_file):
+        return pd.read_excel(uploaded_file)
+    return pd.read_csv(uploaded_file)
+
+
+def _excel_value(value):
+    # Mirrors pandas' openpyxl reader: blanks become "", integral floats become ints
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def _excel_frame(header: List, rows: List[List]) -> pd.DataFrame:
+    # Same parser pd.read_excel uses, so dtype inference matches the whole-file path
+    return TextParser([header] + rows, header=0).read()
+
+
+def _iter_excel_chunks(uploaded_file, chunk_rows: int) -> Iterator[Tuple[pd.DataFrame, Optional[float]]]:
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(uploaded_file, read_only=True, data_only=True)
+    try:
+        sheet = workbook.worksheets[0]
+        total_rows = sheet.max_row  # From the sheet's dimension tag; may be missing
+        rows = sheet.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        header = [_excel_value(value) for value in header]
+
+        batch, read = [], 0
+        for row in rows:
+            if all(value is None for value in row):
+                continue
+            batch.append([_excel_value(value) for value in row[:len(header)]])
+            read += 1
+            if len(batch) == chunk_rows:
+                progress = min(read / (total_rows - 1), 1.0) if total_rows and total_rows > 1 else None
+                yield _excel_frame(header, batch), progress
+                batch = []
+        if batch:
+            yield _excel_frame(header, batch), 1.0
+    finally:
+        workbook.close()
+
+
+def _iter_csv_chunks(uploaded_file, chunk_rows: int) -> Iterator[Tuple[pd.DataFrame, Optional[float]]]:
+    size = _file_size(uploaded_file)
+    with pd.read_csv(uploaded_file, chunksize=chunk_rows) as reader:
+        for chunk in reader:
+            # The parser reads ahead, so this is an estimate
+            progress = min(uploaded_file.tell() / size, 1.0) if size else None
+            yield chunk, progress
+
+
+def iter_raw_chunks(uploaded_file, chunk_rows: int = STREAM_CHUNK_ROWS
+                    ) -> Iterator[Tuple[pd.DataFrame, Optional[float]]]:
+    """
+    Reads an uploaded CSV or XLSX file in chunks of at most ``chunk_rows`` rows.
+
+    Args:
+        uploaded_file: A binary file object (e.g. from st.file_uploader).
+                       Its name decides between XLSX and CSV.
+        chunk_rows: Maximum rows per chunk.
+
+    Yields:
+        Tuples (raw_chunk, progress), where progress is the fraction of the
+        file read so far (None if it cannot be estimated).
+    """
+    if _is_excel(uploaded_file):
+        yield from _iter_excel_chunks(uploaded_file, chunk_rows)
+    else:
+        yield from _iter_csv_chunks(uploaded_file, chunk_rows)
+
+
+class ChunkedAssetPipeline:
+    """
+    Runs AssetPipeline chunk by chunk, de-duplicating FAT IDs across chunks.
+
+    Attributes:
+        seen_fat_ids: FAT IDs already emitted by earlier chunks.
+        duplicates_dropped: Rows dropped because their FAT ID was seen in an earlier chunk.
+        timings: Total seconds per pipeline stage over all chunks.
+    """
+
+    def __init__(self, pipeline: Optional[AssetPipeline] = None):
+        self.pipeline = pipeline or AssetPipeline()
+        self.seen_fat_ids: Set[str] = set()
+        self.duplicates_dropped = 0
+        self.timings: Dict[str, float] = {}
+
+    def process(self, raw_chunk: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+        """
+        Cleans one raw chunk and splits it per target table.
+
+        Args:
+            raw_chunk: Rows of the raw spreadsheet, with its original header.
+
+        Returns:
+            Mapping of table name to the chunk's rows for that table, without
+            FAT IDs emitted by earlier chunks. Empty if nothing is left.
+        """
+        if raw_chunk.empty:
+            return {}
+        result = self.pipeline.run_staged(raw_chunk)
+        prepared = result.stage("prepare_fat_ids")
+
+        if 'fat_id' in prepared.columns:
+            repeated = prepared['fat_id'].isin(self.seen_fat_ids)
+            if repeated.any():
+                self.duplicates_dropped += int(repeated.sum())
+                prepared = prepared[~repeated]
+            self.seen_fat_ids.update(prepared['fat_id'].dropna())
+
+        self._add_timings(result.timings)
+        if prepared.empty:
+            return {}
+        split = PipelineResult(self.pipeline, prepared, seed_stage="prepare_fat_ids")
+        splits = split.splits
+        self._add_timings(split.timings)
+        return splits
+
+    def _add_timings(self, timings: Dict[str, float]):
+        for stage, seconds in timings.items():
+            self.timings[stage] = self.timings.get(stage, 0.0) + seconds
+
+
+def stream_file_splits(uploaded_file, chunk_rows: int = STREAM_CHUNK_ROWS,
+                       chunked: Optional[ChunkedAssetPipeline] = None,
+                       on_chunk: Optional[Callable[[int, int, Optional[float]], None]] = None,
+                       row_filter: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None
+                       ) -> Iterator[Dict[str, pd.DataFrame]]:
+    """
+    Reads, cleans and splits an uploaded file chunk by chunk.
+
+    Args:
+        uploaded_file: The file object (CSV or XLSX).
+        chunk_rows: Maximum raw rows per chunk.
+        chunked: Optional ChunkedAssetPipeline to use (to inspect its state afterwards).
+        on_chunk: Optional callback(chunk_number, rows_read, progress) after each chunk.
+        row_filter: Optional callable returning the raw rows of a chunk to process
+                    (e.g. without rows unchanged since the last upload).
+
+    Yields:
+        Per-table splits of each chunk (see ``ChunkedAssetPipeline.process``).
+    """
+    chunked = chunked or ChunkedAssetPipeline()
+    rows_read = 0
+    for number, (raw_chunk, progress) in enumerate(iter_raw_chunks(uploaded_file, chunk_rows), start=1):
+        start = time.perf_counter()
+        rows_read += len(raw_chunk)
+        if row_filter:
+            raw_chunk = row_filter(raw_chunk)
+        splits = chunked.process(raw_chunk)
+        print(f"DEBUG: Chunk {number} ({len(raw_chunk)} rows) processed in "
+              f"{time.perf_counter() - start:.2f}s")
+        if splits:
+            yield splits
+        if on_chunk:
+            on_chunk(number, rows_read, progress)
@@ -0,0 +1,292 @@
+"""
+Materialized views behind the dashboard KPIs and aggregations.
+
+``asset_kpi_base`` applies the dashboard's value cleaning in SQL (kota_kab
+title-cased and invalid cities dropped, brand_olt mapped to one spelling,
+fat_filter_pemakaian upper-cased with anomalies as 'UNKNOWN', negative HC
+dropped). The materialized views aggregate it once: global KPIs, per
+kota_kab, and per brand_olt / fat_filter_pemakaian / olt both per city and
+overall (kota_kab = 'All'). The dashboard then reads O(groups) rows.
+
+The views are refreshed with REFRESH MATERIALIZED VIEW CONCURRENTLY, so
+readers are never blocked, and remember the asset table watermark they
+were built from (see core.utils.asset_snapshot): readers can tell stale
+views from fresh ones without comparing data.
+
+``normalize_dashboard_assets`` and ``kpi_frames_from_assets`` compute the
+same values in pandas for when the views are unavailable.
+"""
+
+import json
+import logging
+from typing import Dict, Optional
+
+import pandas as pd
+from psycopg2 import sql
+
+from core.utils.asset_snapshot import ensure_watermark_triggers, fetch_watermark
+
+logger = logging.getLogger(__name__)
+
+# Tables the KPI views read
+KPI_TABLES = ("user_terminals", "clusters", "home_connecteds")
+
+# Scope value of the rows aggregated over every kota_kab
+ALL_KOTA = 'All'
+
+# Value cleaning shared by the views and the dashboard
+INVALID_KOTA = ('LOCAL OPERATOR', 'NONE', '', 'NAN', '#N/A', '#REF!', 'UNKNOWN')
+INVALID_FAT_FILTER = ('#N/A', '#REF!', 'BISA DIPAKAI FAT LOSS', 'NAN', 'NONE', '')
+BRAND_MAPPING = {
+    'Fiber Home': 'Fiberhome',
+    'FIBER HOME': 'Fiberhome',
+    'fiberhome': 'Fiberhome',
+    'FIBERHOME': 'Fiberhome',
+    'fiber home': 'Fiberhome',
+    'ZTE': 'Zte',
+    'zte': 'Zte',
+    'HUAWEI': 'Huawei',
+    'huawei': 'Huawei',
+    'BDCOM': 'Bdcom',
+    'bdcom': 'Bdcom',
+    'RAISECOM': 'Raisecom',
+    'raisecom': 'Raisecom',
+    '#N/A': 'Unknown',
+    '#REF!': 'Unknown',
+    'NAN': 'Unknown',
+    'NONE': 'Unknown',
+    '': 'Unknown',
+    'nan': 'Unknown'
+}
+
+# Dimensions aggregated per kota_kab and overall
+KPI_DIMENSIONS = ("brand_olt", "fat_filter_pemakaian", "olt")
+
+BASE_VIEW = "asset_kpi_base"
+GLOBAL_VIEW = "asset_kpi_global"
+KOTA_VIEW = "asset_kpi_by_kota_kab"
+DIMENSION_VIEWS = {dimension: f"asset_kpi_by_{dimension}" for dimension in KPI_DIMENSIONS}
+KPI_VIEWS = (GLOBAL_VIEW, KOTA_VIEW) + tuple(DIMENSION_VIEWS.values())
+
+REFRESH_STATE_TABLE = "asset_kpi_refreshes"
+
+# Python's str.strip() whitespace, for btrim
+_WHITESPACE = " \t\n\r\x0b\x0c"
+
+_METRICS = """
+        count(*) AS total_assets,
+        count(DISTINCT olt) AS total_olt,
+        count(DISTINCT fdt_id) AS total_fdt,
+        sum(total_hc)::bigint AS total_hc,
+        avg(total_hc)::double precision AS avg_hc"""
+
+
+def _literals(values) -> sql.Composed:
+    return sql.SQL(", ").join(sql.Literal(value) for value in values)
+
+
+def _base_view_sql() -> sql.Composed:
+    brand_cases = {}
+    for raw, brand in BRAND_MAPPING.items():
+        brand_cases.setdefault(brand, []).append(raw)
+    brand_case = sql.SQL(" ").join(
+        sql.SQL("WHEN b.brand IN ({}) THEN {}").format(_literals(raws), sql.Literal(brand))
+        for brand, raws in brand_cases.items())
+    return sql.SQL("""
+        CREATE OR REPLACE VIEW {base} AS
+        SELECT
+            ut.fat_id,
+            ut.olt,
+            ut.fdt_id,
+            k.kota_kab,
+            CASE WHEN b.brand IS NULL THEN 'None' {brand_case} ELSE b.brand END AS brand_olt,
+            CASE WHEN f.fat_filter IS NULL OR f.fat_filter IN ({invalid_fat_filter}) THEN 'UNKNOWN'
+                 ELSE f.fat_filter END AS fat_filter_pemakaian,
+            COALESCE(hc.total_hc, 0) AS total_hc
+        FROM user_terminals ut
+        LEFT JOIN clusters cl ON ut.fat_id = cl.fat_id
+        LEFT JOIN home_connecteds hc ON ut.fat_id = hc.fat_id
+        CROSS JOIN LATERAL (SELECT initcap(btrim(cl.kota_kab, {ws})) AS kota_kab) AS k
+        CROSS JOIN LATERAL (SELECT btrim(ut.brand_olt, {ws}) AS brand) AS b
+        CROSS JOIN LATERAL (SELECT upper(btrim(ut.fat_filter_pemakaian, {ws})) AS fat_filter) AS f
+        WHERE k.kota_kab IS NOT NULL
+        AND upper(k.kota_kab) NOT IN ({invalid_kota})
+        AND COALESCE(hc.total_hc, 0) >= 0
+    """).format(
+        base=sql.Identifier(BASE_VIEW), brand_case=brand_case, ws=sql.Literal(_WHITESPACE),
+        invalid_fat_filter=_literals(INVALID_FAT_FILTER), invalid_kota=_literals(INVALID_KOTA))
+
+
+def _view_definitions() -> Dict[str, sql.Composed]:
+    base = sql.Identifier(BASE_VIEW)
+    definitions = {
+        GLOBAL_VIEW: sql.SQL("""
+            SELECT 1 AS id,
+                count(DISTINCT fat_id) AS total_fat,
+                {metrics}
+            FROM {base}
+        """).format(metrics=sql.SQL(_METRICS), base=base),
+        KOTA_VIEW: sql.SQL("""
+            SELECT kota_kab, {metrics}
+            FROM {base}
+            GROUP BY kota_kab
+        """).format(metrics=sql.SQL(_METRICS), base=base),
+    }
+    for dimension, view in DIMENSION_VIEWS.items():
+        definitions[view] = sql.SQL("""
+            SELECT CASE WHEN GROUPING(kota_kab) = 1 THEN {all_kota} ELSE kota_kab END AS kota_kab,
+                {dimension}, {metrics}
+            FROM {base}
+            GROUP BY GROUPING SETS ((kota_kab, {dimension}), ({dimension}))
+        """).format(all_kota=sql.Literal(ALL_KOTA), dimension=sql.Identifier(dimension),
+                    metrics=sql.SQL(_METRICS), base=base)
+    return definitions
+
+
+# Unique index columns; REFRESH ... CONCURRENTLY requires one per view
+_UNIQUE_KEYS = {GLOBAL_VIEW: ("id",), KOTA_VIEW: ("kota_kab",),
+                **{view: ("kota_kab", dimension) for dimension, view in DIMENSION_VIEWS.items()}}
+
+
+def ensure_kpi_views(conn) -> None:
+    """
+    Creates the KPI views, their unique indexes and the refresh state table if missing.
+
+    Also installs the asset table watermark triggers the refresh state relies on.
+
+    Args:
+        conn: An open psycopg2 connection with DDL privileges.
+    """
+    with conn.cursor() as cur:
+        missing = []
+        for view in KPI_VIEWS + (REFRESH_STATE_TABLE,):
+            cur.execute("SELECT to_regclass(%s)", (view,))
+            if cur.fetchone()[0] is None:
+                missing.append(view)
+        conn.rollback()
+    ensure_watermark_triggers(conn, KPI_TABLES)
+    if not missing:
+        return
+
+    with conn.cursor() as cur:
+        cur.execute(_base_view_sql())
+        for view, definition in _view_definitions().items():
+            cur.execute(sql.SQL("CREATE MATERIALIZED VIEW IF NOT EXISTS {} AS {} WITH DATA").format(
+                sql.Identifier(view), definition))
+            cur.execute(sql.SQL("CREATE UNIQUE INDEX IF NOT EXISTS {} ON {} ({})").format(
+                sql.Identifier(f"{view}_key"), sql.Identifier(view),
+                sql.SQL(", ").join(sql.Identifier(column) for column in _UNIQUE_KEYS[view])))
+        cur.execute(sql.SQL("""
+            CREATE TABLE IF NOT EXISTS {} (
+                view_name VARCHAR(255) PRIMARY KEY,
+                watermark TEXT,
+                refreshed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """).format(sql.Identifier(REFRESH_STATE_TABLE)))
+    conn.commit()
+    logger.info(f"Created KPI views: {', '.join(missing)}")
+
+
+def _watermark_text(cur) -> Optional[str]:
+    watermark = fetch_watermark(cur, KPI_TABLES)
+    return None if watermark is None else json.dumps(watermark)
+
+
+def kpi_views_stale(cur) -> bool:
+    """True if an asset table changed since the KPI views were last refreshed."""
+    current = _watermark_text(cur)
+    if current is None:
+        return True
+    cur.execute(sql.SQL("SELECT count(*) FROM {} WHERE watermark = %s AND view_name = ANY(%s)").format(
+        sql.Identifier(REFRESH_STATE_TABLE)), (current, list(KPI_VIEWS)))
+    return cur.fetchone()[0] < len(KPI_VIEWS)
+
+
+def refresh_kpi_views(conn, force: bool = False, concurrently: bool = True) -> bool:
+    """
+    Refreshes the KPI views if the asset tables changed since their last refresh.
+
+    Refreshes are serialized with an advisory lock; a caller that waited
+    for another refresh re-checks and usually finds the views fresh. The
+    watermark is read before the views, so the stored watermark never
+    claims more than the views contain.
+
+    Args:
+        conn: An open psycopg2 connection (the views must exist).
+        force: Refresh even if the views look fresh.
+        concurrently: Use REFRESH ... CONCURRENTLY (readers are not blocked).
+
+    Returns:
+        True if the views were refreshed.
+    """
+    with conn.cursor() as cur:
+        cur.execute("SELECT pg_advisory_xact_lock(hashtext('asset_kpi_refresh'))")
+        if not force and not kpi_views_stale(cur):
+            conn.rollback()
+            return False
+        watermark = _watermark_text(cur)
+        refresh = sql.SQL("REFRESH MATERIALIZED VIEW CONCURRENTLY {}" if concurrently
+                          else "REFRESH MATERIALIZED VIEW {}")
+        for view in KPI_VIEWS:
+            cur.execute(refresh.format(sql.Identifier(view)))
+            cur.execute(sql.SQL("""
+                INSERT INTO {state} (view_name, watermark, refreshed_at)
+                VALUES (%s, %s, CURRENT_TIMESTAMP)
+                ON CONFLICT (view_name) DO UPDATE
+                    SET watermark = EXCLUDED.watermark, refreshed_at = EXCLUDED.refreshed_at
+            """).format(state=sql.Identifier(REFRESH_STATE_TABLE)), (view, watermark))
+    conn.commit()
+    return True
+
+
+def normalize_dashboard_assets(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Applies the asset_kpi_base cleaning to a dashboard asset frame in place.
+
+    total_hc becomes numeric (missing as 0), kota_kab title-cased,
+    fat_filter_pemakaian upper-cased with anomalies as 'UNKNOWN' and
+    brand_olt mapped with BRAND_MAPPING. Rows are not dropped; see
+    valid_kota_mask.
+    """
+    df['total_hc'] = pd.to_numeric(df['total_hc'], errors='coerce').fillna(0)
+    df['kota_kab'] = df['kota_kab'].astype(str).str.strip().str.title()
+    df['fat_filter_pemakaian'] = df['fat_filter_pemakaian'].astype(str).str.upper().str.strip()
+    df.loc[df['fat_filter_pemakaian'].isin(INVALID_FAT_FILTER), 'fat_filter_pemakaian'] = 'UNKNOWN'
+    df['brand_olt'] = df['brand_olt'].astype(str).str.strip().replace(BRAND_MAPPING)
+    return df
+
+
+def valid_kota_mask(df: pd.DataFrame) -> pd.Series:
+    """Rows of a normalized frame that asset_kpi_base keeps (valid city, HC >= 0)."""
+    return ~df['kota_kab'].str.upper().isin(INVALID_KOTA) & df['kota_kab'].notna() & (df['total_hc'] >= 0)
+
+
+def _metrics(grouped) -> pd.DataFrame:
+    return grouped.agg(total_assets=('fat_id', 'size'), total_olt=('olt', 'nunique'),
+                       total_fdt=('fdt_id', 'nunique'), total_hc=('total_hc', 'sum'),
+                       avg_hc=('total_hc', 'mean')).reset_index()
+
+
+def kpi_frames_from_assets(df: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    """
+    Computes the KPI view contents from a normalized, filtered asset frame.
+
+    Args:
+        df: Output of normalize_dashboard_assets restricted to valid_kota_mask.
+
+    Returns:
+        Mapping of 'global', 'kota_kab' and each KPI_DIMENSIONS entry to a
+        frame with the columns of the matching view.
+    """
+    frames = {
+        'global': pd.DataFrame([{
+            'total_fat': df['fat_id'].nunique(), 'total_assets': len(df),
+            'total_olt': df['olt'].nunique(), 'total_fdt': df['fdt_id'].nunique(),
+            'total_hc': df['total_hc'].sum(), 'avg_hc': df['total_hc'].mean()}]),
+        'kota_kab': _metrics(df.groupby('kota_kab', dropna=False)),
+    }
+    for dimension in KPI_DIMENSIONS:
+        per_kota = _metrics(df.groupby(['kota_kab', dimension], dropna=False))
+        overall = _metrics(df.groupby(dimension, dropna=False)).assign(kota_kab=ALL_KOTA)
+        frames[dimension] = pd.concat([overall, per_kota], ignore_index=True)[per_kota.columns]
+    return frames
@@ -0,0 +1,279 @@
+"""
+Server-side clustering of asset locations for the dashboard map.
+
+FAT coordinates are projected to Web Mercator pixels and bucketed into a
+grid of ``cell_pixels`` screen pixels per zoom level. The finest level is
+computed from the points; every coarser level merges the cells of the
+level below (cell x, y >> 1), so the whole pyramid costs about one pass
+over the points plus one pass per level over the cells. Each cluster
+carries its point count, HC sum, number of full FATs (fat_id_x filled)
+and the centroid of its points.
+
+All levels go out as one GeoJSON FeatureCollection (a zoom range per
+feature) drawn by ClusterLayer: the browser shows the features of the
+current zoom level, so the full network is on the map without a Python
+marker per asset.
+"""
+
+import json
+import logging
+from typing import Dict, Optional, Union
+
+import numpy as np
+import pandas as pd
+from branca.element import MacroElement
+from jinja2 import Template
+
+logger = logging.getLogger(__name__)
+
+MAP_CLUSTER_CONFIG = {
+    'min_zoom': 5,
+    'max_zoom': 16,
+    'cell_pixels': 60,  # Cluster cell size on screen
+    'max_features': 40_000,  # Finest levels are dropped beyond this (page size)
+}
+
+# Coordinates outside Indonesia are treated as invalid
+INDONESIA_BOUNDS = {'lat_min': -11.0, 'lat_max': 6.0, 'lon_min': 95.0, 'lon_max': 141.0}
+
+TILE_SIZE = 256
+
+# GeoJSON coordinate precision (~1 m)
+COORDINATE_DECIMALS = 5
+
+
+def valid_coordinates_mask(lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+    """Points with both coordinates present and inside INDONESIA_BOUNDS."""
+    with np.errstate(invalid='ignore'):
+        return ((lat >= INDONESIA_BOUNDS['lat_min']) & (lat <= INDONESIA_BOUNDS['lat_max'])
+                & (lon >= INDONESIA_BOUNDS['lon_min']) & (lon <= INDONESIA_BOUNDS['lon_max']))
+
+
+def fat_id_x_filled(values) -> np.ndarray:
+    """True where fat_id_x holds a value, i.e. the FAT is full ('', 'none' and 'nan' count as empty)."""
+    series = pd.Series(values, dtype=object)
+    empty = series.isna() | series.astype(str).str.strip().str.lower().isin(['', 'none', 'nan'])
+    return ~empty.to_numpy(dtype=bool)
+
+
+def _mercator_pixels(lat: np.ndarray, lon: np.ndarray, zoom: int):
+    world = TILE_SIZE * 2.0 ** zoom
+    x = (lon + 180.0) / 360.0 * world
+    sin_lat = np.sin(np.radians(lat))
+    y = (0.5 - np.log((1 + sin_lat) / (1 - sin_lat)) / (4 * np.pi)) * world
+    return x, y
+
+
+def _merge(cell_x: np.ndarray, cell_y: np.ndarray, sums: Dict[str, np.ndarray]):
+    """Sums the entries sharing a cell; returns the cells, their sums, a member and the member count of each cell."""
+    keys = (cell_x.astype(np.int64) << 32) | cell_y.astype(np.int64)
+    unique_keys, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    merged = {name: np.bincount(inverse, weights=values, minlength=len(unique_keys))
+              for name, values in sums.items()}
+    members = np.bincount(inverse, minlength=len(unique_keys))
+    return unique_keys >> 32, unique_keys & 0xFFFFFFFF, merged, first, members
+
+
+def build_clusters(lat: np.ndarray, lon: np.ndarray, total_hc: np.ndarray,
+                   full: Optional[np.ndarray] = None, min_zoom: Optional[int] = None,
+                   max_zoom: Optional[int] = None, cell_pixels: Optional[int] = None,
+                   max_features: Optional[int] = None) -> pd.DataFrame:
+    """
+    Clusters points on a screen-pixel grid for every zoom level.
+
+    A cluster that is unchanged over several levels (same points) is one
+    row with a zoom range, so a lone FAT is listed once rather than once
+    per level.
+
+    Args:
+        lat, lon: Point coordinates; invalid ones (see valid_coordinates_mask) are left out.
+        total_hc: HC per point (NaN counts as 0).
+        full: True for full FATs; None if unknown.
+        min_zoom, max_zoom, cell_pixels, max_features: Override MAP_CLUSTER_CONFIG.
+            If the levels up to max_zoom hold more than max_features
+            clusters, the finest levels are dropped.
+
+    Returns:
+        A frame of (min_zoom, max_zoom, latitude, longitude, count, total_hc,
+        full, row): the cluster is shown from min_zoom to max_zoom, and row
+        is the input position of one of its points (the only one when
+        count is 1).
+    """
+    min_zoom = MAP_CLUSTER_CONFIG['min_zoom'] if min_zoom is None else min_zoom
+    max_zoom = MAP_CLUSTER_CONFIG['max_zoom'] if max_zoom is None else max_zoom
+    cell_pixels = cell_pixels or MAP_CLUSTER_CONFIG['cell_pixels']
+    max_features = max_features or MAP_CLUSTER_CONFIG['max_features']
+
+    lat = np.asarray(lat, dtype=np.float64)
+    lon = np.asarray(lon, dtype=np.float64)
+    rows = np.flatnonzero(valid_coordinates_mask(lat, lon))
+    lat, lon = lat[rows], lon[rows]
+    x, y = _mercator_pixels(lat, lon, max_zoom)
+    sums = {
+        'count': np.ones(len(rows)),
+        'total_hc': np.nan_to_num(np.asarray(total_hc, dtype=np.float64)[rows]),
+        'full': np.zeros(len(rows)) if full is None else np.asarray(full, dtype=np.float64)[rows],
+        'lat_sum': lat,
+        'lon_sum': lon,
+    }
+    cell_x, cell_y = np.floor(x / cell_pixels), np.floor(y / cell_pixels)
+
+    # Clusters first seen per level, and for the current cells the level and
+    # position of the cluster they continue
+    levels: Dict[int, Dict[str, np.ndarray]] = {}
+    origin_zoom = origin_index = None
+    for zoom in range(max_zoom, min_zoom - 1, -1):
+        cell_x, cell_y, sums, first, members = _merge(cell_x, cell_y, sums)
+        rows = rows[first]
+        if origin_zoom is None:
+            new = np.ones(len(first), dtype=bool)
+        else:
+            # A cell made of one cell of the finer level is the same cluster
+            origin_zoom, origin_index = origin_zoom[first], origin_index[first]
+            new = members > 1
+            for level in np.unique(origin_zoom[~new]):
+                levels[level]['min_zoom'][origin_index[~new & (origin_zoom == level)]] = zoom
+        levels[zoom] = {
+            'min_zoom': np.full(int(new.sum()), zoom),
+            'max_zoom': np.full(int(new.sum()), zoom),
+            'latitude': (sums['lat_sum'] / sums['count'])[new],
+            'longitude': (sums['lon_sum'] / sums['count'])[new],
+            'count': sums['count'][new].astype(np.int64),
+            'total_hc': sums['total_hc'][new],
+            'full': sums['full'][new].astype(np.int64),
+            'row': rows[new],
+        }
+        position = np.cumsum(new) - 1
+        origin_zoom = np.where(new, zoom, origin_zoom) if origin_zoom is not None else np.full(len(new), zoom)
+        origin_index = np.where(new, position, origin_index) if origin_index is not None else position
+        # The cell of the next coarser level holds 2 x 2 cells of this one
+        cell_x, cell_y = cell_x >> 1, cell_y >> 1
+
+    clusters = pd.concat([pd.DataFrame(level) for _, level in sorted(levels.items())], ignore_index=True)
+
+    # Keep the finest levels whose clusters fit the budget; zooming further shows the last kept level
+    top_zoom = max_zoom
+    while top_zoom > min_zoom and (clusters['min_zoom'] <= top_zoom).sum() > max_features:
+        top_zoom -= 1
+    if top_zoom < max_zoom:
+        logger.info(f"Map clusters limited to zoom {top_zoom} ({max_features} clusters)")
+        clusters = clusters[clusters['min_zoom'] <= top_zoom].reset_index(drop=True)
+        clusters['max_zoom'] = clusters['max_zoom'].clip(upper=top_zoom)
+    return clusters
+
+
+def clusters_geojson(clusters: pd.DataFrame, labels: Optional[np.ndarray] = None) -> dict:
+    """
+    One GeoJSON FeatureCollection with the clusters of every level.
+
+    Args:
+        clusters: Output of build_clusters.
+        labels: FAT ID per input point; single-point clusters get it as fat_id.
+
+    Returns:
+        FeatureCollection whose point features have the properties
+        min_zoom, max_zoom, count, total_hc, full and, for single points,
+        fat_id.
+    """
+    names = [None] * len(clusters)
+    if labels is not None:
+        single = clusters['count'].to_numpy() == 1
+        names = np.where(single, np.asarray(labels, dtype=object)[clusters['row'].to_numpy()], None)
+    columns = zip(clusters['min_zoom'].tolist(), clusters['max_zoom'].tolist(),
+                  clusters['longitude'].round(COORDINATE_DECIMALS).tolist(),
+                  clusters['latitude'].round(COORDINATE_DECIMALS).tolist(),
+                  clusters['count'].tolist(), clusters['total_hc'].tolist(), clusters['full'].tolist(), names)
+    features = []
+    for min_zoom, max_zoom, longitude, latitude, count, total_hc, full, name in columns:
+        properties = {'min_zoom': min_zoom, 'max_zoom': max_zoom, 'count': count,
+                      'total_hc': int(total_hc), 'full': full}
+        if name is not None:
+            properties['fat_id'] = str(name)
+        features.append({'type': 'Feature', 'geometry': {'type': 'Point', 'coordinates': [longitude, latitude]},
+                         'properties': properties})
+    return {'type': 'FeatureCollection', 'features': features}
+
+
+def script_json(data: Union[dict, list, str]) -> str:
+    """Compact JSON for embedding in a <script> block (strings are taken as JSON already)."""
+    text = data if isinstance(data, str) else json.dumps(data, separators=(',', ':'), default=str)
+    return text.replace('</', '<\\/')  # Never close the surrounding <script>
+
+
+class ClusterLayer(MacroElement):
+    """
+    Leaflet layer drawing the clusters of clusters_geojson for the current zoom.
+
+    Clusters are round count badges (click to zoom in); single FATs are
+    green or red dots like the dashboard's status markers.
+    """
+
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+        (function() {
+            var map = {{ this._parent.get_name() }};
+            var data = {{ this.data }};
+            var minZoom = Infinity, maxZoom = -Infinity;
+            var byZoom = {};
+            function esc(text) {
+                return String(text).replace(/[&<>"']/g, function(c) {
+                    return {'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'}[c];
+                });
+            }
+            data.features.forEach(function(f) {
+                for (var z = f.properties.min_zoom; z <= f.properties.max_zoom; z++) {
+                    (byZoom[z] = byZoom[z] || []).push(f);
+                }
+                minZoom = Math.min(minZoom, f.properties.min_zoom);
+                maxZoom = Math.max(maxZoom, f.properties.max_zoom);
+            });
+            function badge(p) {
+                var size = Math.round(24 + 8 * Math.log10(p.count));
+                var color = p.full === 0 ? '#28a745' : (p.full === p.count ? '#dc3545' : '#fd7e14');
+                return L.divIcon({
+                    html: '<div style="width:' + size + 'px;height:' + size + 'px;line-height:' + size +
+                          'px;border-radius:50%;background:' + color + ';opacity:0.85;color:#fff;' +
+                          'font:bold 11px Arial,sans-serif;text-align:center;">' + p.count + '</div>',
+                    className: '', iconSize: [size, size]
+                });
+            }
+            var layer = L.geoJSON(null, {
+                pointToLayer: function(f, latlng) {
+                    var p = f.properties;
+                    if (p.count === 1) {
+                        return L.circleMarker(latlng, {radius: 6, weight: 1, color: '#fff', fillOpacity: 0.9,
+                                                       fillColor: p.full ? '#dc3545' : '#28a745'});
+                    }
+                    return L.marker(latlng, {icon: badge(p)});
+                },
+                onEachFeature: function(f, l) {
+                    var p = f.properties;
+                    if (p.count === 1) {
+                        l.bindTooltip('FAT ID: ' + esc(p.fat_id || '-') +
+                                      ' | HC: ' + p.total_hc + (p.full ? ' | Full' : ''));
+                    } else {
+                        l.bindTooltip(p.count + ' FAT | HC: ' + p.total_hc + ' | Full: ' + p.full);
+                        l.on('click', function(e) { map.setView(e.latlng, Math.min(map.getZoom() + 2, 18)); });
+                    }
+                }
+            }).addTo(map);
+            function show() {
+                var zoom = Math.max(minZoom, Math.min(maxZoom, map.getZoom()));
+                layer.clearLayers();
+                layer.addData(byZoom[zoom] || []);
+            }
+            map.on('zoomend', show);
+            show();
+        })();
+        {% endmacro %}
+    """)
+
+    def __init__(self, geojson: Union[dict, str]):
+        """
+        Args:
+            geojson: Output of clusters_geojson, as a dict or a JSON string.
+                Zooms outside its levels show the nearest level.
+        """
+        super().__init__()
+        self._name = 'ClusterLayer'
+        self.data = script_json(geojson)
@@ -0,0 +1,122 @@
+"""
+Compact marker layer for the dashboard map.
+
+Markers go out as one JSON array of rows and are drawn by a single Leaflet
+callback. Popups and tooltips are rendered in the browser from one shared
+template when they are opened, and the two status icons are created once.
+Python only converts a few columns to lists, instead of formatting an
+HTML popup and building a folium.Popup and folium.Icon per marker.
+"""
+
+import logging
+
+import numpy as np
+import pandas as pd
+from branca.element import MacroElement
+from jinja2 import Template
+
+from core.services.map_clusters import fat_id_x_filled, script_json
+
+logger = logging.getLogger(__name__)
+
+# Fields of a marker row, in order
+MARKER_FIELDS = ('latitude_fat', 'longitude_fat', 'fat_id', 'kota_kab', 'olt', 'total_hc',
+                 'link_dokumen_feeder', 'fat_id_x')
+
+COORDINATE_DECIMALS = 6
+
+
+def _text_column(df: pd.DataFrame, column: str) -> list:
+    if column not in df.columns:
+        return [None] * len(df)
+    values = df[column].astype(object)
+    return values.where(values.notna(), None).tolist()
+
+
+def marker_rows(df: pd.DataFrame) -> list:
+    """
+    Rows of MARKER_FIELDS for MarkerLayer; rows without coordinates are dropped.
+
+    fat_id_x is kept only when it is filled (the FAT is full), so the
+    browser can tell the status from it alone.
+    """
+    lat = pd.to_numeric(df['latitude_fat'], errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+    lon = pd.to_numeric(df['longitude_fat'], errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+    keep = ~(np.isnan(lat) | np.isnan(lon))
+    df = df[keep]
+
+    hc = pd.to_numeric(df['total_hc'], errors='coerce') if 'total_hc' in df.columns else pd.Series(np.nan, index=df.index)
+    # Whole HC counts print without a trailing '.0'
+    hc_values = [None if np.isnan(v) else (int(v) if float(v).is_integer() else v) for v in hc.astype(float).tolist()]
+    fat_id_x = _text_column(df, 'fat_id_x')
+    if 'fat_id_x' in df.columns:
+        full = fat_id_x_filled(df['fat_id_x'])
+        fat_id_x = [str(value) if filled else None for value, filled in zip(fat_id_x, full)]
+
+    return [list(row) for row in zip(
+        np.round(lat[keep], COORDINATE_DECIMALS).tolist(), np.round(lon[keep], COORDINATE_DECIMALS).tolist(),
+        _text_column(df, 'fat_id'), _text_column(df, 'kota_kab'), _text_column(df, 'olt'), hc_values,
+        _text_column(df, 'link_dokumen_feeder'), fat_id_x)]
+
+
+class MarkerLayer(MacroElement):
+    """
+    Status markers (green check: normal, red cross: full) with the dashboard popup.
+
+    Added to a map or a feature group like a folium.Marker; all markers of
+    the layer share two icons and one popup template.
+    """
+
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+        (function() {
+            var parent = {{ this._parent.get_name() }};
+            var rows = {{ this.data }};
+            var icons = {
+                normal: L.AwesomeMarkers.icon({icon: 'ok', markerColor: 'green', prefix: 'glyphicon'}),
+                full: L.AwesomeMarkers.icon({icon: 'remove', markerColor: 'red', prefix: 'glyphicon'})
+            };
+            function esc(text) {
+                return String(text === null || text === undefined ? 'N/A' : text).replace(/[&<>"']/g, function(c) {
+                    return {'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'}[c];
+                });
+            }
+            function status(r) {
+                return r[7] === null ? 'Status: Normal' : 'Status: Issue - ' + esc(r[7]);
+            }
+            function popup(r) {
+                var normal = r[7] === null;
+                var link = /^https?:\\/\\//i.test(r[6] || '') ? esc(r[6]) : '#';
+                return '<div style="font-family: Arial, sans-serif; min-width: 200px;">' +
+                    '<div style="background-color: ' + (normal ? '#d4edda' : '#f8d7da') +
+                    '; padding: 8px; border-radius: 5px; margin-bottom: 10px;">' +
+                    '<h4 style="margin: 0; color: ' + (normal ? '#155724' : '#721c24') + ';">FAT ID: ' +
+                    esc(r[2]) + '</h4></div>' +
+                    '<div style="padding: 5px 0;">' +
+                    '<b>Kota/Kab:</b> ' + esc(r[3]) + '<br>' +
+                    '<b>OLT:</b> ' + esc(r[4]) + '<br>' +
+                    '<b>Total HC:</b> ' + esc(r[5]) + '<br>' +
+                    '<b>Link Dokumen:</b> <a href="' + link +
+                    '" target="_blank" style="color: #007bff;">Lihat Dokumen</a><br>' +
+                    '<b>' + status(r) + '</b></div></div>';
+            }
+            rows.forEach(function(r) {
+                L.marker([r[0], r[1]], {icon: r[7] === null ? icons.normal : icons.full})
+                    .bindPopup(function() { return popup(r); }, {maxWidth: 300})
+                    .bindTooltip(function() { return 'FAT ID: ' + esc(r[2]) + ' | ' + status(r); })
+                    .addTo(parent);
+            });
+        })();
+        {% endmacro %}
+    """)
+
+    def __init__(self, df: pd.DataFrame):
+        """
+        Args:
+            df: Assets with the MARKER_FIELDS columns (missing text columns show as N/A).
+        """
+        super().__init__()
+        self._name = 'MarkerLayer'
+        rows = marker_rows(df)
+        self.count = len(rows)
+        self.data = script_json(rows)
@@ -0,0 +1,151 @@
+"""
+Bounding-box queries for the dashboard map.
+
+FAT locations are indexed with GiST on point(longitude_fat, latitude_fat),
+using the built-in point operators (no PostGIS needed), so a viewport
+query reads only the index entries inside the box instead of every asset
+in the country. The joined child tables can hold several rows per FAT, so
+the rows are first reduced to one per FAT (the one with the highest
+total_hc). Results are then keyset-paginated on (total_hc DESC, fat_id
+DESC): a page continues after the last row of the previous one, so later
+pages cost the same as the first.
+"""
+
+import logging
+from typing import NamedTuple, Optional, Tuple
+
+from core.services.map_clusters import INDONESIA_BOUNDS
+
+logger = logging.getLogger(__name__)
+
+MAP_VIEWPORT_CONFIG = {
+    'page_size': 200,      # FATs per viewport page
+    'min_point_zoom': 13,  # Below this zoom the map shows clusters only
+}
+
+FAT_LOCATION_INDEX = "idx_user_terminals_fat_location"
+
+CREATE_FAT_LOCATION_INDEX = f"""
+    CREATE INDEX IF NOT EXISTS {FAT_LOCATION_INDEX} ON user_terminals
+    USING gist (point(longitude_fat, latitude_fat))
+    WHERE latitude_fat IS NOT NULL AND longitude_fat IS NOT NULL
+"""
+
+# Columns of a viewport page (the dashboard marker popup fields), one row per FAT
+_VIEWPORT_QUERY = """
+    SELECT DISTINCT ON (ut.fat_id)
+        ut.fat_id,
+        ut.latitude_fat,
+        ut.longitude_fat,
+        ut.olt,
+        ut.fat_id_x,
+        cl.kota_kab,
+        COALESCE(hc.total_hc, 0) AS total_hc,
+        dk.link_dokumen_feeder
+    FROM user_terminals ut
+    LEFT JOIN clusters cl ON ut.fat_id = cl.fat_id
+    LEFT JOIN home_connecteds hc ON ut.fat_id = hc.fat_id
+    LEFT JOIN dokumentasis dk ON ut.fat_id = dk.fat_id
+    WHERE ut.latitude_fat IS NOT NULL
+    AND ut.longitude_fat IS NOT NULL
+    AND point(ut.longitude_fat, ut.latitude_fat) <@ box(point(%s, %s), point(%s, %s))
+"""
+
+
+class BoundingBox(NamedTuple):
+    """Map viewport in degrees."""
+    south: float
+    west: float
+    north: float
+    east: float
+
+    @classmethod
+    def from_folium(cls, bounds: Optional[dict]) -> Optional['BoundingBox']:
+        """
+        Reads the 'bounds' value returned by st_folium.
+
+        Returns:
+            The box clipped to Indonesia, or None if the bounds are missing
+            or the viewport lies outside Indonesia.
+        """
+        try:
+            south_west, north_east = bounds['_southWest'], bounds['_northEast']
+            box = cls(float(south_west['lat']), float(south_west['lng']),
+                      float(north_east['lat']), float(north_east['lng']))
+        except (KeyError, TypeError, ValueError):
+            return None
+        return box.clipped()
+
+    def clipped(self) -> Optional['BoundingBox']:
+        """The part of the box inside INDONESIA_BOUNDS, or None if they do not overlap."""
+        box = BoundingBox(max(self.south, INDONESIA_BOUNDS['lat_min']), max(self.west, INDONESIA_BOUNDS['lon_min']),
+                          min(self.north, INDONESIA_BOUNDS['lat_max']), min(self.east, INDONESIA_BOUNDS['lon_max']))
+        if box.south > box.north or box.west > box.east:
+            return None
+        return box
+
+    def rounded(self, decimals: int = 4) -> 'BoundingBox':
+        """The box with rounded edges (about 10 m at 4 decimals), e.g. for cache keys."""
+        return BoundingBox(*(round(edge, decimals) for edge in self))
+
+
+INDONESIA_BBOX = BoundingBox(INDONESIA_BOUNDS['lat_min'], INDONESIA_BOUNDS['lon_min'],
+                             INDONESIA_BOUNDS['lat_max'], INDONESIA_BOUNDS['lon_max'])
+
+
+class MapCursor(NamedTuple):
+    """Sort key of the last row of a viewport page; the next page starts after it."""
+    total_hc: int
+    fat_id: str
+
+
+def viewport_query(bbox: BoundingBox, kota_filter: Optional[str] = None, cursor: Optional[MapCursor] = None,
+                   limit: Optional[int] = None) -> Tuple[str, tuple]:
+    """
+    Builds the query for the FATs inside a bounding box.
+
+    Args:
+        bbox: Viewport to query.
+        kota_filter: Restrict to one kota_kab, compared the way the dashboard
+            normalises it (trimmed, title-cased); None or 'All' for every city.
+        cursor: Return the rows after this one (see MapCursor).
+        limit: Maximum number of rows (None for all).
+
+    Returns:
+        A tuple containing (query, params).
+    """
+    query = _VIEWPORT_QUERY
+    params = [bbox.west, bbox.south, bbox.east, bbox.north]
+    if kota_filter and kota_filter != 'All':
+        query += " AND initcap(btrim(cl.kota_kab)) = %s"
+        params.append(kota_filter)
+    query = f"""
+    SELECT * FROM ({query}
+        ORDER BY ut.fat_id, COALESCE(hc.total_hc, 0) DESC
+    ) AS fats"""
+    if cursor is not None:
+        query += " WHERE (total_hc, fat_id) < (%s, %s)"
+        params.extend([cursor.total_hc, cursor.fat_id])
+    query += " ORDER BY total_hc DESC, fat_id DESC"
+    if limit is not None:
+        query += " LIMIT %s"
+        params.append(limit)
+    return query, tuple(params)
+
+
+def ensure_fat_location_index(conn) -> None:
+    """
+    Creates the GiST index on FAT locations if missing.
+
+    Args:
+        conn: An open psycopg2 connection with DDL privileges.
+    """
+    with conn.cursor() as cur:
+        cur.execute("SELECT to_regclass(%s)", (FAT_LOCATION_INDEX,))
+        exists = cur.fetchone()[0] is not None
+        conn.rollback()
+        if exists:
+            return
+        cur.execute(CREATE_FAT_LOCATION_INDEX)
+    conn.commit()
+    logger.info(f"Created FAT location index {FAT_LOCATION_INDEX}")
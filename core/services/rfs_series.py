@@ -0,0 +1,313 @@
+"""
+Pre-aggregated RFS time series: assets and HC per kota_kab and RFS date.
+
+The series is kept in two bucket tables, per day (``asset_rfs_daily``) and
+per month (``asset_rfs_monthly``), keyed by (period_start, kota_kab). Rows
+follow the KPI views' cleaning (``asset_kpi_base``, see kpi_views) joined
+with additional_informations.tanggal_rfs.
+
+Updates are incremental. Statement-level triggers on the four source tables
+queue the fat_id of every changed row in ``asset_rfs_pending``, and
+apply_rfs_changes folds the queue in. It subtracts each queued FAT's
+previous contribution (kept in ``asset_rfs_contributions``), adds its
+current one, and updates only the touched buckets. The cost follows the
+number of changed FATs, not the table size. Reads apply pending changes
+first, then read O(buckets) rows for any date window.
+
+``rfs_series_from_assets`` computes the same series in pandas for when the
+tables are unavailable.
+"""
+
+import logging
+from datetime import date
+from typing import Optional, Tuple
+
+import pandas as pd
+from psycopg2 import sql
+
+from core.services.kpi_views import ALL_KOTA, BASE_VIEW, ensure_kpi_views
+
+logger = logging.getLogger(__name__)
+
+DAILY_TABLE = "asset_rfs_daily"
+MONTHLY_TABLE = "asset_rfs_monthly"
+CONTRIBUTIONS_TABLE = "asset_rfs_contributions"
+PENDING_TABLE = "asset_rfs_pending"
+RFS_TABLES = (DAILY_TABLE, MONTHLY_TABLE, CONTRIBUTIONS_TABLE, PENDING_TABLE)
+
+# Source table -> columns a change must touch to move a FAT between buckets
+RFS_SOURCE_COLUMNS = {
+    'user_terminals': ('fat_id',),
+    'clusters': ('fat_id', 'kota_kab'),
+    'home_connecteds': ('fat_id', 'total_hc'),
+    'additional_informations': ('fat_id', 'tanggal_rfs'),
+}
+RFS_SOURCE_TABLES = tuple(RFS_SOURCE_COLUMNS)
+
+# Granularity -> (bucket table, date_trunc unit used to roll the buckets up)
+RFS_GRANULARITIES = {
+    'day': (DAILY_TABLE, 'day'),
+    'month': (MONTHLY_TABLE, 'month'),
+    'year': (MONTHLY_TABLE, 'year'),
+}
+
+# Columns of a served series
+RFS_SERIES_COLUMNS = ['period_start', 'kota_kab', 'total_assets', 'total_hc']
+
+_BUCKET_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS {table} (
+        period_start DATE NOT NULL,
+        kota_kab TEXT NOT NULL,
+        total_assets BIGINT NOT NULL DEFAULT 0,
+        total_hc BIGINT NOT NULL DEFAULT 0,
+        PRIMARY KEY (period_start, kota_kab)
+    )
+"""
+
+_STATE_TABLES_SQL = f"""
+    CREATE TABLE IF NOT EXISTS {CONTRIBUTIONS_TABLE} (
+        fat_id VARCHAR(255) NOT NULL,
+        tanggal_rfs DATE NOT NULL,
+        kota_kab TEXT NOT NULL,
+        total_assets INTEGER NOT NULL,
+        total_hc BIGINT NOT NULL,
+        PRIMARY KEY (fat_id, tanggal_rfs, kota_kab)
+    );
+    CREATE TABLE IF NOT EXISTS {PENDING_TABLE} (
+        fat_id VARCHAR(255) PRIMARY KEY
+    );
+"""
+
+# Changed rows of one statement, projected on the columns that matter
+_QUEUE_FUNCTION_SQL = """
+CREATE OR REPLACE FUNCTION {function}()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'TRUNCATE' THEN
+        INSERT INTO {pending} (fat_id)
+        SELECT fat_id FROM {contributions} UNION SELECT fat_id FROM user_terminals
+        ON CONFLICT DO NOTHING;
+    ELSIF TG_OP = 'INSERT' THEN
+        INSERT INTO {pending} (fat_id)
+        SELECT DISTINCT fat_id FROM new_rows WHERE fat_id IS NOT NULL
+        ON CONFLICT DO NOTHING;
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO {pending} (fat_id)
+        SELECT DISTINCT fat_id FROM old_rows WHERE fat_id IS NOT NULL
+        ON CONFLICT DO NOTHING;
+    ELSE
+        INSERT INTO {pending} (fat_id)
+        SELECT DISTINCT fat_id FROM (
+            (SELECT {columns} FROM old_rows EXCEPT SELECT {columns} FROM new_rows)
+            UNION ALL
+            (SELECT {columns} FROM new_rows EXCEPT SELECT {columns} FROM old_rows)
+        ) AS changed
+        WHERE fat_id IS NOT NULL
+        ON CONFLICT DO NOTHING;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+# Transition tables need one trigger per event
+_TRIGGER_EVENTS = {
+    'insert': "AFTER INSERT ON {table} REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT",
+    'update': "AFTER UPDATE ON {table} REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT",
+    'delete': "AFTER DELETE ON {table} REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT",
+    'truncate': "AFTER TRUNCATE ON {table} FOR EACH STATEMENT",
+}
+
+
+def _trigger_name(table: str, event: str) -> str:
+    return f"trigger_{table}_rfs_{event}"
+
+
+def ensure_rfs_series(conn) -> None:
+    """
+    Creates the RFS bucket tables and queue triggers if missing.
+
+    On first creation every FAT is queued, so the next apply_rfs_changes
+    builds the whole series. Existing triggers are left alone. Also creates
+    the KPI views, whose base view supplies the cleaned rows.
+
+    Args:
+        conn: An open psycopg2 connection with DDL privileges.
+    """
+    ensure_kpi_views(conn)
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT t.tgname
+            FROM pg_trigger t
+            JOIN pg_class c ON c.oid = t.tgrelid
+            WHERE t.tgname LIKE 'trigger\\_%\\_rfs\\_%'
+            AND NOT t.tgisinternal
+        """)
+        installed = {row[0] for row in cur.fetchall()}
+        cur.execute("SELECT to_regclass(%s)", (CONTRIBUTIONS_TABLE,))
+        created = cur.fetchone()[0] is None
+        missing = [(table, event) for table in RFS_SOURCE_TABLES for event in _TRIGGER_EVENTS
+                   if _trigger_name(table, event) not in installed]
+        if not created and not missing:
+            conn.rollback()
+            return
+
+        for table in (DAILY_TABLE, MONTHLY_TABLE):
+            cur.execute(sql.SQL(_BUCKET_TABLE_SQL).format(table=sql.Identifier(table)))
+        cur.execute(_STATE_TABLES_SQL)
+        for table, columns in RFS_SOURCE_COLUMNS.items():
+            cur.execute(sql.SQL(_QUEUE_FUNCTION_SQL).format(
+                function=sql.Identifier(f"queue_asset_rfs_change_{table}"),
+                pending=sql.Identifier(PENDING_TABLE), contributions=sql.Identifier(CONTRIBUTIONS_TABLE),
+                columns=sql.SQL(", ").join(sql.Identifier(column) for column in columns)))
+        for table, event in missing:
+            cur.execute(sql.SQL("CREATE TRIGGER {trigger} " + _TRIGGER_EVENTS[event]
+                                + " EXECUTE FUNCTION {function}()").format(
+                trigger=sql.Identifier(_trigger_name(table, event)), table=sql.Identifier(table),
+                function=sql.Identifier(f"queue_asset_rfs_change_{table}")))
+        if created:
+            cur.execute(sql.SQL("INSERT INTO {} (fat_id) SELECT fat_id FROM user_terminals ON CONFLICT DO NOTHING")
+                        .format(sql.Identifier(PENDING_TABLE)))
+    conn.commit()
+    logger.info(f"Created RFS series tables and {len(missing)} queue triggers")
+
+
+def apply_rfs_changes(conn) -> int:
+    """
+    Folds the queued FAT changes into the bucket tables.
+
+    Applies are serialized with an advisory lock. A FAT changed while an
+    apply runs is queued again and picked up by the next one.
+
+    Args:
+        conn: An open psycopg2 connection (see ensure_rfs_series).
+
+    Returns:
+        Number of FATs applied.
+    """
+    with conn.cursor() as cur:
+        cur.execute("SELECT pg_advisory_xact_lock(hashtext('asset_rfs_apply'))")
+        cur.execute(sql.SQL("""
+            CREATE TEMP TABLE rfs_changed ON COMMIT DROP AS
+            WITH claimed AS (DELETE FROM {pending} RETURNING fat_id)
+            SELECT fat_id FROM claimed
+        """).format(pending=sql.Identifier(PENDING_TABLE)))
+        changed = cur.rowcount
+        if not changed:
+            conn.rollback()
+            return 0
+
+        cur.execute("""
+            CREATE TEMP TABLE rfs_delta (
+                tanggal_rfs DATE, kota_kab TEXT, total_assets BIGINT, total_hc BIGINT
+            ) ON COMMIT DROP
+        """)
+        # Previous contributions, subtracted
+        cur.execute(sql.SQL("""
+            WITH old AS (
+                DELETE FROM {contributions} c USING rfs_changed ch
+                WHERE c.fat_id = ch.fat_id
+                RETURNING c.tanggal_rfs, c.kota_kab, c.total_assets, c.total_hc
+            )
+            INSERT INTO rfs_delta SELECT tanggal_rfs, kota_kab, -total_assets, -total_hc FROM old
+        """).format(contributions=sql.Identifier(CONTRIBUTIONS_TABLE)))
+        # Current contributions, added
+        cur.execute(sql.SQL("""
+            WITH new AS (
+                INSERT INTO {contributions} (fat_id, tanggal_rfs, kota_kab, total_assets, total_hc)
+                SELECT b.fat_id, ai.tanggal_rfs, b.kota_kab, count(*), sum(b.total_hc)
+                FROM rfs_changed ch
+                JOIN {base} b ON b.fat_id = ch.fat_id
+                JOIN additional_informations ai ON ai.fat_id = b.fat_id
+                WHERE ai.tanggal_rfs IS NOT NULL
+                GROUP BY b.fat_id, ai.tanggal_rfs, b.kota_kab
+                RETURNING tanggal_rfs, kota_kab, total_assets, total_hc
+            )
+            INSERT INTO rfs_delta SELECT tanggal_rfs, kota_kab, total_assets, total_hc FROM new
+        """).format(contributions=sql.Identifier(CONTRIBUTIONS_TABLE), base=sql.Identifier(BASE_VIEW)))
+
+        for table, unit in ((DAILY_TABLE, 'day'), (MONTHLY_TABLE, 'month')):
+            cur.execute(sql.SQL("""
+                INSERT INTO {table} AS t (period_start, kota_kab, total_assets, total_hc)
+                SELECT date_trunc(%s, tanggal_rfs)::date, kota_kab, sum(total_assets), sum(total_hc)
+                FROM rfs_delta
+                GROUP BY 1, 2
+                ON CONFLICT (period_start, kota_kab) DO UPDATE
+                    SET total_assets = t.total_assets + EXCLUDED.total_assets,
+                        total_hc = t.total_hc + EXCLUDED.total_hc
+            """).format(table=sql.Identifier(table)), (unit,))
+    conn.commit()
+    return changed
+
+
+def rfs_series_query(granularity: str = 'month', start: Optional[date] = None, end: Optional[date] = None,
+                     kota_kab: Optional[str] = None) -> Tuple[sql.Composed, tuple]:
+    """
+    Builds the query for the RFS series in a date window.
+
+    Args:
+        granularity: 'day', 'month' or 'year' (rolled up from the monthly buckets).
+        start: First RFS date included (None: from the first bucket).
+        end: Last RFS date included (None: up to the last bucket).
+        kota_kab: One city, or None / ALL_KOTA for every city.
+
+    Returns:
+        A tuple containing (query, params); rows have RFS_SERIES_COLUMNS.
+    """
+    if granularity not in RFS_GRANULARITIES:
+        raise ValueError(f"Unknown granularity '{granularity}', expected one of {', '.join(RFS_GRANULARITIES)}")
+    table, unit = RFS_GRANULARITIES[granularity]
+    conditions, params = [sql.SQL("total_assets > 0")], [unit]
+    if start is not None:
+        # A monthly bucket holds the whole month: clip the window to the buckets it touches
+        conditions.append(sql.SQL("period_start >= date_trunc(%s, %s::date)::date"))
+        params.extend(['day' if table == DAILY_TABLE else 'month', start])
+    if end is not None:
+        conditions.append(sql.SQL("period_start <= %s"))
+        params.append(end)
+    if kota_kab and kota_kab != ALL_KOTA:
+        conditions.append(sql.SQL("kota_kab = %s"))
+        params.append(kota_kab)
+    query = sql.SQL("""
+        SELECT date_trunc(%s, period_start)::date AS period_start, kota_kab,
+            sum(total_assets)::bigint AS total_assets, sum(total_hc)::bigint AS total_hc
+        FROM {table}
+        WHERE {conditions}
+        GROUP BY 1, 2
+        ORDER BY 1, 2
+    """).format(table=sql.Identifier(table), conditions=sql.SQL(" AND ").join(conditions))
+    return query, tuple(params)
+
+
+def rfs_series_from_assets(df: pd.DataFrame, granularity: str = 'month', start: Optional[date] = None,
+                           end: Optional[date] = None) -> pd.DataFrame:
+    """
+    Computes the RFS series from a normalized, filtered asset frame.
+
+    Args:
+        df: Output of normalize_dashboard_assets restricted to valid_kota_mask,
+            with a tanggal_rfs column.
+        granularity: 'day', 'month' or 'year'.
+        start: First RFS date included (None: no lower bound).
+        end: Last RFS date included (None: no upper bound).
+
+    Returns:
+        A frame with RFS_SERIES_COLUMNS, like rfs_series_query.
+    """
+    if granularity not in RFS_GRANULARITIES:
+        raise ValueError(f"Unknown granularity '{granularity}', expected one of {', '.join(RFS_GRANULARITIES)}")
+    tanggal = pd.to_datetime(df['tanggal_rfs'], errors='coerce')
+    # Window bounds are compared with the bucket start, as in rfs_series_query
+    bucket_unit = 'D' if granularity == 'day' else 'M'
+    bucket = tanggal.dt.to_period(bucket_unit).dt.start_time
+    keep = tanggal.notna()
+    if start is not None:
+        keep &= bucket >= pd.Timestamp(start).to_period(bucket_unit).start_time
+    if end is not None:
+        keep &= bucket <= pd.Timestamp(end)
+    period = tanggal[keep].dt.to_period({'day': 'D', 'month': 'M', 'year': 'Y'}[granularity]).dt.start_time
+    series = pd.DataFrame({'period_start': period.dt.date, 'kota_kab': df.loc[keep, 'kota_kab'].astype(str),
+                           'total_hc': pd.to_numeric(df.loc[keep, 'total_hc'], errors='coerce').fillna(0)})
+    series = series.groupby(['period_start', 'kota_kab'], as_index=False).agg(
+        total_assets=('total_hc', 'size'), total_hc=('total_hc', 'sum'))
+    return series[RFS_SERIES_COLUMNS]
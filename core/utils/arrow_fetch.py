@@ -0,0 +1,103 @@
+"""Arrow-native query results via COPY ... TO STDOUT."""
+
+import io
+import logging
+from typing import List, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+from psycopg2 import extensions
+
+logger = logging.getLogger(__name__)
+
+# PostgreSQL type OIDs mapped to Arrow types. Anything not listed is read
+# as string so that CSV type inference never reinterprets text columns
+# (e.g. numeric-looking port or ID values).
+PG_OID_TO_ARROW = {
+    16: pa.bool_(),                      # boolean
+    20: pa.int64(),                      # bigint
+    21: pa.int64(),                      # smallint
+    23: pa.int64(),                      # integer
+    700: pa.float64(),                   # real
+    701: pa.float64(),                   # double precision / FLOAT
+    1700: pa.float64(),                  # numeric (read as float)
+    1082: pa.date32(),                   # date
+    1114: pa.timestamp('us'),            # timestamp
+    1184: pa.timestamp('us', tz='UTC'),  # timestamptz
+}
+
+
+def _describe(cur, bound_query: str) -> List[tuple]:
+    """Returns (name, arrow_type) for each result column without fetching rows."""
+    cur.execute(f"SELECT * FROM ({bound_query}\n) AS described LIMIT 0")
+    return [(desc[0], PG_OID_TO_ARROW.get(desc[1], pa.string()))
+            for desc in cur.description]
+
+
+def fetch_arrow_table(conn, query: str, params: Optional[tuple] = None) -> pa.Table:
+    """
+    Run a SELECT through ``COPY (query) TO STDOUT`` and parse it with pyarrow.
+
+    The result is transferred as CSV and parsed in C, so no Python object
+    is created per cell. Column types come from the query's result
+    description rather than CSV inference. NULL and empty strings stay
+    distinct, and quoted values may contain newlines.
+
+    Args:
+        conn: An open psycopg2 connection.
+        query: The SELECT statement (without a trailing semicolon).
+        params: Optional tuple of parameters for the query.
+
+    Returns:
+        A pyarrow Table with one column per result column.
+    """
+    with conn.cursor() as cur:
+        bound_query = cur.mogrify(query, params).decode(
+            extensions.encodings.get(conn.encoding, 'utf-8'))
+        # The closing parenthesis goes on a new line: the query may end in a -- comment
+        bound_query = bound_query.strip().rstrip(';')
+        columns = _describe(cur, bound_query)
+
+        buffer = io.BytesIO()
+        cur.copy_expert(
+            f"COPY ({bound_query}\n) TO STDOUT WITH (FORMAT csv, ENCODING 'UTF8')", buffer)
+    buffer.seek(0)
+
+    # Positional names keep duplicate result column names intact
+    positional = [str(i) for i in range(len(columns))]
+    if buffer.getbuffer().nbytes == 0:
+        return pa.table(
+            [pa.array([], type=arrow_type) for _, arrow_type in columns],
+            names=[name for name, _ in columns])
+
+    table = pa_csv.read_csv(
+        buffer,
+        read_options=pa_csv.ReadOptions(column_names=positional),
+        # COPY quotes text with embedded newlines; without this, a value
+        # that spans a block boundary is split into bogus rows
+        parse_options=pa_csv.ParseOptions(newlines_in_values=True),
+        convert_options=pa_csv.ConvertOptions(
+            column_types={pos: arrow_type for pos, (_, arrow_type) in zip(positional, columns)},
+            true_values=['t'],
+            false_values=['f'],
+            strings_can_be_null=True,
+            quoted_strings_can_be_null=False))
+    return table.rename_columns([name for name, _ in columns])
+
+
+def arrow_table_to_frame(table: pa.Table, arrow_dtypes: bool = True) -> pd.DataFrame:
+    """
+    Convert an Arrow table to a DataFrame.
+
+    Args:
+        table: The Arrow table.
+        arrow_dtypes: If True, columns use ``pd.ArrowDtype`` and share the
+                      Arrow buffers; otherwise they use NumPy dtypes.
+
+    Returns:
+        The DataFrame.
+    """
+    if arrow_dtypes:
+        return table.to_pandas(types_mapper=pd.ArrowDtype)
+    return table.to_pandas()
@@ -0,0 +1,374 @@
+"""
+On-disk Arrow snapshot of the joined dashboard asset dataset.
+
+The result of a query over the asset tables is written to an uncompressed
+Arrow IPC file together with a watermark: the per-table change counters
+that statement-level triggers keep in ``asset_table_watermarks``, read in
+the same transaction as the data. Loading memory-maps the file, so a cold
+start or a new replica serves the dashboard from disk instead of re-running
+the join. The file is rebuilt when the database watermark has moved past
+it, and in a background thread whenever the asset tables change in this or
+another process (see add_table_change_callback).
+"""
+
+import contextlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+import pandas as pd
+import pyarrow as pa
+from psycopg2 import sql, Error as Psycopg2Error, OperationalError, InterfaceError
+
+from .arrow_fetch import fetch_arrow_table, arrow_table_to_frame
+from .database import ManagedConnectionPool, add_table_change_callback, execute_with_retry
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_CONFIG = {
+    'enabled': os.environ.get("ASSET_SNAPSHOT_ENABLED", "1") != "0",
+    'directory': os.environ.get("ASSET_SNAPSHOT_DIR",
+                                os.path.join(tempfile.gettempdir(), "asset_snapshots")),
+    'refresh_delay': 2   # Seconds to wait so a burst of table changes causes one rebuild
+}
+
+WATERMARK_TABLE = "asset_table_watermarks"
+
+# Schema metadata key holding the watermark of a snapshot file
+_WATERMARK_KEY = b"asset_snapshot_watermark"
+
+CREATE_WATERMARK_TABLE = f"""
+    CREATE TABLE IF NOT EXISTS {WATERMARK_TABLE} (
+        table_name VARCHAR(255) PRIMARY KEY,
+        version BIGINT NOT NULL DEFAULT 0,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+_WATERMARK_FUNCTION_SQL = f"""
+CREATE OR REPLACE FUNCTION bump_asset_table_watermark()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO {WATERMARK_TABLE} (table_name, version, updated_at)
+    VALUES (TG_TABLE_NAME, 1, CURRENT_TIMESTAMP)
+    ON CONFLICT (table_name) DO UPDATE
+        SET version = {WATERMARK_TABLE}.version + 1, updated_at = CURRENT_TIMESTAMP;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+# Sorted (table, version) pairs, comparable with ==
+Watermark = Tuple[Tuple[str, int], ...]
+
+
+def ensure_watermark_triggers(conn, tables: Iterable[str]) -> None:
+    """
+    Create the watermark table and install its triggers on tables that lack them.
+
+    The triggers run once per statement and increment the table's counter
+    in the writing transaction, so a watermark read together with the data
+    always describes exactly that data. Existing triggers are left alone.
+
+    Args:
+        conn: An open psycopg2 connection with privileges on the tables.
+        tables: Tables to install the trigger on.
+    """
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT c.relname
+            FROM pg_trigger t
+            JOIN pg_class c ON c.oid = t.tgrelid
+            WHERE t.tgname = 'trigger_' || c.relname || '_watermark'
+            AND NOT t.tgisinternal
+        """)
+        installed = {row[0] for row in cur.fetchall()}
+        cur.execute("SELECT to_regclass(%s)", (WATERMARK_TABLE,))
+        missing = [table for table in tables if table not in installed]
+        if not missing and cur.fetchone()[0] is not None:
+            conn.rollback()
+            return
+
+        cur.execute(CREATE_WATERMARK_TABLE)
+        cur.execute(_WATERMARK_FUNCTION_SQL)
+        for table in missing:
+            cur.execute("SELECT to_regclass(%s)", (f"public.{table}",))
+            if cur.fetchone()[0] is None:
+                continue
+            cur.execute(sql.SQL("""
+                CREATE TRIGGER {trigger}
+                    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table}
+                    FOR EACH STATEMENT
+                    EXECUTE FUNCTION bump_asset_table_watermark()
+            """).format(
+                trigger=sql.Identifier(f"trigger_{table}_watermark"),
+                table=sql.Identifier(table)))
+            logger.info(f"Installed watermark trigger on '{table}'")
+    conn.commit()
+
+
+def fetch_watermark(cur, tables: Iterable[str]) -> Optional[Watermark]:
+    """
+    Returns the current watermark of the given tables, or None if the watermark table is missing.
+
+    Tables never written since their trigger was installed have version 0.
+    """
+    cur.execute("SELECT to_regclass(%s)", (WATERMARK_TABLE,))
+    if cur.fetchone()[0] is None:
+        return None
+    tables = sorted(set(tables))
+    cur.execute(sql.SQL("SELECT table_name, version FROM {} WHERE table_name = ANY(%s)").format(
+        sql.Identifier(WATERMARK_TABLE)), (tables,))
+    versions = dict(cur.fetchall())
+    return tuple((table, int(versions.get(table, 0))) for table in tables)
+
+
+def write_snapshot(table: pa.Table, watermark: Watermark, path: str) -> None:
+    """
+    Writes a table and its watermark to an Arrow IPC file.
+
+    The file is written next to ``path`` and renamed over it, so readers
+    (including memory-mapped ones in other processes) never see a partial file.
+    """
+    metadata = dict(table.schema.metadata or {})
+    metadata[_WATERMARK_KEY] = json.dumps(watermark).encode()
+    table = table.replace_schema_metadata(metadata)
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+        raise
+
+
+def read_snapshot(path: str) -> Optional[Tuple[pa.Table, Watermark]]:
+    """
+    Memory-maps a snapshot file.
+
+    Returns:
+        Tuple of (table, watermark), or None if the file is missing,
+        unreadable or has no watermark.
+    """
+    try:
+        table = pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+    except FileNotFoundError:
+        return None
+    except (OSError, pa.ArrowInvalid) as e:
+        logger.warning(f"Ignoring unreadable asset snapshot '{path}': {e}")
+        return None
+    raw = (table.schema.metadata or {}).get(_WATERMARK_KEY)
+    if raw is None:
+        return None
+    watermark = tuple((name, int(version)) for name, version in json.loads(raw))
+    return table, watermark
+
+
+class AssetSnapshotStore:
+    """
+    Snapshot file of one query over the asset tables.
+
+    ``load`` serves the memory-mapped file while its watermark matches the
+    database and rebuilds it otherwise. ``refresh_in_background`` rebuilds
+    it in a daemon thread; requests arriving while a rebuild runs are
+    coalesced into at most one more rebuild.
+    """
+
+    def __init__(self, db_pool: ManagedConnectionPool, name: str, query: str,
+                 tables: Iterable[str], directory: Optional[str] = None,
+                 refresh_delay: Optional[float] = None):
+        """
+        Args:
+            db_pool: The connection pool used for watermarks and rebuilds.
+            name: File name of the snapshot (without extension).
+            query: The SELECT whose result is stored.
+            tables: Tables the query reads; their watermark versions the file.
+            directory: Snapshot directory (default SNAPSHOT_CONFIG['directory']).
+            refresh_delay: Seconds a background rebuild waits for further changes.
+        """
+        self.db_pool = db_pool
+        self.name = name
+        self.query = query
+        self.tables = tuple(sorted(set(tables)))
+        self.path = os.path.join(directory or SNAPSHOT_CONFIG['directory'], f"{name}.arrow")
+        self._refresh_delay = SNAPSHOT_CONFIG['refresh_delay'] if refresh_delay is None else refresh_delay
+
+        self._build_lock = threading.Lock()   # One rebuild at a time
+        self._state_lock = threading.Lock()
+        self._loaded: Optional[Tuple[pa.Table, Watermark]] = None
+        self._refresh_thread: Optional[threading.Thread] = None
+        self._refresh_pending = False
+        self._triggers_checked = False
+
+    def _ensure_triggers(self) -> None:
+        if self._triggers_checked:
+            return
+
+        def _install(conn):
+            ensure_watermark_triggers(conn, self.tables)
+
+        try:
+            execute_with_retry(self.db_pool, _install)
+        except (OperationalError, InterfaceError):
+            raise
+        except Psycopg2Error as e:
+            # Missing privileges: rely on the triggers from init.sql
+            logger.warning(f"Could not install watermark triggers: {e}")
+        self._triggers_checked = True
+
+    def current_watermark(self) -> Optional[Watermark]:
+        """The database watermark of the snapshot's tables, or None if watermarks are unavailable."""
+        def _read(conn):
+            with conn.cursor() as cur:
+                watermark = fetch_watermark(cur, self.tables)
+            conn.rollback()
+            return watermark
+
+        self._ensure_triggers()
+        return execute_with_retry(self.db_pool, _read)
+
+    def refresh(self) -> Optional[pa.Table]:
+        """
+        Rebuilds the snapshot file from the database.
+
+        The watermark and the rows are read in one REPEATABLE READ
+        transaction. Returns the memory-mapped table, or None if
+        watermarks are unavailable.
+        """
+        def _build(conn):
+            with conn.cursor() as cur:
+                cur.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY")
+                watermark = fetch_watermark(cur, self.tables)
+            if watermark is None:
+                conn.rollback()
+                return None
+            table = fetch_arrow_table(conn, self.query)
+            conn.rollback()
+            return table, watermark
+
+        self._ensure_triggers()
+        with self._build_lock:
+            start = time.perf_counter()
+            built = execute_with_retry(self.db_pool, _build)
+            if built is None:
+                return None
+            write_snapshot(built[0], built[1], self.path)
+            # Serve the mapped file so the parsed buffers can be freed
+            self._loaded = read_snapshot(self.path) or built
+            logger.info(f"Asset snapshot '{self.name}' rebuilt: {self._loaded[0].num_rows} rows "
+                        f"in {time.perf_counter() - start:.2f}s")
+            return self._loaded[0]
+
+    def load_table(self) -> Optional[pa.Table]:
+        """
+        Returns the snapshot as a memory-mapped Arrow table, rebuilding it if stale.
+
+        If the database cannot be reached, the file on disk is served as it is.
+        Returns None if watermarks are unavailable (query the database directly).
+        """
+        try:
+            current = self.current_watermark()
+        except (OperationalError, InterfaceError) as e:
+            snapshot = self._loaded or read_snapshot(self.path)
+            if snapshot is None:
+                raise
+            logger.warning(f"Database unreachable, serving asset snapshot '{self.name}' from disk: {e}")
+            return snapshot[0]
+        if current is None:
+            return None
+
+        snapshot = self._loaded
+        if snapshot is None or snapshot[1] != current:
+            # Another process or replica may have rebuilt the file already
+            snapshot = read_snapshot(self.path)
+        if snapshot is not None and snapshot[1] == current:
+            self._loaded = snapshot
+            return snapshot[0]
+        return self.refresh()
+
+    def load(self, arrow_dtypes: bool = False) -> Optional[pd.DataFrame]:
+        """
+        Returns the snapshot as a DataFrame (see load_table).
+
+        Args:
+            arrow_dtypes: If True, columns use ``pd.ArrowDtype`` over the mapped
+                          file; otherwise NumPy/object dtypes as from a cursor fetch.
+        """
+        table = self.load_table()
+        return None if table is None else arrow_table_to_frame(table, arrow_dtypes=arrow_dtypes)
+
+    def on_tables_changed(self, *tables: str) -> None:
+        """Schedules a background rebuild if one of the snapshot's tables changed."""
+        if set(tables) & set(self.tables):
+            self.refresh_in_background()
+
+    def refresh_in_background(self) -> None:
+        """Rebuilds the snapshot in a daemon thread after ``refresh_delay`` seconds."""
+        with self._state_lock:
+            self._refresh_pending = True
+            if self._refresh_thread is not None and self._refresh_thread.is_alive():
+                return
+            self._refresh_thread = threading.Thread(
+                target=self._refresh_loop, name=f"snapshot-refresh-{self.name}", daemon=True)
+            self._refresh_thread.start()
+
+    def _refresh_loop(self) -> None:
+        while True:
+            time.sleep(self._refresh_delay)
+            with self._state_lock:
+                if not self._refresh_pending:
+                    self._refresh_thread = None
+                    return
+                self._refresh_pending = False
+            try:
+                current = self.current_watermark()
+                loaded = self._loaded or read_snapshot(self.path)
+                if current is not None and (loaded is None or loaded[1] != current):
+                    self.refresh()
+            except Exception as e:
+                logger.error(f"Background refresh of asset snapshot '{self.name}' failed: {e}")
+
+
+# Stores of this process by name, notified of every table version bump
+_stores: Dict[str, AssetSnapshotStore] = {}
+_stores_lock = threading.Lock()
+
+
+def _notify_stores(*tables: str) -> None:
+    with _stores_lock:
+        stores = list(_stores.values())
+    for store in stores:
+        store.on_tables_changed(*tables)
+
+
+def get_snapshot_store(db_pool: ManagedConnectionPool, name: str, query: str,
+                       tables: Iterable[str]) -> AssetSnapshotStore:
+    """
+    Returns the process-wide snapshot store for ``name``, creating it on first use.
+
+    Args:
+        db_pool: The connection pool (a store is re-created for a new pool).
+        name: Snapshot name, also its file name.
+        query: The SELECT whose result is stored.
+        tables: Tables the query reads.
+
+    Returns:
+        The AssetSnapshotStore.
+    """
+    with _stores_lock:
+        store = _stores.get(name)
+        if store is None or store.db_pool is not db_pool:
+            if not _stores:
+                add_table_change_callback(_notify_stores)
+            store = AssetSnapshotStore(db_pool, name, query, tables)
+            _stores[name] = store
+        return store
@@ -0,0 +1,290 @@
+"""Bulk loading of DataFrames through COPY ... FROM STDIN and staging tables."""
+
+import io
+import time
+import logging
+from typing import Dict, Iterable, List, Optional
+
+import pandas as pd
+from psycopg2 import sql
+
+logger = logging.getLogger(__name__)
+
+# NULL marker used in the CSV stream; keeps NULL distinct from empty strings
+COPY_NULL = r'\N'
+
+# Rows rendered to CSV per chunk while streaming a DataFrame into COPY
+COPY_CHUNK_ROWS = 10000
+
+
+def prepare_frame_for_copy(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Convert float columns holding only whole numbers to nullable integers.
+
+    Integer columns with missing values arrive as float64 (``3.0``), which
+    COPY rejects for INTEGER targets while a parameterised INSERT accepts it.
+    """
+    converted = {}
+    for col in df.columns[df.dtypes.map(pd.api.types.is_float_dtype)]:
+        values = df[col].dropna()
+        if (values % 1 == 0).all():
+            converted[col] = df[col].astype('Int64')
+    if not converted:
+        return df
+    return df.assign(**converted)
+
+
+class DataFrameCSVStream(io.TextIOBase):
+    """
+    Read-only file object that renders a DataFrame as CSV on demand.
+
+    ``copy_expert`` pulls from it in small reads, so at most one chunk of
+    ``chunk_rows`` rows is rendered at a time instead of the whole file.
+    """
+
+    def __init__(self, df: pd.DataFrame, chunk_rows: int = COPY_CHUNK_ROWS):
+        self._df = df
+        self._chunk_rows = chunk_rows
+        self._position = 0
+        self._buffer = ''
+
+    def readable(self) -> bool:
+        return True
+
+    def _render_next_chunk(self) -> bool:
+        if self._position >= len(self._df):
+            return False
+        chunk = self._df.iloc[self._position:self._position + self._chunk_rows]
+        self._position += self._chunk_rows
+        self._buffer += chunk.to_csv(header=False, index=False, na_rep=COPY_NULL)
+        return True
+
+    def read(self, size: int = -1) -> str:
+        if size is None or size < 0:
+            while self._render_next_chunk():
+                pass
+            data, self._buffer = self._buffer, ''
+            return data
+        while len(self._buffer) < size and self._render_next_chunk():
+            pass
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+
+def copy_into_staging(cur, df: pd.DataFrame, target_table: str,
+                      staging_table: Optional[str] = None) -> int:
+    """
+    Create a temporary staging table shaped like the target columns and COPY the DataFrame into it.
+
+    The staging table only has the DataFrame's columns, typed like the
+    target, and no constraints. It is dropped at the end of the transaction.
+
+    Args:
+        cur: Cursor of the loading transaction.
+        df: Data to stage. Column names must exist in the target table.
+        target_table: Table whose column types the staging table copies.
+        staging_table: Optional staging table name (default ``stage_<target>``).
+
+    Returns:
+        Number of rows staged.
+    """
+    staging_table = staging_table or f"stage_{target_table}"
+    columns = sql.SQL(", ").join(sql.Identifier(col) for col in df.columns)
+
+    cur.execute(sql.SQL("DROP TABLE IF EXISTS {}").format(sql.Identifier(staging_table)))
+    cur.execute(sql.SQL(
+        "CREATE TEMP TABLE {staging} ON COMMIT DROP AS SELECT {columns} FROM {target} WITH NO DATA"
+    ).format(staging=sql.Identifier(staging_table), columns=columns,
+             target=sql.Identifier(target_table)))
+
+    copy_query = sql.SQL(
+        "COPY {staging} ({columns}) FROM STDIN WITH (FORMAT csv, NULL {null})"
+    ).format(staging=sql.Identifier(staging_table), columns=columns,
+             null=sql.Literal(COPY_NULL))
+    cur.copy_expert(copy_query.as_string(cur), DataFrameCSVStream(prepare_frame_for_copy(df)))
+    return cur.rowcount
+
+
+def bulk_insert_dataframe(cur, df: pd.DataFrame, table: str,
+                          conflict_columns: Optional[Iterable[str]] = None) -> Dict[str, float]:
+    """
+    Insert a DataFrame with COPY into a staging table followed by one INSERT ... SELECT.
+
+    Args:
+        cur: Cursor of the loading transaction (the caller commits).
+        df: Rows to insert. Column names must match the target table.
+        table: Target table name.
+        conflict_columns: Optional columns for ``ON CONFLICT (...) DO NOTHING``.
+
+    Returns:
+        Dict with 'table', 'staged', 'inserted', 'skipped', 'seconds' and 'rows_per_sec'.
+    """
+    start = time.perf_counter()
+    staging_table = f"stage_{table}"
+    staged = copy_into_staging(cur, df, table, staging_table)
+
+    columns = sql.SQL(", ").join(sql.Identifier(col) for col in df.columns)
+    insert_query = sql.SQL("INSERT INTO {target} ({columns}) SELECT {columns} FROM {staging}").format(
+        target=sql.Identifier(table), columns=columns, staging=sql.Identifier(staging_table))
+    if conflict_columns:
+        insert_query += sql.SQL(" ON CONFLICT ({}) DO NOTHING").format(
+            sql.SQL(", ").join(sql.Identifier(col) for col in conflict_columns))
+    cur.execute(insert_query)
+    inserted = cur.rowcount
+
+    cur.execute(sql.SQL("DROP TABLE {}").format(sql.Identifier(staging_table)))
+    seconds = time.perf_counter() - start
+    report = {
+        'table': table,
+        'staged': staged,
+        'inserted': inserted,
+        'skipped': staged - inserted,
+        'seconds': seconds,
+        'rows_per_sec': staged / seconds if seconds > 0 else 0.0
+    }
+    logger.info(
+        f"Bulk loaded '{table}': {inserted}/{staged} rows inserted in {seconds:.2f}s "
+        f"({report['rows_per_sec']:,.0f} rows/s)")
+    return report
+
+
+def bulk_merge_dataframe(cur, df: pd.DataFrame, table: str, key_column: str = 'fat_id',
+                         key_is_unique: bool = False,
+                         changed_keys_table: Optional[str] = None) -> Dict[str, float]:
+    """
+    Merge a DataFrame into a table by key, applying only real changes.
+
+    Rows are staged with COPY and diffed server-side. New keys are inserted;
+    existing rows are updated only where a staged column ``IS DISTINCT FROM``
+    the stored value (NULLs compare as values, so clearing a cell counts as a
+    change). Columns not present in the DataFrame are left untouched.
+
+    Args:
+        cur: Cursor of the merge transaction (the caller commits).
+        df: Incoming rows, including the key column.
+        table: Target table name.
+        key_column: Column identifying a record.
+        key_is_unique: True if the target has a unique constraint on the key
+                       (one INSERT ... ON CONFLICT DO UPDATE); otherwise a
+                       set-based UPDATE followed by an anti-join INSERT.
+        changed_keys_table: Optional existing table with a ``key_column``
+                            column that receives every inserted or updated key.
+
+    Returns:
+        Dict with 'table', 'staged', 'inserted', 'updated', 'unchanged',
+        'seconds' and 'rows_per_sec'. Counts are per distinct key.
+    """
+    start = time.perf_counter()
+    staging_table = f"stage_{table}"
+    staged = copy_into_staging(cur, df, table, staging_table)
+
+    key = sql.Identifier(key_column)
+    target = sql.Identifier(table)
+    columns = [sql.Identifier(col) for col in df.columns]
+    value_columns = [sql.Identifier(col) for col in df.columns if col != key_column]
+    column_list = sql.SQL(", ").join(columns)
+    # One row per key, as split_data keeps the first occurrence
+    source = sql.SQL("(SELECT DISTINCT ON ({key}) * FROM {staging} ORDER BY {key}) AS s").format(
+        key=key, staging=sql.Identifier(staging_table))
+
+    def _qualified(alias: str, idents: List[sql.Identifier]) -> sql.Composable:
+        return sql.SQL(", ").join(sql.SQL("{}.{}").format(sql.Identifier(alias), i) for i in idents)
+
+    changed = sql.SQL("ROW({}) IS DISTINCT FROM ROW({})").format(
+        _qualified('t', value_columns), _qualified('s', value_columns)) if value_columns else sql.SQL("FALSE")
+
+    def _log_keys(cte: str) -> sql.Composable:
+        if not changed_keys_table:
+            return sql.SQL("")
+        return sql.SQL(", logged AS (INSERT INTO {log} ({key}) SELECT {key} FROM {cte})").format(
+            log=sql.Identifier(changed_keys_table), key=key, cte=sql.Identifier(cte))
+
+    cur.execute(sql.SQL("SELECT count(DISTINCT {key}) FROM {staging}").format(
+        key=key, staging=sql.Identifier(staging_table)))
+    distinct_keys = cur.fetchone()[0]
+
+    if key_is_unique:
+        if value_columns:
+            on_conflict = sql.SQL("DO UPDATE SET {}").format(sql.SQL(", ").join(
+                sql.SQL("{col} = EXCLUDED.{col}").format(col=col) for col in value_columns))
+        else:
+            on_conflict = sql.SQL("DO NOTHING")
+        cur.execute(sql.SQL("""
+            WITH merged AS (
+                INSERT INTO {target} ({columns})
+                SELECT {source_columns} FROM {source}
+                LEFT JOIN {target} AS t ON t.{key} = s.{key}
+                WHERE t.{key} IS NULL OR {changed}
+                ON CONFLICT ({key}) {on_conflict}
+                RETURNING {key}, (xmax = 0) AS inserted
+            ){log}
+            SELECT count(*) FILTER (WHERE inserted), count(*) FILTER (WHERE NOT inserted) FROM merged
+        """).format(target=target, columns=column_list, source_columns=_qualified('s', columns),
+                    source=source, key=key, changed=changed, on_conflict=on_conflict,
+                    log=_log_keys('merged')))
+        inserted, updated = cur.fetchone()
+    else:
+        updated = 0
+        if value_columns:
+            cur.execute(sql.SQL("""
+                WITH changed_rows AS (
+                    UPDATE {target} AS t SET {assignments}
+                    FROM {source}
+                    WHERE t.{key} = s.{key} AND {changed}
+                    RETURNING t.{key}
+                ){log}
+                SELECT count(DISTINCT {key}) FROM changed_rows
+            """).format(target=target, source=source, key=key, changed=changed,
+                        log=_log_keys('changed_rows'),
+                        assignments=sql.SQL(", ").join(
+                            sql.SQL("{col} = s.{col}").format(col=col) for col in value_columns)))
+            updated = cur.fetchone()[0]
+        cur.execute(sql.SQL("""
+            WITH new_rows AS (
+                INSERT INTO {target} ({columns})
+                SELECT {source_columns} FROM {source}
+                WHERE NOT EXISTS (SELECT 1 FROM {target} AS t WHERE t.{key} = s.{key})
+                RETURNING {key}
+            ){log}
+            SELECT count(*) FROM new_rows
+        """).format(target=target, columns=column_list, source_columns=_qualified('s', columns),
+                    source=source, key=key, log=_log_keys('new_rows')))
+        inserted = cur.fetchone()[0]
+
+    cur.execute(sql.SQL("DROP TABLE {}").format(sql.Identifier(staging_table)))
+    seconds = time.perf_counter() - start
+    report = {
+        'table': table,
+        'staged': staged,
+        'inserted': inserted,
+        'updated': updated,
+        'unchanged': distinct_keys - inserted - updated,
+        'seconds': seconds,
+        'rows_per_sec': staged / seconds if seconds > 0 else 0.0
+    }
+    logger.info(
+        f"Merged '{table}': {inserted} inserted, {updated} updated, "
+        f"{report['unchanged']} unchanged in {seconds:.2f}s")
+    return report
+
+
+def select_missing_keys(cur, keys: Iterable[str], table: str, key_column: str = 'fat_id') -> List[str]:
+    """
+    Return the given keys that do not exist in ``table``, diffed server-side.
+
+    Only the incoming keys travel to the server and only the missing ones
+    come back, so the table's keys are never loaded into the client. Keys
+    are compared exactly (using the key's index), so pass them normalised
+    the way they are written (for FAT IDs: ``clean_fat_ids``).
+    """
+    key_frame = pd.DataFrame({key_column: pd.Series(list(keys), dtype=object)}).drop_duplicates()
+    staging_table = f"stage_keys_{table}"
+    copy_into_staging(cur, key_frame, table, staging_table)
+    cur.execute(sql.SQL("""
+        SELECT s.{key} FROM {staging} AS s
+        WHERE NOT EXISTS (SELECT 1 FROM {target} AS t WHERE t.{key} = s.{key})
+    """).format(key=sql.Identifier(key_column), staging=sql.Identifier(staging_table),
+                target=sql.Identifier(table)))
+    missing = [row[0] for row in cur.fetchall()]
+    cur.execute(sql.SQL("DROP TABLE {}").format(sql.Identifier(staging_table)))
+    return missing
@@ -0,0 +1,180 @@
+"""Cross-process cache invalidation via PostgreSQL LISTEN/NOTIFY."""
+
+import select
+import threading
+import logging
+from typing import Callable, Iterable, Optional
+
+import psycopg2
+from psycopg2 import extensions, sql
+
+logger = logging.getLogger(__name__)
+
+# Notification settings
+NOTIFY_CONFIG = {
+    'channel': 'asset_table_changes',
+    'poll_timeout': 5,       # Seconds to block waiting for notifications
+    'reconnect_delay': 5     # Seconds to wait before re-opening a dropped listener
+}
+
+# Tables whose writes are broadcast to every application process
+NOTIFY_TABLES = ("user_terminals", "clusters", "home_connecteds",
+                 "dokumentasis", "additional_informations", "dynamic_columns")
+
+_NOTIFY_FUNCTION_SQL = """
+CREATE OR REPLACE FUNCTION notify_asset_table_change()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pg_notify('{channel}', TG_TABLE_NAME);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+
+def ensure_notify_triggers(conn, tables: Iterable[str] = NOTIFY_TABLES) -> None:
+    """
+    Install the statement-level NOTIFY triggers on tables that do not have them yet.
+
+    Existing triggers are left untouched so that replicas starting up do not
+    take DDL locks on busy tables.
+
+    Args:
+        conn: An open psycopg2 connection with privileges on the tables.
+        tables: Tables to install the trigger on.
+    """
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT c.relname
+            FROM pg_trigger t
+            JOIN pg_class c ON c.oid = t.tgrelid
+            WHERE t.tgname = 'trigger_' || c.relname || '_notify_change'
+            AND NOT t.tgisinternal
+        """)
+        installed = {row[0] for row in cur.fetchall()}
+
+        missing = [table for table in tables if table not in installed]
+        if not missing:
+            conn.rollback()
+            return
+
+        cur.execute(_NOTIFY_FUNCTION_SQL.format(channel=NOTIFY_CONFIG['channel']))
+        for table in missing:
+            cur.execute("SELECT to_regclass(%s)", (f"public.{table}",))
+            if cur.fetchone()[0] is None:
+                continue  # Table not created yet (e.g. dynamic columns disabled)
+            cur.execute(sql.SQL("""
+                CREATE TRIGGER {trigger}
+                    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table}
+                    FOR EACH STATEMENT
+                    EXECUTE FUNCTION notify_asset_table_change()
+            """).format(
+                trigger=sql.Identifier(f"trigger_{table}_notify_change"),
+                table=sql.Identifier(table)))
+            logger.info(f"Installed change notification trigger on '{table}'")
+    conn.commit()
+
+
+class TableChangeListener(threading.Thread):
+    """
+    Background thread that LISTENs for table change notifications.
+
+    Each notification payload is a table name. Notifications received in
+    the same poll cycle are de-duplicated and passed to ``on_change`` in one
+    call. After a dropped connection every watched table is reported as
+    changed, since notifications sent while disconnected are lost.
+    """
+
+    def __init__(self, connect_kwargs: dict, on_change: Callable[..., None],
+                 tables: Iterable[str] = NOTIFY_TABLES,
+                 channel: str = NOTIFY_CONFIG['channel'],
+                 poll_timeout: float = NOTIFY_CONFIG['poll_timeout'],
+                 reconnect_delay: float = NOTIFY_CONFIG['reconnect_delay']):
+        """
+        Initializes the listener thread (call ``start()`` to run it).
+
+        Args:
+            connect_kwargs: Keyword arguments passed to ``psycopg2.connect``.
+            on_change: Callable invoked as ``on_change(*table_names)``.
+            tables: Table names to act on; other payloads are ignored.
+            channel: NOTIFY channel name.
+            poll_timeout: Seconds to block waiting for notifications.
+            reconnect_delay: Seconds to wait before reconnecting after an error.
+        """
+        super().__init__(name="table-change-listener", daemon=True)
+        self._connect_kwargs = connect_kwargs
+        self._on_change = on_change
+        self._tables = frozenset(tables)
+        self._channel = channel
+        self._poll_timeout = poll_timeout
+        self._reconnect_delay = reconnect_delay
+        self._stop_event = threading.Event()
+        self._conn = None
+
+    def _listen(self) -> None:
+        """Opens the dedicated listener connection and subscribes to the channel."""
+        self._conn = psycopg2.connect(**self._connect_kwargs)
+        self._conn.set_isolation_level(extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        try:
+            ensure_notify_triggers(self._conn, self._tables)
+        except psycopg2.Error as e:
+            # Missing privileges: rely on the triggers from init.sql
+            logger.warning(f"Could not install change notification triggers: {e}")
+        with self._conn.cursor() as cur:
+            cur.execute(sql.SQL("LISTEN {}").format(
+                sql.Identifier(self._channel)))
+        logger.info(f"Listening for table changes on channel '{self._channel}'")
+
+    def _close(self) -> None:
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+            self._conn = None
+
+    def _dispatch(self, tables: Iterable[str]) -> None:
+        changed = sorted(set(tables) & self._tables)
+        if not changed:
+            return
+        try:
+            self._on_change(*changed)
+        except Exception as e:
+            logger.error(f"Error handling table change notification: {e}")
+
+    def run(self) -> None:
+        reconnecting = False
+        while not self._stop_event.is_set():
+            try:
+                self._listen()
+                if reconnecting:
+                    # Anything may have changed while we were disconnected
+                    self._dispatch(self._tables)
+                    reconnecting = False
+
+                while not self._stop_event.is_set():
+                    ready, _, _ = select.select(
+                        [self._conn], [], [], self._poll_timeout)
+                    if not ready:
+                        continue
+                    self._conn.poll()
+                    changed = set()
+                    while self._conn.notifies:
+                        changed.add(self._conn.notifies.pop(0).payload)
+                    self._dispatch(changed)
+
+            except (psycopg2.Error, OSError, ValueError) as e:
+                if self._stop_event.is_set():
+                    break
+                logger.warning(
+                    f"Table change listener disconnected: {e}. Reconnecting in {self._reconnect_delay}s")
+                reconnecting = True
+                self._close()
+                self._stop_event.wait(self._reconnect_delay)
+
+        self._close()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stops the listener and closes its connection."""
+        self._stop_event.set()
+        self.join(timeout)
@@ -1,16 +1,20 @@
 """Database connection management for PostgreSQL and Supabase."""
 
 import psycopg2
-from psycopg2 import pool, OperationalError, InterfaceError
+from psycopg2 import pool, extensions, OperationalError, InterfaceError
 import streamlit as st
 from supabase import create_client
-from typing import Tuple, Optional, Callable, Any
+from typing import Tuple, Optional, Callable, Any, Dict, Iterable, Iterator, List
+from contextlib import contextmanager
+from collections import deque
 import logging
+import threading
 import time
 import functools
 import hashlib
-import pickle
-from datetime import datetime, timedelta
+import uuid
+from .query_cache import QueryCache
+from .change_notifications import TableChangeListener
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -21,11 +25,125 @@ CACHE_CONFIG = {
     'schema_ttl': 7200,      # 2 hours for schema data
     'aggregation_ttl': 1800,  # 30 minutes for aggregations
     'map_data_ttl': 1800,    # 30 minutes for map data
-    'max_cache_size': 100    # Maximum number of cached items
+    'versioned_data_ttl': 21600,  # 6 hours for results keyed by table versions
+    'max_cache_size': 100,   # Maximum number of cached items
+    'max_cache_bytes': 512 * 1024 * 1024,  # Global memory budget for cached results
+    'namespace_quotas': {    # Per-namespace memory budgets (namespace = function name)
+        'load_all_assets': 256 * 1024 * 1024,
+        'get_asset_aggregations': 16 * 1024 * 1024,
+        'get_map_data': 64 * 1024 * 1024
+    }
+}
+
+# Connection pool configuration (overridable via [database] secrets)
+POOL_CONFIG = {
+    'minconn': 1,               # Connections opened eagerly at startup
+    'maxconn': 10,              # Hard upper bound on open connections
+    'checkout_timeout': 15,     # Seconds to wait for a free connection
+    'idle_check_after': 30,     # Ping connections idle longer than this (seconds)
+    'max_lifetime': 1800        # Recycle connections older than this (seconds)
 }
 
 # In-memory cache storage
-_cache_storage = {}
+_query_cache = QueryCache(
+    max_bytes=CACHE_CONFIG['max_cache_bytes'],
+    max_entries=CACHE_CONFIG['max_cache_size'],
+    namespace_quotas=CACHE_CONFIG['namespace_quotas']
+)
+
+
+# Per-table generation counters. Cached results that depend on a table
+# include its version in their key, and every write path bumps it.
+_table_versions: Dict[str, int] = {}
+_table_versions_lock = threading.Lock()
+# Called with the bumped table names (see add_table_change_callback)
+_table_change_callbacks: List[Callable[..., None]] = []
+
+
+def get_table_versions(tables: Iterable[str]) -> Tuple[Tuple[str, int], ...]:
+    """Get the current (table, version) pairs for the given tables, sorted by name."""
+    with _table_versions_lock:
+        return tuple((table, _table_versions.get(table, 0)) for table in sorted(set(tables)))
+
+
+def bump_table_versions(*tables: str) -> None:
+    """
+    Mark tables as changed: bump their versions and evict dependent cache entries.
+
+    Args:
+        *tables: Names of the tables that were written to.
+    """
+    if not tables:
+        return
+    with _table_versions_lock:
+        for table in tables:
+            _table_versions[table] = _table_versions.get(table, 0) + 1
+    removed = _query_cache.invalidate_tags(tables)
+    logger.info(
+        f"Table versions bumped for {', '.join(tables)} ({removed} cache entries invalidated)")
+    for callback in list(_table_change_callbacks):
+        try:
+            callback(*tables)
+        except Exception as e:
+            logger.error(f"Error in table change callback: {e}")
+
+
+def add_table_change_callback(callback: Callable[..., None]) -> None:
+    """
+    Register a callable invoked as ``callback(*tables)`` after every version bump.
+
+    Runs for local writes and, through the change listener, for writes made
+    by other processes. Callbacks must return quickly (e.g. start a thread).
+    """
+    with _table_versions_lock:
+        if callback not in _table_change_callbacks:
+            _table_change_callbacks.append(callback)
+
+
+# Listener applying writes made by other processes to the local table versions
+_change_listener: Optional[TableChangeListener] = None
+_change_listener_lock = threading.Lock()
+
+
+def start_change_listener(connect_kwargs: dict) -> Optional[TableChangeListener]:
+    """
+    Start the per-process LISTEN/NOTIFY listener if it is not running yet.
+
+    Notifications are sent by statement-level triggers on the asset tables,
+    so writes from any replica, Airflow job or psql session bump the local
+    table versions and evict dependent cache entries.
+
+    Args:
+        connect_kwargs: Connection parameters for the dedicated listener connection.
+
+    Returns:
+        The running listener, or None if disabled in secrets.
+    """
+    global _change_listener
+    try:
+        enabled = st.secrets.get("database", {}).get(
+            "ENABLE_CHANGE_NOTIFICATIONS", True)
+    except Exception:
+        enabled = True
+    if not enabled:
+        logger.info("Cross-process cache invalidation disabled")
+        return None
+
+    with _change_listener_lock:
+        if _change_listener is None or not _change_listener.is_alive():
+            _change_listener = TableChangeListener(
+                connect_kwargs, on_change=bump_table_versions)
+            _change_listener.start()
+        return _change_listener
+
+
+def stop_change_listener(timeout: Optional[float] = 5) -> None:
+    """Stop the LISTEN/NOTIFY listener if it is running."""
+    global _change_listener
+    with _change_listener_lock:
+        if _change_listener is not None:
+            _change_listener.stop(timeout)
+            _change_listener = None
 
 
 def generate_cache_key(*args, **kwargs) -> str:
@@ -34,80 +152,357 @@ def generate_cache_key(*args, **kwargs) -> str:
     return hashlib.md5(key_data.encode()).hexdigest()
 
 
-def is_cache_valid(timestamp: datetime, ttl_seconds: int) -> bool:
-    """Check if cached data is still valid based on TTL."""
-    return datetime.now() - timestamp < timedelta(seconds=ttl_seconds)
+def get_from_cache(cache_key: str, ttl_seconds: Optional[int] = None,
+                   namespace: Optional[str] = None) -> Optional[Any]:
+    """Retrieve data from cache if present and not expired."""
+    data = _query_cache.get(cache_key, max_age=ttl_seconds, namespace=namespace)
+    if data is not None:
+        logger.info(f"Cache HIT for key: {cache_key[:8]}...")
+    else:
+        logger.info(f"Cache MISS for key: {cache_key[:8]}...")
+    return data
 
 
-def get_from_cache(cache_key: str, ttl_seconds: int) -> Optional[Any]:
-    """Retrieve data from cache if valid."""
-    if cache_key in _cache_storage:
-        cached_item = _cache_storage[cache_key]
-        if is_cache_valid(cached_item['timestamp'], ttl_seconds):
-            logger.info(f"Cache HIT for key: {cache_key[:8]}...")
-            return cached_item['data']
-        else:
-            # Remove expired cache
-            logger.info(f"Cache EXPIRED for key: {cache_key[:8]}...")
-            del _cache_storage[cache_key]
-
-    logger.info(f"Cache MISS for key: {cache_key[:8]}...")
-    return None
-
-
-def set_cache(cache_key: str, data: Any) -> None:
-    """Store data in cache with timestamp."""
-    # Implement LRU eviction if cache is full
-    if len(_cache_storage) >= CACHE_CONFIG['max_cache_size']:
-        # Remove oldest cache entry
-        oldest_key = min(_cache_storage.keys(),
-                         key=lambda k: _cache_storage[k]['timestamp'])
-        del _cache_storage[oldest_key]
-        logger.info(f"Cache evicted oldest entry: {oldest_key[:8]}...")
-
-    _cache_storage[cache_key] = {
-        'data': data,
-        'timestamp': datetime.now(),
-        'size': len(pickle.dumps(data)) if hasattr(data, '__len__') else 0
-    }
-    logger.info(f"Cache SET for key: {cache_key[:8]}...")
+def set_cache(cache_key: str, data: Any, ttl_seconds: Optional[int] = None,
+              namespace: str = 'default', tables: Optional[Iterable[str]] = None) -> None:
+    """Store data in cache with a TTL (defaults to the asset data TTL) and its table dependencies."""
+    if ttl_seconds is None:
+        ttl_seconds = CACHE_CONFIG['asset_data_ttl']
+    if _query_cache.set(cache_key, data, ttl_seconds, namespace=namespace, tags=tables):
+        logger.info(f"Cache SET for key: {cache_key[:8]}... ({namespace})")
 
 
 def clear_cache(pattern: Optional[str] = None) -> None:
-    """Clear cache entries matching pattern, or all if pattern is None."""
+    """Clear cache entries whose namespace or key matches pattern, or all if pattern is None."""
     if pattern is None:
-        _cache_storage.clear()
+        _query_cache.clear()
         logger.info("All cache cleared")
     else:
-        keys_to_remove = [k for k in _cache_storage.keys() if pattern in k]
-        for key in keys_to_remove:
-            del _cache_storage[key]
-        logger.info(f"Cache cleared for pattern: {pattern}")
+        removed = _query_cache.invalidate(
+            lambda key, namespace: namespace == pattern or pattern in key)
+        logger.info(f"Cache cleared for pattern: {pattern} ({removed} entries)")
+
+
+def get_cache_stats() -> Dict[str, Any]:
+    """Get hit/miss/eviction counters and memory usage of the query cache."""
+    return _query_cache.stats()
 
 
-def cache_query_result(ttl_seconds: int = 3600):
-    """Decorator for caching database query results."""
+def cache_query_result(ttl_seconds: int = 3600, namespace: Optional[str] = None,
+                       tables: Optional[Iterable[str]] = None):
+    """
+    Decorator for caching database query results.
+
+    Args:
+        ttl_seconds: Time-to-live of each cached result.
+        namespace: Cache namespace for quotas and stats. Defaults to the function name.
+        tables: Tables the query reads. Their versions become part of the cache
+                key, so a write to any of them invalidates the result.
+    """
+    dependent_tables = tuple(sorted(set(tables))) if tables else ()
+
     def decorator(func):
+        cache_namespace = namespace or func.__name__
+
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
-            # Generate cache key
-            cache_key = generate_cache_key(func.__name__, *args, **kwargs)
+            # Generate cache key (including versions of the tables read)
+            cache_key = generate_cache_key(
+                func.__name__, get_table_versions(dependent_tables), *args, **kwargs)
 
             # Try to get from cache
-            cached_result = get_from_cache(cache_key, ttl_seconds)
+            cached_result = get_from_cache(
+                cache_key, namespace=cache_namespace)
             if cached_result is not None:
                 return cached_result
 
             # Execute function and cache result
             result = func(*args, **kwargs)
             if result is not None:
-                set_cache(cache_key, result)
+                set_cache(cache_key, result, ttl_seconds,
+                          namespace=cache_namespace, tables=dependent_tables)
 
             return result
         return wrapper
     return decorator
 
 
+class ManagedConnectionPool:
+    """
+    Thread-safe, bounded PostgreSQL connection pool.
+
+    Unlike ``psycopg2.pool.SimpleConnectionPool`` this pool can be shared by
+    concurrent Streamlit sessions. Checkout blocks (up to a timeout) when all
+    connections are leased instead of failing immediately, connections are only
+    pinged when they have been idle for a while, and connections older than
+    ``max_lifetime`` are recycled transparently.
+
+    The ``getconn``/``putconn``/``closeall`` methods keep the psycopg2 pool
+    interface so existing callers continue to work; new code should prefer
+    ``lease()``.
+    """
+
+    def __init__(self, minconn: int, maxconn: int,
+                 checkout_timeout: float = POOL_CONFIG['checkout_timeout'],
+                 idle_check_after: float = POOL_CONFIG['idle_check_after'],
+                 max_lifetime: float = POOL_CONFIG['max_lifetime'],
+                 **connect_kwargs):
+        """
+        Initializes the pool and opens ``minconn`` connections eagerly.
+
+        Args:
+            minconn: Number of connections opened at startup.
+            maxconn: Maximum number of open connections (idle + leased).
+            checkout_timeout: Default seconds to wait for a free connection.
+            idle_check_after: Connections idle longer than this are pinged before reuse.
+            max_lifetime: Connections older than this are closed and replaced.
+            **connect_kwargs: Keyword arguments passed to ``psycopg2.connect``.
+        """
+        if maxconn < 1 or minconn < 0 or minconn > maxconn:
+            raise ValueError(
+                f"Invalid pool bounds: minconn={minconn}, maxconn={maxconn}")
+
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.checkout_timeout = checkout_timeout
+        self.idle_check_after = idle_check_after
+        self.max_lifetime = max_lifetime
+        self._connect_kwargs = connect_kwargs
+
+        self._cond = threading.Condition()
+        self._idle = deque()       # Idle connections, most recently used on the right
+        self._leased = {}          # id(conn) -> conn for connections handed out
+        self._created_at = {}      # id(conn) -> creation time (monotonic)
+        self._last_used = {}       # id(conn) -> last return time (monotonic)
+        self._size = 0             # Open connections, including reserved slots
+        self._stats = {'checkouts': 0, 'waits': 0, 'timeouts': 0,
+                       'created': 0, 'recycled': 0, 'discarded': 0}
+        self.closed = False
+
+        for _ in range(minconn):
+            with self._cond:
+                self._size += 1
+            conn = self._open_connection()
+            with self._cond:
+                self._idle.append(conn)
+
+    def _open_connection(self):
+        """Opens a new connection for a slot that has already been reserved."""
+        try:
+            conn = psycopg2.connect(**self._connect_kwargs)
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+        now = time.monotonic()
+        with self._cond:
+            self._created_at[id(conn)] = now
+            self._last_used[id(conn)] = now
+            self._stats['created'] += 1
+        return conn
+
+    def _discard(self, conn) -> None:
+        """Closes a connection and frees its slot."""
+        try:
+            if not conn.closed:
+                conn.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._created_at.pop(id(conn), None)
+            self._last_used.pop(id(conn), None)
+            self._size -= 1
+            self._stats['discarded'] += 1
+            self._cond.notify()
+
+    def _is_expired(self, conn) -> bool:
+        """Checks whether a connection has exceeded its maximum lifetime."""
+        created_at = self._created_at.get(id(conn))
+        return created_at is None or time.monotonic() - created_at > self.max_lifetime
+
+    def _is_usable(self, conn) -> bool:
+        """Validates an idle connection before handing it out."""
+        if conn.closed != 0:
+            return False
+        if self._is_expired(conn):
+            with self._cond:
+                self._stats['recycled'] += 1
+            return False
+
+        # Only pay for a round trip when the connection sat idle long enough
+        # for a server/proxy timeout to have dropped it.
+        idle_for = time.monotonic() - self._last_used.get(id(conn), 0)
+        if idle_for > self.idle_check_after:
+            if not is_connection_alive(conn):
+                return False
+            try:
+                conn.rollback()  # End the transaction opened by the ping
+            except (OperationalError, InterfaceError):
+                return False
+        return True
+
+    def getconn(self, timeout: Optional[float] = None):
+        """
+        Checks out a validated connection, blocking while the pool is exhausted.
+
+        Args:
+            timeout: Seconds to wait for a free connection. Defaults to ``checkout_timeout``.
+
+        Returns:
+            An open psycopg2 connection.
+
+        Raises:
+            pool.PoolError: If the pool is closed or no connection frees up in time.
+        """
+        wait_limit = self.checkout_timeout if timeout is None else timeout
+        deadline = time.monotonic() + wait_limit
+
+        while True:
+            conn = None
+            with self._cond:
+                while True:
+                    if self.closed:
+                        raise pool.PoolError("connection pool is closed")
+                    if self._idle:
+                        conn = self._idle.pop()
+                        break
+                    if self._size < self.maxconn:
+                        self._size += 1  # Reserve a slot, connect outside the lock
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats['timeouts'] += 1
+                        raise pool.PoolError(
+                            f"connection pool exhausted: no connection available after {wait_limit}s "
+                            f"(maxconn={self.maxconn})")
+                    self._stats['waits'] += 1
+                    self._cond.wait(remaining)
+
+            if conn is None:
+                conn = self._open_connection()
+            elif not self._is_usable(conn):
+                logger.info("Replacing stale pooled connection")
+                self._discard(conn)
+                continue
+
+            with self._cond:
+                self._leased[id(conn)] = conn
+                self._stats['checkouts'] += 1
+            return conn
+
+    def putconn(self, conn, close: bool = False) -> None:
+        """
+        Returns a connection to the pool.
+
+        Args:
+            conn: A connection previously obtained from ``getconn``.
+            close: If True, close the connection instead of reusing it.
+        """
+        with self._cond:
+            if self._leased.pop(id(conn), None) is None:
+                raise pool.PoolError("trying to put unkeyed connection")
+
+        if not close and not self.closed and conn.closed == 0:
+            try:
+                status = conn.info.transaction_status
+                if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+                    close = True
+                elif status != extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except (OperationalError, InterfaceError):
+                close = True
+        else:
+            close = True
+
+        if close or self._is_expired(conn):
+            self._discard(conn)
+            return
+
+        with self._cond:
+            self._last_used[id(conn)] = time.monotonic()
+            self._idle.append(conn)
+            self._cond.notify()
+
+    @contextmanager
+    def lease(self, timeout: Optional[float] = None):
+        """
+        Context manager that checks out a connection and always returns it.
+
+        Connections that raised a connection-level error inside the block are
+        closed instead of being returned to the idle set.
+
+        Args:
+            timeout: Seconds to wait for a free connection.
+
+        Yields:
+            An open psycopg2 connection.
+        """
+        conn = self.getconn(timeout=timeout)
+        broken = False
+        try:
+            yield conn
+        except (OperationalError, InterfaceError):
+            broken = True
+            raise
+        finally:
+            self.putconn(conn, close=broken)
+
+    def closeall(self) -> None:
+        """Closes every connection and rejects further checkouts."""
+        with self._cond:
+            self.closed = True
+            connections = list(self._idle) + list(self._leased.values())
+            for conn in self._idle:
+                self._created_at.pop(id(conn), None)
+                self._last_used.pop(id(conn), None)
+            self._idle.clear()
+            # Leased connections free their slot when they are put back
+            self._size = len(self._leased)
+            self._cond.notify_all()
+        for conn in connections:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns a snapshot of pool occupancy and counters."""
+        with self._cond:
+            return {
+                'size': self._size,
+                'idle': len(self._idle),
+                'leased': len(self._leased),
+                'minconn': self.minconn,
+                'maxconn': self.maxconn,
+                **self._stats
+            }
+
+
+def get_pool_config() -> dict:
+    """Get connection pool settings, applying optional overrides from Streamlit secrets."""
+    overrides = {
+        'minconn': 'POOL_MIN_CONN',
+        'maxconn': 'POOL_MAX_CONN',
+        'checkout_timeout': 'POOL_CHECKOUT_TIMEOUT',
+        'idle_check_after': 'POOL_IDLE_CHECK_AFTER',
+        'max_lifetime': 'POOL_MAX_LIFETIME'
+    }
+    config = dict(POOL_CONFIG)
+    try:
+        db_secrets = st.secrets["database"]
+        for setting, secret_key in overrides.items():
+            if secret_key in db_secrets:
+                config[setting] = type(POOL_CONFIG[setting])(
+                    db_secrets[secret_key])
+    except (KeyError, AttributeError, FileNotFoundError):
+        pass
+    except (TypeError, ValueError) as e:
+        logger.warning(f"Ignoring invalid pool configuration override: {e}")
+    return config
+
+
 @st.cache_resource(ttl=CACHE_CONFIG['schema_ttl'])
 def get_database_config() -> dict:
     """Get database configuration from Streamlit secrets."""
@@ -156,7 +551,7 @@ def get_supabase_config() -> dict:
 
 
 @st.cache_resource
-def connect_db() -> Tuple[Optional[pool.SimpleConnectionPool], Optional[object]]:
+def connect_db() -> Tuple[Optional[ManagedConnectionPool], Optional[object]]:
     """
     Create PostgreSQL connection pool and Supabase client.
 
@@ -180,9 +575,9 @@ def connect_db() -> Tuple[Optional[pool.SimpleConnectionPool], Optional[object]]
                     'options': '-c statement_timeout=30000'  # 30 second query timeout
                 }
 
-                db_pool = pool.SimpleConnectionPool(
-                    minconn=1,
-                    maxconn=5,
+                pool_config = get_pool_config()
+                db_pool = ManagedConnectionPool(
+                    **pool_config,
                     **enhanced_db_config
                 )
 
@@ -190,16 +585,12 @@ def connect_db() -> Tuple[Optional[pool.SimpleConnectionPool], Optional[object]]
                 max_retries = 3
                 for attempt in range(max_retries):
                     try:
-                        test_conn = db_pool.getconn()
-                        if test_conn.closed != 0:
-                            raise OperationalError("Connection is closed")
-
-                        # Test with a simple query
-                        with test_conn.cursor() as cur:
-                            cur.execute("SELECT 1")
-                            cur.fetchone()
-
-                        db_pool.putconn(test_conn)
+                        with db_pool.lease() as test_conn:
+                            # Test with a simple query
+                            with test_conn.cursor() as cur:
+                                cur.execute("SELECT 1")
+                                cur.fetchone()
+                            test_conn.rollback()
                         break
                     except (OperationalError, InterfaceError) as e:
                         logger.warning(
@@ -208,7 +599,12 @@ def connect_db() -> Tuple[Optional[pool.SimpleConnectionPool], Optional[object]]
                             raise
                         time.sleep(2 ** attempt)  # Exponential backoff
 
-                logger.info("PostgreSQL connection pool created successfully")
+                logger.info(
+                    f"PostgreSQL connection pool created successfully "
+                    f"(min={pool_config['minconn']}, max={pool_config['maxconn']})")
+
+                start_change_listener(
+                    {**db_config, 'connect_timeout': 10})
             except Exception as e:
                 logger.error(f"Failed to create PostgreSQL connection: {e}")
                 db_pool = None
@@ -244,7 +640,7 @@ def connect_db() -> Tuple[Optional[pool.SimpleConnectionPool], Optional[object]]
     return db_pool, supabase_client
 
 
-def close_db_pool(db_pool: pool.SimpleConnectionPool) -> None:
+def close_db_pool(db_pool: ManagedConnectionPool) -> None:
     """
     Safely close the database connection pool.
 
@@ -252,6 +648,7 @@ def close_db_pool(db_pool: pool.SimpleConnectionPool) -> None:
         db_pool: The connection pool to close
     """
     try:
+        stop_change_listener()
         if db_pool:
             db_pool.closeall()
             logger.info("Database connection pool closed successfully")
@@ -282,10 +679,15 @@ def is_connection_alive(connection) -> bool:
         return False
 
 
-def get_robust_connection(db_pool: pool.SimpleConnectionPool, max_retries: int = 3):
+def get_robust_connection(db_pool: ManagedConnectionPool, max_retries: int = 3):
     """
     Get a robust database connection with retry logic.
 
+    The pool validates connections itself (idle-time ping and lifetime
+    recycling), so this only retries when opening a connection fails.
+    Callers must return the connection with ``db_pool.putconn``; prefer
+    ``db_pool.lease()`` in new code.
+
     Args:
         db_pool: The connection pool
         max_retries: Maximum number of retry attempts
@@ -298,28 +700,7 @@ def get_robust_connection(db_pool: pool.SimpleConnectionPool, max_retries: int =
     """
     for attempt in range(max_retries):
         try:
-            conn = db_pool.getconn()
-
-            # Test if connection is alive
-            if is_connection_alive(conn):
-                return conn
-            else:
-                # Connection is dead, discard it and try again
-                logger.warning(
-                    f"Dead connection detected on attempt {attempt + 1}, discarding...")
-                try:
-                    # Force close the bad connection
-                    db_pool.putconn(conn, close=True)
-                except:
-                    pass
-
-                if attempt < max_retries - 1:
-                    time.sleep(2 ** attempt)  # Exponential backoff
-                    continue
-                else:
-                    raise OperationalError(
-                        "Unable to get alive connection after retries")
-
+            return db_pool.getconn()
         except (OperationalError, InterfaceError) as e:
             logger.warning(f"Connection attempt {attempt + 1} failed: {e}")
             if attempt < max_retries - 1:
@@ -331,12 +712,16 @@ def get_robust_connection(db_pool: pool.SimpleConnectionPool, max_retries: int =
     raise OperationalError("Unable to get connection after all retries")
 
 
-def execute_with_retry(db_pool: pool.SimpleConnectionPool,
+def execute_with_retry(db_pool: ManagedConnectionPool,
                        operation: Callable[[Any], Any],
                        max_retries: int = 3) -> Any:
     """
     Execute a database operation with retry logic for connection failures.
 
+    Each attempt runs inside a pool lease, so the connection is always
+    returned, and connections that failed with a connection-level error are
+    closed instead of being reused.
+
     Args:
         db_pool: The connection pool
         operation: A callable that takes a connection and returns a result
@@ -351,25 +736,15 @@ def execute_with_retry(db_pool: pool.SimpleConnectionPool,
     last_exception = None
 
     for attempt in range(max_retries):
-        conn = None
         try:
-            conn = get_robust_connection(db_pool, max_retries=2)
-            result = operation(conn)
-            return result
+            with db_pool.lease() as conn:
+                return operation(conn)
 
         except (OperationalError, InterfaceError) as e:
             last_exception = e
             logger.warning(
                 f"Database operation attempt {attempt + 1} failed: {e}")
 
-            # Close the problematic connection
-            if conn:
-                try:
-                    db_pool.putconn(conn, close=True)
-                    conn = None
-                except:
-                    pass
-
             if attempt < max_retries - 1:
                 time.sleep(2 ** attempt)  # Exponential backoff
                 continue
@@ -377,20 +752,59 @@ def execute_with_retry(db_pool: pool.SimpleConnectionPool,
                 break
 
         except Exception as e:
-            # Non-connection related errors should not be retried
+            # Non-connection related errors (including pool exhaustion) should not be retried
             last_exception = e
             break
 
-        finally:
-            # Return connection to pool if still valid
-            if conn:
-                try:
-                    db_pool.putconn(conn)
-                except:
-                    pass
-
     # If we get here, all retries failed
     if last_exception:
         raise last_exception
     else:
         raise OperationalError("Database operation failed after all retries")
+
+
+def stream_query(db_pool: ManagedConnectionPool, query: str,
+                 params: Optional[tuple] = None, itersize: int = 10000,
+                 max_retries: int = 3) -> Iterator[Tuple[List[tuple], List[str]]]:
+    """
+    Stream query results from a server-side (named) cursor.
+
+    Rows are fetched ``itersize`` at a time, so only one batch is held on
+    the client. The pool connection stays leased until the generator is
+    exhausted or closed. Connection failures are retried only before the
+    first batch has been yielded.
+
+    Args:
+        db_pool: The connection pool
+        query: The SQL query string
+        params: Optional tuple of parameters for the query
+        itersize: Number of rows fetched per round trip
+        max_retries: Maximum number of attempts to open the cursor
+
+    Yields:
+        Tuples of (rows, column_names). An empty result yields one batch
+        with no rows so callers still receive the column names.
+    """
+    for attempt in range(max_retries):
+        started = False
+        try:
+            with db_pool.lease() as conn:
+                with conn.cursor(name=f"stream_{uuid.uuid4().hex}") as cur:
+                    cur.itersize = itersize
+                    cur.execute(query, params)
+                    rows = cur.fetchmany(itersize)
+                    columns = [desc[0] for desc in cur.description]
+                    started = True
+                    yield rows, columns
+                    while rows:
+                        rows = cur.fetchmany(itersize)
+                        if rows:
+                            yield rows, columns
+            return
+
+        except (OperationalError, InterfaceError) as e:
+            if started or attempt == max_retries - 1:
+                raise
+            logger.warning(
+                f"Streaming query attempt {attempt + 1} failed: {e}")
+            time.sleep(2 ** attempt)  # Exponential backoff
@@ -0,0 +1,307 @@
+"""In-process LRU/TTL cache for query results with byte-size budgets."""
+
+import sys
+import threading
+import time
+import logging
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Set
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_size(data: Any) -> int:
+    """
+    Estimate the in-memory size of a cached value in bytes.
+
+    DataFrames and Series are measured with ``memory_usage(deep=True)`` and
+    NumPy arrays with ``nbytes``; containers are measured one level deep.
+    Nothing is serialised.
+
+    Args:
+        data: The value to measure.
+
+    Returns:
+        Approximate size in bytes.
+    """
+    if isinstance(data, pd.DataFrame):
+        return int(data.memory_usage(deep=True, index=True).sum())
+    if isinstance(data, (pd.Series, pd.Index)):
+        return int(data.memory_usage(deep=True))
+    if isinstance(data, np.ndarray):
+        return int(data.nbytes)
+    if isinstance(data, (list, tuple, set, frozenset)):
+        return sys.getsizeof(data) + sum(sys.getsizeof(item) for item in data)
+    if isinstance(data, dict):
+        return sys.getsizeof(data) + sum(
+            sys.getsizeof(k) + sys.getsizeof(v) for k, v in data.items())
+    return sys.getsizeof(data)
+
+
+class _CacheEntry:
+    """A single cached value with its namespace, tags, size and expiry."""
+
+    __slots__ = ('value', 'namespace', 'tags', 'size', 'created_at', 'expires_at')
+
+    def __init__(self, value: Any, namespace: str, tags: frozenset, size: int,
+                 created_at: float, expires_at: float):
+        self.value = value
+        self.namespace = namespace
+        self.tags = tags
+        self.size = size
+        self.created_at = created_at
+        self.expires_at = expires_at
+
+
+class QueryCache:
+    """
+    Thread-safe LRU cache with per-entry TTL and memory budgets.
+
+    Entries live in a global LRU order and in a per-namespace LRU order, so
+    lookups, inserts and evictions are all O(1). Inserting an entry first
+    evicts least-recently-used entries from the same namespace until its
+    quota fits, then from the whole cache until the global byte budget and
+    entry limit fit. Values larger than their budget are not cached.
+
+    Entries can carry tags (e.g. the tables a query reads) so that all
+    dependent entries can be dropped at once with ``invalidate_tags``.
+    """
+
+    def __init__(self, max_bytes: int, max_entries: Optional[int] = None,
+                 namespace_quotas: Optional[Dict[str, int]] = None,
+                 size_estimator: Callable[[Any], int] = estimate_size):
+        """
+        Initializes the cache.
+
+        Args:
+            max_bytes: Global memory budget in bytes.
+            max_entries: Optional upper bound on the number of entries.
+            namespace_quotas: Optional byte quota per namespace.
+            size_estimator: Callable returning the size of a value in bytes.
+        """
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.namespace_quotas = dict(namespace_quotas or {})
+        self._size_estimator = size_estimator
+
+        self._lock = threading.RLock()
+        self._entries: "OrderedDict[Hashable, _CacheEntry]" = OrderedDict()
+        self._namespace_keys: Dict[str, "OrderedDict[Hashable, None]"] = {}
+        self._namespace_bytes: Dict[str, int] = {}
+        self._tag_keys: Dict[str, Set[Hashable]] = {}
+        self._total_bytes = 0
+        self._counters = self._new_counters()
+        self._namespace_counters: Dict[str, Dict[str, int]] = {}
+
+    @staticmethod
+    def _new_counters() -> Dict[str, int]:
+        return {'hits': 0, 'misses': 0, 'expirations': 0,
+                'evictions': 0, 'inserts': 0, 'rejections': 0}
+
+    def _count(self, namespace: str, counter: str) -> None:
+        self._counters[counter] += 1
+        if namespace not in self._namespace_counters:
+            self._namespace_counters[namespace] = self._new_counters()
+        self._namespace_counters[namespace][counter] += 1
+
+    def _remove(self, key: Hashable) -> _CacheEntry:
+        """Removes an entry from all indexes. Caller must hold the lock."""
+        entry = self._entries.pop(key)
+        namespace_keys = self._namespace_keys[entry.namespace]
+        del namespace_keys[key]
+        if not namespace_keys:
+            del self._namespace_keys[entry.namespace]
+        self._namespace_bytes[entry.namespace] -= entry.size
+        self._total_bytes -= entry.size
+        for tag in entry.tags:
+            tagged = self._tag_keys.get(tag)
+            if tagged is not None:
+                tagged.discard(key)
+                if not tagged:
+                    del self._tag_keys[tag]
+        return entry
+
+    def get(self, key: Hashable, max_age: Optional[float] = None,
+            namespace: Optional[str] = None) -> Optional[Any]:
+        """
+        Retrieve a value, refreshing its LRU position.
+
+        Args:
+            key: Cache key.
+            max_age: Optional additional age limit in seconds, checked
+                     together with the entry's own TTL.
+            namespace: Namespace to attribute a miss to in the stats.
+
+        Returns:
+            The cached value, or None on miss or expiry.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                if namespace is not None:
+                    self._count(namespace, 'misses')
+                else:
+                    self._counters['misses'] += 1
+                return None
+
+            now = time.monotonic()
+            expired = now >= entry.expires_at or (
+                max_age is not None and now - entry.created_at >= max_age)
+            if expired:
+                self._remove(key)
+                self._count(entry.namespace, 'expirations')
+                self._count(entry.namespace, 'misses')
+                return None
+
+            self._entries.move_to_end(key)
+            self._namespace_keys[entry.namespace].move_to_end(key)
+            self._count(entry.namespace, 'hits')
+            return entry.value
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: float, namespace: str = 'default',
+            tags: Optional[Iterable[str]] = None) -> bool:
+        """
+        Store a value, evicting least-recently-used entries as needed.
+
+        Args:
+            key: Cache key.
+            value: Value to cache.
+            ttl_seconds: Time-to-live for this entry.
+            namespace: Namespace used for quotas, stats and bulk invalidation.
+            tags: Optional tags used for dependency invalidation.
+
+        Returns:
+            True if the value was cached, False if it exceeds its budget.
+        """
+        size = self._size_estimator(value)
+        entry_tags = frozenset(tags or ())
+        quota = self.namespace_quotas.get(namespace, self.max_bytes)
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            if size > quota or size > self.max_bytes:
+                self._count(namespace, 'rejections')
+                logger.info(
+                    f"Cache REJECT for namespace '{namespace}': {size:,} bytes exceeds budget")
+                return False
+
+            # Make room inside the namespace quota first, then globally
+            namespace_keys = self._namespace_keys.get(namespace)
+            while namespace_keys and self._namespace_bytes[namespace] + size > quota:
+                evicted_key = next(iter(namespace_keys))
+                self._remove(evicted_key)
+                self._count(namespace, 'evictions')
+                namespace_keys = self._namespace_keys.get(namespace)
+
+            while self._entries and (
+                    self._total_bytes + size > self.max_bytes or
+                    (self.max_entries is not None and len(self._entries) >= self.max_entries)):
+                evicted_key = next(iter(self._entries))
+                evicted = self._remove(evicted_key)
+                self._count(evicted.namespace, 'evictions')
+
+            now = time.monotonic()
+            self._entries[key] = _CacheEntry(
+                value, namespace, entry_tags, size, now, now + ttl_seconds)
+            self._namespace_keys.setdefault(namespace, OrderedDict())[key] = None
+            for tag in entry_tags:
+                self._tag_keys.setdefault(tag, set()).add(key)
+            self._namespace_bytes[namespace] = self._namespace_bytes.get(
+                namespace, 0) + size
+            self._total_bytes += size
+            self._count(namespace, 'inserts')
+            return True
+
+    def delete(self, key: Hashable) -> bool:
+        """Remove a single entry. Returns True if it existed."""
+        with self._lock:
+            if key not in self._entries:
+                return False
+            self._remove(key)
+            return True
+
+    def clear(self, namespace: Optional[str] = None) -> int:
+        """
+        Remove all entries, or all entries of one namespace.
+
+        Returns:
+            Number of entries removed.
+        """
+        with self._lock:
+            if namespace is None:
+                removed = len(self._entries)
+                self._entries.clear()
+                self._namespace_keys.clear()
+                self._namespace_bytes.clear()
+                self._tag_keys.clear()
+                self._total_bytes = 0
+                return removed
+
+            keys = list(self._namespace_keys.get(namespace, ()))
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+
+    def invalidate(self, predicate: Callable[[Hashable, str], bool]) -> int:
+        """
+        Remove entries for which ``predicate(key, namespace)`` is true.
+
+        Returns:
+            Number of entries removed.
+        """
+        with self._lock:
+            keys = [key for key, entry in self._entries.items()
+                    if predicate(key, entry.namespace)]
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        """
+        Remove every entry carrying at least one of the given tags.
+
+        Returns:
+            Number of entries removed.
+        """
+        with self._lock:
+            keys = set()
+            for tag in tags:
+                keys.update(self._tag_keys.get(tag, ()))
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns a snapshot of occupancy and hit/miss/eviction counters."""
+        with self._lock:
+            lookups = self._counters['hits'] + self._counters['misses']
+            namespaces = {}
+            for namespace in set(self._namespace_counters) | set(self._namespace_keys):
+                counters = self._namespace_counters.get(
+                    namespace, self._new_counters())
+                namespaces[namespace] = {
+                    'entries': len(self._namespace_keys.get(namespace, ())),
+                    'bytes': self._namespace_bytes.get(namespace, 0),
+                    'quota_bytes': self.namespace_quotas.get(namespace, self.max_bytes),
+                    **counters
+                }
+            return {
+                'entries': len(self._entries),
+                'bytes': self._total_bytes,
+                'max_bytes': self.max_bytes,
+                'max_entries': self.max_entries,
+                'hit_ratio': self._counters['hits'] / lookups if lookups else 0.0,
+                **self._counters,
+                'namespaces': namespaces
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
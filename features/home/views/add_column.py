@@ -1,6 +1,6 @@
 # features/home/views/add_column.py
 
-from core.utils.database import connect_db
+from core.utils.database import connect_db, bump_table_versions
 import streamlit as st
 import pandas as pd
 import psycopg2
@@ -314,9 +314,9 @@ class ColumnManager:
                         asset_service.invalidate_all_cache()
                         logger.info(
                             "Invalidated all AssetDataService caches due to schema change")
-                # Also clear streamlit cache to ensure fresh data
-                st.cache_data.clear()
-                logger.info("Column added - all caches invalidated")
+                # Invalidate only results that read the altered table
+                bump_table_versions(table_name, 'dynamic_columns')
+                logger.info("Column added - dependent caches invalidated")
             except Exception as cache_error:
                 logger.warning(f"Could not invalidate caches: {cache_error}")
 
@@ -343,6 +343,7 @@ class ColumnManager:
         success, message, _ = self.execute_query(query, (column_id,))
 
         if success:
+            bump_table_versions('dynamic_columns')
             return True, "Kolom berhasil dihapus!"
         return False, f"Error: {message}"
 
@@ -1,129 +1,170 @@
 # features/home/views/dashboard.py
+import json
 import streamlit as st
 import pandas as pd
 import plotly.express as px
 import folium
-from core.services.AssetDataService import AssetDataService
-from core.utils.database import CACHE_CONFIG
-from typing import Optional
-from folium.plugins import MarkerCluster
-from streamlit_folium import folium_static
+from core.services.AssetDataService import AssetDataService, ASSET_TABLES
+from core.services.asset_index import AssetIndex
+from core.services.map_clusters import (ClusterLayer, build_clusters, clusters_geojson,
+                                        fat_id_x_filled, valid_coordinates_mask)
+from core.services.map_markers import MarkerLayer
+from core.services.map_viewport import MAP_VIEWPORT_CONFIG, BoundingBox
+from core.services.rfs_series import RFS_SOURCE_TABLES, rfs_series_from_assets
+from core.services.kpi_views import (ALL_KOTA, KPI_TABLES, kpi_frames_from_assets,
+                                     normalize_dashboard_assets, valid_kota_mask)
+from core.utils.database import CACHE_CONFIG, get_table_versions
+from typing import Dict, Optional, Tuple
+from streamlit_folium import st_folium
 
 
 # --- Caching and Optimization Functions ---
 
-@st.cache_data(ttl=CACHE_CONFIG['asset_data_ttl'], show_spinner="Loading dashboard data...")
-def load_dashboard_data_cached(_service: AssetDataService) -> Optional[pd.DataFrame]:
+@st.cache_data(ttl=CACHE_CONFIG['versioned_data_ttl'], show_spinner="Loading dashboard data...")
+def load_dashboard_data_cached(_service: AssetDataService, table_versions: Tuple[Tuple[str, int], ...]) -> Optional[pd.DataFrame]:
     """
     Enhanced cached data loading with multiple optimization strategies.
     Uses both Streamlit cache and service-level caching.
+
+    `table_versions` is only part of the cache key: a write to any asset
+    table changes it, so the dashboard reloads without clearing other caches.
     """
-    print("CACHE MISS: Loading data from database with enhanced caching...")
+    print("CACHE MISS: Loading data from the asset snapshot...")
 
-    # Use the cached service method
-    df = _service.load_all_assets(limit=None)
+    # Memory-mapped snapshot file, rebuilt from the database only when stale
+    # Compact dtypes are applied while converting from Arrow, without a second copy
+    df = _service.load_asset_snapshot(compact=True)
 
     if df is not None and not df.empty:
-        # Optimize data types for memory efficiency
-        df = optimize_dataframe_memory(df)
-        print(f"Loaded and optimized {len(df)} records for dashboard")
+        report = df.attrs.get('compact_report', {})
+        saved = sum(before - after for before, after in report.values())
+        print(f"Loaded {len(df)} compact records for dashboard ({saved / 2 ** 20:.1f} MiB saved)")
 
     return df
 
 
-@st.cache_data(ttl=CACHE_CONFIG['aggregation_ttl'])
-def get_cached_aggregations(_service: AssetDataService, group_by: str) -> Optional[pd.DataFrame]:
-    """Get cached aggregated data for visualizations."""
-    return _service.get_asset_aggregations(group_by)
+@st.cache_data(ttl=CACHE_CONFIG['versioned_data_ttl'], show_spinner="Loading KPIs...")
+def load_dashboard_kpis_cached(_service: AssetDataService, table_versions: Tuple[Tuple[str, int], ...]) -> Optional[Dict[str, pd.DataFrame]]:
+    """
+    KPI and aggregation frames from the materialized KPI views (None if unavailable).
+
+    `table_versions` is only part of the cache key, as in load_dashboard_data_cached.
+    """
+    return _service.load_dashboard_kpis()
 
 
-@st.cache_data(ttl=CACHE_CONFIG['map_data_ttl'], show_spinner="Preparing map data...")
-def prepare_map_data_enhanced(df: pd.DataFrame, max_markers: int = 1000, kota_filter: str = 'All') -> pd.DataFrame:
+@st.cache_data(ttl=CACHE_CONFIG['versioned_data_ttl'], show_spinner=False)
+def load_rfs_series_cached(_service: AssetDataService, table_versions: Tuple[Tuple[str, int], ...],
+                           granularity: str, kota_filter: str) -> Optional[pd.DataFrame]:
     """
-    Enhanced map data preparation with intelligent caching and optimization.
+    RFS time series from the pre-aggregated buckets (None if unavailable).
+
+    `table_versions` is only part of the cache key, as in load_dashboard_data_cached.
     """
-    print(f"Processing map data for {len(df)} records (filter: {kota_filter})")
+    return _service.get_rfs_series(granularity=granularity, kota_kab=kota_filter)
 
-    if df.empty:
-        return pd.DataFrame()
 
-    df_map = df.copy()
+@st.cache_resource(max_entries=2, show_spinner="Indexing asset data...")
+def build_asset_index_cached(_df_raw: pd.DataFrame, table_versions: Tuple[Tuple[str, int], ...]) -> AssetIndex:
+    """
+    AssetIndex over the normalized rows with a valid kota_kab.
 
-    # Efficient coordinate validation
-    numeric_columns = ['latitude_fat', 'longitude_fat']
-    for col in numeric_columns:
-        if col in df_map.columns:
-            df_map[col] = pd.to_numeric(df_map[col], errors='coerce')
+    Built once per `table_versions` and shared by every rerun and filter
+    change; the indexed frame must be treated as read-only.
+    """
+    df = _df_raw.copy()
+    df.columns = df.columns.str.strip().str.lower()
 
-    # Remove invalid coordinates
-    valid_coords_mask = (
-        df_map['latitude_fat'].notna() &
-        df_map['longitude_fat'].notna() &
-        (df_map['latitude_fat'] >= -11) & (df_map['latitude_fat'] <= 6) &
-        (df_map['longitude_fat'] >= 95) & (df_map['longitude_fat'] <= 141)
-    )
-    # Intelligent sampling based on importance
-    df_map = df_map[valid_coords_mask]
-    if max_markers is not None and len(df_map) > max_markers:
-        # Multi-criteria sampling: HC value + geographical distribution
-        if 'total_hc' in df_map.columns:
-            # Primary: High HC values
-            high_hc = df_map.nlargest(max_markers // 2, 'total_hc')
-
-            # Secondary: Geographical diversity (sample remaining)
-            remaining = df_map[~df_map.index.isin(high_hc.index)]
-            if not remaining.empty:
-                geo_sample = remaining.sample(
-                    min(max_markers // 2, len(remaining)))
-                df_map = pd.concat([high_hc, geo_sample])
-            else:
-                df_map = high_hc
-        else:
-            df_map = df_map.head(max_markers)
+    # Clean and normalize data (same rules as the KPI views: kota_kab title-cased,
+    # fat_filter_pemakaian anomalies as UNKNOWN, brand_olt spellings unified)
+    df = normalize_dashboard_assets(df)
 
-        print(f"Map data intelligently sampled to {len(df_map)} markers")
-    elif max_markers is None:
-        print(f"Map data showing all {len(df_map)} markers (no limit)")
+    # Drop invalid kota values and rows with negative HC values (anomalies)
+    return AssetIndex(df[valid_kota_mask(df)].reset_index(drop=True))
 
-    return df_map
 
+def _dimension_counts(kpis: Dict[str, pd.DataFrame], dimension: str, kota_filter: str) -> pd.DataFrame:
+    """Rows per value of a KPI dimension within the selected city ('All' for every city)."""
+    frame = kpis[dimension]
+    frame = frame[frame['kota_kab'] == kota_filter]
+    return frame[[dimension, 'total_assets']].rename(columns={'total_assets': 'count'}).sort_values(
+        'count', ascending=False, kind='stable')
 
-def optimize_dataframe_memory(df: pd.DataFrame) -> pd.DataFrame:
-    """Optimize DataFrame memory usage by converting data types."""
-    if df.empty:
-        return df
 
-    df_optimized = df.copy()
+@st.cache_data(ttl=CACHE_CONFIG['aggregation_ttl'])
+def get_cached_aggregations(_service: AssetDataService, group_by: str) -> Optional[pd.DataFrame]:
+    """Get cached aggregated data for visualizations."""
+    return _service.get_asset_aggregations(group_by)
 
-    # Optimize numeric columns
-    for col in df_optimized.select_dtypes(include=['int64']).columns:
-        if df_optimized[col].min() >= 0:
-            if df_optimized[col].max() < 255:
-                df_optimized[col] = df_optimized[col].astype('uint8')
-            elif df_optimized[col].max() < 65535:
-                df_optimized[col] = df_optimized[col].astype('uint16')
-            else:
-                df_optimized[col] = df_optimized[col].astype('uint32')
-        else:
-            if df_optimized[col].min() > -128 and df_optimized[col].max() < 127:
-                df_optimized[col] = df_optimized[col].astype('int8')
-            elif df_optimized[col].min() > -32768 and df_optimized[col].max() < 32767:
-                df_optimized[col] = df_optimized[col].astype('int16')
-            else:
-                df_optimized[col] = df_optimized[col].astype('int32')
 
-    # Optimize string columns to categories where beneficial
-    for col in df_optimized.select_dtypes(include=['object']).columns:
-        # Less than 50% unique values
-        if df_optimized[col].nunique() / len(df_optimized) < 0.5:
-            df_optimized[col] = df_optimized[col].astype('category')
+@st.cache_data(ttl=CACHE_CONFIG['map_data_ttl'], show_spinner="Clustering map data...")
+def build_map_clusters_cached(_asset_index: AssetIndex, table_versions: Tuple[Tuple[str, int], ...],
+                              kota_filter: str = ALL_KOTA) -> Tuple[str, Dict]:
+    """
+    Clusters every asset of the selected city for all map zoom levels.
+
+    `table_versions` and `kota_filter` are the cache key; the index is not hashed.
+
+    Returns:
+        The clusters as a GeoJSON string for ClusterLayer, and a summary with
+        the number of assets with valid coordinates ('assets'), how many of
+        them are full ('full') and their center ('center').
+    """
+    selection = _asset_index.select(kota_kab=None if kota_filter == ALL_KOTA else kota_filter)
+    rows = selection.row_ids()
+    frame = _asset_index.frame
+    lat, lon = selection.numbers('latitude_fat'), selection.numbers('longitude_fat')
+    full = fat_id_x_filled(frame['fat_id_x'].to_numpy()[rows])
+    clusters = build_clusters(lat, lon, selection.numbers('total_hc'), full)
+    print(f"Clustered {len(rows)} assets into {len(clusters)} map clusters (filter: {kota_filter})")
+
+    valid = valid_coordinates_mask(lat, lon)
+    summary = {
+        'assets': int(valid.sum()),
+        'full': int(full[valid].sum()),
+        'center': [float(lat[valid].mean()), float(lon[valid].mean())] if valid.any() else None,
+    }
+    geojson = clusters_geojson(clusters, frame['fat_id'].to_numpy()[rows])
+    return json.dumps(geojson, separators=(',', ':')), summary
+
+
+def _load_next_viewport_page(service: AssetDataService):
+    """Button callback: appends the next page of the current viewport's FATs."""
+    state = st.session_state.get('map_viewport')
+    if state is None or state['cursor'] is None:
+        return
+    page, cursor = service.get_map_page(state['bbox'], state['kota_filter'], cursor=state['cursor'])
+    if page is not None:
+        state['pages'].append(page)
+        state['cursor'] = cursor
+
+
+def load_viewport_assets(service: AssetDataService, bbox: BoundingBox, kota_filter: str) -> Tuple[pd.DataFrame, bool]:
+    """
+    FATs inside the map viewport: the first page, plus the pages loaded with _load_next_viewport_page.
+
+    Pages are kept in session state until the viewport or the city changes.
+
+    Returns:
+        A tuple containing (FATs loaded so far, whether more pages exist).
+    """
+    bbox = bbox.rounded()
+    state = st.session_state.get('map_viewport')
+    if state is None or state['bbox'] != bbox or state['kota_filter'] != kota_filter:
+        page, cursor = service.get_map_page(bbox, kota_filter)
+        state = {'bbox': bbox, 'kota_filter': kota_filter,
+                 'pages': [page] if page is not None else [], 'cursor': cursor}
+        st.session_state['map_viewport'] = state
+    if not state['pages']:
+        return pd.DataFrame(), False
+    return pd.concat(state['pages'], ignore_index=True), state['cursor'] is not None
 
-    return df_optimized
 
 # ----------------------------------------------------
 
 
-def _add_markers_to_map_helper(map_object, df_assets, current_filter_context, use_cluster=True, performance_limit=None):
+def _add_markers_to_map_helper(map_object, df_assets, current_filter_context, use_cluster=True, performance_limit=None,
+                               compact=True):
     """
     Helper function to add asset markers to a Folium map or MarkerCluster.
     Markers use check/cross icons based on fat_id_x field:
@@ -132,6 +173,8 @@ def _add_markers_to_map_helper(map_object, df_assets, current_filter_context, us
 
     Args:
         performance_limit: Maximum number of markers to render (None = unlimited)
+        compact: Ship the markers as one JSON array with a shared client-side
+            popup template (MarkerLayer) instead of a folium.Marker per row
     """
     if df_assets.empty:
         return
@@ -146,6 +189,10 @@ def _add_markers_to_map_helper(map_object, df_assets, current_filter_context, us
 
     target_map = map_object
 
+    if compact:
+        MarkerLayer(df_assets).add_to(target_map)
+        return
+
     for idx, asset_row in df_assets.iterrows():
         lat = asset_row['latitude_fat']
         lon = asset_row['longitude_fat']
@@ -220,7 +267,8 @@ def app(asset_data_service: AssetDataService):
     # --- Judul Utama ---
     st.markdown('<div class="title">DASHBOARD DATA ASET ALL</div>',
                 unsafe_allow_html=True)    # --- Load Data with Enhanced Caching ---
-    df_raw = load_dashboard_data_cached(asset_data_service)
+    asset_versions = get_table_versions(ASSET_TABLES)
+    df_raw = load_dashboard_data_cached(asset_data_service, asset_versions)
 
     # --- Initial Data Check and Cleaning (Tetap sama) ---
     if df_raw is None:
@@ -230,79 +278,41 @@ def app(asset_data_service: AssetDataService):
         st.info("No asset data found in the database.")
         st.stop()
 
-    df = df_raw.copy()
-    df.columns = df.columns.str.strip().str.lower()
-
     # --- Data Preprocessing & Filtering (Enhanced) ---
     required_cols = ['kota_kab', 'total_hc', 'brand_olt',
                      'fat_filter_pemakaian', 'fat_id', 'fdt_id', 'olt']
-    missing_cols = [col for col in required_cols if col not in df.columns]
+    raw_columns = set(df_raw.columns.str.strip().str.lower())
+    missing_cols = [col for col in required_cols if col not in raw_columns]
     if missing_cols:
         st.error(
             f"Missing required columns in the data: {', '.join(missing_cols)}. Dashboard cannot be fully rendered.")
         st.stop()
 
-    # Clean and normalize data
-    df['total_hc'] = pd.to_numeric(df['total_hc'], errors='coerce').fillna(0)
-
-    # Normalize kota_kab names (fix case sensitivity issues like surabaya vs Surabaya)
-    df['kota_kab'] = df['kota_kab'].astype(str).str.strip().str.title()
-
-    # Clean fat_filter_pemakaian data (remove anomalies)
-    invalid_fat_filter = ['#N/A', '#REF!',
-                          'BISA DIPAKAI FAT LOSS', 'NAN', 'NONE', '']
-    df['fat_filter_pemakaian'] = df['fat_filter_pemakaian'].astype(
-        str).str.upper().str.strip()
-    df.loc[df['fat_filter_pemakaian'].isin(
-        invalid_fat_filter), 'fat_filter_pemakaian'] = 'UNKNOWN'
-
-    # Clean brand_olt data (normalize and remove anomalies)
-    df['brand_olt'] = df['brand_olt'].astype(str).str.strip()
-    # Normalize brand names - fix common variations
-    brand_mapping = {
-        'Fiber Home': 'Fiberhome',
-        'FIBER HOME': 'Fiberhome',
-        'fiberhome': 'Fiberhome',
-        'FIBERHOME': 'Fiberhome',
-        'fiber home': 'Fiberhome',
-        'ZTE': 'Zte',
-        'zte': 'Zte',
-        'HUAWEI': 'Huawei',
-        'huawei': 'Huawei',
-        'BDCOM': 'Bdcom',
-        'bdcom': 'Bdcom',
-        'RAISECOM': 'Raisecom',
-        'raisecom': 'Raisecom',
-        '#N/A': 'Unknown',
-        '#REF!': 'Unknown',
-        'NAN': 'Unknown',
-        'NONE': 'Unknown',
-        '': 'Unknown',
-        'nan': 'Unknown'
-    }
-    df['brand_olt'] = df['brand_olt'].replace(brand_mapping)
-
-    # Enhanced kota filtering (more comprehensive)
-    invalid_kota = ['LOCAL OPERATOR', 'NONE',
-                    '', 'NAN', '#N/A', '#REF!', 'UNKNOWN']
-    df_filtered_global = df[~df['kota_kab'].str.upper().isin(
-        invalid_kota)].copy()
-    df_filtered_global.dropna(subset=['kota_kab'], inplace=True)
-
-    # Remove rows with negative HC values (anomalies)
-    df_filtered_global = df_filtered_global[df_filtered_global['total_hc'] >= 0]
+    # Normalized, valid rows with value bitmaps; filters below select from it
+    asset_index = build_asset_index_cached(df_raw, asset_versions)
+    df_filtered_global = asset_index.frame
 
     if df_filtered_global.empty:
         st.warning("No valid data remaining after enhanced filtering.")
         st.stop()
 
+    # KPIs and aggregations from the materialized views (O(groups) rows);
+    # computed from the asset frame if the views are unavailable
+    kpis = load_dashboard_kpis_cached(
+        asset_data_service, get_table_versions(KPI_TABLES))
+    if kpis is None:
+        kpis = kpi_frames_from_assets(df_filtered_global)
+    hc_per_kota = kpis['kota_kab'][['kota_kab', 'total_hc']].sort_values(
+        by='total_hc', ascending=False, kind='stable')
+
     # --- Global KPIs (HTML Tetap sama, styling dari CSS) ---
     st.subheader("🔢 Key Performance Indicators (Overall)")
     try:
-        total_olt = df_filtered_global['olt'].nunique()
-        total_fdt = df_filtered_global['fdt_id'].nunique()
-        total_fat = df_filtered_global['fat_id'].nunique()
-        total_hc_sum = df_filtered_global['total_hc'].sum()
+        global_kpis = kpis['global'].iloc[0]
+        total_olt = int(global_kpis['total_olt'])
+        total_fdt = int(global_kpis['total_fdt'])
+        total_fat = int(global_kpis['total_fat'])
+        total_hc_sum = global_kpis['total_hc']
 
         kpi_html_1 = f"""
         <div class="kpi-container">
@@ -327,8 +337,7 @@ def app(asset_data_service: AssetDataService):
         st.markdown(kpi_html_1, unsafe_allow_html=True)
 
         # Enhanced KPI calculations with proper data filtering
-        hc_per_kota_global = df_filtered_global.groupby(
-            'kota_kab')['total_hc'].sum().reset_index()
+        hc_per_kota_global = hc_per_kota.reset_index(drop=True)
 
         # Remove kota with zero or negative HC values for KPI calculations
         hc_per_kota_global = hc_per_kota_global[hc_per_kota_global['total_hc'] > 0]
@@ -377,7 +386,7 @@ def app(asset_data_service: AssetDataService):
 
     # --- Interactive Filtering (Enhanced) ---
     st.subheader("🔍 Filtered Analysis")
-    unique_cities = sorted(df_filtered_global['kota_kab'].unique().tolist())
+    unique_cities = sorted(kpis['kota_kab']['kota_kab'].dropna().tolist())
     # Enhanced filtering for city selection (remove anomalies)
     invalid_strings_for_select = ['local operator',
                                   'none', '', ' ', '#n/a', 'unknown', 'nan']
@@ -386,19 +395,17 @@ def app(asset_data_service: AssetDataService):
 
     kota_filter = st.selectbox(
         "Select Kota/Kabupaten for detailed view:",
-        ['All'] + unique_cities,
+        [ALL_KOTA] + unique_cities,
         key="kota_filter_selectbox"
     )
 
-    # FIXED: Proper filtering logic
-    if kota_filter != 'All':
-        df_filtered_selection = df_filtered_global[df_filtered_global['kota_kab'] == kota_filter].copy(
-        )
-    else:
-        df_filtered_selection = df_filtered_global.copy()
+    # Bitmap lookup on the asset index instead of a mask over every row
+    kota_selection = asset_index.select(
+        kota_kab=None if kota_filter == ALL_KOTA else kota_filter)
+    df_filtered_selection = kota_selection.frame()
 
     # Cek jika hasil filter (untuk kota spesifik) kosong
-    if df_filtered_selection.empty and kota_filter != 'All':
+    if df_filtered_selection.empty and kota_filter != ALL_KOTA:
         st.warning(f"No data available for the selected filter: {kota_filter}")
 
     # --- Visualizations based on Filtered Data ---
@@ -409,12 +416,9 @@ def app(asset_data_service: AssetDataService):
     with vis_cols[0]:
         st.markdown("##### Total HC Distribution")
         if not df_filtered_selection.empty:
-            if kota_filter == 'All':
+            if kota_filter == ALL_KOTA:
                 # For 'All', show HC sum per city
-                data_to_plot = df_filtered_selection.groupby(
-                    'kota_kab', as_index=False)['total_hc'].sum()
-                data_to_plot = data_to_plot.sort_values(
-                    by='total_hc', ascending=False)
+                data_to_plot = hc_per_kota
                 if not data_to_plot.empty:
                     fig = px.bar(data_to_plot, x='kota_kab', y='total_hc', title="Total HC per Kota/Kabupaten",
                                  labels={'kota_kab': 'Kota/Kabupaten', 'total_hc': 'Total HC'})
@@ -425,10 +429,8 @@ def app(asset_data_service: AssetDataService):
             else:
                 # For a specific city, show HC sum per FDT ID within that city
                 if 'fdt_id' in df_filtered_selection.columns:
-                    data_to_plot = df_filtered_selection.groupby(
-                        'fdt_id', as_index=False)['total_hc'].sum()
-                    data_to_plot = data_to_plot.sort_values(
-                        by='total_hc', ascending=False).head(15)  # Top 15 FDTs
+                    data_to_plot = kota_selection.group_by(
+                        'fdt_id').head(15)  # Top 15 FDTs
                     if not data_to_plot.empty:
                         fig = px.bar(data_to_plot, x='fdt_id', y='total_hc', title=f"Top HC Distribution by FDT ID in {kota_filter}",
                                      labels={'fdt_id': 'FDT ID', 'total_hc': 'Total HC'})
@@ -438,7 +440,7 @@ def app(asset_data_service: AssetDataService):
                             f"No HC data by FDT ID to display for {kota_filter}.")
                 else:
                     # Fallback: show total HC for the city if FDT ID is not available
-                    total_hc_city = df_filtered_selection['total_hc'].sum()
+                    total_hc_city = kota_selection.kpis()['total_hc']
                     st.metric(
                         label=f"Total HC in {kota_filter}", value=f"{int(total_hc_city):,} HC")
                     st.info("FDT ID column not available for detailed breakdown.")
@@ -450,18 +452,15 @@ def app(asset_data_service: AssetDataService):
         st.markdown("##### OLT Brand Distribution")
         if 'brand_olt' in df_filtered_selection.columns and not df_filtered_selection.empty:
             # Enhanced data cleaning for brand OLT
-            df_brand_clean = df_filtered_selection.copy()
+            brand_counts = _dimension_counts(kpis, 'brand_olt', kota_filter)
 
             # Remove anomalies and normalize values
             invalid_brand_values = ['Unknown',
                                     '#N/A', '#REF!', 'NAN', 'NONE', '']
-            df_brand_clean = df_brand_clean[~df_brand_clean['brand_olt'].isin(
+            brand_counts = brand_counts[~brand_counts['brand_olt'].isin(
                 invalid_brand_values)]
 
-            if not df_brand_clean.empty:
-                brand_counts = df_brand_clean['brand_olt'].value_counts(
-                ).reset_index()
-                brand_counts.columns = ['brand_olt', 'count']
+            if not brand_counts.empty:
 
                 if not brand_counts.empty:
                     fig = px.pie(brand_counts, names='brand_olt', values='count', title=f"OLT Brand Distribution in {kota_filter}",
@@ -483,19 +482,15 @@ def app(asset_data_service: AssetDataService):
         st.markdown("##### FAT Filter Status Distribution")
         if 'fat_filter_pemakaian' in df_filtered_selection.columns and not df_filtered_selection.empty:
             # Enhanced data cleaning for FAT filter status
-            df_filter_clean = df_filtered_selection.copy()
+            pemakaian_counts = _dimension_counts(kpis, 'fat_filter_pemakaian', kota_filter)
 
             # Remove anomalies and normalize values
             invalid_filter_values = [
                 'UNKNOWN', '#N/A', '#REF!', 'BISA DIPAKAI FAT LOSS', 'NAN', 'NONE', '']
-            df_filter_clean = df_filter_clean[~df_filter_clean['fat_filter_pemakaian'].isin(
+            pemakaian_counts = pemakaian_counts[~pemakaian_counts['fat_filter_pemakaian'].isin(
                 invalid_filter_values)]
 
-            if not df_filter_clean.empty:
-                pemakaian_counts = df_filter_clean['fat_filter_pemakaian'].value_counts(
-                ).reset_index()
-                pemakaian_counts.columns = ['fat_filter_pemakaian', 'count']
-
+            if not pemakaian_counts.empty:
                 if not pemakaian_counts.empty:
                     fig = px.bar(pemakaian_counts, x='fat_filter_pemakaian', y='count',
                                  title=f"Status Pemakaian FAT di {kota_filter}",
@@ -521,11 +516,8 @@ def app(asset_data_service: AssetDataService):
     with vis_cols2[0]:
         st.markdown("##### Distribusi HC Teratas")
         if not df_filtered_selection.empty:
-            if kota_filter == 'All':
-                hc_per_kota_prog = df_filtered_selection.groupby(
-                    'kota_kab')['total_hc'].sum().reset_index()
-                hc_per_kota_prog = hc_per_kota_prog.sort_values(
-                    by='total_hc', ascending=False).head(15)
+            if kota_filter == ALL_KOTA:
+                hc_per_kota_prog = hc_per_kota.head(15)
                 if not hc_per_kota_prog.empty:
                     fig = px.bar(hc_per_kota_prog.sort_values(by='total_hc', ascending=True),
                                  x='total_hc', y='kota_kab', orientation='h',
@@ -538,10 +530,7 @@ def app(asset_data_service: AssetDataService):
                 else:
                     st.info("Tidak ada data HC untuk progress bar (Filter: Semua).")
             else:  # Specific city
-                hc_by_fat_prog = df_filtered_selection.groupby(
-                    'fat_id')['total_hc'].sum().reset_index()
-                hc_by_fat_prog = hc_by_fat_prog.sort_values(
-                    by='total_hc', ascending=False).head(10)
+                hc_by_fat_prog = kota_selection.group_by('fat_id').head(10)
                 if not hc_by_fat_prog.empty:
                     fig = px.bar(hc_by_fat_prog.sort_values(by='total_hc', ascending=True),
                                  x='total_hc', y='fat_id', orientation='h',
@@ -561,23 +550,24 @@ def app(asset_data_service: AssetDataService):
     # Plot 5: Trend Chart
     with vis_cols2[1]:
         st.markdown(f"##### Peringkat HC per Tahun (Top 10 Kota/Kab)")
-        df_bump_chart_base = df_filtered_selection.copy()
-        if 'tanggal_rfs' not in df_bump_chart_base.columns:
+        yearly_series = load_rfs_series_cached(
+            asset_data_service, get_table_versions(RFS_SOURCE_TABLES), 'year', kota_filter)
+        if yearly_series is None and 'tanggal_rfs' in df_filtered_selection.columns:
+            # Tabel RFS tidak tersedia: hitung dari data aset yang sudah dimuat
+            yearly_series = rfs_series_from_assets(df_filtered_selection, 'year')
+        if yearly_series is None:
             st.warning(
                 "Kolom 'tanggal_rfs' tidak ditemukan. Grafik peringkat/tren HC per tahun tidak dapat dibuat.")
         else:
-            df_bump_chart_base['tanggal_rfs'] = pd.to_datetime(
-                df_bump_chart_base['tanggal_rfs'], errors='coerce')
-            df_bump_chart_base.dropna(subset=['tanggal_rfs'], inplace=True)
-            df_bump_chart_base['year'] = df_bump_chart_base['tanggal_rfs'].dt.year
+            df_bump_chart_base = yearly_series.assign(
+                year=pd.to_datetime(yearly_series['period_start']).dt.year)
 
-            if df_bump_chart_base.empty or 'year' not in df_bump_chart_base.columns or df_bump_chart_base['year'].isnull().all():
+            if df_bump_chart_base.empty:
                 st.info(
                     "Tidak ada data HC dengan informasi tahun yang valid untuk grafik peringkat/tren.")
             else:
-                if kota_filter == 'All':
-                    yearly_hc = df_bump_chart_base.groupby(['year', 'kota_kab'])[
-                        'total_hc'].sum().reset_index()
+                if kota_filter == ALL_KOTA:
+                    yearly_hc = df_bump_chart_base[['year', 'kota_kab', 'total_hc']]
                     if not yearly_hc.empty:
                         top_cities = yearly_hc.groupby(
                             'kota_kab')['total_hc'].sum().nlargest(10).index
@@ -604,8 +594,7 @@ def app(asset_data_service: AssetDataService):
 
                 else:  # Specific city
                     yearly_hc_city = df_bump_chart_base[df_bump_chart_base['kota_kab'] == kota_filter]
-                    yearly_hc_city = yearly_hc_city.groupby(
-                        'year')['total_hc'].sum().reset_index()
+                    yearly_hc_city = yearly_hc_city[['year', 'total_hc']]
 
                     if not yearly_hc_city.empty and len(yearly_hc_city['year'].unique()) > 1:
                         fig = px.line(yearly_hc_city, x='year', y='total_hc',
@@ -623,7 +612,7 @@ def app(asset_data_service: AssetDataService):
     st.subheader(f"🗺️ Peta Lokasi Aset - {kota_filter}")
 
     # Show filtering info with debug details
-    if kota_filter != 'All':
+    if kota_filter != ALL_KOTA:
         unique_cities_in_filtered = df_filtered_selection['kota_kab'].unique(
         ) if not df_filtered_selection.empty else []
         st.info(
@@ -640,53 +629,38 @@ def app(asset_data_service: AssetDataService):
         st.info(
             f"📍 Menampilkan peta untuk semua kota | Total aset: {len(df_filtered_selection):,} | Kota ditemukan: {len(unique_cities_in_filtered)}")
 
-    # Performance toggle
-    col_map1, col_map2, col_map3 = st.columns([2, 1, 1])
+    # Map controls
+    col_map1, col_map2 = st.columns([3, 1])
     with col_map1:
         fat_id_search = st.text_input(
             "Cari FAT ID (kosongkan untuk melihat peta regional/kota):", key="map_fat_id_search").strip()
     with col_map2:
         show_map = st.checkbox("Tampilkan Peta", value=True,
                                help="Uncheck to skip map loading for faster page load")
-    with col_map3:
-        show_all_data = st.checkbox("Tampilkan Semua Data", value=False,
-                                    help="⚠️ PERINGATAN: Menampilkan semua data dapat memperlambat loading")
 
     if not show_map:
         st.info("🚀 Peta dinonaktifkan untuk performa yang lebih cepat. Centang kotak 'Tampilkan Peta' untuk melihat peta.")
         return
 
-    # Dynamic marker limits based on user choice
-    if show_all_data:
-        st.warning(
-            "⚠️ **Mode Semua Data Aktif**: Rendering mungkin membutuhkan waktu lebih lama untuk dataset besar (>10,000 markers)")
-        max_markers_limit = None  # No limit
-        performance_limit = None  # No limit in helper function
-    else:
-        max_markers_limit = 1000 if kota_filter == 'All' else 300
-        performance_limit = 500
+    # Cek kolom penting untuk peta
+    required_map_cols_search = [
+        'latitude_fat', 'longitude_fat', 'fat_id', 'kota_kab', 'total_hc', 'olt', 'fat_id_x', 'link_dokumen_feeder']
+    if not all(col in df_filtered_selection.columns for col in required_map_cols_search):
+        missing_map_cols = [
+            col for col in required_map_cols_search if col not in df_filtered_selection.columns]
+        st.error(
+            f"Kolom peta yang dibutuhkan tidak lengkap: {', '.join(missing_map_cols)}.")
+        return
 
-    # FIXED: Double-check filtering before preparing map data
-    if kota_filter != 'All':
-        # Ensure data is properly filtered for the selected city
-        df_for_map = df_filtered_selection[df_filtered_selection['kota_kab'] == kota_filter].copy(
-        )
-        if df_for_map.empty:
-            st.error(
-                f"❌ Tidak ada data untuk kota {kota_filter} setelah filtering ulang.")
-            return
-        st.success(
-            f"✅ Verifikasi filtering: {len(df_for_map)} aset ditemukan untuk {kota_filter}")
-    else:
-        # Prepare map data with enhanced caching and sampling
-        # ENHANCED FAT ID SEARCH: Search full dataset first if user is searching for specific FAT ID
-        df_for_map = df_filtered_selection.copy()
+    if df_filtered_selection.empty:
+        st.error(f"❌ Tidak ada data untuk kota {kota_filter}.")
+        return
 
     df_search_specific = None
     if fat_id_search:
-        # Search in the full filtered dataset (before map sampling/limiting)
-        df_search_full = df_for_map[
-            df_for_map['fat_id'].astype(str).str.contains(
+        # Search in the full filtered dataset
+        df_search_full = df_filtered_selection[
+            df_filtered_selection['fat_id'].astype(str).str.contains(
                 fat_id_search, case=False, na=False)
         ]
 
@@ -707,158 +681,84 @@ def app(asset_data_service: AssetDataService):
             st.warning(
                 f"❌ FAT ID '{fat_id_search}' tidak ditemukan di dataset")
 
-    with st.spinner("Preparing optimized map data..."):
-        # Prepare base map data with normal limits
-        df_map_ready = prepare_map_data_enhanced(
-            df_for_map,
-            max_markers=max_markers_limit,
-            kota_filter=kota_filter
-        )        # If we have specific search results, ensure they're included in map data
-        if df_search_specific is not None and not df_search_specific.empty:
-            # Merge search results with map data, giving priority to search results
-            search_fat_ids = df_search_specific['fat_id'].unique()
-
-            # Remove any existing search results from map_ready to avoid duplicates
-            df_map_ready = df_map_ready[~df_map_ready['fat_id'].isin(
-                search_fat_ids)]
-
-            # Add search results at the beginning
-            df_map_ready = pd.concat(
-                [df_search_specific, df_map_ready], ignore_index=True)
+    # Every asset of the selection, clustered per zoom level (no sampling)
+    clusters_json, map_summary = build_map_clusters_cached(
+        asset_index, asset_versions, kota_filter)
 
-    if df_map_ready.empty:
+    if map_summary['assets'] == 0:
         st.info(
             f"Tidak ada data aset dengan koordinat valid untuk peta ({kota_filter}).")
-        return  # Cek kolom penting untuk peta
-    required_map_cols_search = [
-        'latitude_fat', 'longitude_fat', 'fat_id', 'kota_kab', 'total_hc', 'olt', 'fat_id_x', 'link_dokumen_feeder']
-
-    if not all(col in df_map_ready.columns for col in required_map_cols_search):
-        missing_map_cols = [
-            col for col in required_map_cols_search if col not in df_map_ready.columns]
-        st.error(
-            f"Kolom peta yang dibutuhkan tidak lengkap: {', '.join(missing_map_cols)}.")
         return
 
-    # Initialize map with better performance settings
-    map_center_default = [-7.5, 112.7]  # East Java
-    map_zoom_default = 8    # Calculate optimal center based on data and selected filter
-    if not df_map_ready.empty:
+    # Calculate optimal center based on data and selected filter
+    if df_search_specific is not None and not df_search_specific.empty:
         # If searching for specific FAT ID, center on search results
-        if df_search_specific is not None and not df_search_specific.empty:
-            map_center_default = [
-                df_search_specific['latitude_fat'].mean(),
-                df_search_specific['longitude_fat'].mean()
-            ]
-            map_zoom_default = 14 if len(df_search_specific) == 1 else 12
-        elif kota_filter != 'All':
-            # For specific city, center on that city's data
-            map_center_default = [
-                df_map_ready['latitude_fat'].mean(),
-                df_map_ready['longitude_fat'].mean()
-            ]
-            map_zoom_default = 12  # Zoom closer for specific city
-        else:
-            # For 'All', use broader view but still center on data
-            map_center_default = [
-                df_map_ready['latitude_fat'].mean(),
-                df_map_ready['longitude_fat'].mean()]
-            map_zoom_default = 8
+        map_center_default = [
+            df_search_specific['latitude_fat'].mean(),
+            df_search_specific['longitude_fat'].mean()
+        ]
+        map_zoom_default = 14 if len(df_search_specific) == 1 else 12
+    else:
+        map_center_default = map_summary['center']
+        map_zoom_default = 12 if kota_filter != ALL_KOTA else 8
 
     with st.spinner("Memuat peta..."):
 
         m = folium.Map(
             location=map_center_default,
             zoom_start=map_zoom_default,
-            # Faster than CartoDB            prefer_canvas=True  # Better performance for many markers
             tiles="OpenStreetMap",
         )
+        ClusterLayer(clusters_json).add_to(m)
+
+        # Individual FATs of the last reported viewport once zoomed in to street level
+        map_key = f"asset_map_{kota_filter}"
+        map_state = st.session_state.get(map_key) or {}
+        viewport_bbox = BoundingBox.from_folium(map_state.get('bounds'))
+        viewport_group, has_more_pages = None, False
+        if viewport_bbox is not None and (map_state.get('zoom') or 0) >= MAP_VIEWPORT_CONFIG['min_point_zoom']:
+            df_viewport, has_more_pages = load_viewport_assets(
+                asset_data_service, viewport_bbox, kota_filter)
+            if not df_viewport.empty:
+                viewport_group = folium.FeatureGroup(name="FAT di viewport")
+                _add_markers_to_map_helper(viewport_group, df_viewport, "viewport",
+                                           use_cluster=False, performance_limit=None)
 
-        if fat_id_search and df_search_specific is not None and not df_search_specific.empty:
-            # Add search result markers first (highlighted, no clustering)
+        if df_search_specific is not None and not df_search_specific.empty:
+            # Search results on top of the clusters (highlighted, with full popups)
             _add_markers_to_map_helper(m, df_search_specific.head(50),
                                        f"🔍 Search: {fat_id_search}",
                                        use_cluster=False, performance_limit=50)
+        elif fat_id_search:
+            st.warning(
+                f"FAT ID '{fat_id_search}' tidak ditemukan. Menampilkan peta umum.")
 
-            # Add other markers with clustering if there are more
-            other_markers = df_map_ready[~df_map_ready['fat_id'].isin(
-                df_search_specific['fat_id'])]
-            if not other_markers.empty and len(other_markers) > 10:
-                marker_cluster = MarkerCluster(
-                    name=f"Other Assets in {kota_filter}",
-                    options={'maxClusterRadius': 50,
-                             'spiderfyOnMaxZoom': False}
-                ).add_to(m)
-                _add_markers_to_map_helper(
-                    marker_cluster, other_markers, kota_filter, performance_limit=performance_limit)
-            elif not other_markers.empty:
-                _add_markers_to_map_helper(m, other_markers, kota_filter,
-                                           use_cluster=False, performance_limit=performance_limit)
+        if kota_filter != ALL_KOTA:
+            st.success(
+                f"✅ Peta {kota_filter} berhasil dimuat dengan {map_summary['assets']:,} aset (dengan clustering)")
         else:
-            # Normal map view without specific search
-            if fat_id_search:
-                st.warning(
-                    f"FAT ID '{fat_id_search}' tidak ditemukan. Menampilkan peta umum.")
-
-            # Standard clustering logic for general view
-            if len(df_map_ready) > 100:
-                marker_cluster = MarkerCluster(
-                    name=f"Assets in {kota_filter}",
-                    options={'maxClusterRadius': 50,
-                             'spiderfyOnMaxZoom': False}
-                ).add_to(m)
-                _add_markers_to_map_helper(
-                    marker_cluster, df_map_ready, kota_filter, performance_limit=performance_limit)
-
-                # Enhanced success message with city verification
-                if kota_filter != 'All':
-                    cities_in_map = df_map_ready['kota_kab'].unique(
-                    ) if 'kota_kab' in df_map_ready.columns else ['Unknown']
-                    if len(cities_in_map) == 1 and cities_in_map[0] == kota_filter:
-                        st.success(
-                            f"✅ Peta {kota_filter} berhasil dimuat dengan {len(df_map_ready)} aset (dengan clustering)")
-                    else:
-                        st.warning(
-                            f"⚠️ Peta dimuat dengan {len(df_map_ready)} aset, tetapi mengandung kota: {', '.join(cities_in_map[:3])}")
-                else:
-                    cities_in_map = df_map_ready['kota_kab'].unique(
-                    ) if 'kota_kab' in df_map_ready.columns else ['Unknown']
-                    st.success(
-                        f"✅ Peta semua kota berhasil dimuat dengan {len(df_map_ready)} aset dari {len(cities_in_map)} kota (dengan clustering)")
-            else:
-                # Few markers, no need for clustering
-                _add_markers_to_map_helper(
-                    m, df_map_ready, kota_filter, use_cluster=False, performance_limit=performance_limit)
-
-                # Enhanced success message with city verification
-                if kota_filter != 'All':
-                    cities_in_map = df_map_ready['kota_kab'].unique(
-                    ) if 'kota_kab' in df_map_ready.columns else ['Unknown']
-                    if len(cities_in_map) == 1 and cities_in_map[0] == kota_filter:
-                        st.success(
-                            f"✅ Peta {kota_filter} berhasil dimuat dengan {len(df_map_ready)} aset")
-                    else:
-                        st.warning(
-                            f"⚠️ Peta dimuat dengan {len(df_map_ready)} aset, tetapi mengandung kota: {', '.join(cities_in_map[:3])}")
-                else:
-                    cities_in_map = df_map_ready['kota_kab'].unique(
-                    ) if 'kota_kab' in df_map_ready.columns else ['Unknown']
-                    st.success(
-                        f"✅ Peta semua kota berhasil dimuat dengan {len(df_map_ready)} aset dari {len(cities_in_map)} kota")
-
-        # Reduced height for better performance
-        folium_static(m, width=None, height=500)
+            st.success(
+                f"✅ Peta semua kota berhasil dimuat dengan {map_summary['assets']:,} aset dari {len(unique_cities_in_filtered)} kota (dengan clustering)")
+
+        # Reports bounds and zoom back on pan/zoom, so the next rerun loads that viewport
+        st_folium(m, key=map_key, height=500, use_container_width=True,
+                  returned_objects=["bounds", "zoom"], feature_group_to_add=viewport_group)
+
+        if viewport_group is not None:
+            st.caption(
+                f"📍 {len(df_viewport):,} FAT di area peta (diurutkan berdasarkan HC)")
+            if has_more_pages:
+                st.button("Muat FAT berikutnya", key="map_viewport_next_page",
+                          on_click=_load_next_viewport_page, args=(asset_data_service,))
+        else:
+            st.caption(
+                f"🔍 Perbesar peta (zoom ≥ {MAP_VIEWPORT_CONFIG['min_point_zoom']}) untuk memuat detail FAT di area yang terlihat")
 
         # Add marker status summary after the map
-        if 'fat_id_x' in df_map_ready.columns:
-            normal_count = df_map_ready['fat_id_x'].isna().sum(
-            ) + (df_map_ready['fat_id_x'].astype(str).str.strip().str.lower().isin(['', 'none', 'nan'])).sum()
-            issue_count = len(df_map_ready) - normal_count
-
-            col1, col2 = st.columns(2)
-            with col1:
-                st.metric("🟢 FAT Normal", normal_count,
-                          help="FAT dengan kondisi masih bisa diisi (fat_id_x kosong)")
-            with col2:
-                st.metric("🔴 FAT Full", issue_count,
-                          help="FAT sudah terisi penuh (fat_id_x terisi)")
+        col1, col2 = st.columns(2)
+        with col1:
+            st.metric("🟢 FAT Normal", map_summary['assets'] - map_summary['full'],
+                      help="FAT dengan kondisi masih bisa diisi (fat_id_x kosong)")
+        with col2:
+            st.metric("🔴 FAT Full", map_summary['full'],
+                      help="FAT sudah terisi penuh (fat_id_x terisi)")
@@ -4,11 +4,17 @@ from core.services.AssetDataService import AssetDataService  # Import service
 import pandas as pd
 import logging
 from core.utils.database import connect_db
-from core.services.dynamic_search_helper import get_unified_search_service
+from core.services.dynamic_search_helper import SEARCH_PAGE_SIZE, SearchPage, get_unified_search_service
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Pilihan urutan hasil -> kunci UnifiedSearchService.SEARCH_ORDERS
+SORT_ORDERS = {
+    "Terbaru": "rfs_newest",
+    "Terlama": "rfs_oldest"
+}
+
 
 def _get_dynamic_column_type(field_name: str, asset_data_service: AssetDataService) -> str:
     """
@@ -453,6 +459,72 @@ def get_search_suggestions(asset_data_service: AssetDataService, column_name: st
         return []
 
 
+def search_assets_page(asset_data_service: AssetDataService, search_params: dict, cursor: tuple = None) -> SearchPage:
+    """
+    Satu halaman hasil pencarian (keyset pagination) dengan column mapping yang konsisten.
+
+    Args:
+        asset_data_service: Instance AssetDataService
+        search_params: Parameter pencarian (lihat UnifiedSearchService.search_page)
+        cursor: None untuk halaman pertama, atau next_cursor halaman sebelumnya
+
+    Returns:
+        SearchPage; rows kosong jika tidak ada hasil atau terjadi error
+    """
+    search_service = get_unified_search_service(asset_data_service)
+    page = search_service.search_page(search_params, cursor)
+    if page is None:
+        return SearchPage(pd.DataFrame(), None, search_params.get('search_mode', 'auto'))
+    return page._replace(rows=page.rows.rename(columns=asset_data_service.get_column_mapping()))
+
+
+def fetch_all_search_results(asset_data_service: AssetDataService, search_params: dict) -> pd.DataFrame:
+    """Semua hasil pencarian (per halaman keyset), misalnya untuk export."""
+    search_service = get_unified_search_service(asset_data_service)
+    pages = list(search_service.iter_search_pages(search_params))
+    if not pages:
+        return pd.DataFrame()
+    return pd.concat(pages, ignore_index=True).rename(columns=asset_data_service.get_column_mapping())
+
+
+def _load_search_page(asset_data_service: AssetDataService, page_number: int):
+    """Memuat halaman ke-page_number (mulai 1) dari pencarian aktif ke session state."""
+    cursors = st.session_state.search_cursors
+    page = search_assets_page(
+        asset_data_service, st.session_state.search_query, cursors[page_number - 1])
+    # Cursor awal tiap halaman yang sudah dikunjungi, agar tombol Prev tetap satu query
+    if page.next_cursor is not None and page_number == len(cursors):
+        cursors.append(page.next_cursor)
+    st.session_state.search_query = {
+        **st.session_state.search_query, 'search_mode': page.search_mode}
+    st.session_state.data_result = page.rows
+    st.session_state.search_has_next = page.next_cursor is not None
+    st.session_state.current_page = page_number
+    st.session_state.selected_index = None
+
+
+def _start_search(asset_data_service: AssetDataService, search_params: dict):
+    """Memulai pencarian baru (halaman 1) dan menghitung total hasil."""
+    st.session_state.search_query = search_params
+    st.session_state.search_cursors = [None]
+    st.session_state.search_export = None
+    _load_search_page(asset_data_service, 1)
+    if not st.session_state.search_has_next:
+        st.session_state.search_total = (len(st.session_state.data_result), True)
+    else:
+        search_service = get_unified_search_service(asset_data_service)
+        st.session_state.search_total = search_service.count_matches(
+            st.session_state.search_query)
+
+
+def _format_search_total() -> str:
+    """Total hasil untuk ditampilkan; estimasi diberi tanda ±."""
+    total, exact = st.session_state.get("search_total", (None, False))
+    if total is None:
+        return "?"
+    return f"{total:,}" if exact else f"±{total:,}"
+
+
 def fetch_data_by_search(asset_data_service: AssetDataService, search_column: str, search_value: str, additional_filters: dict = None) -> pd.DataFrame:
     """
     Optimized search that uses database-level filtering instead of loading all data.
@@ -586,34 +658,35 @@ def export_search_results(df: pd.DataFrame, filename_prefix: str = "search_resul
         return None
 
 
-def create_quick_filters(df: pd.DataFrame) -> dict:
+def create_quick_filters(asset_data_service: AssetDataService, search_params: dict) -> dict:
     """
-    Create quick filter options based on data.
+    Create quick filter options from the whole search result, not only the current page.
 
     Args:
-        df: DataFrame to analyze
+        asset_data_service: Instance of AssetDataService
+        search_params: Active search parameters (see UnifiedSearchService.search_page)
 
     Returns:
         Dictionary of quick filter options
     """
     try:
+        search_service = get_unified_search_service(asset_data_service)
         quick_filters = {}
 
         # Location-based filters
-        if 'Kota/Kab' in df.columns:
-            top_cities = df['Kota/Kab'].value_counts().head(5).index.tolist()
+        top_cities = search_service.top_values(search_params, 'Kota/Kab')
+        if top_cities:
             quick_filters['top_cities'] = top_cities
 
         # Brand filters
-        if 'Brand OLT' in df.columns:
-            brands = df['Brand OLT'].value_counts().head(5).index.tolist()
+        brands = search_service.top_values(search_params, 'Brand OLT')
+        if brands:
             quick_filters['top_brands'] = brands
 
         # Status filters
-        if 'FAT KONDISI' in df.columns:
-            conditions = df['FAT KONDISI'].unique().tolist()
-            quick_filters['fat_conditions'] = [
-                c for c in conditions if pd.notna(c)]
+        conditions = search_service.top_values(search_params, 'FAT KONDISI', limit=20)
+        if conditions:
+            quick_filters['fat_conditions'] = conditions
 
         return quick_filters
     except Exception as e:
@@ -750,6 +823,12 @@ display: ;
         st.session_state.data_result = pd.DataFrame()
     if "search_submitted" not in st.session_state:
         st.session_state.search_submitted = False
+    if "search_query" not in st.session_state:
+        st.session_state.search_query = None
+        st.session_state.search_cursors = [None]
+        st.session_state.search_has_next = False
+        st.session_state.search_total = (0, True)
+        st.session_state.search_export = None
 
     # Back Button - hanya tampil ketika dalam detail view
     if st.session_state.selected_index is not None:
@@ -814,22 +893,12 @@ display: ;
     attribute_filters = main_filters[main_filter]["attributes"]
 
     # Advanced Search Options
-    col_mode, col_limit = st.columns([2, 1])
-    with col_mode:
-        search_mode = st.selectbox(
-            "Mode Pencarian:",
-            ["Auto (Cerdas)", "Exact Match", "Partial Match"],
-            help="Auto: mencoba exact match dulu, lalu partial. Exact: hanya hasil yang sama persis. Partial: hasil yang mengandung kata kunci"
-        )
-    with col_limit:
-        search_limit = st.number_input(
-            "Maksimal Hasil:",
-            min_value=10,
-            max_value=5000,
-            value=1000,
-            step=50,
-            help="Batasi jumlah hasil pencarian untuk performa yang lebih baik"
-        )    # Convert search mode to internal format
+    search_mode = st.selectbox(
+        "Mode Pencarian:",
+        ["Auto (Cerdas)", "Exact Match", "Partial Match"],
+        help="Auto: mencoba exact match dulu, lalu partial. Exact: hanya hasil yang sama persis. Partial: hasil yang mengandung kata kunci"
+    )
+    # Convert search mode to internal format
     mode_mapping = {
         "Auto (Cerdas)": "auto",
         "Exact Match": "exact",
@@ -884,19 +953,17 @@ display: ;
                 'primary_value': search_input,
                 'additional_filters': additional_filters,
                 'search_mode': internal_search_mode,
-                'limit': int(search_limit)
+                'order': SORT_ORDERS[st.session_state.get("sort", "Terbaru")]
             }
 
-            # Use unified search
-            result_df = search_assets_unified(
-                asset_data_service, search_params)
-            st.session_state.data_result = result_df
-            st.session_state.selected_index = None
+            # Use unified search, one page at a time
+            _start_search(asset_data_service, search_params)
+            result_df = st.session_state.data_result
             st.session_state.search_submitted = True
             # Show search summary
             if not result_df.empty:
                 st.success(
-                    f"✅ Ditemukan {len(result_df)} hasil untuk pencarian '{search_input}' di kolom {selected_column}")
+                    f"✅ Ditemukan {_format_search_total()} hasil untuk pencarian '{search_input}' di kolom {selected_column}")
             else:
                 st.warning(
                     f"❌ Tidak ditemukan hasil untuk pencarian '{search_input}' di kolom {selected_column}")
@@ -917,7 +984,7 @@ display: ;
 
             with result_col1:
                 st.markdown(
-                    f"<p><strong>📊 Ditemukan {len(data)} data</strong></p>", unsafe_allow_html=True)
+                    f"<p><strong>📊 Ditemukan {_format_search_total()} data</strong></p>", unsafe_allow_html=True)
 
             with result_col2:
                 # Export functionality with fallback
@@ -932,8 +999,13 @@ display: ;
                         file_extension = "csv"
                         mime_type = "text/csv"
 
-                    exported_data = export_search_results(
-                        data, "search_results")
+                    # Export covers every page of the search, fetched on request
+                    if st.button("📦 Siapkan Export", help="Ambil semua hasil pencarian untuk diekspor"):
+                        with st.spinner("Mengambil semua hasil pencarian..."):
+                            st.session_state.search_export = export_search_results(
+                                fetch_all_search_results(asset_data_service, st.session_state.search_query),
+                                "search_results") or False
+                    exported_data = st.session_state.search_export
                     if exported_data:
                         st.download_button(
                             label=f"📥 Export {export_format}",
@@ -942,7 +1014,7 @@ display: ;
                             mime=mime_type,
                             help=f"Download hasil pencarian dalam format {export_format}"
                         )
-                    else:
+                    elif exported_data is False:
                         st.error("❌ Export gagal")
                 except Exception as e:
                     logger.warning(f"Export functionality not available: {e}")
@@ -963,12 +1035,14 @@ display: ;
                 # Quick action: Clear results
                 if st.button("🗑️ Clear", help="Hapus hasil pencarian"):
                     st.session_state.data_result = pd.DataFrame()
+                    st.session_state.search_query = None
                     st.session_state.search_submitted = False
                     st.rerun()
 
             # Quick Filters
             try:
-                quick_filters = create_quick_filters(data)
+                quick_filters = create_quick_filters(
+                    asset_data_service, st.session_state.search_query)
                 if quick_filters:
                     with st.expander("⚡ Quick Filters", expanded=False):
                         filter_applied = False
@@ -981,9 +1055,9 @@ display: ;
                             for i, city in enumerate(quick_filters['top_cities']):
                                 with city_cols[i % 3]:
                                     if st.button(f"📍 {city}", key=f"qf_city_{i}"):
-                                        filtered_data = data[data['Kota/Kab'].str.contains(
-                                            str(city), na=False, case=False)]
-                                        st.session_state.data_result = filtered_data
+                                        query = st.session_state.search_query
+                                        _start_search(asset_data_service, {**query, 'additional_filters': {
+                                            **query.get('additional_filters', {}), 'Kota/Kab': str(city)}})
                                         filter_applied = True
 
                         if quick_filters.get('top_brands'):
@@ -993,9 +1067,9 @@ display: ;
                             for i, brand in enumerate(quick_filters['top_brands']):
                                 with brand_cols[i % 3]:
                                     if st.button(f"🔧 {brand}", key=f"qf_brand_{i}"):
-                                        filtered_data = data[data['Brand OLT'].str.contains(
-                                            str(brand), na=False, case=False)]
-                                        st.session_state.data_result = filtered_data
+                                        query = st.session_state.search_query
+                                        _start_search(asset_data_service, {**query, 'additional_filters': {
+                                            **query.get('additional_filters', {}), 'Brand OLT': str(brand)}})
                                         filter_applied = True
 
                         if filter_applied:
@@ -1011,27 +1085,27 @@ display: ;
             with sort_col2:
                 # Additional sorting options
                 if st.button("🔄 Reset Sort"):
-                    # Reset to original data order
-                    st.session_state.data_result = st.session_state.data_result.reset_index(
-                        drop=True)
+                    # Back to the default order (newest RFS first)
+                    del st.session_state["sort"]
                     st.rerun()
 
+            # The database sorts the results; a new order starts again at page 1
+            if st.session_state.search_query and SORT_ORDERS[sort_order] != st.session_state.search_query.get('order'):
+                st.session_state.search_query = {
+                    **st.session_state.search_query, 'order': SORT_ORDERS[sort_order]}
+                st.session_state.search_cursors = [None]
+                _load_search_page(asset_data_service, 1)
+                st.rerun()
+
             if "Tanggal RFS" in data.columns:
                 data["Tanggal RFS"] = pd.to_datetime(
                     data["Tanggal RFS"], errors="coerce")
-                data = data.sort_values(
-                    by="Tanggal RFS", ascending=(sort_order == "Terlama"))
 
-            # Pagination Settings
-            page_size = 50  # Jumlah data per halaman
-            total_pages = (len(data) - 1) // page_size + 1
+            # Pagination Settings: data holds the current page only
+            page_size = SEARCH_PAGE_SIZE  # Jumlah data per halaman
             current_page = st.session_state.get("current_page", 1)
-
-            def go_to_page(p):
-                st.session_state.current_page = p
-                st.rerun()            # Display Paginated Data
-            paginated_data = data.iloc[(
-                current_page - 1) * page_size: current_page * page_size]            # Debug: Log available columns for troubleshooting search card display
+            paginated_data = data
+            # Debug: Log available columns for troubleshooting search card display
             logger.info(
                 f"Available columns in search results: {list(data.columns)}")
             if not data.empty:
@@ -1043,10 +1117,6 @@ display: ;
                 logger.info(
                     f"Sample data - FATID: {first_row.get('FATID', 'NOT FOUND')}")
 
-            # Create a mapping from paginated index to original index
-            original_indices = data.iloc[(
-                current_page - 1) * page_size: current_page * page_size].index.tolist()
-
             for idx, (original_idx, row) in enumerate(paginated_data.iterrows()):
                 # Debug: Log available columns for this row
                 with st.form(f"form_{original_idx}"):
@@ -1113,10 +1183,8 @@ display: ;
                             if key.startswith("edit_"):
                                 del st.session_state[key]
 
-                        # Use position in the current data, not original DataFrame index
-                        position_in_current_data = (
-                            current_page - 1) * page_size + idx
-                        st.session_state.selected_index = position_in_current_data
+                        # Use position in the current page, not original DataFrame index
+                        st.session_state.selected_index = idx
                         st.rerun()
             # Navigasi Pagination Streamlit Native
             st.markdown("---")
@@ -1124,18 +1192,18 @@ display: ;
 
             with pagination_col[0]:
                 if st.button("⬅️ Prev") and current_page > 1:
-                    st.session_state.current_page -= 1
+                    _load_search_page(asset_data_service, current_page - 1)
                     st.rerun()
 
             with pagination_col[2]:
-                if st.button("Next ➡️") and current_page < total_pages:
-                    st.session_state.current_page += 1
+                if st.button("Next ➡️") and st.session_state.search_has_next:
+                    _load_search_page(asset_data_service, current_page + 1)
                     st.rerun()            # Tampilkan range halaman sebagai teks tengah
             with pagination_col[1]:
                 start_idx = (current_page - 1) * page_size + 1
-                end_idx = min(current_page * page_size, len(data))
+                end_idx = start_idx + len(data) - 1
                 st.markdown(
-                    f"<div style='text-align:center; font-weight:bold;'>Menampilkan {start_idx}-{end_idx} dari {len(data)} data</div>", unsafe_allow_html=True)
+                    f"<div style='text-align:center; font-weight:bold;'>Menampilkan {start_idx}-{end_idx} dari {_format_search_total()} data</div>", unsafe_allow_html=True)
 
         elif st.session_state.search_submitted and data.empty:
             st.warning("Tidak ditemukan hasil.")
@@ -255,21 +255,70 @@ def app(asset_data_service: AssetDataService):
 
     # --- Tab Upload File ---
     with tab_upload:
-        st.subheader("Upload Asset File (CSV)")
+        st.subheader("Upload Asset File (CSV/XLSX)")
         uploaded_file = st.file_uploader(
-            "Choose a CSV file",
-            type=["csv"],
+            "Choose a CSV or Excel file",
+            type=["csv", "xlsx"],
             key="asset_uploader",
-            help="Upload a CSV file with asset data. Ensure columns match the required format."
+            help="Upload a CSV or Excel file with asset data. Ensure columns match the required format."
         )
 
-        if uploaded_file is not None:
+        upload_mode = st.radio(
+            "Upload mode",
+            options=["insert", "merge"],
+            format_func=lambda mode: {
+                "insert": "Insert new FAT IDs only",
+                "merge": "Merge (insert new, update changed FAT IDs)"
+            }[mode],
+            horizontal=True,
+            key="asset_upload_mode",
+            help="Merge compares every uploaded row with the database and only writes values that changed."
+        )
+
+        stream_upload = st.checkbox(
+            "Large file: load directly in chunks (no preview)",
+            key="asset_upload_streaming",
+            help="Reads and loads the file in chunks with constant memory. Rows cannot be edited before loading."
+        )
+
+        if uploaded_file is not None and stream_upload:
+            # Mode streaming: file diproses per chunk langsung ke database
+            if st.button("⬆️ Load File into Database", key="asset_stream_button"):
+                progress_bar = st.progress(0.0, text="Starting...")
+
+                def _show_progress(status):
+                    fraction = status['progress'] if status['progress'] is not None else 0.0
+                    progress_bar.progress(
+                        fraction,
+                        text=f"Chunk {status['chunks']}: {status['rows_read']:,} rows read, "
+                             f"{status['inserted']:,} inserted, {status['updated']:,} updated")
+
+                summary, stream_error = asset_data_service.stream_asset_file(
+                    uploaded_file, mode=upload_mode, progress_callback=_show_progress)
+
+                if stream_error:
+                    st.error(
+                        f"Loading stopped after {summary.get('chunks', 0)} chunks: {stream_error}")
+                else:
+                    progress_bar.progress(1.0, text="Done")
+                    st.success(
+                        f"Loaded {summary['rows_read']:,} rows in {summary['chunks']} chunks "
+                        f"({summary['seconds']:.1f}s): {summary['inserted']:,} inserted, "
+                        f"{summary['updated']:,} updated, {summary['unchanged']:,} unchanged, "
+                        f"{summary['skipped_unchanged']:,} rows skipped as unchanged since the last upload, "
+                        f"{summary['skipped_existing']:,} already existing, "
+                        f"{summary['duplicates_dropped']:,} duplicate FAT IDs skipped.")
+                if summary.get('failed_rows'):
+                    st.warning(
+                        f"{summary['failed_rows']:,} rows could not be inserted. Check logs for details.")
+
+        elif uploaded_file is not None:
             st.write("Processing uploaded file...")
-            with st.spinner("Reading and cleaning data from CSV..."):
+            with st.spinner("Reading and cleaning data from file..."):
                 # Panggil service process_uploaded_asset_file
                 # Hasilnya adalah DataFrame tunggal yang sudah diproses
                 processed_df = asset_data_service.process_uploaded_asset_file(
-                    uploaded_file)
+                    uploaded_file, mode=upload_mode)
 
             if processed_df is not None and not processed_df.empty:  # Tambahkan cek not empty
                 st.success("File processed successfully. Preview:")
@@ -296,21 +345,37 @@ def app(asset_data_service: AssetDataService):
                         st.write(
                             f"Attempting to insert/update {len(df_final)} records...")
 
-                        with st.spinner("Inserting data into database... This might take some time."):
-                            # Panggil service insert_asset_dataframe dengan DataFrame tunggal
-                            processed_count, error_count = asset_data_service.insert_asset_dataframe(
-                                df_final)
-
-                        # Berikan feedback berdasarkan hasil insert dari service
-                        if error_count == 0:
-                            st.success(
-                                f"Successfully processed {processed_count} records from the file.")
+                        if upload_mode == "merge":
+                            with st.spinner("Merging data into database... This might take some time."):
+                                summary, merge_error = asset_data_service.merge_asset_dataframe(
+                                    df_final)
+
+                            if merge_error:
+                                st.error(f"Merge failed: {merge_error}")
+                            else:
+                                st.success(
+                                    f"Merge complete: {summary['inserted']} inserted, "
+                                    f"{summary['updated']} updated, {summary['unchanged']} unchanged FAT IDs.")
+                                st.dataframe(
+                                    pd.DataFrame(summary['tables'])[
+                                        ['table', 'inserted', 'updated', 'unchanged']],
+                                    hide_index=True)
                         else:
-                            st.warning(
-                                f"Attempted to process {len(df_final)} records. "
-                                f"Successfully processed: {processed_count}. Failed/Skipped: {error_count}. "
-                                "Failures might be due to duplicate FAT IDs (ON CONFLICT DO NOTHING) or other data errors. Check logs for details."
-                            )
+                            with st.spinner("Inserting data into database... This might take some time."):
+                                # Panggil service insert_asset_dataframe dengan DataFrame tunggal
+                                processed_count, error_count = asset_data_service.insert_asset_dataframe(
+                                    df_final)
+
+                            # Berikan feedback berdasarkan hasil insert dari service
+                            if error_count == 0:
+                                st.success(
+                                    f"Successfully processed {processed_count} records from the file.")
+                            else:
+                                st.warning(
+                                    f"Attempted to process {len(df_final)} records. "
+                                    f"Successfully processed: {processed_count}. Failed/Skipped: {error_count}. "
+                                    "Failures might be due to duplicate FAT IDs (ON CONFLICT DO NOTHING) or other data errors. Check logs for details."
+                                )
 
                         # Hapus state setelah upload
                         del st.session_state.df_to_upload
@@ -80,6 +80,17 @@ CREATE TABLE additional_informations (
     fat_id VARCHAR(255) NOT NULL REFERENCES user_terminals(fat_id) ON DELETE CASCADE
 );
 
+-- Index fat_id pada tabel anak untuk join, merge upload, dan ON DELETE CASCADE
+CREATE INDEX IF NOT EXISTS idx_clusters_fat_id ON clusters(fat_id);
+CREATE INDEX IF NOT EXISTS idx_home_connecteds_fat_id ON home_connecteds(fat_id);
+CREATE INDEX IF NOT EXISTS idx_dokumentasis_fat_id ON dokumentasis(fat_id);
+CREATE INDEX IF NOT EXISTS idx_additional_informations_fat_id ON additional_informations(fat_id);
+
+-- Index GiST lokasi FAT untuk query peta per viewport (bounding box)
+CREATE INDEX IF NOT EXISTS idx_user_terminals_fat_location ON user_terminals
+    USING gist (point(longitude_fat, latitude_fat))
+    WHERE latitude_fat IS NOT NULL AND longitude_fat IS NOT NULL;
+
 -- Tabel pelanggan
 CREATE TABLE pelanggans (
     id_permohonan VARCHAR(255) PRIMARY KEY, 
@@ -176,6 +187,95 @@ VALUES
     ('user_terminals', 'priority_level', 'Level Prioritas', 'Level prioritas untuk maintenance', 'INTEGER', true)
 ON CONFLICT (table_name, column_name) DO NOTHING;
 
+-- Sidik jari (xxh3) baris mentah terakhir per FAT ID, agar upload ulang hanya memproses baris yang berubah
+CREATE TABLE IF NOT EXISTS etl_row_hashes (
+    fat_id VARCHAR(255) PRIMARY KEY REFERENCES user_terminals(fat_id) ON DELETE CASCADE,
+    row_hash BIGINT NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Notifikasi perubahan tabel untuk invalidasi cache antar proses (LISTEN asset_table_changes)
+CREATE OR REPLACE FUNCTION notify_asset_table_change()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pg_notify('asset_table_changes', TG_TABLE_NAME);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trigger_user_terminals_notify_change
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON user_terminals
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION notify_asset_table_change();
+
+CREATE TRIGGER trigger_clusters_notify_change
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON clusters
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION notify_asset_table_change();
+
+CREATE TRIGGER trigger_home_connecteds_notify_change
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON home_connecteds
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION notify_asset_table_change();
+
+CREATE TRIGGER trigger_dokumentasis_notify_change
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON dokumentasis
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION notify_asset_table_change();
+
+CREATE TRIGGER trigger_additional_informations_notify_change
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON additional_informations
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION notify_asset_table_change();
+
+CREATE TRIGGER trigger_dynamic_columns_notify_change
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON dynamic_columns
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION notify_asset_table_change();
+
+-- Penanda versi per tabel aset untuk snapshot Arrow dashboard (naik sekali per statement)
+CREATE TABLE IF NOT EXISTS asset_table_watermarks (
+    table_name VARCHAR(255) PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE OR REPLACE FUNCTION bump_asset_table_watermark()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO asset_table_watermarks (table_name, version, updated_at)
+    VALUES (TG_TABLE_NAME, 1, CURRENT_TIMESTAMP)
+    ON CONFLICT (table_name) DO UPDATE
+        SET version = asset_table_watermarks.version + 1, updated_at = CURRENT_TIMESTAMP;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trigger_user_terminals_watermark
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON user_terminals
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION bump_asset_table_watermark();
+
+CREATE TRIGGER trigger_clusters_watermark
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON clusters
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION bump_asset_table_watermark();
+
+CREATE TRIGGER trigger_home_connecteds_watermark
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON home_connecteds
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION bump_asset_table_watermark();
+
+CREATE TRIGGER trigger_dokumentasis_watermark
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON dokumentasis
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION bump_asset_table_watermark();
+
+CREATE TRIGGER trigger_additional_informations_watermark
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON additional_informations
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION bump_asset_table_watermark();
+
 -- Cloud User Sessions Table for Secure Session Management
 -- This table provides device-specific session isolation
 CREATE TABLE IF NOT EXISTS cloud_user_sessions (
@@ -0,0 +1,219 @@
+"""
+Seeded generator of raw asset spreadsheets for the ETL tests and benchmarks.
+
+The frames have the headers of the upload template (the keys of
+AssetPipeline.column_rename_map) and values shaped like the real sheets:
+Indonesian regions, coordinates in every format the parser handles, FAT ID
+ranges, thousands separators in capacities and missing counts.
+"""
+
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+# Characters used to mutate valid coordinates into edge cases
+MUTATION_CHARS = (list("0123456789.,- °EeSsNnÂ\u00a0_+")
+                  + ["  ", ", ", ". ", "inf", "nan", "None", "\u0661", "\u2003", "\x1c", "\v"])
+
+# Share of each _format_coordinate kind; most sheets use 'lat,lon' or 'lat, lon'
+FORMAT_WEIGHTS = np.array([30, 30, 5, 5, 3, 3, 2, 3, 2, 2, 3, 3, 2, 5, 2], dtype=float)
+FORMAT_WEIGHTS /= FORMAT_WEIGHTS.sum()
+
+
+def _format_coordinate(kind: int, lat: float, lon: float):
+    if kind == 0:
+        return f"{lat:.6f},{lon:.6f}"
+    if kind == 1:
+        return f"{lat:.6f}, {lon:.6f}"
+    if kind == 2:
+        return f"{lat:.5f}. {lon:.5f}"
+    if kind == 3:
+        return f"S{abs(lat):.6f} E{lon:.6f}"
+    if kind == 4:
+        return f"{lat:.6f}°{lon:.6f}°"
+    if kind == 5:
+        return f"{lat:.5f}.{lon:.5f}"
+    if kind == 6:
+        return f"{lat:.6f}{lon:.6f}".replace(".", "").replace("-", "-", 1)
+    if kind == 7:
+        return float(f"{abs(lat):.6f}{lon:.6f}".replace(".", "")) * (-1 if lat < 0 else 1)
+    if kind == 8:
+        return f"{lat:.4f},,{lon:.4f}"
+    if kind == 9:
+        return f"{lat * 100:.3f}E{lon * 100:.3f}"
+    if kind == 10:
+        return f" {lat:.6f}Â,{lon:.6f} "
+    if kind == 11:
+        return round(lat, 6)
+    if kind == 12:
+        return int(abs(lat) * 1e6)
+    if kind == 13:
+        return None
+    return ""
+
+
+def generate_coordinates(rows: int, seed: int = 0, mutation_rate: float = 0.3,
+                         lats: Optional[np.ndarray] = None, lons: Optional[np.ndarray] = None) -> pd.Series:
+    """
+    Seeded mix of Indonesian coordinates in every format the parser handles.
+
+    A share of the values is mutated by inserting, deleting or replacing
+    characters so the cleaners' rejection paths are exercised as well.
+    Points are spread over Indonesia unless lats/lons are given.
+    """
+    rng = np.random.default_rng(seed)
+    if lats is None or lons is None:
+        lats = rng.uniform(-11.0, 6.0, rows)
+        lons = rng.uniform(95.0, 141.0, rows)
+    kinds = rng.choice(len(FORMAT_WEIGHTS), size=rows, p=FORMAT_WEIGHTS)
+    values = [_format_coordinate(k, a, b) for k, a, b in zip(kinds, lats, lons)]
+
+    for i in np.flatnonzero(rng.random(rows) < mutation_rate):
+        if not isinstance(values[i], str) or not values[i]:
+            continue
+        text = values[i]
+        pos = int(rng.integers(0, len(text)))
+        op = rng.integers(0, 3)
+        char = MUTATION_CHARS[int(rng.integers(0, len(MUTATION_CHARS)))]
+        if op == 0:
+            text = text[:pos] + char + text[pos:]
+        elif op == 1:
+            text = text[:pos] + text[pos + 1:]
+        else:
+            text = text[:pos] + char + text[pos + 1:]
+        values[i] = text
+    return pd.Series(values, dtype=object)
+
+
+# (Kota/Kab, UP3, approximate latitude, longitude)
+REGIONS = [
+    ("KOTA SURABAYA", "UP3 SURABAYA UTARA", -7.26, 112.75),
+    ("KABUPATEN SIDOARJO", "UP3 SIDOARJO", -7.45, 112.70),
+    ("KOTA MALANG", "UP3 MALANG", -7.98, 112.63),
+    ("KABUPATEN GRESIK", "UP3 GRESIK", -7.16, 112.65),
+    ("KOTA BANDUNG", "UP3 BANDUNG", -6.91, 107.61),
+    ("KABUPATEN BEKASI", "UP3 BEKASI", -6.24, 107.15),
+    ("KOTA SEMARANG", "UP3 SEMARANG", -6.97, 110.42),
+    ("KOTA DENPASAR", "UP3 BALI SELATAN", -8.65, 115.22),
+    ("KOTA MEDAN", "UP3 MEDAN", 3.59, 98.67),
+    ("KOTA MAKASSAR", "UP3 MAKASSAR SELATAN", -5.15, 119.43),
+]
+BRANDS = ["ZTE", "HUAWEI", "FIBERHOME", "NOKIA"]
+KONDISI = ["baik", "rusak ringan", "rusak berat"]
+PEMAKAIAN = ["idle", "used", "full", "FULL"]
+MITRA = ["PT Mitra Jaya Telekomunikasi", "cv karya nusantara", "PT ICON+"]
+
+
+def _ids(prefix: str, numbers: np.ndarray, width: int) -> np.ndarray:
+    return np.array([f"{prefix}{n:0{width}d}" for n in numbers], dtype=object)
+
+
+def _with_missing(rng: np.random.Generator, values, share: float) -> np.ndarray:
+    values = np.asarray(values, dtype=object).copy()
+    values[rng.random(len(values)) < share] = None
+    return values
+
+
+def generate_raw_assets(rows: int, seed: int = 0, range_share: float = 0.02,
+                        duplicate_share: float = 0.01, coordinate_mutation_rate: float = 0.02) -> pd.DataFrame:
+    """
+    Generates a raw asset sheet as it would be read from an uploaded file.
+
+    Assets are placed around their region's city; OLT, FDT, FAT and cluster
+    coordinates of a row lie close together and each column mixes every
+    coordinate format (see FORMAT_WEIGHTS).
+
+    Args:
+        rows: Number of rows.
+        seed: Random seed; the same arguments always give the same frame.
+        range_share: Share of FATID values written as a range ('ID1-ID2').
+        duplicate_share: Share of rows repeating an earlier FATID.
+        coordinate_mutation_rate: Share of coordinates with a random typo.
+
+    Returns:
+        A DataFrame with the upload template's columns.
+    """
+    rng = np.random.default_rng(seed)
+    region = rng.integers(0, len(REGIONS), rows)
+    kota = np.array([r[0] for r in REGIONS], dtype=object)[region]
+    up3 = np.array([r[1] for r in REGIONS], dtype=object)[region]
+    olt_no = region * 100 + rng.integers(0, 20, rows)
+    fdt_no = olt_no * 100 + rng.integers(0, 40, rows)
+
+    fat_no = np.arange(rows) + 1_000_000
+    fat_ids = _ids("ICNFAT", fat_no, 7)
+    ranges = rng.random(rows) < range_share
+    fat_ids[ranges] = [f"FAT{n:07d} - FAT{n + 5_000_000:07d}" for n in fat_no[ranges]]
+    repeated = np.flatnonzero(rng.random(rows) < duplicate_share)
+    fat_ids[repeated] = fat_ids[rng.integers(0, rows, len(repeated))]
+    # Lower-case and padded variants that the FAT ID cleaning normalises
+    messy = rng.random(rows) < 0.05
+    fat_ids[messy] = [f" {v.lower()} " for v in fat_ids[messy]]
+
+    site_lat = np.array([r[2] for r in REGIONS])[region] + rng.normal(0, 0.08, rows)
+    site_lon = np.array([r[3] for r in REGIONS])[region] + rng.normal(0, 0.08, rows)
+
+    def coordinates(offset: int, spread: float) -> pd.Series:
+        return generate_coordinates(rows, seed=seed + offset, mutation_rate=coordinate_mutation_rate,
+                                    lats=site_lat + rng.normal(0, spread, rows),
+                                    lons=site_lon + rng.normal(0, spread, rows))
+
+    capacity = rng.choice(["1.000", "2.000", "500", "1,000", " 250 "], rows)
+    total_hc = rng.integers(0, 16, rows).astype(float)
+    total_hc[rng.random(rows) < 0.05] = np.nan
+    rfs = pd.to_datetime("2021-01-01") + pd.to_timedelta(rng.integers(0, 1400, rows), unit="D")
+
+    return pd.DataFrame({
+        "Hostname OLT": _ids("GPON-OLT-", olt_no, 4),
+        "Kordinat OLT": coordinates(1, 0.02),
+        "Brand OLT": rng.choice(BRANDS, rows),
+        "Type OLT": rng.choice(["C320", "C600", "MA5800-X7", "AN5516-04"], rows),
+        "Kapasitas OLT": rng.choice(["2", "4", "16"], rows),
+        "Kapasitas port OLT": rng.choice(["8", "16"], rows),
+        "OLT Port": rng.integers(1, 16, rows),
+        "OLT": _ids("OLT", olt_no, 4),
+        "Interface OLT": rng.choice(["gpon 1/1/1", "gpon 1/2/3", "xgs 1/1/4"], rows),
+        "Lokasi OLT": np.array([f"sto {k.split()[-1].lower()}" for k in kota], dtype=object),
+        "FDT ID": _ids("FDT-", fdt_no, 6),
+        "Status OSP AMARTA": rng.choice(["done", "on progress", "not yet"], rows),
+        "Jumlah Splitter FDT": rng.integers(1, 4, rows),
+        "Kapasitas Splitter FDT": capacity,
+        "FDT New/Existing": rng.choice(["new", "existing"], rows),
+        "Port FDT": rng.integers(1, 48, rows),
+        "Koodinat FDT": coordinates(2, 0.005),
+        "FATID": fat_ids,
+        "Jumlah Splitter FAT": rng.integers(1, 3, rows),
+        "Kapasitas Splitter FAT": rng.choice([8, 16], rows),
+        "Koodinat FAT": coordinates(3, 0.001),
+        "Status OSP AMARTA FAT": rng.choice(["done", "not yet"], rows),
+        "FAT KONDISI": _with_missing(rng, rng.choice(KONDISI, rows), 0.1),
+        "FAT FILTER PEMAKAIAN": _with_missing(rng, rng.choice(PEMAKAIAN, rows), 0.05),
+        "KETERANGAN FULL": _with_missing(rng, rng.choice(["penuh", "tersisa 1 port"], rows), 0.7),
+        "FAT ID X": _ids("X-FAT-", fat_no, 7),
+        "FILTER FAT CAP": rng.choice(["8", "16"], rows),
+        "Cluster": np.array([f"cluster {k.split()[-1].lower()} {n % 7}" for k, n in zip(kota, fdt_no)], dtype=object),
+        "Koordinat Cluster": coordinates(4, 0.01),
+        "Area KP": np.array([f"kp {k.split()[-1].lower()}" for k in kota], dtype=object),
+        "Kota/Kab": kota,
+        "Kecamatan": np.array([f"kecamatan {n % 31}" for n in fdt_no], dtype=object),
+        "Kelurahan": np.array([f"kelurahan {n % 97}" for n in fdt_no], dtype=object),
+        "UP3": up3,
+        "ULP": np.array([f"ulp {n % 13}" for n in olt_no], dtype=object),
+        "LINK DOKUMEN FEEDER": _ids("https://drive.google.com/file/d/feeder", fdt_no, 6),
+        "KETERANGAN DOKUMEN": rng.choice(["lengkap", "belum lengkap"], rows),
+        "LINK DATA ASET": _ids("https://drive.google.com/file/d/aset", fat_no, 7),
+        "KETERANGAN DATA ASET": rng.choice(["valid", "perlu cek"], rows),
+        "LINK MAPS": _ids("https://maps.google.com/?q=", fat_no, 7),
+        "UPDATE ASET": rng.choice(["sudah", "belum"], rows),
+        "AMARTA UPDATE": rng.choice(["sudah", "belum"], rows),
+        "HC OLD": rng.integers(0, 8, rows),
+        "HC iCRM+": rng.integers(0, 8, rows),
+        "TOTAL HC": total_hc,
+        "CLEANSING HP": rng.choice(["ok", "cek ulang"], rows),
+        "PA": _ids("PA-", rng.integers(0, 5000, rows), 5),
+        "Tanggal RFS": rfs,
+        "Mitra": _with_missing(rng, rng.choice(MITRA, rows), 0.05),
+        "Kategori": rng.choice(["residensial", "bisnis", "pemerintah"], rows),
+        "Sumber Datek": rng.choice(["amarta", "survey"], rows),
+    })
@@ -0,0 +1,7 @@
+"""Shared pytest setup."""
+
+import os
+
+# Importing core loads the tools config, which otherwise reads the Tavily
+# key from .streamlit/secrets.toml; the tests need no real secrets.
+os.environ.setdefault("TAVILY_API_KEY", "test")
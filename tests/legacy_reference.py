@@ -0,0 +1,84 @@
+"""
+Reference implementations that vectorized pipeline code replaced.
+
+The tests (and the benchmarks) compare the current code against these
+row-by-row versions, so they live here rather than in a benchmark script.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def expand_fat_id_ranges_iterrows(df: pd.DataFrame) -> pd.DataFrame:
+    """Reference: the row-by-row implementation that _expand_fat_id_ranges replaced."""
+    if 'fat_id' not in df.columns:
+        return df
+
+    expanded_rows = []
+    for _, row in df.iterrows():
+        fat_id = str(row['fat_id']).strip() if pd.notna(row['fat_id']) else ''
+        if '-' in fat_id:
+            id_parts = [part.strip() for part in fat_id.split('-') if part.strip()]
+            if len(id_parts) == 2:
+                row1 = row.copy()
+                row1['fat_id'] = id_parts[0]
+                expanded_rows.append(row1)
+                row2 = row.copy()
+                row2['fat_id'] = id_parts[1]
+                expanded_rows.append(row2)
+            else:
+                expanded_rows.append(row)
+        else:
+            expanded_rows.append(row)
+
+    return pd.DataFrame(expanded_rows) if expanded_rows else pd.DataFrame(columns=df.columns)
+
+
+def generate_fat_ids(rows: int, seed: int = 0, range_share: float = 0.1) -> pd.DataFrame:
+    """Seeded asset-like frame whose fat_id column mixes single IDs, ranges and malformed ranges."""
+    rng = np.random.default_rng(seed)
+    numbers = rng.integers(0, 10_000_000, rows)
+    single = np.array([f"ICNFAT{n:07d}" for n in numbers], dtype=object)
+    kind = rng.random(rows)
+    fat_ids = single.copy()
+    is_range = kind < range_share
+    fat_ids[is_range] = [f"FAT{n:07d} - FAT{n + 1:07d}" for n in numbers[is_range]]
+    # Malformed values that must keep their row unchanged
+    odd = (kind >= range_share) & (kind < range_share + 0.02)
+    fat_ids[odd] = rng.choice(["A-B-C", "FAT1-", "-", " - ", "FAT2--", "X- -Y-Z"], odd.sum())
+    fat_ids[rng.random(rows) < 0.01] = None
+    return pd.DataFrame({
+        "fat_id": fat_ids,
+        "hostname_olt": [f"OLT-SBY-{n % 40:02d}" for n in numbers],
+        "latitude_fat": rng.uniform(-8.0, -6.0, rows),
+        "longitude_fat": rng.uniform(110.0, 114.0, rows),
+        "total_hc": pd.array(rng.integers(0, 16, rows), dtype="Int64"),
+        "tanggal_rfs": pd.to_datetime("2022-01-01") + pd.to_timedelta(rng.integers(0, 900, rows), unit="D"),
+    })
+
+
+def capitalize_apply(df: pd.DataFrame, exclude_columns) -> pd.DataFrame:
+    """Reference: the per-cell implementation capitalize_columns_except replaced."""
+    for col in df.columns:
+        if col not in exclude_columns and df[col].dtype == "object":
+            df[col] = df[col].apply(lambda x: x.title().strip() if isinstance(x, str) else x)
+    return df
+
+
+def int64_via_text(series: pd.Series) -> pd.Series:
+    """Reference: the string round trip _convert_column_types used for every Int64 column."""
+    text = series.astype(str).str.replace("[., ]", "", regex=True).str.strip()
+    return pd.to_numeric(text, errors="coerce").astype("Int64")
+
+
+def edge_case_frame(rows: int, seed: int) -> pd.DataFrame:
+    """Mixed-type and non-ASCII cells the vectorized paths must leave exactly as before."""
+    rng = np.random.default_rng(seed)
+    cells = np.array(["  jawa timur ", "KOTA  SURABAYA", "o'brien", "ǆemal", "straße", "ÿes", "\tsto\n",
+                      "", " ", "123abc", 7, 7.5, None, np.nan, pd.Timestamp("2023-01-01"), True],
+                     dtype=object)
+    return pd.DataFrame({
+        "Mixed": cells[rng.integers(0, len(cells), rows)],
+        "Text": rng.choice(cells[:10].astype(str), rows).astype(object),
+        "Counts": rng.choice(np.array(["1.000", " 2,5", "x", None, 12, 3.0], dtype=object), rows),
+    })
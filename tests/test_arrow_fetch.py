@@ -0,0 +1,58 @@
+"""Arrow fetch: parsing COPY CSV output into typed Arrow columns."""
+
+import csv
+import io
+
+import pyarrow as pa
+
+from core.utils.arrow_fetch import fetch_arrow_table
+
+
+class _CopyCursor:
+    """Replays a fixed result as PostgreSQL's ``COPY ... (FORMAT csv)`` would write it."""
+
+    def __init__(self, columns, rows):
+        self.columns = columns
+        self.rows = rows
+        self.description = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def mogrify(self, query, params=None):
+        return query.encode()
+
+    def execute(self, query, params=None):
+        self.description = self.columns
+
+    def copy_expert(self, query, buffer):
+        text = io.StringIO()
+        csv.writer(text, lineterminator="\n").writerows(self.rows)
+        buffer.write(text.getvalue().encode())
+
+
+class _CopyConnection:
+    encoding = 'UTF8'
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def cursor(self):
+        return self._cursor
+
+
+def test_multiline_values_across_blocks():
+    notes = ["line one\nline two, \"quoted\"\nline three " + "x" * (i % 200) for i in range(40_000)]
+    rows = [(i, note) for i, note in enumerate(notes)]
+    cursor = _CopyCursor([("id", 23), ("notes", 25)], rows)
+
+    table = fetch_arrow_table(_CopyConnection(cursor), "SELECT id, notes FROM assets")
+
+    # Several MB of CSV, so Arrow parses it in more than one block
+    assert sum(len(note) for note in notes) > 4 * 1024 * 1024
+    assert table.schema == pa.schema([("id", pa.int64()), ("notes", pa.string())])
+    assert table.column("id").to_pylist() == list(range(len(notes)))
+    assert table.column("notes").to_pylist() == notes
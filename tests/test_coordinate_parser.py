@@ -0,0 +1,54 @@
+"""The vectorized coordinate engine must match the per-cell (legacy) one exactly."""
+
+import os
+
+import pandas as pd
+import pytest
+
+from core.services.etl_proces import AssetPipeline
+from tests.asset_generator import generate_coordinates
+
+DATA_XLSX = os.path.join(os.path.dirname(__file__), os.pardir, "data", "data.xlsx")
+
+
+def _parse(engine: str, column: pd.Series):
+    df = pd.DataFrame({"koordinat_x": column})
+    df = AssetPipeline(coordinate_engine=engine)._process_coordinate_column(df, "x")
+    return df["latitude_x"], df["longitude_x"]
+
+
+def assert_engines_agree(column: pd.Series):
+    legacy_lat, legacy_lon = _parse("legacy", column)
+    fast_lat, fast_lon = _parse("vectorized", column)
+    pd.testing.assert_series_equal(fast_lat, legacy_lat, check_exact=True)
+    pd.testing.assert_series_equal(fast_lon, legacy_lon, check_exact=True)
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_generated_formats(seed):
+    assert_engines_agree(generate_coordinates(5_000, seed=seed))
+
+
+def test_generated_formats_without_mutations():
+    assert_engines_agree(generate_coordinates(2_000, seed=3, mutation_rate=0.0))
+
+
+@pytest.mark.parametrize("values", [
+    [],
+    [None, None],
+    ["", " ", "nan", "None"],
+    [-7.2575, 112.7521, 0, -0.0],
+])
+def test_edge_columns(values):
+    assert_engines_agree(pd.Series(values, dtype=object))
+
+
+@pytest.mark.skipif(not os.path.exists(DATA_XLSX), reason="data/data.xlsx not present")
+def test_spreadsheet_columns():
+    # The per-cell path sees raw cell values, so read without dtype coercion
+    for frame in pd.read_excel(DATA_XLSX, sheet_name=None).values():
+        for col in frame.columns:
+            column = frame[col].reset_index(drop=True)
+            assert_engines_agree(column)
+            assert_engines_agree(column.astype(object).where(column.notna(), None).map(
+                lambda v: v if v is None else str(v)))
@@ -0,0 +1,70 @@
+"""New-FAT-ID check: keys are normalised client-side and compared exactly in SQL."""
+
+from contextlib import contextmanager
+
+import pandas as pd
+import pytest
+
+from core.services.AssetDataService import AssetDataService
+from core.utils import bulk_copy
+
+
+class _KeyCursor:
+    """Stands in for the server: answers the anti-join with exact key equality."""
+
+    def __init__(self, stored_keys):
+        self.stored_keys = set(stored_keys)
+        self.staged_keys = []
+        self.queries = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, params=None):
+        self.queries.append(repr(query))
+
+    def fetchall(self):
+        return [(key,) for key in self.staged_keys if key not in self.stored_keys]
+
+
+class _FakePool:
+    def __init__(self, cursor):
+        self.cursor = cursor
+
+    @contextmanager
+    def lease(self):
+        conn = type("Conn", (), {})()
+        conn.cursor = lambda: self.cursor
+        conn.rollback = lambda: None
+        yield conn
+
+
+@pytest.fixture
+def service_with_keys(monkeypatch):
+    def make(stored_keys):
+        cursor = _KeyCursor(stored_keys)
+
+        def stage(cur, df, target_table, staging_table=None):
+            cur.staged_keys = df.iloc[:, 0].tolist()
+            return len(df)
+
+        monkeypatch.setattr(bulk_copy, "copy_into_staging", stage)
+        return AssetDataService(_FakePool(cursor)), cursor
+    return make
+
+
+def test_variant_of_stored_key_is_not_new(service_with_keys):
+    service, cursor = service_with_keys(["FATA01"])
+    uploaded = pd.DataFrame({"fat_id": [" fat-a01 ", "FAT A01", "fat-b02"], "kota": ["x", "y", "z"]})
+
+    new_ids, error = service._get_new_fat_ids(uploaded["fat_id"])
+
+    assert error is None
+    assert new_ids == {"FATB02"}
+    assert service._filter_new_records(uploaded, new_ids)["kota"].tolist() == ["z"]
+    # The stored key column is compared as-is, so its index can serve the anti-join
+    anti_join = next(query for query in cursor.queries if "NOT EXISTS" in query)
+    assert "upper(" not in anti_join and "btrim(" not in anti_join
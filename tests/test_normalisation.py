@@ -0,0 +1,63 @@
+"""Typed normalisation stages against the per-cell code they replaced."""
+
+import contextlib
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.services.etl_normalize import PATH_NUMERIC, PATH_TEXT, to_int64
+from core.services.etl_proces import AssetPipeline
+from tests.asset_generator import generate_raw_assets
+from tests.legacy_reference import capitalize_apply, edge_case_frame, int64_via_text
+
+
+@pytest.fixture
+def pipeline():
+    return AssetPipeline()
+
+
+def _quiet(func, *args):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return func(*args)
+
+
+def test_capitalize_edge_cases(pipeline):
+    edge = edge_case_frame(5_000, seed=0)
+    pd.testing.assert_frame_equal(_quiet(pipeline.capitalize_columns_except, edge.copy()),
+                                  capitalize_apply(edge.copy(), pipeline.exclude_columns))
+
+
+@pytest.mark.parametrize("seed", [0, 1])
+def test_capitalize_generated_sheet(pipeline, seed):
+    raw = generate_raw_assets(5_000, seed=seed)
+    pd.testing.assert_frame_equal(_quiet(pipeline.capitalize_columns_except, raw.copy()),
+                                  capitalize_apply(raw.copy(), pipeline.exclude_columns))
+
+
+def test_int64_text_columns_match_text_round_trip(pipeline):
+    renamed = _quiet(pipeline._rename_columns, _quiet(pipeline.capitalize_columns_except,
+                                                      generate_raw_assets(5_000, seed=0)))
+    converted = _quiet(pipeline._convert_column_types, renamed.copy())
+    stats = pipeline.pop_column_stats()["convert_types"]
+    text_columns = [col for col, stat in stats.items() if stat["path"] == PATH_TEXT]
+    assert text_columns
+    for col in text_columns:
+        pd.testing.assert_series_equal(converted[col], int64_via_text(renamed[col]))
+
+
+def test_int64_edge_text():
+    counts = edge_case_frame(2_000, seed=0)["Counts"]
+    converted, path = to_int64(counts)
+    assert path == PATH_TEXT
+    pd.testing.assert_series_equal(converted, int64_via_text(counts))
+
+
+def test_int64_numeric_columns_cast_directly():
+    # The text round trip turned a float 3.0 into 30
+    converted, path = to_int64(pd.Series([3.0, np.nan, 12.0]))
+    assert path == PATH_NUMERIC
+    assert converted.tolist() == [3, pd.NA, 12]
+    converted, path = to_int64(pd.Series([1, 2], dtype="int64"))
+    assert (path, str(converted.dtype)) == (PATH_NUMERIC, "Int64")
@@ -0,0 +1,121 @@
+"""QueryCache: TTL expiry, LRU eviction, namespace quotas and table-version invalidation."""
+
+from types import SimpleNamespace
+
+import pytest
+
+from core.utils import database, query_cache
+from core.utils.query_cache import QueryCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """A manual clock the cache reads instead of time.monotonic."""
+    now = SimpleNamespace(value=1000.0)
+    monkeypatch.setattr(query_cache, "time", SimpleNamespace(monotonic=lambda: now.value))
+    return now
+
+
+def make_cache(**kwargs):
+    # Values are bytes strings; their length is their size
+    kwargs.setdefault("max_bytes", 1_000)
+    return QueryCache(size_estimator=len, **kwargs)
+
+
+def test_entry_expires_after_its_ttl(clock):
+    cache = make_cache()
+    cache.set("k", b"value", ttl_seconds=10)
+
+    clock.value += 9.9
+    assert cache.get("k") == b"value"
+    clock.value += 0.1
+    assert cache.get("k") is None
+    assert "k" not in cache
+    assert cache.stats()["expirations"] == 1
+
+
+def test_max_age_is_checked_with_the_ttl(clock):
+    cache = make_cache()
+    cache.set("k", b"value", ttl_seconds=60)
+
+    clock.value += 5
+    assert cache.get("k", max_age=10) == b"value"
+    assert cache.get("k", max_age=5) is None
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = make_cache(max_bytes=30)
+    for key in "abc":
+        cache.set(key, b"x" * 10, ttl_seconds=60)
+
+    cache.get("a")  # b is now the least recently used
+    cache.set("d", b"x" * 10, ttl_seconds=60)
+
+    assert [key in cache for key in "abcd"] == [True, False, True, True]
+    assert cache.stats()["bytes"] == 30
+    assert cache.stats()["evictions"] == 1
+
+
+def test_entry_limit_evicts_oldest(clock):
+    cache = make_cache(max_entries=2)
+    for key in "abc":
+        cache.set(key, b"x", ttl_seconds=60)
+
+    assert len(cache) == 2
+    assert "a" not in cache
+
+
+def test_namespace_quota_evicts_only_within_the_namespace(clock):
+    cache = make_cache(max_bytes=100, namespace_quotas={"small": 20})
+    cache.set("other", b"x" * 10, ttl_seconds=60, namespace="big")
+    cache.set("s1", b"x" * 10, ttl_seconds=60, namespace="small")
+    cache.set("s2", b"x" * 10, ttl_seconds=60, namespace="small")
+
+    cache.set("s3", b"x" * 10, ttl_seconds=60, namespace="small")
+
+    assert "s1" not in cache and "s2" in cache and "s3" in cache
+    assert "other" in cache
+    small = cache.stats()["namespaces"]["small"]
+    assert small["bytes"] == 20 and small["evictions"] == 1
+
+
+def test_value_over_its_quota_is_rejected(clock):
+    cache = make_cache(max_bytes=100, namespace_quotas={"small": 20})
+    cache.set("s1", b"x" * 10, ttl_seconds=60, namespace="small")
+
+    assert cache.set("huge", b"x" * 21, ttl_seconds=60, namespace="small") is False
+    assert "huge" not in cache and "s1" in cache
+    assert cache.stats()["rejections"] == 1
+
+
+def test_invalidate_tags_drops_only_tagged_entries(clock):
+    cache = make_cache()
+    cache.set("assets", b"1", ttl_seconds=60, tags=["user_terminals"])
+    cache.set("joined", b"2", ttl_seconds=60, tags=["user_terminals", "clusters"])
+    cache.set("other", b"3", ttl_seconds=60, tags=["pelanggans"])
+
+    assert cache.invalidate_tags(["user_terminals"]) == 2
+    assert "other" in cache and len(cache) == 1
+
+
+def test_table_version_bump_invalidates_cached_results():
+    calls = []
+
+    @database.cache_query_result(ttl_seconds=60, namespace="test_versions", tables=["test_versioned_table"])
+    def load(limit):
+        calls.append(limit)
+        return [limit]
+
+    try:
+        assert load(5) == [5] and load(5) == [5]
+        assert calls == [5]
+
+        versions = database.get_table_versions(["test_versioned_table"])
+        database.bump_table_versions("test_versioned_table")
+
+        assert database.get_table_versions(["test_versioned_table"]) != versions
+        assert database.get_cache_stats()["namespaces"]["test_versions"]["entries"] == 0
+        assert load(5) == [5]
+        assert calls == [5, 5]
+    finally:
+        database._query_cache.clear("test_versions")